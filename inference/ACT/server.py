@@ -3,7 +3,6 @@
 # dependencies = [
 #     "lerobot",
 #     "phosphobot",
-#     "json_numpy",
 #     "fastapi",
 #     "uvicorn",
 #     "packaging",
@@ -24,18 +23,23 @@ from pathlib import Path
 from typing import List
 import json
 import cv2
-import json_numpy
 import numpy as np
 import torch
 import torch.nn as nn
 import uvicorn
 from packaging import version  # Don't remove this line (used by lerobot)
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from huggingface_hub import snapshot_download
 from huggingface_hub.errors import RepositoryNotFoundError
 from huggingface_hub.utils._validators import HFValidationError
 from lerobot.policies.act.modeling_act import ACTPolicy
-from pydantic import BaseModel
+
+from phosphobot.am.wire import (
+    WIRE_FORMATS,
+    decode_observation,
+    encode_actions,
+    wire_format_from_content_type,
+)
 
 app = FastAPI()
 
@@ -45,10 +49,6 @@ input_features: dict = {}
 device = None
 
 
-class InferenceRequest(BaseModel):
-    encoded: str  # Will contain json_numpy encoded payload with image
-
-
 def get_safe_torch_device(device_str: str, log: bool = True) -> torch.device:
     """Get a safe torch device, defaulting to CPU if requested device is not available."""
     if device_str == "cuda" and not torch.cuda.is_available():
@@ -216,14 +216,18 @@ def process_image(
 
 
 @app.post("/act")
-async def inference(request: InferenceRequest) -> str | None:
-    """Endpoint for ACT policy inference."""
+async def inference(request: Request) -> Response:
+    """
+    Endpoint for ACT policy inference.
+    The body is encoded with phosphobot.am.wire: msgpack or the legacy json_numpy payload.
+    The actions are sent back in the same format.
+    """
     if policy is None:
         raise HTTPException(status_code=500, detail="Policy not initialized")
 
     try:
-        # Decode the double-encoded payload
-        payload: dict = json_numpy.loads(request.encoded)
+        content_type = request.headers.get("Content-Type")
+        payload: dict = decode_observation(await request.body(), content_type)
         target_size: tuple[int, int] = (224, 224)
 
         # Get feature names
@@ -256,9 +260,10 @@ async def inference(request: InferenceRequest) -> str | None:
             target_size=target_size,
         )
 
-        # Encode response using json_numpy
-        response = json_numpy.dumps(actions)
-        return response
+        body, media_type = encode_actions(
+            actions, wire_format_from_content_type(content_type)
+        )
+        return Response(content=body, media_type=media_type)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -272,6 +277,7 @@ async def health_check():
         "policy_loaded": policy is not None,
         "device": str(device) if device is not None else None,
         "input_features": input_features if input_features != {} else "not_loaded",
+        "wire_formats": WIRE_FORMATS,
     }
 
 
@@ -228,17 +228,22 @@ async def serve(
     import time
     from datetime import datetime, timezone
 
-    import json_numpy
     import torch
     import torch.nn as nn
     import uvicorn
-    from fastapi import FastAPI, HTTPException
+    from fastapi import FastAPI, HTTPException, Request
     from huggingface_hub import snapshot_download  # type: ignore
-    from pydantic import BaseModel
 
     from lerobot.policies.act.modeling_act import ACTPolicy
     from supabase import Client, create_client
 
+    from phosphobot.am.wire import (
+        WIRE_FORMATS,
+        decode_observation,
+        encode_actions,
+        wire_format_from_content_type,
+    )
+
     class RetryError(Exception):
         """Custom exception for retrying the request."""
 
@@ -470,20 +475,30 @@ async def serve(
                     actions = actions.transpose(0, 1)
                     return actions.cpu().numpy()
 
-            class InferenceRequest(BaseModel):
-                encoded: str  # Will contain json_numpy encoded payload with image
+            @app.get("/health")
+            async def health_check():
+                """Used by the clients to negotiate the wire format."""
+                return {
+                    "status": "healthy" if policy is not None else "not_ready",
+                    "wire_formats": WIRE_FORMATS,
+                }
 
             @app.post("/act")
-            async def inference(request: InferenceRequest):
-                """Endpoint for ACT policy inference."""
+            async def inference(request: Request):
+                """
+                Endpoint for ACT policy inference.
+                The body is encoded with phosphobot.am.wire, the actions are sent back in the same format.
+                """
                 nonlocal policy
 
                 if policy is None:
                     raise HTTPException(status_code=500, detail="Policy not loaded")
 
                 try:
-                    # Decode the double-encoded payload
-                    payload: dict = json_numpy.loads(request.encoded)
+                    content_type = request.headers.get("Content-Type")
+                    payload: dict = decode_observation(
+                        await request.body(), content_type
+                    )
                     # Default size for Paligemma
                     target_size: tuple[int, int] = (224, 224)
 
@@ -551,9 +566,10 @@ async def serve(
                             content=str(e),
                         )
 
-                    # Encode response using json_numpy
-                    response = json_numpy.dumps(actions)
-                    return response
+                    body, media_type = encode_actions(
+                        actions, wire_format_from_content_type(content_type)
+                    )
+                    return Response(content=body, media_type=media_type)
 
                 except Exception as e:
                     raise HTTPException(
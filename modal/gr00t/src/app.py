@@ -259,7 +259,11 @@ def serve(
             logger.info(f"Policy loaded after {time_to_load} seconds")
 
             # Start the server
-            server = RobotInferenceServer(model=policy, port=args.port)
+            # Deployed phosphobot clients may still send pickled requests: accept them
+            # during the migration to multipart. Remove allow_pickle on 2027-01-31.
+            server = RobotInferenceServer(
+                model=policy, port=args.port, allow_pickle=True
+            )
             logger.info(
                 f"Server instanciated (not started) after {time_to_load} seconds"
             )
@@ -9,7 +9,6 @@ if TYPE_CHECKING:
     from phosphobot.hardware.base import BaseManipulator
 
 import httpx
-import json_numpy  # type: ignore
 import numpy as np
 from fastapi import HTTPException
 from huggingface_hub import HfApi
@@ -17,9 +16,18 @@ from loguru import logger
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 from phosphobot.am.base import ActionModel
+from phosphobot.am.observation import ImageInput, ObservationAssembler
+from phosphobot.am.wire import (
+    WireFormat,
+    decode_actions,
+    encode_observation,
+    negotiate_wire_format,
+)
 from phosphobot.camera import AllCameras
+from phosphobot.configs import config
 from phosphobot.control_signal import AIControlSignal
 from phosphobot.models import ModelConfigurationResponse
+from phosphobot.types import PixelFormat
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
 
@@ -168,6 +176,30 @@ class ACTSpawnConfig(BaseModel):
     hf_model_config: HuggingFaceAugmentedValidator
 
 
+def blend_action_chunks(
+    remaining: np.ndarray, new_chunk: np.ndarray, elapsed_steps: int
+) -> np.ndarray:
+    """
+    Merge an action chunk returned by the model with the actions left in the queue.
+
+    The new chunk was predicted from the observation taken elapsed_steps steps ago, so its
+    first elapsed_steps actions are stale and dropped. Where the rest overlaps with the
+    remaining actions, the two are cross-faded: the first actions stay close to the ones
+    the robot was about to execute and the last ones follow the new chunk. This keeps the
+    motion continuous when switching chunks.
+    """
+    new_chunk = new_chunk[elapsed_steps:]
+    if len(remaining) == 0 or len(new_chunk) == 0:
+        return new_chunk if len(new_chunk) > 0 else remaining
+
+    overlap = min(len(remaining), len(new_chunk))
+    weights = np.arange(1, overlap + 1) / (overlap + 1)
+    weights = weights.reshape(-1, *([1] * (new_chunk.ndim - 1)))
+    blended = (1 - weights) * remaining[:overlap] + weights * new_chunk[:overlap]
+    # Only one of the tails is not empty
+    return np.concatenate([blended, new_chunk[overlap:], remaining[overlap:]])
+
+
 class RetryError(Exception):
     """Custom exception to retry the inference call."""
 
@@ -179,37 +211,95 @@ class ACT(ActionModel):
         self,
         server_url: str = "http://localhost",
         server_port: int = 8080,
+        jpeg_quality: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
+        """
+        jpeg_quality: if set and the server supports msgpack, frames are sent as JPEG
+        of this quality (0-100) instead of raw pixels. Defaults to config.INFERENCE_JPEG_QUALITY.
+        """
         super().__init__(server_url, server_port)
+        self.jpeg_quality = (
+            jpeg_quality if jpeg_quality is not None else config.INFERENCE_JPEG_QUALITY
+        )
         self.async_client = httpx.AsyncClient(
             base_url=server_url + f":{server_port}",
             timeout=10,
-            headers={"Content-Type": "application/json"},
             limits=httpx.Limits(max_keepalive_connections=10, max_connections=100),
             http2=True,  # Enables HTTP/2 for better performance if supported
         )
         self.sync_client = httpx.Client(
             base_url=server_url + f":{server_port}",
             timeout=10,
-            headers={"Content-Type": "application/json"},
             limits=httpx.Limits(max_keepalive_connections=10, max_connections=100),
             http2=True,  # Enables HTTP/2 if supported by the server
         )
 
+    def _set_wire_format(self, response: Optional[httpx.Response]) -> WireFormat:
+        """
+        Pick the wire format from the /health response of the server. It's only kept
+        after a successful response: otherwise, json_numpy is used for this request and
+        /health is fetched again on the next one.
+        """
+        if response is None or response.status_code != 200:
+            return negotiate_wire_format(None)
+        server_wire_formats = None
+        try:
+            server_wire_formats = response.json().get("wire_formats")
+        except ValueError:
+            pass
+        self.wire_format = negotiate_wire_format(server_wire_formats)
+        logger.info(f"Sending observations to the ACT server as {self.wire_format}")
+        return self.wire_format
+
+    def negotiate_wire_format(self) -> WireFormat:
+        if self.wire_format is not None:
+            return self.wire_format
+        try:
+            response: Optional[httpx.Response] = self.sync_client.get("/health")
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch the wire formats of the server: {e}")
+            response = None
+        return self._set_wire_format(response)
+
+    async def async_negotiate_wire_format(self) -> WireFormat:
+        if self.wire_format is not None:
+            return self.wire_format
+        try:
+            response: Optional[httpx.Response] = await self.async_client.get(
+                f"{self.server_url}/health"
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch the wire formats of the server: {e}")
+            response = None
+        return self._set_wire_format(response)
+
+    def _encode_inputs(self, inputs: dict, wire_format: WireFormat) -> dict:
+        """Keyword arguments of the httpx post request for the inputs."""
+        body, content_type = encode_observation(
+            inputs, wire_format, jpeg_quality=self.jpeg_quality
+        )
+        return {
+            "content": body,
+            "headers": {"Content-Type": content_type, "Accept": content_type},
+        }
+
     def sample_actions(self, inputs: dict) -> np.ndarray:
-        # Double-encoded version (to send numpy arrays as JSON)
-        encoded_payload = {"encoded": json_numpy.dumps(inputs)}
+        wire_format = self.negotiate_wire_format()
 
         try:
-            response = self.sync_client.post("/act", json=encoded_payload)
+            response = self.sync_client.post(
+                "/act", **self._encode_inputs(inputs, wire_format)
+            )
 
             if response.status_code == 202:
                 raise RetryError(response.content)
 
             if response.status_code != 200:
                 raise RuntimeError(response.text)
-            actions = json_numpy.loads(response.json())
+            actions = decode_actions(
+                response.content, response.headers.get("Content-Type")
+            )
         except RetryError as e:
             raise RetryError(e)
         except Exception as e:
@@ -221,12 +311,16 @@ class ACT(ActionModel):
         return actions
 
     async def async_sample_actions(self, inputs: dict) -> np.ndarray:
-        # Clean up the input to avoid JSON serialization issues
-        encoded_payload = {"encoded": json_numpy.dumps(inputs)}
+        wire_format = await self.async_negotiate_wire_format()
+        return await self._async_post_inputs(self._encode_inputs(inputs, wire_format))
 
+    async def _async_post_inputs(self, encoded_inputs: dict) -> np.ndarray:
+        """Post inputs encoded with _encode_inputs to the server and return the actions."""
         try:
             response = await self.async_client.post(
-                f"{self.server_url}/act", json=encoded_payload, timeout=30
+                f"{self.server_url}/act",
+                **encoded_inputs,
+                timeout=30,
             )
 
             if response.status_code == 202:
@@ -234,7 +328,9 @@ class ACT(ActionModel):
 
             if response.status_code != 200:
                 raise RuntimeError(response.text)
-            actions = json_numpy.loads(response.json())
+            actions = decode_actions(
+                response.content, response.headers.get("Content-Type")
+            )
         except RetryError as e:
             raise RetryError(e)
         except Exception as e:
@@ -391,17 +487,38 @@ class ACT(ActionModel):
     def fetch_frame(
         cls, all_cameras: AllCameras, camera_id: int, resolution: list[int]
     ) -> np.ndarray:
-        import cv2
-
         rgb_frame = all_cameras.get_rgb_frame(
             camera_id=camera_id,
             resize=(resolution[2], resolution[1]),
         )
-        if rgb_frame is not None:
-            # Convert to BGR
-            image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        return cls.prepare_frame(rgb_frame, camera_id=camera_id, resolution=resolution)
+
+    @classmethod
+    def prepare_frame(
+        cls,
+        frame: Optional[np.ndarray],
+        camera_id: int,
+        resolution: list[int],
+        pixel_format: PixelFormat = "rgb",
+    ) -> np.ndarray:
+        """
+        Convert a frame in pixel_format to the BGR image of the given resolution (C, H, W) expected by the model.
+        If the frame is None, return a black image.
+        """
+        import cv2
+
+        if frame is not None:
+            if frame.shape[:2] != (resolution[1], resolution[2]):
+                frame = cv2.resize(
+                    frame,
+                    (resolution[2], resolution[1]),
+                    interpolation=cv2.INTER_AREA,
+                )
+            if pixel_format == "rgb":
+                # Convert to BGR
+                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
             # Ensure dtype is uint8 (if it isn’t already)
-            converted_array = image.astype(np.uint8)
+            converted_array = frame.astype(np.uint8)
             return converted_array
 
         else:
@@ -430,6 +547,7 @@ class ACT(ActionModel):
         angle_format: Literal["degrees", "radians", "other"] = "radians",
         min_angle: Optional[float] = None,
         max_angle: Optional[float] = None,
+        prefetch_threshold: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -437,6 +555,11 @@ class ACT(ActionModel):
         It uses the model to get the actions based on the current state of the robot and the cameras.
         The loop runs until the control signal is stopped or the model is not available anymore.
         The loop runs at the specified fps and speed.
+
+        If prefetch_threshold is set, the next chunk is requested as soon as this many actions
+        are left in the queue, and the robot keeps executing the current chunk during inference.
+        The new chunk is then merged with the queue with blend_action_chunks.
+        Otherwise, the next chunk is requested when the queue is empty.
         """
 
         nb_iter = 0
@@ -444,124 +567,162 @@ class ACT(ActionModel):
 
         signal_marked_as_started = False
         actions_queue: deque = deque([])
-
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
-
-            start_time = time.perf_counter()
-
-            # Get the images from the cameras based on the config
-            # For now, just put as many cameras as the model config
-            image_inputs: Dict[str, np.ndarray] = {}
-            for i, camera_name in enumerate(config.input_features.video_keys):
-                if cameras_keys_mapping is None:
-                    camera_id = i
-                else:
-                    camera_id = cameras_keys_mapping.get(camera_name, i)
-
-                video_resolution = config.input_features.features[camera_name].shape
-                frame_array = ACT.fetch_frame(
-                    all_cameras=all_cameras,
+        # Inference request running while the robot executes the queue
+        pending_chunk: Optional[asyncio.Task] = None
+        # Number of actions executed since the pending request was sent
+        steps_since_request = 0
+
+        # Get the images from the cameras based on the config
+        # For now, just put as many cameras as the model config
+        image_inputs: List[ImageInput] = []
+        for i, camera_name in enumerate(config.input_features.video_keys):
+            camera_id = i
+            if cameras_keys_mapping is not None:
+                camera_id = cameras_keys_mapping.get(camera_name, i)
+            resolution = config.input_features.features[camera_name].shape
+            image_inputs.append(
+                ImageInput(
+                    key=camera_name,
                     camera_id=camera_id,
-                    resolution=video_resolution,
+                    size=(resolution[2], resolution[1]),
                 )
-                image_inputs[camera_name] = frame_array
-
-            # Number of cameras
-            if len(image_inputs) != len(config.input_features.video_keys):
-                logger.warning(
-                    f"Model has {len(config.input_features.video_keys)} cameras but {len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {config.input_features.video_keys} cameras but {len(image_inputs)} cameras are plugged."
+            )
+        if config.input_features.env_key is not None and selected_camera_id is not None:
+            image_inputs.append(
+                ImageInput(
+                    key="image_for_bboxes",
+                    camera_id=selected_camera_id,
+                    size=(224, 224),
                 )
+            )
+        observation_assembler = ObservationAssembler(
+            all_cameras=all_cameras,
+            robots=robots,
+            image_inputs=image_inputs,
+            # Share the sample of the state broadcaster if it's within half a step
+            read_state=lambda robot: robot.get_joints_position(
+                unit="rad", max_staleness=0.5 / fps
+            ),
+            pixel_format="bgr",
+        )
 
-            # Number of robots
-            number_of_robots = len(robots)
-            number_of_robots_in_config = config.input_features.number_of_arms
-            if number_of_robots != number_of_robots_in_config:
-                logger.warning("No robot connected. Exiting AI control loop.")
-                control_signal.stop()
-                raise Exception("No robot connected. Exiting AI control loop.")
-
-            # Concatenate all robot states
-            state = robots[0].read_joints_position(unit="rad")
-            for robot in robots[1:]:
-                state = np.concatenate(
-                    (state, robot.read_joints_position(unit="rad")), axis=0
+        try:
+            while control_signal.is_in_loop():
+                logger.debug(
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
                 )
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
 
-            inputs: dict[str, np.ndarray | str] = {
-                config.input_features.state_key: state,
-                **image_inputs,
-            }
+                start_time = time.perf_counter()
 
-            if config.input_features.env_key is not None:
-                if prompt is None or selected_camera_id is None:
-                    raise ValueError(
-                        f"detect_instruction and camera_id_to_use must be provided when env_key is set, got {prompt} and {selected_camera_id}"
+                # Number of robots
+                number_of_robots = len(robots)
+                number_of_robots_in_config = config.input_features.number_of_arms
+                if number_of_robots != number_of_robots_in_config:
+                    logger.warning("No robot connected. Exiting AI control loop.")
+                    control_signal.stop()
+                    raise Exception("No robot connected. Exiting AI control loop.")
+
+                # Read the robots and the cameras concurrently
+                observation = await observation_assembler.assemble()
+
+                inputs: dict[str, np.ndarray | str] = {
+                    config.input_features.state_key: observation.state,
+                    **{
+                        camera_name: observation.images[camera_name]
+                        for camera_name in config.input_features.video_keys
+                    },
+                }
+
+                if config.input_features.env_key is not None:
+                    if prompt is None or selected_camera_id is None:
+                        raise ValueError(
+                            f"detect_instruction and camera_id_to_use must be provided when env_key is set, got {prompt} and {selected_camera_id}"
+                        )
+                    inputs["detect_instruction"] = prompt
+                    inputs["image_for_bboxes"] = observation.images["image_for_bboxes"]
+
+                try:
+                    if pending_chunk is None and (
+                        len(actions_queue) == 0
+                        or (
+                            prefetch_threshold is not None
+                            and len(actions_queue) <= prefetch_threshold
+                        )
+                    ):
+                        # Encode the inputs before the request runs in the background: the
+                        # arrays of the observation are overwritten by the next assemble()
+                        wire_format = await self.async_negotiate_wire_format()
+                        pending_chunk = asyncio.create_task(
+                            self._async_post_inputs(
+                                self._encode_inputs(inputs, wire_format)
+                            )
+                        )
+                        steps_since_request = 0
+                    if pending_chunk is not None and (
+                        pending_chunk.done() or len(actions_queue) == 0
+                    ):
+                        request, pending_chunk = pending_chunk, None
+                        new_chunk = await request
+                        actions_queue = deque(
+                            blend_action_chunks(
+                                np.array(actions_queue),
+                                new_chunk,
+                                elapsed_steps=steps_since_request,
+                            )
+                        )
+                    if len(actions_queue) == 0:
+                        # The whole chunk was stale, request a new one
+                        continue
+                    actions = actions_queue.popleft()
+                    steps_since_request += 1
+                except RetryError:
+                    logger.warning("Could not detect the target object. Retrying...")
+                    continue
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to get actions from model: {e}. Exiting AI control loop."
                     )
-                inputs["detect_instruction"] = prompt
-
-                frame_array = ACT.fetch_frame(
-                    all_cameras=all_cameras,
-                    camera_id=selected_camera_id,
-                    resolution=[3, 224, 224],
-                )
-                inputs["image_for_bboxes"] = frame_array
-
-            try:
-                if len(actions_queue) == 0:
-                    actions = await self.async_sample_actions(inputs)
-                    actions_queue.extend(actions)
-                actions = actions_queue.popleft()
-            except RetryError:
-                logger.warning("Could not detect the target object. Retrying...")
-                continue
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model: {e}. Exiting AI control loop."
-                )
-                control_signal.stop()
-                break
-
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
-
-            for action in actions:
-                # Early stop
-                if not control_signal.is_in_loop():
+                    control_signal.stop()
                     break
 
-                # Send the new joint position to the robot
-                action_list = action.tolist()
-
-                unit: Literal["rad", "motor_units", "degrees", "other"]
-                if angle_format == "radians":
-                    unit = "rad"
-                else:
-                    unit = angle_format
-
-                for robot_index in range(len(robots)):
-                    robots[robot_index].write_joint_positions(
-                        angles=action_list[robot_index * 6 : robot_index * 6 + 6],
-                        unit=unit,
-                        min_value=min_angle,
-                        max_value=max_angle,
-                    )
-
-                # Wait fps time
-                elapsed_time = time.perf_counter() - start_time
-                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-                await asyncio.sleep(sleep_time)
-                start_time = time.perf_counter()
-
-            nb_iter += 1
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                for action in actions:
+                    # Early stop
+                    if not control_signal.is_in_loop():
+                        break
+
+                    # Send the new joint position to the robot
+                    action_list = action.tolist()
+
+                    unit: Literal["rad", "motor_units", "degrees", "other"]
+                    if angle_format == "radians":
+                        unit = "rad"
+                    else:
+                        unit = angle_format
+
+                    for robot_index in range(len(robots)):
+                        robots[robot_index].write_joint_positions(
+                            angles=action_list[robot_index * 6 : robot_index * 6 + 6],
+                            unit=unit,
+                            min_value=min_angle,
+                            max_value=max_angle,
+                        )
+
+                    # Wait fps time
+                    elapsed_time = time.perf_counter() - start_time
+                    sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                    await asyncio.sleep(sleep_time)
+                    start_time = time.perf_counter()
+
+                nb_iter += 1
+        finally:
+            if pending_chunk is not None:
+                pending_chunk.cancel()
+            observation_assembler.close()
@@ -11,6 +11,7 @@ from huggingface_hub import HfApi
 from loguru import logger
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from phosphobot.am.wire import WireFormat
 from phosphobot.models import InfoModel, ModelConfigurationResponse
 from phosphobot.utils import get_hf_token
 
@@ -34,6 +35,9 @@ class ActionModel(ABC):
         """
         self.server_url = server_url
         self.server_port = server_port
+        # Format of the requests sent to the server (see phosphobot.am.wire).
+        # None until negotiated with the server.
+        self.wire_format: Optional[WireFormat] = None
 
     @classmethod
     def fetch_and_get_configuration(cls, model_id: str) -> ModelConfigurationResponse:
@@ -28,6 +28,7 @@ if TYPE_CHECKING:
 import numpy as np
 import pandas as pd
 import zmq
+import zmq.asyncio
 from fastapi import HTTPException
 from huggingface_hub import HfApi, snapshot_download
 from loguru import logger
@@ -42,8 +43,10 @@ from phosphobot.am.base import (
     generate_readme,
     resize_dataset,
 )
+from phosphobot.am.observation import ImageInput, ObservationAssembler
+from phosphobot.am.wire import decode_multipart, encode_multipart, is_multipart
 from phosphobot.camera import AllCameras
-from phosphobot.control_signal import AIControlSignal
+from phosphobot.control_signal import AIControlSignal, ControlStoppedError
 from phosphobot.models import ModelConfigurationResponse
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
@@ -70,6 +73,13 @@ class TorchSerializer:
         return obj
 
 
+# Format of the messages between the client and the server:
+# - "multipart": a msgpack header and the raw buffers of the arrays, see encode_multipart.
+# - "pickle": legacy format of the Isaac-GR00T server. Unpickling data received from the
+#   network can run arbitrary code: only used with servers that don't speak multipart.
+ZmqWireFormat = Literal["multipart", "pickle"]
+
+
 @dataclass
 class EndpointHandler:
     handler: Callable
@@ -80,10 +90,18 @@ class BaseInferenceServer:
     """
     An inference server that spin up a ZeroMQ socket and listen for incoming requests.
     Can add custom endpoints by calling `register_endpoint`.
+
+    Requests are answered in the format they were sent: multipart, or pickle for legacy
+    clients. Pickled requests can run arbitrary code on the server: they are refused unless
+    allow_pickle is True. The arrays of multipart requests are read-only views on the
+    received frames: RobotInferenceServer copies them before calling the policy.
     """
 
-    def __init__(self, host: str = "*", port: int = 5555) -> None:
+    def __init__(
+        self, host: str = "*", port: int = 5555, allow_pickle: bool = False
+    ) -> None:
         self.running = True
+        self.allow_pickle = allow_pickle
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.REP)
         self.socket.bind(f"tcp://{host}:{port}")
@@ -122,9 +140,17 @@ class BaseInferenceServer:
         addr = self.socket.getsockopt_string(zmq.LAST_ENDPOINT)
         logger.info(f"Server is ready and listening on {addr}")
         while self.running:
-            raw = self.socket.recv()
+            frames = self.socket.recv_multipart(copy=False)
+            multipart = is_multipart(frames[0].buffer)
+            request: Optional[dict] = None
             try:
-                request = TorchSerializer.from_bytes(raw)
+                if multipart:
+                    request = decode_multipart([frame.buffer for frame in frames])
+                elif self.allow_pickle:
+                    request = TorchSerializer.from_bytes(frames[0].bytes)
+                else:
+                    raise ValueError("Pickled requests are not accepted")
+                assert request is not None
                 version = request.get("version", 1)
                 use_envelope = version >= 2
 
@@ -138,7 +164,12 @@ class BaseInferenceServer:
                 else:
                     result = handler.handler()
 
-                if use_envelope:
+                if multipart:
+                    self.socket.send_multipart(
+                        encode_multipart({"status": "ok", "result": result}),
+                        copy=False,
+                    )
+                elif use_envelope:
                     resp: Dict[str, Any] = {"status": "ok", "result": result}
                     self.socket.send(TorchSerializer.to_bytes(resp))
                 else:
@@ -149,14 +180,16 @@ class BaseInferenceServer:
                 tb = traceback.format_exc()
                 print(f"[ERROR] {e}\n{tb}")
 
-                if "request" in locals() and request.get("version", 1) >= 2:
-                    error_resp: Dict[str, Any] = {
-                        "status": "error",
-                        "error_type": type(e).__name__,
-                        "message": str(e),
-                        # omit traceback if you don't want to expose internals
-                        "traceback": tb,
-                    }
+                error_resp: Dict[str, Any] = {
+                    "status": "error",
+                    "error_type": type(e).__name__,
+                    "message": str(e),
+                    # omit traceback if you don't want to expose internals
+                    "traceback": tb,
+                }
+                if multipart:
+                    self.socket.send_multipart(encode_multipart(error_resp))
+                elif request is not None and request.get("version", 1) >= 2:
                     self.socket.send(TorchSerializer.to_bytes(error_resp))
                 else:
                     # legacy client: single-byte ERROR token
@@ -194,14 +227,36 @@ class BasePolicy(ABC):
         raise NotImplementedError
 
 
+def _writable_arrays(observations: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy the read-only arrays of a multipart request: they are views on the received
+    frames, and the policies transform the observations in place.
+    """
+    return {
+        key: value.copy()
+        if isinstance(value, np.ndarray) and not value.flags.writeable
+        else value
+        for key, value in observations.items()
+    }
+
+
 class RobotInferenceServer(BaseInferenceServer):
     """
     Server with three endpoints for real robot policies
     """
 
-    def __init__(self, model: BasePolicy, host: str = "*", port: int = 5555) -> None:
-        super().__init__(host, port)
-        self.register_endpoint("get_action", model.get_action)
+    def __init__(
+        self,
+        model: BasePolicy,
+        host: str = "*",
+        port: int = 5555,
+        allow_pickle: bool = False,
+    ) -> None:
+        super().__init__(host, port, allow_pickle=allow_pickle)
+        self.register_endpoint(
+            "get_action",
+            lambda observations: model.get_action(_writable_arrays(observations)),
+        )
         self.register_endpoint(
             "get_modality_config", model.get_modality_config, requires_input=False
         )
@@ -212,7 +267,69 @@ class RobotInferenceServer(BaseInferenceServer):
         server.run()
 
 
+def encode_request(
+    endpoint: str,
+    data: Optional[Dict],
+    requires_input: bool,
+    wire_format: ZmqWireFormat,
+) -> List[Any]:
+    """Frames of a request to the inference server."""
+    request: Dict[str, Any] = {
+        "endpoint": endpoint,
+        # Version 3: multipart messages. Version 2: pickled envelope.
+        "version": 3 if wire_format == "multipart" else 2,
+    }
+    if requires_input:
+        request["data"] = data or {}
+    if wire_format == "multipart":
+        return encode_multipart(request)
+    return [TorchSerializer.to_bytes(request)]
+
+
+# Ping sent to detect the format of the server. It has no array: a single frame, that a
+# server only speaking pickle answers with the legacy error token.
+PROBE_FRAMES = encode_multipart({"endpoint": "ping", "version": 3})
+
+
+def wire_format_from_probe_reply(frames: List[zmq.Frame]) -> ZmqWireFormat:
+    return "multipart" if is_multipart(frames[0].buffer) else "pickle"
+
+
+def decode_response(frames: List[zmq.Frame], wire_format: ZmqWireFormat) -> dict:
+    """
+    Decode the reply of the inference server. Raises a RuntimeError if the server
+    replied with an error. Pickled replies are only read from servers using pickle.
+    """
+    raw = frames[0].buffer
+    # legacy error token
+    if raw == b"ERROR":
+        raise RuntimeError("Server error (legacy)")
+
+    # decode envelope or raw result
+    if is_multipart(raw):
+        resp = decode_multipart([frame.buffer for frame in frames])
+    elif wire_format == "pickle":
+        resp = TorchSerializer.from_bytes(frames[0].bytes)
+    else:
+        raise RuntimeError("Unexpected reply from the inference server")
+    if "status" in resp:
+        if resp["status"] == "error":
+            et, msg = resp.get("error_type", "Error"), resp.get("message", "")
+            tb = resp.get("traceback", "")
+            raise RuntimeError(f"{et}: {msg}\n\n{tb}")
+        return resp.get("result", {})
+    else:
+        # legacy: the handler's own dict
+        return resp
+
+
 class BaseInferenceClient:
+    """
+    Client of the inference server. Observations are sent as multipart messages: the
+    frames are not pickled nor copied. Servers that only speak pickle are detected by
+    the first request.
+    """
+
     def __init__(
         self, host: str = "localhost", port: int = 5555, timeout_ms: int = 15000
     ) -> None:
@@ -221,7 +338,7 @@ class BaseInferenceClient:
         self.host = host
         self.port = port
         self.timeout_ms = timeout_ms
-        self.version = 2
+        self.wire_format: Optional[ZmqWireFormat] = None
         self._init_socket()
 
     def _init_socket(self) -> None:
@@ -243,6 +360,17 @@ class BaseInferenceClient:
         """
         self.call_endpoint("kill", requires_input=False)
 
+    def negotiate_wire_format(self) -> ZmqWireFormat:
+        if self.wire_format is None:
+            self.socket.send_multipart(PROBE_FRAMES)
+            self.wire_format = wire_format_from_probe_reply(
+                self.socket.recv_multipart(copy=False)
+            )
+            logger.info(
+                f"Sending observations to the gr00t server as {self.wire_format}"
+            )
+        return self.wire_format
+
     def call_endpoint(
         self, endpoint: str, data: Optional[Dict] = None, requires_input: bool = True
     ) -> dict:
@@ -254,28 +382,11 @@ class BaseInferenceClient:
             data: The input data for the endpoint.
             requires_input: Whether the endpoint requires input data.
         """
-        request = {"endpoint": endpoint, "version": self.version}
-        if requires_input:
-            request["data"] = data or {}
-
-        self.socket.send(TorchSerializer.to_bytes(request))
-        raw = self.socket.recv()
-
-        # legacy error token
-        if raw == b"ERROR":
-            raise RuntimeError("Server error (legacy)")
-
-        # decode envelope or raw result
-        resp = TorchSerializer.from_bytes(raw)
-        if "status" in resp:
-            if resp["status"] == "error":
-                et, msg = resp.get("error_type", "Error"), resp.get("message", "")
-                tb = resp.get("traceback", "")
-                raise RuntimeError(f"{et}: {msg}\n\n{tb}")
-            return resp.get("result", {})
-        else:
-            # legacy: the handler's own dict
-            return resp
+        wire_format = self.negotiate_wire_format()
+        self.socket.send_multipart(
+            encode_request(endpoint, data, requires_input, wire_format), copy=False
+        )
+        return decode_response(self.socket.recv_multipart(copy=False), wire_format)
 
     def __del__(self) -> None:
         """Cleanup resources on destruction"""
@@ -297,6 +408,105 @@ class ExternalRobotInferenceClient(BaseInferenceClient):
         return self.call_endpoint("get_action", observations)
 
 
+class AsyncInferenceClient:
+    """
+    Asynchronous client of the inference server, for the control loops running on the
+    event loop: waiting for the server does not block the other requests.
+
+    A REQ socket expects the reply of its last request: after a timeout or a cancellation,
+    the socket is recreated (without blocking) so that the next request does not read a
+    stale reply. ZMQ reconnects to the server by itself if the connection is lost.
+
+    Like BaseInferenceClient, observations are sent as multipart messages, or pickled for
+    servers that only speak pickle.
+    """
+
+    def __init__(
+        self, host: str = "localhost", port: int = 5555, timeout_ms: int = 15000
+    ) -> None:
+        self.context = zmq.asyncio.Context()
+
+        self.host = host
+        self.port = port
+        self.timeout_ms = timeout_ms
+        self.wire_format: Optional[ZmqWireFormat] = None
+        self.socket: Optional[zmq.asyncio.Socket] = None
+        # Requests on a REQ socket must alternate with their replies
+        self._lock = asyncio.Lock()
+
+    def _get_socket(self) -> zmq.asyncio.Socket:
+        if self.socket is None:
+            self.socket = self.context.socket(zmq.REQ)
+            self.socket.setsockopt(zmq.LINGER, 0)
+            self.socket.connect(f"tcp://{self.host}:{self.port}")
+        return self.socket
+
+    def _reset_socket(self) -> None:
+        if self.socket is not None:
+            self.socket.close(linger=0)
+            self.socket = None
+
+    async def ping(self, timeout: float = 1.0) -> bool:
+        try:
+            await self.call_endpoint("ping", requires_input=False, timeout=timeout)
+            return True
+        except (TimeoutError, zmq.error.ZMQError):
+            return False
+
+    async def call_endpoint(
+        self,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        requires_input: bool = True,
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Call an endpoint on the server. Raises a TimeoutError if the server does not reply
+        within timeout seconds (by default, timeout_ms).
+        """
+        if timeout is None:
+            timeout = self.timeout_ms / 1000
+
+        async with self._lock:
+            socket = self._get_socket()
+            try:
+                if self.wire_format is None:
+                    await socket.send_multipart(PROBE_FRAMES)
+                    self.wire_format = wire_format_from_probe_reply(
+                        await asyncio.wait_for(
+                            socket.recv_multipart(copy=False), timeout=timeout
+                        )
+                    )
+                    logger.info(
+                        f"Sending observations to the gr00t server as {self.wire_format}"
+                    )
+                wire_format = self.wire_format
+                await socket.send_multipart(
+                    encode_request(endpoint, data, requires_input, wire_format),
+                    copy=False,
+                )
+                frames = await asyncio.wait_for(
+                    socket.recv_multipart(copy=False), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                self._reset_socket()
+                raise TimeoutError(
+                    f"No reply from the inference server {self.host}:{self.port} to '{endpoint}' after {timeout}s"
+                )
+            except BaseException:
+                # Cancelled or failed: the reply must not be read by the next request
+                self._reset_socket()
+                raise
+        return decode_response(frames, wire_format)
+
+    async def get_action(self, observations: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.call_endpoint("get_action", observations)
+
+    def close(self) -> None:
+        self._reset_socket()
+        self.context.term()
+
+
 class Stats(BaseModel):
     max: list[float]
     min: list[float]
@@ -505,11 +715,21 @@ class Gr00tN1(ActionModel):
     ) -> None:
         super().__init__(server_url, server_port)
         self.client = ExternalRobotInferenceClient(host=server_url, port=server_port)
+        # Used by the control loop, so that the server keeps serving during inference
+        self.async_client = AsyncInferenceClient(host=server_url, port=server_port)
         self.action_keys = action_keys
 
     def sample_actions(self, inputs: dict) -> np.ndarray:
         # Get the dict from the server
         response = self.client.get_action(inputs)
+        return self._concatenate_actions(response)
+
+    async def async_sample_actions(self, inputs: dict) -> np.ndarray:
+        response = await self.async_client.get_action(inputs)
+        return self._concatenate_actions(response)
+
+    def _concatenate_actions(self, response: Dict[str, Any]) -> np.ndarray:
+        """Actions of the response of the server, as an array (16, action_size)."""
         action_parts = []
         for key in self.action_keys:
             new_action = response[key]
@@ -736,210 +956,199 @@ class Gr00tN1(ActionModel):
         The loop runs at the specified fps and speed.
         """
 
-        import cv2
-
         nb_iter = 0
         config = model_spawn_config.hf_model_config
         signal_marked_as_started = False
 
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
-
-            start_time = time.perf_counter()
-
-            # Get the images from the cameras based on the config
-            # For now, just put as many cameras as the model config
-            image_inputs: Dict[str, np.ndarray] = {}
-            for i, (camera_name, video) in enumerate(
-                config.embodiment.modalities.video.items()
-            ):
-                if cameras_keys_mapping is None:
-                    camera_id = i
-                else:
-                    camera_id = cameras_keys_mapping.get(
-                        f"video.{camera_name}", cameras_keys_mapping.get(camera_name, i)
-                    )
-
-                rgb_frame = all_cameras.get_rgb_frame(
-                    camera_id=camera_id, resize=video.resolution
+        # Get the images from the cameras based on the config
+        # For now, just put as many cameras as the model config
+        image_inputs: List[ImageInput] = []
+        for i, (camera_name, video) in enumerate(
+            config.embodiment.modalities.video.items()
+        ):
+            camera_id = i
+            if cameras_keys_mapping is not None:
+                camera_id = cameras_keys_mapping.get(
+                    f"video.{camera_name}", cameras_keys_mapping.get(camera_name, i)
                 )
-                if rgb_frame is not None:
-                    # Convert to BGR
-                    image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+            image_inputs.append(
+                ImageInput(
+                    key=f"video.{camera_name}",
+                    camera_id=camera_id,
+                    size=(video.resolution[0], video.resolution[1]),
                     # Add a batch dimension (from (240, 320, 3) to (1, 240, 320, 3))
-                    converted_array = np.expand_dims(image, axis=0)
-                    # Ensure dtype is uint8 (if it isn't already)
-                    converted_array = converted_array.astype(np.uint8)
-                    image_inputs[f"video.{camera_name}"] = converted_array
-
-                else:
-                    logger.warning(
-                        f"Camera {camera_name} not available. Sending all black."
-                    )
-                    image_inputs[f"video.{camera_name}"] = np.zeros(
-                        (1, video.resolution[1], video.resolution[0], video.channels),
-                        dtype=np.uint8,
-                    )
-
-            # Number of cameras
-            if len(image_inputs) != len(config.embodiment.modalities.video.keys()):
-                logger.warning(
-                    f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
+                    batch_dim=True,
                 )
-
-            # Number of robots
-            number_of_robots = len(robots)
-            number_of_robots_in_config = (
-                config.embodiment.statistics.state.number_of_arms
-            )
-            if number_of_robots != number_of_robots_in_config:
-                logger.warning("No robot connected. Exiting AI control loop.")
-                control_signal.stop()
-                raise Exception("No robot connected. Exiting AI control loop.")
-
-            # Concatenate all robot states
-            state = robots[0].read_joints_position(
-                unit=unit, max_value=max_angle, min_value=min_angle
             )
-            for robot in robots[1:]:
-                state = np.concatenate(
-                    (
-                        state,
-                        robot.read_joints_position(
-                            unit=unit, max_value=max_angle, min_value=min_angle
-                        ),
-                    ),
-                    axis=0,
-                )
+        observation_assembler = ObservationAssembler(
+            all_cameras=all_cameras,
+            robots=robots,
+            image_inputs=image_inputs,
+            # Share the sample of the state broadcaster if it's within half a step
+            read_state=lambda robot: robot.get_joints_position(
+                unit=unit,
+                max_staleness=0.5 / fps,
+                max_value=max_angle,
+                min_value=min_angle,
+            ),
+            pixel_format="bgr",
+        )
 
-            inputs = {
-                **image_inputs,
-                "annotation.human.action.task_description": prompt,
-            }
-
-            state_index = 0
-            for (
-                component_name,
-                stats,
-            ) in config.embodiment.statistics.state.active_components.items():
-                num_elements = len(stats.max)
-                component_state = state[state_index : state_index + num_elements]
-                inputs[f"state.{component_name}"] = component_state.reshape(
-                    1, num_elements
-                )
-                state_index += num_elements
-            try:
-                actions = self(inputs)
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model: {e}. Exiting AI control loop."
+        try:
+            while control_signal.is_in_loop():
+                logger.debug(
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}"
                 )
-                control_signal.stop()
-                break
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
 
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
+                start_time = time.perf_counter()
 
-            nb_actions_too_large = 0
-            for action in actions:
-                # Early stop
-                if not control_signal.is_in_loop():
+                # Number of robots
+                number_of_robots = len(robots)
+                number_of_robots_in_config = (
+                    config.embodiment.statistics.state.number_of_arms
+                )
+                if number_of_robots != number_of_robots_in_config:
+                    logger.warning("No robot connected. Exiting AI control loop.")
+                    control_signal.stop()
+                    raise Exception("No robot connected. Exiting AI control loop.")
+
+                # Read the robots and the cameras concurrently
+                observation = await observation_assembler.assemble()
+                state = observation.state
+
+                inputs = {
+                    **observation.images,
+                    "annotation.human.action.task_description": prompt,
+                }
+
+                state_index = 0
+                for (
+                    component_name,
+                    stats,
+                ) in config.embodiment.statistics.state.active_components.items():
+                    num_elements = len(stats.max)
+                    component_state = state[state_index : state_index + num_elements]
+                    inputs[f"state.{component_name}"] = component_state.reshape(
+                        1, num_elements
+                    )
+                    state_index += num_elements
+                try:
+                    actions = await control_signal.run_until_stopped(
+                        self.async_sample_actions(inputs)
+                    )
+                except ControlStoppedError:
+                    logger.debug("AI control stopped while waiting for the model")
                     break
-                # Send the new joint position to the robot
-                action_list = action.tolist()
-                for robot_index in range(len(robots)):
-                    target_position = action_list[robot_index * 6 : robot_index * 6 + 6]
-
-                    # If the distance between the current and target position is too high, skip the action
-                    current_position = robots[robot_index].read_joints_position(
-                        unit=unit,
-                        max_value=max_angle,
-                        min_value=min_angle,
-                        source="sim",
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to get actions from model: {e}. Exiting AI control loop."
                     )
-                    max_transition_angles: np.ndarray
-                    if unit == "degrees":
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angles = np.array([90.0] * 5 + [180.0])
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + 180) % 360 - 180
-                        )
+                    control_signal.stop()
+                    break
 
-                    elif unit == "rad":
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angles = np.array([np.pi / 2] * 5 + [np.pi])
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + np.pi) % (2 * np.pi)
-                            - np.pi
-                        )
-                    elif (
-                        unit == "other"
-                        and max_angle is not None
-                        and min_angle is not None
-                    ):
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angle = (max_angle - min_angle) / 2
-                        max_transition_angles = np.array(
-                            [max_transition_angle] * 5 + [max_angle - min_angle]
-                        )
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + max_angle)
-                            % (max_angle - min_angle)
-                            - max_transition_angle
-                        )
-                    else:
-                        raise ValueError(f"Unknown unit: {unit}")
-
-                    if np.any(current_to_target_diff > max_transition_angles):
-                        largest_diff = np.max(current_to_target_diff)
-                        largest_diff_index = np.argmax(current_to_target_diff)
-                        error_message = (
-                            f"Skipping action for robot {robot_index} because the to joint position {largest_diff_index} difference is too large: {largest_diff} > {max_transition_angles[largest_diff_index]} in units {unit}"
-                            + f"\nCurrent position: {current_position}"
-                            + f"\nTarget position: {target_position}\n"
-                            + "Possible reasons for this error:"
-                            + "\n1. Make sure you selected the *right angle unit* in the control page (angle, degrees, other)."
-                            + "\n2. Inspect your dataset joints positions to ensure they are within the expected range."
-                            + "\n3. There was an issue in the model output, please check the model training and data quality."
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                nb_actions_too_large = 0
+                for action in actions:
+                    # Early stop
+                    if not control_signal.is_in_loop():
+                        break
+                    # Send the new joint position to the robot
+                    action_list = action.tolist()
+                    for robot_index in range(len(robots)):
+                        target_position = action_list[
+                            robot_index * 6 : robot_index * 6 + 6
+                        ]
+
+                        # If the distance between the current and target position is too high, skip the action
+                        current_position = robots[robot_index].read_joints_position(
+                            unit=unit,
+                            max_value=max_angle,
+                            min_value=min_angle,
+                            source="sim",
                         )
-                        if nb_actions_too_large <= 20:
-                            logger.warning(error_message)
-                            nb_actions_too_large += 1
-                            continue
-                        else:
-                            control_signal.stop()
-                            raise Exception(error_message)
-                    else:
-                        logger.debug(
-                            f"Writing joint position to robot {robot_index}: {target_position}"
-                        )
-
-                    robots[robot_index].write_joint_positions(
-                        angles=target_position,
-                        unit=unit,
-                        max_value=max_angle,
-                        min_value=min_angle,
-                    )
-                    nb_actions_too_large = 0
+                        max_transition_angles: np.ndarray
+                        if unit == "degrees":
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angles = np.array([90.0] * 5 + [180.0])
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + 180) % 360 - 180
+                            )
 
-                # Wait fps time
-                elapsed_time = time.perf_counter() - start_time
-                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-                await asyncio.sleep(sleep_time)
-                start_time = time.perf_counter()
+                        elif unit == "rad":
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angles = np.array([np.pi / 2] * 5 + [np.pi])
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + np.pi)
+                                % (2 * np.pi)
+                                - np.pi
+                            )
+                        elif (
+                            unit == "other"
+                            and max_angle is not None
+                            and min_angle is not None
+                        ):
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angle = (max_angle - min_angle) / 2
+                            max_transition_angles = np.array(
+                                [max_transition_angle] * 5 + [max_angle - min_angle]
+                            )
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + max_angle)
+                                % (max_angle - min_angle)
+                                - max_transition_angle
+                            )
+                        else:
+                            raise ValueError(f"Unknown unit: {unit}")
+
+                        if np.any(current_to_target_diff > max_transition_angles):
+                            largest_diff = np.max(current_to_target_diff)
+                            largest_diff_index = np.argmax(current_to_target_diff)
+                            error_message = (
+                                f"Skipping action for robot {robot_index} because the to joint position {largest_diff_index} difference is too large: {largest_diff} > {max_transition_angles[largest_diff_index]} in units {unit}"
+                                + f"\nCurrent position: {current_position}"
+                                + f"\nTarget position: {target_position}\n"
+                                + "Possible reasons for this error:"
+                                + "\n1. Make sure you selected the *right angle unit* in the control page (angle, degrees, other)."
+                                + "\n2. Inspect your dataset joints positions to ensure they are within the expected range."
+                                + "\n3. There was an issue in the model output, please check the model training and data quality."
+                            )
+                            if nb_actions_too_large <= 20:
+                                logger.warning(error_message)
+                                nb_actions_too_large += 1
+                                continue
+                            else:
+                                control_signal.stop()
+                                raise Exception(error_message)
+                        else:
+                            logger.debug(
+                                f"Writing joint position to robot {robot_index}: {target_position}"
+                            )
 
-            nb_iter += 1
+                        robots[robot_index].write_joint_positions(
+                            angles=target_position,
+                            unit=unit,
+                            max_value=max_angle,
+                            min_value=min_angle,
+                        )
+                        nb_actions_too_large = 0
+
+                    # Wait fps time
+                    elapsed_time = time.perf_counter() - start_time
+                    sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                    await asyncio.sleep(sleep_time)
+                    start_time = time.perf_counter()
+
+                nb_iter += 1
+        finally:
+            observation_assembler.close()
+            self.async_client.close()
 
 
 class Gr00tTrainerConfig(BaseTrainerConfig):
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from phosphobot.camera import AllCameras, SyncedFrames
+from phosphobot.types import PixelFormat
+
+if TYPE_CHECKING:
+    # We only need BaseManipulator for type checking
+    # This prevents loading pybullet in modal
+    from phosphobot.hardware.base import BaseManipulator
+
+
+@dataclass
+class ImageInput:
+    """A camera frame to put in the observation sent to the model."""
+
+    # Key of the image in the observation
+    key: str
+    camera_id: int
+    # (width, height) of the image expected by the model
+    size: Tuple[int, int]
+    # Shape the image as (1, H, W, C) instead of (H, W, C)
+    batch_dim: bool = False
+
+
+@dataclass
+class AssembledObservation:
+    # Joints of all the robots, concatenated
+    state: np.ndarray
+    # Number of joints of each robot in state
+    joints_per_robot: List[int]
+    # Images by ImageInput.key
+    images: Dict[str, np.ndarray]
+    synced_frames: SyncedFrames
+
+
+class ObservationAssembler:
+    """
+    Build the observations of an AI control loop off the event loop.
+
+    The robots and the cameras are read concurrently in worker threads, and the frames are
+    resized and converted into buffers reused from one observation to the next.
+    Frames are requested at the middle of the robot read, so the images match the state.
+
+    The buffers alternate between two sets: the images of an observation are overwritten by
+    the next-but-one call to assemble. Copy them if they must live longer (e.g. when encoding
+    a request asynchronously).
+    """
+
+    def __init__(
+        self,
+        all_cameras: AllCameras,
+        robots: List["BaseManipulator"],
+        image_inputs: List[ImageInput],
+        read_state: Callable[["BaseManipulator"], np.ndarray],
+        pixel_format: PixelFormat = "bgr",
+    ):
+        self.all_cameras = all_cameras
+        self.robots = robots
+        self.image_inputs = image_inputs
+        self.read_state = read_state
+        self.pixel_format = pixel_format
+        self.camera_ids = list(dict.fromkeys(image.camera_id for image in image_inputs))
+        # One worker per camera and one for the robots
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.camera_ids) + 1, thread_name_prefix="observation"
+        )
+        self._buffers: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = ({}, {})
+        self._buffer_index = 0
+        self._previous_synced_frames: Optional[SyncedFrames] = None
+        # Duration of the last robot read, used to target the middle of the next one
+        self._state_read_duration = 0.0
+
+    def _read_robots(self) -> Tuple[np.ndarray, List[int], float]:
+        start = time.perf_counter()
+        states = [self.read_state(robot) for robot in self.robots]
+        duration = time.perf_counter() - start
+        return (
+            np.concatenate(states, axis=0),
+            [len(state) for state in states],
+            duration,
+        )
+
+    def _prepare_image(
+        self,
+        image_input: ImageInput,
+        synced_frames: SyncedFrames,
+        buffers: Dict[str, np.ndarray],
+    ) -> np.ndarray:
+        width, height = image_input.size
+        shape = (1, height, width, 3) if image_input.batch_dim else (height, width, 3)
+        buffer = buffers.get(image_input.key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            buffers[image_input.key] = buffer
+        image = buffer[0] if image_input.batch_dim else buffer
+
+        timestamped_frame = synced_frames.frames.get(image_input.camera_id)
+        if timestamped_frame is None:
+            logger.warning(
+                f"Camera {image_input.camera_id} not available. Sending all black."
+            )
+            image.fill(0)
+        elif (
+            timestamped_frame.pixel_format == self.pixel_format
+            and timestamped_frame.frame.dtype == np.uint8
+            and timestamped_frame.frame.shape[2:] == (3,)
+            and timestamped_frame.frame.shape[:2] != (height, width)
+        ):
+            # Resize directly into the buffer
+            cv2.resize(
+                timestamped_frame.frame,
+                (width, height),
+                dst=image,
+                interpolation=cv2.INTER_AREA,
+            )
+        else:
+            np.copyto(
+                image, timestamped_frame.get(self.pixel_format, resize=(width, height))
+            )
+        return buffer
+
+    def _read_frames(
+        self, timestamp: float
+    ) -> Tuple[SyncedFrames, Dict[str, np.ndarray]]:
+        synced_frames = self.all_cameras.get_synced_frames(
+            camera_ids=self.camera_ids,
+            timestamp=timestamp,
+            previous=self._previous_synced_frames,
+            executor=self._executor,
+            pixel_format=self.pixel_format,
+        )
+        self._previous_synced_frames = synced_frames
+
+        buffers = self._buffers[self._buffer_index]
+        self._buffer_index = 1 - self._buffer_index
+        images = self._executor.map(
+            lambda image_input: self._prepare_image(
+                image_input, synced_frames, buffers
+            ),
+            self.image_inputs,
+        )
+        return synced_frames, {
+            image_input.key: image
+            for image_input, image in zip(self.image_inputs, images)
+        }
+
+    async def assemble(self) -> AssembledObservation:
+        timestamp = time.perf_counter() + self._state_read_duration / 2
+        state_read = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._read_robots
+        )
+        (
+            (state, joints_per_robot, duration),
+            (synced_frames, images),
+        ) = await asyncio.gather(
+            state_read, asyncio.to_thread(self._read_frames, timestamp)
+        )
+        self._state_read_duration = duration
+
+        if synced_frames.duplicate_camera_ids or synced_frames.stale_camera_ids:
+            logger.debug(
+                f"Duplicate frames from cameras {synced_frames.duplicate_camera_ids}, "
+                + f"stale frames from cameras {synced_frames.stale_camera_ids}"
+            )
+        return AssembledObservation(
+            state=state,
+            joints_per_robot=joints_per_robot,
+            images=images,
+            synced_frames=synced_frames,
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
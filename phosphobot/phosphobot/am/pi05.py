@@ -9,24 +9,26 @@ if TYPE_CHECKING:
     # This prevents loading pybullet in modal
     from phosphobot.hardware.base import BaseManipulator
 
-import functools
 
 import cv2
-import msgpack
 import numpy as np
+import websockets.asyncio.client
 import websockets.sync.client
 from fastapi import HTTPException
 from huggingface_hub import HfApi
 from loguru import logger
 from pydantic import BaseModel, ConfigDict, Field
-from websockets.exceptions import InvalidMessage
+from websockets.exceptions import ConnectionClosed, InvalidMessage
 
 from phosphobot.am.base import (
     ActionModel,
 )
+from phosphobot.am.observation import ImageInput, ObservationAssembler
+from phosphobot.am.wire import Packer, unpackb
 from phosphobot.camera import AllCameras
-from phosphobot.control_signal import AIControlSignal
+from phosphobot.control_signal import AIControlSignal, ControlStoppedError
 from phosphobot.models import ModelConfigurationResponse
+from phosphobot.types import PixelFormat
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
 
@@ -105,52 +107,6 @@ class HuggingFaceAugmentedValidator(BaseModel):
     )
 
 
-# This code comes from openpi-client module https://github.com/phospho-app/openpi/blob/main/packages/openpi-client/src/openpi_client/msgpack_numpy.py
-def pack_array(obj: Any) -> Any:
-    if (isinstance(obj, (np.ndarray, np.generic))) and obj.dtype.kind in (
-        "V",
-        "O",
-        "c",
-    ):
-        raise ValueError(f"Unsupported dtype: {obj.dtype}")
-
-    if isinstance(obj, np.ndarray):
-        return {
-            b"__ndarray__": True,
-            b"data": obj.tobytes(),
-            b"dtype": obj.dtype.str,
-            b"shape": obj.shape,
-        }
-
-    if isinstance(obj, np.generic):
-        return {
-            b"__npgeneric__": True,
-            b"data": obj.item(),
-            b"dtype": obj.dtype.str,
-        }
-
-    return obj
-
-
-def unpack_array(obj: Any) -> Any:
-    if b"__ndarray__" in obj:
-        return np.ndarray(
-            buffer=obj[b"data"], dtype=np.dtype(obj[b"dtype"]), shape=obj[b"shape"]
-        )
-
-    if b"__npgeneric__" in obj:
-        return np.dtype(obj[b"dtype"]).type(obj[b"data"])
-
-    return obj
-
-
-Packer = functools.partial(msgpack.Packer, default=pack_array)
-packb = functools.partial(msgpack.packb, default=pack_array)
-
-Unpacker = functools.partial(msgpack.Unpacker, object_hook=unpack_array)
-unpackb = functools.partial(msgpack.unpackb, object_hook=unpack_array)
-
-
 class WebsocketClientPolicy:
     """Implements the Policy interface by communicating with a server over websocket.
 
@@ -202,38 +158,101 @@ class WebsocketClientPolicy:
         return unpackb(response)
 
 
-def fetch_camera_images(
-    config: Pi05SpawnConfig,
-    all_cameras: AllCameras,
-    cameras_keys_mapping: Dict[str, int] | None = None,
-) -> Dict[str, np.ndarray]:
+class AsyncWebsocketClientPolicy:
+    """Asynchronous version of WebsocketClientPolicy, for the control loop running on the event loop.
+
+    It connects on the first inference. After a timeout or a cancellation, the connection is
+    dropped: its late reply would be read by the next request. A dropped or closed connection
+    is reopened by the next inference, without blocking the event loop.
     """
-    Fetch images from cameras based on the model configuration.
 
-    Args:
-        config: The model configuration containing video keys and resolutions
-        all_cameras: Camera manager instance
-        cameras_keys_mapping: [Optional] mapping of camera names to camera IDs
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: Optional[int] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self._uri = f"ws://{host}"
+        if port is not None:
+            self._uri += f":{port}"
+        self.timeout = timeout
+        self._packer = Packer()
+        self._ws: Optional[websockets.asyncio.client.ClientConnection] = None
+        self._server_metadata: Dict = {}
+        # A reply must be read by the request that sent it
+        self._lock = asyncio.Lock()
 
-    Returns:
-        Dictionary mapping camera names to captured image arrays
-    """
-    image_inputs: Dict[str, np.ndarray] = {}
-    for i, camera_name in enumerate(config.image_keys):
-        if cameras_keys_mapping is None:
-            camera_id = i
-        else:
-            camera_id = cameras_keys_mapping.get(camera_name, i)
+    def get_server_metadata(self) -> Dict:
+        return self._server_metadata
 
-        video_resolution = [3, 224, 224]  # Default resolution (C, H, W)
-        frame_array = Pi05.fetch_frame(
-            all_cameras=all_cameras,
-            camera_id=camera_id,
-            resolution=video_resolution,
-        )
-        image_inputs[camera_name.replace("observation.", "observation/")] = frame_array
+    async def _wait_for_server(self) -> websockets.asyncio.client.ClientConnection:
+        logger.info(f"Waiting for server at {self._uri}...")
+        # Despite the error we try up to 20 times to connect
+        for _ in range(20):
+            try:
+                conn = await websockets.asyncio.client.connect(
+                    self._uri,
+                    compression=None,
+                    max_size=None,
+                    open_timeout=40,
+                    close_timeout=40,
+                    ping_interval=120,
+                    ping_timeout=40,
+                )
+                self._server_metadata = unpackb(await conn.recv())
+                return conn
+            except InvalidMessage:
+                logger.info("Still waiting for server...")
+                await asyncio.sleep(5)
+        raise RuntimeError(f"Could not connect to server at {self._uri}")
 
-    return image_inputs
+    def _drop_connection(self) -> None:
+        if self._ws is not None:
+            # Closing waits for the server: don't block the request on it
+            asyncio.ensure_future(self._ws.close())
+            self._ws = None
+
+    async def infer(self, obs: Dict, timeout: Optional[float] = None) -> Dict:
+        """
+        Send the observation and return the reply of the server. Raises a TimeoutError if
+        the server does not reply within timeout seconds (by default, self.timeout).
+        """
+        data = self._packer.pack(obs)
+        if timeout is None:
+            timeout = self.timeout
+        async with self._lock:
+            # If the server closed the connection since the last request, reconnect once
+            for attempt in range(2):
+                if self._ws is None:
+                    self._ws = await self._wait_for_server()
+                try:
+                    await self._ws.send(data)
+                    response = await asyncio.wait_for(self._ws.recv(), timeout=timeout)
+                    break
+                except ConnectionClosed:
+                    self._ws = None
+                    if attempt == 1:
+                        raise
+                    logger.warning(f"Connection to {self._uri} closed, reconnecting...")
+                except asyncio.TimeoutError:
+                    self._drop_connection()
+                    raise TimeoutError(
+                        f"No reply from the inference server at {self._uri} after {timeout}s"
+                    )
+                except BaseException:
+                    # Cancelled or failed: the reply must not be read by the next request
+                    self._drop_connection()
+                    raise
+        if isinstance(response, str):
+            # we're expecting bytes; if the server sends a string, it's an error.
+            raise RuntimeError(f"Error in inference server:\n{response}")
+        return unpackb(response)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._ws is not None:
+                await self._ws.close()
+                self._ws = None
 
 
 class RetryError(Exception):
@@ -256,9 +275,24 @@ class Pi05(ActionModel):
         **kwargs: Any,
     ):
         super().__init__(server_url, server_port)
-        self.client = WebsocketClientPolicy(host=server_url, port=server_port)
+        # Connects on the first inference: the server may still be starting
+        self.async_client = AsyncWebsocketClientPolicy(
+            host=server_url, port=server_port
+        )
+        self._client: Optional[WebsocketClientPolicy] = None
+        # The openpi websocket server only speaks msgpack
+        self.wire_format = "msgpack"
         self.image_keys = image_keys
 
+    @property
+    def client(self) -> WebsocketClientPolicy:
+        """Blocking client, for sample_actions. Connects when first used."""
+        if self._client is None:
+            self._client = WebsocketClientPolicy(
+                host=self.server_url, port=self.server_port
+            )
+        return self._client
+
     def sample_actions(self, inputs: dict) -> np.ndarray:
         try:
             response = self.client.infer(obs=inputs)
@@ -280,7 +314,7 @@ class Pi05(ActionModel):
 
     async def async_sample_actions(self, inputs: dict) -> np.ndarray:
         try:
-            response = self.client.infer(obs=inputs)
+            response = await self.async_client.infer(obs=inputs)
 
             logger.debug(f"Response from server: {response}")
             if isinstance(response, dict) and "actions" in response:
@@ -418,11 +452,26 @@ class Pi05(ActionModel):
             camera_id=camera_id,
             resize=(resolution[2], resolution[1]),
         )
-        if rgb_frame is not None:
-            # Convert to BGR
-            image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        return cls.prepare_frame(rgb_frame, camera_id=camera_id, resolution=resolution)
+
+    @classmethod
+    def prepare_frame(
+        cls,
+        frame: Optional[np.ndarray],
+        camera_id: int,
+        resolution: list[int],
+        pixel_format: PixelFormat = "rgb",
+    ) -> np.ndarray:
+        """
+        Convert a frame in pixel_format of the given resolution (C, H, W) to the BGR image expected by the model.
+        If the frame is None, return a black image.
+        """
+        if frame is not None:
+            if pixel_format == "rgb":
+                # Convert to BGR
+                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
             # Ensure dtype is uint8 (if it isn’t already)
-            converted_array = image.astype(np.uint8)
+            converted_array = frame.astype(np.uint8)
             return converted_array
 
         else:
@@ -444,7 +493,7 @@ class Pi05(ActionModel):
         model_spawn_config: Pi05SpawnConfig,
         all_cameras: AllCameras,
         prompt: str,
-        fps: int = 10, # Pi0 model family operates at 10 fps
+        fps: int = 10,  # Pi0 model family operates at 10 fps
         speed: float = 1.0,
         cameras_keys_mapping: Dict[str, int] | None = None,
         angle_format: Literal["degrees", "radians", "other"] = "radians",
@@ -463,123 +512,133 @@ class Pi05(ActionModel):
         signal_marked_as_started = False
         actions_queue: deque = deque([])
 
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
-
-            start_time = time.perf_counter()
-
-            # Get the images from the cameras based on the config
-            image_inputs = fetch_camera_images(
-                config=model_spawn_config,
-                all_cameras=all_cameras,
-                cameras_keys_mapping=cameras_keys_mapping,
-            )
-
-            # Verify number of cameras
-            if len(image_inputs) != len(model_spawn_config.image_keys):
-                logger.warning(
-                    f"Model has {len(model_spawn_config.image_keys)} cameras but "
-                    f"{len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {len(model_spawn_config.image_keys)} cameras but "
-                    f"{len(image_inputs)} cameras are plugged."
-                )
-
-            # Concatenate all robot states
-            robot_idx_joints_mapping = {}
-            state = robots[0].read_joints_position(unit="rad")
-            robot_idx_joints_mapping[0] = state.shape[0]
-            for robot in robots[1:]:
-                state = np.concatenate(
-                    (state, robot.read_joints_position(unit="rad")), axis=0
-                )
-                robot_idx_joints_mapping[len(robot_idx_joints_mapping)] = (
-                    robot.read_joints_position(unit="rad").shape[0]
+        # Get the images from the cameras based on the config
+        video_resolution = [3, 224, 224]  # Default resolution (C, H, W)
+        image_inputs: List[ImageInput] = []
+        for i, camera_name in enumerate(model_spawn_config.image_keys):
+            camera_id = i
+            if cameras_keys_mapping is not None:
+                camera_id = cameras_keys_mapping.get(camera_name, i)
+            image_inputs.append(
+                ImageInput(
+                    key=camera_name.replace("observation.", "observation/"),
+                    camera_id=camera_id,
+                    size=(video_resolution[2], video_resolution[1]),
                 )
+            )
+        observation_assembler = ObservationAssembler(
+            all_cameras=all_cameras,
+            robots=robots,
+            image_inputs=image_inputs,
+            # Share the sample of the state broadcaster if it's within half a step
+            read_state=lambda robot: robot.get_joints_position(
+                unit="rad", max_staleness=0.5 / fps
+            ),
+            pixel_format="bgr",
+        )
 
-            # Verify number of joints
-            number_of_joints_in_config = model_spawn_config.action_dim
-            number_of_connected_joints = sum(robot_idx_joints_mapping.values()) # num_actuated_joints is not reliable here, some robots like the piper have a separate gripper
-            if number_of_connected_joints != number_of_joints_in_config:
-                logger.warning(
-                    f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
+        try:
+            while control_signal.is_in_loop():
+                logger.debug(
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
                 )
-
-            # Prepare model input
-            inputs: dict[str, np.ndarray | str] = {
-                "observation/state": state,
-                "prompt": prompt,
-                **image_inputs,
-            }
-
-            try:
-                if len(actions_queue) == 0:
-                    actions_dict = self.client.infer(obs=inputs)
-                    if isinstance(actions_dict, dict) and "actions" in actions_dict:
-                        actions = np.array(actions_dict["actions"])
-                    else:
-                        raise ValueError(
-                            f"Invalid response from model server: {actions_dict}"
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
+
+                start_time = time.perf_counter()
+
+                # Read the robots and the cameras concurrently
+                observation = await observation_assembler.assemble()
+                state = observation.state
+                robot_idx_joints_mapping = dict(enumerate(observation.joints_per_robot))
+
+                # Verify number of joints
+                number_of_joints_in_config = model_spawn_config.action_dim
+                number_of_connected_joints = sum(
+                    robot_idx_joints_mapping.values()
+                )  # num_actuated_joints is not reliable here, some robots like the piper have a separate gripper
+                if number_of_connected_joints != number_of_joints_in_config:
+                    logger.warning(
+                        f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
+                    )
+                    control_signal.stop()
+                    raise Exception(
+                        f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
+                    )
+
+                # Prepare model input
+                inputs: dict[str, np.ndarray | str] = {
+                    "observation/state": state,
+                    "prompt": prompt,
+                    **observation.images,
+                }
+
+                try:
+                    if len(actions_queue) == 0:
+                        actions_dict = await control_signal.run_until_stopped(
+                            self.async_client.infer(obs=inputs)
                         )
-                    actions_queue.extend(actions)
-                actions = actions_queue.popleft()  # actions will be of size action_dim, by default 32, this is expected, we ignore the ones > number of joints
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model, exiting AI control loop.\nError: {e}"
-                )
-                control_signal.stop()
-                break
-
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
-
-            # Early stop
-            if not control_signal.is_in_loop():
-                break
-
-            unit: Literal["rad", "motor_units", "degrees", "other"]
-            if angle_format == "radians":
-                unit = "rad"
-            else:
-                unit = angle_format
-
-            actions_list = actions.tolist()
-
-            for robot_index in range(len(robots)):
-                rolling_count = 0
-                angles = actions_list[
+                        if isinstance(actions_dict, dict) and "actions" in actions_dict:
+                            actions = np.array(actions_dict["actions"])
+                        else:
+                            raise ValueError(
+                                f"Invalid response from model server: {actions_dict}"
+                            )
+                        actions_queue.extend(actions)
+                    actions = actions_queue.popleft()  # actions will be of size action_dim, by default 32, this is expected, we ignore the ones > number of joints
+                except ControlStoppedError:
+                    logger.debug("AI control stopped while waiting for the model")
+                    break
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to get actions from model, exiting AI control loop.\nError: {e}"
+                    )
+                    control_signal.stop()
+                    break
+
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                # Early stop
+                if not control_signal.is_in_loop():
+                    break
+
+                unit: Literal["rad", "motor_units", "degrees", "other"]
+                if angle_format == "radians":
+                    unit = "rad"
+                else:
+                    unit = angle_format
+
+                actions_list = actions.tolist()
+
+                for robot_index in range(len(robots)):
+                    rolling_count = 0
+                    angles = actions_list[
                         rolling_count : rolling_count
                         + robot_idx_joints_mapping[robot_index]
                     ]
-                logger.debug(
-                    f"Sending actions to robot {robot_index}: {angles} in {unit}"
-                )
-                robots[robot_index].write_joint_positions(
-                    angles=angles,
-                    unit=unit,
-                    joints_ids=None,
-                    min_value=min_angle,
-                    max_value=max_angle,
-                )
-                rolling_count += robot_idx_joints_mapping[robot_index]
-
-            # Wait fps time
-            elapsed_time = time.perf_counter() - start_time
-            sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-            await asyncio.sleep(sleep_time)
-            start_time = time.perf_counter()
-
-            nb_iter += 1
+                    logger.debug(
+                        f"Sending actions to robot {robot_index}: {angles} in {unit}"
+                    )
+                    robots[robot_index].write_joint_positions(
+                        angles=angles,
+                        unit=unit,
+                        joints_ids=None,
+                        min_value=min_angle,
+                        max_value=max_angle,
+                    )
+                    rolling_count += robot_idx_joints_mapping[robot_index]
+
+                # Wait fps time
+                elapsed_time = time.perf_counter() - start_time
+                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                await asyncio.sleep(sleep_time)
+                start_time = time.perf_counter()
+
+                nb_iter += 1
+        finally:
+            observation_assembler.close()
+            await self.async_client.close()
@@ -111,6 +111,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         if cameras:
             cameras.stop()
 
+        from phosphobot import recorder as recorder_module
+
+        if recorder_module.recorder is not None and recorder_module.recorder.is_saving:
+            logger.info("Waiting for the episodes being saved...")
+            recorder_module.recorder.episode_saver.wait()
+
         # Cleanup the simulation environment
         del rcm
         del sim
@@ -200,6 +206,7 @@ async def status(
         is_recording=recorder.is_recording or recorder.is_saving,
         ai_running_status=signal_ai_control.status,
         leader_follower_status=signal_leader_follower.is_in_loop(),
+        leader_follower_pairs=signal_leader_follower.pairs_status(),
         server_ip=get_local_ip(),
         server_port=config.PORT,
     )
@@ -8,11 +8,15 @@ import subprocess
 import threading
 import time
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
 from typing import (
     Any,
     AsyncGenerator,
+    Deque,
     Dict,
     Iterable,
     List,
@@ -30,7 +34,7 @@ from loguru import logger
 
 from phosphobot.configs import config
 from phosphobot.models import AllCamerasStatus, SingleCameraStatus
-from phosphobot.types import CameraTypes
+from phosphobot.types import CameraTypes, PixelFormat
 
 cameras = None
 
@@ -307,6 +311,84 @@ def detect_video_indexes(
     return cameras
 
 
+@dataclass
+class TimestampedFrame:
+    """
+    A frame with the time it was captured and its position in the camera stream.
+    """
+
+    # time.perf_counter() when the frame was received from the camera
+    timestamp: float
+    # Increases by one for every frame received from the camera
+    sequence_id: int
+    frame: np.ndarray
+    # Channel order of frame
+    pixel_format: PixelFormat = "rgb"
+    # Conversions of the frame already computed, by (pixel_format, size)
+    _conversions: Dict[Tuple[PixelFormat, Optional[Tuple[int, int]]], np.ndarray] = (
+        field(default_factory=dict, repr=False)
+    )
+
+    def get(
+        self,
+        pixel_format: PixelFormat = "rgb",
+        resize: Optional[Tuple[int, int]] = None,
+    ) -> np.ndarray:
+        """
+        Return the frame in pixel_format, resized to resize (width, height).
+        Conversions are done on first request and cached, so several consumers of the
+        same frame don't convert it again: don't modify the returned array in place.
+        """
+        if resize is not None and (resize[1], resize[0]) == self.frame.shape[:2]:
+            resize = None
+        if pixel_format == self.pixel_format and resize is None:
+            return self.frame
+        converted = self._conversions.get((pixel_format, resize))
+        if converted is None:
+            converted = self.frame
+            if resize is not None:
+                # Resize before converting the colors, to convert fewer pixels
+                converted = self._conversions.get((self.pixel_format, resize))
+                if converted is None:
+                    converted = cv2.resize(
+                        src=self.frame, dsize=resize, interpolation=cv2.INTER_AREA
+                    )
+                    self._conversions[(self.pixel_format, resize)] = converted
+            if pixel_format != self.pixel_format:
+                # RGB <-> BGR is the same channel swap
+                converted = cv2.cvtColor(converted, cv2.COLOR_BGR2RGB)
+            self._conversions[(pixel_format, resize)] = converted
+        return converted
+
+
+@dataclass
+class SyncedFrames:
+    """
+    Frames of several cameras, each one captured the nearest to the same requested time.
+    """
+
+    # Requested time, a time.perf_counter() value
+    timestamp: float
+    # Frames by camera id. Cameras that returned no frame are missing.
+    frames: Dict[int, TimestampedFrame]
+    # Cameras whose frame was already in the previous bundle (the camera didn't send a new frame)
+    duplicate_camera_ids: List[int]
+    # Cameras whose frame is more than a frame period away from the requested time
+    stale_camera_ids: List[int]
+
+    @property
+    def max_offset(self) -> float:
+        """Largest gap in seconds between the requested time and the time of a frame."""
+        return max(
+            (abs(frame.timestamp - self.timestamp) for frame in self.frames.values()),
+            default=0.0,
+        )
+
+    def get_frame(self, camera_id: int) -> Optional[np.ndarray]:
+        timestamped_frame = self.frames.get(camera_id)
+        return timestamped_frame.frame if timestamped_frame is not None else None
+
+
 class BaseCamera(ABC):
     camera_type: CameraTypes
     is_active: bool = False
@@ -314,6 +396,18 @@ class BaseCamera(ABC):
     height: int
     fps: int
 
+    # Number of recent frames kept by the cameras that capture in a thread
+    frame_buffer_size: int = 8
+    # Channel order of the frames received from the camera
+    native_pixel_format: PixelFormat = "bgr"
+    _frame_buffer: Optional[Deque[TimestampedFrame]] = None
+    _frame_buffer_lock: Optional[threading.Lock] = None
+    _sequence_id: int = 0
+    # MJPEG encoders shared by the clients streaming the camera, by (size, quality, is_video_frame)
+    _jpeg_stream_encoders: Optional[
+        Dict[Tuple[Optional[tuple[int, int]], Optional[int], bool], "JpegStreamEncoder"]
+    ] = None
+
     def __init__(self) -> None:
         atexit.register(self.stop)
 
@@ -340,21 +434,110 @@ class BaseCamera(ABC):
         """Get the latest depth frame from the camera."""
         raise NotImplementedError("Depth frame not available")
 
+    def _push_frame(self, frame: np.ndarray) -> None:
+        """
+        Add a frame received from the camera to the frame buffer.
+        Called by the capture thread, the frame is stored as received (not converted).
+        """
+        if self._frame_buffer is None or self._frame_buffer_lock is None:
+            self._frame_buffer_lock = threading.Lock()
+            self._frame_buffer = deque(maxlen=self.frame_buffer_size)
+        with self._frame_buffer_lock:
+            self._sequence_id += 1
+            self._frame_buffer.append(
+                TimestampedFrame(
+                    timestamp=time.perf_counter(),
+                    sequence_id=self._sequence_id,
+                    frame=frame,
+                    pixel_format=self.native_pixel_format,
+                )
+            )
+
+    def _clear_frame_buffer(self) -> None:
+        if self._frame_buffer is not None and self._frame_buffer_lock is not None:
+            with self._frame_buffer_lock:
+                self._frame_buffer.clear()
+
+    def _get_buffered_frame(
+        self, timestamp: Optional[float] = None
+    ) -> Optional[TimestampedFrame]:
+        """
+        Get the buffered frame captured the nearest to timestamp (a time.perf_counter() value),
+        or the latest frame if timestamp is None. None if the buffer is empty.
+        """
+        if self._frame_buffer is None or self._frame_buffer_lock is None:
+            return None
+        with self._frame_buffer_lock:
+            if not self._frame_buffer:
+                return None
+            if timestamp is None:
+                return self._frame_buffer[-1]
+            return min(self._frame_buffer, key=lambda f: abs(f.timestamp - timestamp))
+
+    def get_timestamped_frame(
+        self,
+        resize: Optional[Tuple[int, int]] = None,
+        timestamp: Optional[float] = None,
+        pixel_format: PixelFormat = "rgb",
+    ) -> Optional[TimestampedFrame]:
+        """
+        Get the buffered frame captured the nearest to timestamp (a time.perf_counter() value),
+        or the latest frame if timestamp is None, in the requested pixel format.
+
+        The conversion is cached on the buffered frame: don't modify the returned frame in place.
+        Cameras without a frame buffer read a frame now and timestamp it.
+        """
+        buffered_frame = self._get_buffered_frame(timestamp)
+
+        if buffered_frame is None:
+            frame = self.get_rgb_frame(resize=resize)
+            if frame is None:
+                return None
+            self._sequence_id += 1
+            return TimestampedFrame(
+                timestamp=time.perf_counter(),
+                sequence_id=self._sequence_id,
+                frame=frame
+                if pixel_format == "rgb"
+                else cv2.cvtColor(frame, cv2.COLOR_RGB2BGR),
+                pixel_format=pixel_format,
+            )
+
+        return TimestampedFrame(
+            timestamp=buffered_frame.timestamp,
+            sequence_id=buffered_frame.sequence_id,
+            frame=buffered_frame.get(pixel_format=pixel_format, resize=resize),
+            pixel_format=pixel_format,
+        )
+
+    def get_timestamped_rgb_frame(
+        self,
+        resize: Optional[Tuple[int, int]] = None,
+        timestamp: Optional[float] = None,
+    ) -> Optional[TimestampedFrame]:
+        """Same as get_timestamped_frame, in RGB."""
+        return self.get_timestamped_frame(resize=resize, timestamp=timestamp)
+
     def get_jpeg_rgb_frame(
         self,
         target_size: Optional[tuple[int, int]],
         quality: Optional[int],
         is_video_frame: bool = True,
     ) -> Optional[bytes]:
+        bgr_frame: Optional[np.ndarray] = None
         if is_video_frame:
-            rgb_frame = self.get_rgb_frame(resize=target_size)
+            timestamped_frame = self.get_timestamped_frame(
+                resize=target_size, pixel_format="bgr"
+            )
+            if timestamped_frame is not None:
+                bgr_frame = timestamped_frame.frame
         else:
             rgb_frame = self.get_depth_frame()
-        if rgb_frame is None or not isinstance(rgb_frame, np.ndarray):
+            if rgb_frame is not None and isinstance(rgb_frame, np.ndarray):
+                bgr_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        if bgr_frame is None:
             return None
 
-        bgr_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-
         params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality else []
         success, jpeg = cv2.imencode(".jpg", bgr_frame, params)
 
@@ -363,6 +546,29 @@ class BaseCamera(ABC):
 
         return jpeg.tobytes()
 
+    def get_jpeg_stream_encoder(
+        self,
+        target_size: Optional[tuple[int, int]],
+        quality: Optional[int],
+        is_video_frame: bool = True,
+    ) -> "JpegStreamEncoder":
+        """
+        Get the encoder shared by all the clients streaming this camera with these parameters.
+        """
+        if self._jpeg_stream_encoders is None:
+            self._jpeg_stream_encoders = {}
+        key = (target_size, quality, is_video_frame)
+        encoder = self._jpeg_stream_encoders.get(key)
+        if encoder is None:
+            encoder = JpegStreamEncoder(
+                camera=self,
+                target_size=target_size,
+                quality=quality,
+                is_video_frame=is_video_frame,
+            )
+            self._jpeg_stream_encoders[key] = encoder
+        return encoder
+
     async def generate_rgb_frames(
         self,
         target_size: Optional[tuple[int, int]],
@@ -370,39 +576,138 @@ class BaseCamera(ABC):
         is_video_frame: bool = True,
         request: Optional[Request] = None,
     ) -> AsyncGenerator:
-        """Generator for video frames"""
+        """
+        Generator for video frames.
+        Frames are encoded once for all the clients streaming with the same parameters.
+        """
+        encoder = self.get_jpeg_stream_encoder(
+            target_size=target_size, quality=quality, is_video_frame=is_video_frame
+        )
+        queue = encoder.add_subscriber()
         try:
-            while self.is_active and (
-                request is None or not await request.is_disconnected()
-            ):
+            while request is None or not await request.is_disconnected():
+                frame = await queue.get()
+                if frame is None:
+                    # The encoder stopped: the camera is not active anymore
+                    break
+                yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
+        except GeneratorExit:
+            logger.info(f"{self.camera_name} Generator exited")
+        except KeyboardInterrupt:
+            logger.info(f"{self.camera_name} Keyboard interrupt")
+            self.stop()
+        except Exception as e:
+            logger.warning(f"{self.camera_name} Error generating frames: {str(e)}")
+            self.stop()
+        finally:
+            encoder.remove_subscriber(queue)
+
+
+class JpegStreamEncoder:
+    """
+    Encode the frames of a camera to JPEG once and send the bytes to all the subscribers.
+
+    There is one encoder per (camera, size, quality). It runs while it has subscribers.
+    Each subscriber gets a queue holding only the latest frame: a slow client skips
+    frames instead of slowing down the encoder and the other clients.
+    """
+
+    def __init__(
+        self,
+        camera: BaseCamera,
+        target_size: Optional[tuple[int, int]],
+        quality: Optional[int],
+        is_video_frame: bool = True,
+    ):
+        self.camera = camera
+        self.target_size = target_size
+        self.quality = quality
+        self.is_video_frame = is_video_frame
+        self._subscribers: List[asyncio.Queue[Optional[bytes]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_sequence_id: Optional[int] = None
+
+    @property
+    def nb_subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def add_subscriber(self) -> "asyncio.Queue[Optional[bytes]]":
+        """
+        Return a queue that receives the JPEG bytes of the new frames, then None when the encoder stops.
+        Call remove_subscriber when done.
+        """
+        queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=1)
+        self._subscribers.append(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def remove_subscriber(self, queue: "asyncio.Queue[Optional[bytes]]") -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _publish(self, frame: Optional[bytes]) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                # Drop the frame the client didn't read yet
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    def _encode_new_frame(self) -> Tuple[Optional[bytes], bool]:
+        """
+        Encode the latest frame of the camera if it wasn't encoded yet.
+        Returns (jpeg bytes or None if the capture failed, whether the frame is new).
+        """
+        if self.is_video_frame:
+            # OpenCV encodes BGR frames: no conversion for cameras capturing in BGR
+            timestamped_frame = self.camera.get_timestamped_frame(
+                resize=self.target_size, pixel_format="bgr"
+            )
+            if timestamped_frame is None:
+                return None, True
+            if timestamped_frame.sequence_id == self._last_sequence_id:
+                return None, False
+            self._last_sequence_id = timestamped_frame.sequence_id
+            bgr_frame: Optional[np.ndarray] = timestamped_frame.frame
+        else:
+            rgb_frame = self.camera.get_depth_frame()
+            if rgb_frame is None or not isinstance(rgb_frame, np.ndarray):
+                return None, True
+            bgr_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        if bgr_frame is None:
+            return None, True
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality] if self.quality else []
+        success, jpeg = cv2.imencode(".jpg", bgr_frame, params)
+        if not success:
+            return None, True
+        return jpeg.tobytes(), True
+
+    async def _run(self) -> None:
+        try:
+            while self._subscribers and self.camera.is_active:
                 time_start = time.perf_counter()
-                frame = self.get_jpeg_rgb_frame(
-                    is_video_frame=is_video_frame,
-                    target_size=target_size,
-                    quality=quality,
-                )
+                frame, is_new = await asyncio.to_thread(self._encode_new_frame)
+                if not is_new:
+                    # No new frame from the camera yet, check again soon
+                    await asyncio.sleep(1 / (4 * (self.camera.fps or 30)))
+                    continue
                 if frame is not None:
-                    yield (
-                        b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
-                    )
+                    self._publish(frame)
                 else:
                     logger.warning(
-                        f"{self.camera_name} Skipped frame due to capture error"
+                        f"{self.camera.camera_name} Skipped frame due to capture error"
                     )
                     # Prevent tight loop
                     await asyncio.sleep(0.02)
                 # Wait according to the fps
                 time_spent = time.perf_counter() - time_start
-                time_to_wait = max(0, 1 / self.fps - time_spent)
-                await asyncio.sleep(time_to_wait)
-        except GeneratorExit:
-            logger.info(f"{self.camera_name} Generator exited")
-        except KeyboardInterrupt:
-            logger.info(f"{self.camera_name} Keyboard interrupt")
-            self.stop()
+                await asyncio.sleep(max(0, 1 / (self.camera.fps or 30) - time_spent))
         except Exception as e:
-            logger.warning(f"{self.camera_name} Error generating frames: {str(e)}")
-            self.stop()
+            logger.warning(f"{self.camera.camera_name} Error encoding frames: {str(e)}")
+        finally:
+            # Tell the remaining subscribers that the stream ended
+            self._publish(None)
 
 
 class VideoCamera(threading.Thread, BaseCamera):
@@ -523,6 +828,7 @@ Camera type: {self.camera_type}""")
                 if not self.video or not self.video.isOpened():
                     logger.warning(f"{self.camera_name}: is not initialized")
                     self.last_frame = None
+                    self._clear_frame_buffer()
                     continue
 
                 # The stereo camera fails on the first 2 attempts
@@ -535,8 +841,10 @@ Camera type: {self.camera_type}""")
                 if not success:
                     logger.warning(f"{self.camera_name}: Failed to grab frame")
                     self.last_frame = None
+                    self._clear_frame_buffer()
                 else:
                     self.last_frame = frame
+                    self._push_frame(cast(np.ndarray, frame))
 
     def get_rgb_frame(
         self, resize: Optional[tuple[int, int]] = None
@@ -549,18 +857,21 @@ Camera type: {self.camera_type}""")
         """
         if not self.is_active:
             logger.warning(f"{self.camera_name}: is not active")
-        if self.last_frame is None:
+        last_frame = self.last_frame
+        if last_frame is None:
             logger.warning(f"{self.camera_name}: No frame available")
+            return None
 
-        frame: Optional[np.ndarray] = None
-        # Convert from BGR to RGB
-        if self.last_frame is not None:
-            frame = cv2.cvtColor(self.last_frame, cv2.COLOR_BGR2RGB)
-
-        if resize is not None and frame is not None:
-            frame = cv2.resize(src=frame, dsize=resize, interpolation=cv2.INTER_AREA)
-
-        return frame
+        # Use the latest buffered frame, which caches its conversions for the other consumers
+        buffered_frame = self._get_buffered_frame()
+        if buffered_frame is None or buffered_frame.frame is not last_frame:
+            buffered_frame = TimestampedFrame(
+                timestamp=time.perf_counter(),
+                sequence_id=self._sequence_id,
+                frame=last_frame,
+                pixel_format=self.native_pixel_format,
+            )
+        return buffered_frame.get(pixel_format="rgb", resize=resize)
 
 
 class DummyCamera(VideoCamera):
@@ -932,6 +1243,8 @@ class ZMQCamera(VideoCamera):
     """
 
     camera_type: CameraTypes = "zmq"
+    # The frames are sent in RGB: they are converted when a consumer asks for BGR
+    native_pixel_format: PixelFormat = "rgb"
     connect_to: str
     topic: Optional[str]
     stream_initialized: bool = False
@@ -1006,7 +1319,8 @@ class ZMQCamera(VideoCamera):
         frame = np.frombuffer(frame_bytes, dtype=np.dtype(data["dtype"]))
         reconstructed_frame = frame.reshape(data["shape"])
         with self.lock:
-            self.last_frame = cv2.cvtColor(reconstructed_frame, cv2.COLOR_RGB2BGR)
+            self.last_frame = reconstructed_frame
+        self._push_frame(reconstructed_frame)
 
     def run(self) -> None:
         """Polls the ZMQ PULL socket and manually filters messages by topic."""
@@ -1491,6 +1805,71 @@ class AllCameras:
 
         return frame
 
+    def get_synced_frames(
+        self,
+        camera_ids: List[int],
+        timestamp: Optional[float] = None,
+        resize: Optional[Tuple[int, int]] = None,
+        previous: Optional[SyncedFrames] = None,
+        executor: Optional[Executor] = None,
+        pixel_format: PixelFormat = "rgb",
+    ) -> SyncedFrames:
+        """
+        Get the frames of the cameras captured the nearest to timestamp, a time.perf_counter()
+        value (now if None), in pixel_format. Pass the previous bundle to detect cameras that returned the same frame twice.
+        Pass an executor to read the cameras in parallel.
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        cameras: List[Tuple[int, BaseCamera]] = []
+        for camera_id in camera_ids:
+            camera = self.get_camera_by_id(camera_id)
+            if camera is not None:
+                cameras.append((camera_id, camera))
+
+        def read_frame(camera: BaseCamera) -> Optional[TimestampedFrame]:
+            try:
+                return camera.get_timestamped_frame(
+                    resize=resize, timestamp=timestamp, pixel_format=pixel_format
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to capture frame from {camera.camera_name}: {e}"
+                )
+                return None
+
+        if executor is not None:
+            results = list(executor.map(read_frame, [camera for _, camera in cameras]))
+        else:
+            results = [read_frame(camera) for _, camera in cameras]
+
+        frames: Dict[int, TimestampedFrame] = {}
+        duplicate_camera_ids: List[int] = []
+        stale_camera_ids: List[int] = []
+        for (camera_id, camera), timestamped_frame in zip(cameras, results):
+            if timestamped_frame is None:
+                continue
+            frames[camera_id] = timestamped_frame
+
+            previous_frame = previous.frames.get(camera_id) if previous else None
+            if (
+                previous_frame is not None
+                and previous_frame.sequence_id == timestamped_frame.sequence_id
+            ):
+                duplicate_camera_ids.append(camera_id)
+
+            fps = getattr(camera, "fps", 0) or 30
+            if abs(timestamped_frame.timestamp - timestamp) > 1.5 / fps:
+                stale_camera_ids.append(camera_id)
+
+        return SyncedFrames(
+            timestamp=timestamp,
+            frames=frames,
+            duplicate_camera_ids=duplicate_camera_ids,
+            stale_camera_ids=stale_camera_ids,
+        )
+
     def get_rgb_frames_for_all_cameras(
         self, resize: Optional[Tuple[int, int]] = None
     ) -> Dict[str, Optional[cv2.typing.MatLike]]:
@@ -44,6 +44,25 @@ class Configuration(BaseModel):
 
     # Recording
     MAIN_CAMERA_ID: Optional[int] = None  # defaults to min(detected cameras)
+    # Encode videos while recording instead of keeping all frames in memory until save
+    STREAMING_VIDEO_ENCODING: bool = True
+    # When a recording tick overruns, skip the missed ticks or record the previous step again
+    RECORDING_OVERRUN_POLICY: Literal["skip", "duplicate"] = "skip"
+
+    # AI control
+    # Send camera frames to the inference servers as JPEG of this quality (0-100)
+    # instead of raw pixels. Trades a bit of image quality for bandwidth.
+    INFERENCE_JPEG_QUALITY: Optional[int] = None
+
+    # Robot state
+    # Rate (Hz) at which a background thread samples the joints of each connected robot
+    # with a thread-safe motors bus (Feetech), shared by the recorder, the AI control loops
+    # and the endpoints. The thread pauses while nothing reads the samples. Set to 0 to
+    # disable.
+    STATE_BROADCAST_FREQ: int = 60
+    # Rate (Hz) at which torque, voltage and temperature are sampled, while an endpoint
+    # reads them. Set to 0 to disable.
+    STATE_TELEMETRY_FREQ: float = 1
 
     # Whether to initialize the RealSense camera
     ENABLE_REALSENSE: bool = True
@@ -55,6 +74,18 @@ class Configuration(BaseModel):
 
     # How simulation should be run
     SIM_MODE: SimulationMode = SimulationMode.headless
+    # Step the physics of the simulation. If False, the simulation is only used for
+    # kinematics (FK, IK, visualization): joint states are set without stepping.
+    SIM_PHYSICS: bool = True
+    # How the simulation mirrors the positions written to the robots.
+    # "always": on every write. "lazy": only when the simulation is read (FK, IK, sim
+    # joints), at most SIM_MIRRORING_MAX_FREQ times per second. The GUI is then only
+    # updated on these reads.
+    SIM_MIRRORING: Literal["always", "lazy"] = "always"
+    SIM_MIRRORING_MAX_FREQ: float = 30
+    # Compute the forward and inverse kinematics of the arms with NumPy from their URDF,
+    # or with the PyBullet simulation. Falls back to PyBullet if the URDF isn't supported.
+    KINEMATICS_BACKEND: Literal["numpy", "pybullet"] = "numpy"
     # Only simulation: Only use the simulation
     ONLY_SIMULATION: bool = False
     SIMULATE_CAMERAS: bool = False
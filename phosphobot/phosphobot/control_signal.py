@@ -1,12 +1,24 @@
+import asyncio
 import threading
-from typing import Literal
+from typing import TYPE_CHECKING, Awaitable, List, Literal, TypeVar
 from uuid import uuid4
 
+if TYPE_CHECKING:
+    from phosphobot.leader_follower import PairTiming
+    from phosphobot.models import LeaderFollowerPairStatus
+
 # Class to control the auto control thread
 # Learn more about threading in Python:
 # https://medium.com/@yashwanthnandam/understanding-thread-lock-and-thread-release-and-rlock-b95e1ceb4a17#:~:text=A%20Lock%20object%20in%20Python's,Lock%20until%20it%20is%20released.
 
 
+T = TypeVar("T")
+
+
+class ControlStoppedError(Exception):
+    """The control signal was stopped while waiting for a result."""
+
+
 class ControlSignal:
     def __init__(self) -> None:
         self._running = False
@@ -24,6 +36,50 @@ class ControlSignal:
         with self._lock:
             return self._running
 
+    async def run_until_stopped(
+        self, awaitable: Awaitable[T], poll_interval: float = 0.05
+    ) -> T:
+        """
+        Await awaitable, e.g. a request to an inference server. If the signal is stopped
+        meanwhile, it's cancelled and ControlStoppedError is raised, so that a control loop
+        stops without waiting for the result.
+        """
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=poll_interval)
+                if done:
+                    return task.result()
+                if not self.is_in_loop():
+                    raise ControlStoppedError()
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+class LeaderFollowerSignal(ControlSignal):
+    """Stop signal shared by the control loops of the leader-follower pairs, and their timings."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._timings: List["PairTiming"] = []
+
+    def start(self) -> None:
+        with self._lock:
+            self._running = True
+            self._timings = []
+
+    def set_timings(self, timings: List["PairTiming"]) -> None:
+        with self._lock:
+            self._timings = timings
+
+    def pairs_status(self) -> List["LeaderFollowerPairStatus"]:
+        with self._lock:
+            if not self._running:
+                return []
+            timings = list(self._timings)
+        return [timing.summary() for timing in timings]
+
 
 class AIControlSignal(ControlSignal):
     _status: Literal["stopped", "running", "paused", "waiting"]
@@ -22,8 +22,9 @@ from supabase_auth.types import Session as SupabaseSession
 
 from phosphobot.ai_control import CustomAIControlSignal, setup_ai_control
 from phosphobot.camera import AllCameras, get_all_cameras
-from phosphobot.control_signal import ControlSignal
-from phosphobot.hardware.base import BaseManipulator
+from phosphobot.control_signal import ControlSignal, LeaderFollowerSignal
+from phosphobot.hardware.base import BaseManipulator, BaseRobot
+from phosphobot.hardware.state import RobotState
 from phosphobot.leader_follower import RobotPair, start_leader_follower_loop
 from phosphobot.models import (
     AIControlStatusResponse,
@@ -79,10 +80,17 @@ router = APIRouter(tags=["control"])
 # Object that controls the global /auto, /gravity state in a thread safe way
 signal_ai_control = CustomAIControlSignal()
 signal_gravity_control = ControlSignal()
-signal_leader_follower = ControlSignal()
+signal_leader_follower = LeaderFollowerSignal()
 signal_vr_control = ControlSignal()
 
 
+def _latest_telemetry(robot: BaseRobot, max_staleness: float) -> Optional[RobotState]:
+    """Telemetry sampled in the background at most max_staleness seconds ago, if any."""
+    if isinstance(robot, BaseManipulator) and robot.state_broadcaster is not None:
+        return robot.state_broadcaster.latest_telemetry(max_staleness=max_staleness)
+    return None
+
+
 @router.post(
     "/move/init",
     response_model=StatusResponse,
@@ -130,21 +138,25 @@ async def move_teleop_ws(
 
     await websocket.accept()
 
+    # Only stop the actuators of this connection when it closes
+    session = f"ws-{id(websocket)}"
     signal_vr_control.start()
     try:
         while True:
             data = await websocket.receive_text()
             try:
                 control_data = AppControlData.model_validate_json(data)
-                await teleop_manager.process_control_data(control_data)
+                teleop_manager.submit_control_data(control_data, session=session)
                 await teleop_manager.send_status_updates(websocket)
             except json.JSONDecodeError as e:
                 logger.error(f"WebSocket JSON error: {e}")
 
     except WebSocketDisconnect:
         logger.warning("WebSocket client disconnected")
-
-    signal_vr_control.stop()
+    finally:
+        # Don't run the commands received before the disconnection
+        teleop_manager.stop_actuators(session)
+        signal_vr_control.stop()
 
 
 @router.post("/move/teleop/udp", response_model=UDPServerInformationResponse)
@@ -543,6 +555,7 @@ async def end_effector_read(
 )
 async def read_voltage(
     robot_id: int = 0,
+    max_staleness: float = 2.0,
     rcm: RobotConnectionManager = Depends(get_rcm),
 ) -> VoltageReadResponse:
     """
@@ -555,7 +568,11 @@ async def read_voltage(
             detail="Robot does not support reading voltage",
         )
 
-    voltage = robot.current_voltage()
+    telemetry = _latest_telemetry(robot, max_staleness)
+    if telemetry is not None and telemetry.voltage is not None:
+        voltage = telemetry.voltage
+    else:
+        voltage = robot.current_voltage()
     return VoltageReadResponse(
         current_voltage=voltage.tolist() if voltage is not None else None,
     )
@@ -569,6 +586,7 @@ async def read_voltage(
 )
 async def read_temperature(
     robot_id: int = 0,
+    max_staleness: float = 2.0,
     rcm: RobotConnectionManager = Depends(get_rcm),
 ) -> TemperatureReadResponse:
     """
@@ -581,7 +599,11 @@ async def read_temperature(
             detail="Robot does not support reading temperature",
         )
 
-    temperature = robot.current_temperature()
+    telemetry = _latest_telemetry(robot, max_staleness)
+    if telemetry is not None and telemetry.temperature is not None:
+        temperature = telemetry.temperature
+    else:
+        temperature = robot.current_temperature()
 
     return TemperatureReadResponse(
         current_max_Temperature=temperature,
@@ -622,6 +644,7 @@ async def write_temperature(
 )
 async def read_torque(
     robot_id: int = 0,
+    max_staleness: float = 2.0,
     rcm: RobotConnectionManager = Depends(get_rcm),
 ) -> TorqueReadResponse:
     """
@@ -635,11 +658,15 @@ async def read_torque(
             detail="Robot does not support reading torque",
         )
 
-    current_torque = robot.current_torque()
+    telemetry = _latest_telemetry(robot, max_staleness)
+    if telemetry is not None and telemetry.torque is not None:
+        torques = telemetry.torque
+    else:
+        torques = robot.current_torque()
 
     # Replace NaN values with None and convert to list
     current_torque = [
-        float(torque) if not np.isnan(torque) else None for torque in current_torque
+        float(torque) if not np.isnan(torque) else None for torque in torques
     ]
 
     return TorqueReadResponse(current_torque=current_torque)
@@ -706,7 +733,9 @@ async def read_joints(
     Read joint position.
     """
     if request is None:
-        request = JointsReadRequest(unit="rad", joints_ids=None, source="robot")
+        request = JointsReadRequest(
+            unit="rad", joints_ids=None, source="robot", max_staleness=0.1
+        )
 
     robot = await rcm.get_robot(robot_id)
 
@@ -716,13 +745,22 @@ async def read_joints(
             detail="Robot does not support reading joint positions",
         )
 
-    current_units_position = robot.read_joints_position(
-        unit=request.unit, joints_ids=request.joints_ids, source=request.source
-    )
+    if (
+        isinstance(robot, BaseManipulator)
+        and request.source == "robot"
+        and request.joints_ids is None
+        and request.max_staleness is not None
+    ):
+        angles = robot.get_joints_position(
+            unit=request.unit, max_staleness=request.max_staleness
+        )
+    else:
+        angles = robot.read_joints_position(
+            unit=request.unit, joints_ids=request.joints_ids, source=request.source
+        )
     # Replace NaN values with None and convert to list
     current_units_position = [
-        float(angle) if not np.isnan(angle) else None
-        for angle in current_units_position
+        float(angle) if not np.isnan(angle) else None for angle in angles
     ]
 
     return JointsReadResponse(
@@ -1146,6 +1184,7 @@ async def start_ai_control(
         angle_format=query.angle_format,
         min_angle=query.min_angle,
         max_angle=query.max_angle,
+        prefetch_threshold=query.prefetch_threshold,
     )
 
     return AIControlStatusResponse(
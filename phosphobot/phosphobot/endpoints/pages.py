@@ -1,12 +1,14 @@
+import asyncio
 import base64
 import os
 import random
 import traceback
 from pathlib import Path, PurePath
-from typing import Literal, Union, cast
+from typing import Callable, List, Literal, TypeVar, Union, cast
+from urllib.parse import quote
 
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from huggingface_hub import HfApi
 from loguru import logger
 
@@ -20,6 +22,7 @@ from phosphobot.models import (
     BaseDataset,
     BrowseFilesResponse,
     BrowserFilesRequest,
+    DatasetCompactRequest,
     DatasetListResponse,
     DatasetRepairRequest,
     DatasetShuffleRequest,
@@ -42,15 +45,19 @@ from phosphobot.models import (
     VizSettingsResponse,
     WandBTokenRequest,
 )
+from phosphobot.models.dataset_catalog import get_dataset_catalog
+from phosphobot.recorder import DatasetBusyError, lock_datasets
 from phosphobot.utils import (
+    TTLCache,
+    get_cached_hf_username_or_orgid,
     get_hf_token,
     get_home_app_path,
     get_resources_path,
     is_running_on_pi,
+    iter_zip_folder,
     login_to_hf,
     parse_hf_username_or_orgid,
     sanitize_path,
-    zip_folder,
 )
 
 router = APIRouter(tags=["pages"])
@@ -59,6 +66,11 @@ router = APIRouter(tags=["pages"])
 ROOT_DIR = str(get_home_app_path() / "recordings")
 INDEX_PATH = get_resources_path() / "dist" / "index.html"
 
+# Datasets on the Hugging Face Hub, by username or org ID
+_hub_datasets_cache: TTLCache[List[str]] = TTLCache(ttl=60)
+
+_T = TypeVar("_T")
+
 
 # Optionally, if you want the dashboard to be served at the root endpoint:
 @router.get("/auth", response_class=HTMLResponse)
@@ -138,16 +150,9 @@ def list_directory_items(path: str, root_dir: str = "") -> list[ItemInfo]:
     items = os.listdir(full_path)
     items_info = []
     username_or_org_id = None
-    api = None
     if path.endswith("lerobot_v2") or path.endswith("lerobot_v2.1"):
-        try:
-            api = HfApi()
-            user_info = api.whoami()
-            username_or_org_id = parse_hf_username_or_orgid(user_info)
-        # If we can't get the username or org ID, we can't delete the dataset
-        except Exception as e:
-            logger.debug(f"Error getting Hugging Face username or org ID: {str(e)}")
-            pass
+        # Cached: whoami is a network call
+        username_or_org_id = get_cached_hf_username_or_orgid()
 
     for item in items:
         item_path = os.path.join(path, item)
@@ -164,7 +169,7 @@ def list_directory_items(path: str, root_dir: str = "") -> list[ItemInfo]:
             else None,
         )
         if is_dir:
-            if api is not None and username_or_org_id is not None:
+            if username_or_org_id is not None:
                 info.previewUrl = f"https://lerobot-visualize-dataset.hf.space/{username_or_org_id}/{info.name}"
                 info.huggingfaceUrl = (
                     f"https://huggingface.co/datasets/{username_or_org_id}/{info.name}"
@@ -201,7 +206,9 @@ async def files(query: BrowserFilesRequest) -> Union[BrowseFilesResponse, FileRe
     if os.path.isfile(full_path):
         return FileResponse(full_path)
 
-    items_info = list_directory_items(path=safe_path, root_dir=ROOT_DIR)
+    items_info = await asyncio.to_thread(
+        list_directory_items, path=safe_path, root_dir=ROOT_DIR
+    )
 
     # Prepare episode data if in a dataset structure
     episode_paths = []
@@ -210,23 +217,30 @@ async def files(query: BrowserFilesRequest) -> Union[BrowseFilesResponse, FileRe
     parts = PurePath(safe_path).parts
 
     if len(parts) > 1 and parts[-2] in {"json", "lerobot_v2", "lerobot_v2.1"}:
-        data_dir = root / safe_path / "data"
-        # look for chunk folders
-        chunk0 = data_dir / "chunk-000"
-        if chunk0.exists():
-            # gather all parquet files
-            for p in sorted(data_dir.glob("chunk-*/**/*.parquet")):
-                # basename like "whatever_123.parquet"
-                episode_paths.append(str(p))
-                # extract the numeric ID
-                stem = p.stem  # e.g. "whatever_123"
-                try:
-                    ep_id = int(stem.split("_")[-1])
-                except ValueError:
-                    continue
-                episode_ids.append(ep_id)
-            # sort descending for IDs
-            episode_ids.sort(reverse=True)
+        # The parquets are listed in the catalog
+        entry = await asyncio.to_thread(
+            get_dataset_catalog().get, str(root / safe_path)
+        )
+        if entry is not None:
+            parquet_paths = entry.episode_paths
+        else:
+            # Not a readable dataset, e.g. its info.json is missing
+            data_dir = root / safe_path / "data"
+            parquet_paths = [
+                str(p) for p in sorted(data_dir.glob("chunk-*/**/*.parquet"))
+            ]
+        for episode_path in parquet_paths:
+            # basename like "whatever_123.parquet"
+            episode_paths.append(episode_path)
+            # extract the numeric ID
+            stem = Path(episode_path).stem  # e.g. "whatever_123"
+            try:
+                ep_id = int(stem.split("_")[-1])
+            except ValueError:
+                continue
+            episode_ids.append(ep_id)
+        # sort descending for IDs
+        episode_ids.sort(reverse=True)
 
     response_data = BrowseFilesResponse(
         directoryTitle=f"Directory: {safe_path}",
@@ -386,6 +400,29 @@ async def submit_user_settings(user_settings: AdminSettingsRequest) -> StatusRes
         )
 
 
+async def update_catalog(*dataset_paths: str) -> None:
+    """Update the catalog entries of modified datasets, in a thread."""
+    catalog = get_dataset_catalog()
+    for dataset_path in dataset_paths:
+        await asyncio.to_thread(catalog.update, dataset_path)
+
+
+async def edit_datasets(dataset_paths: List[str], edit: Callable[[], _T]) -> _T:
+    """
+    Run an edit of datasets in a thread, while the recorder doesn't write them.
+    Raises a 409 if episodes of one of the datasets are being recorded or saved.
+    """
+
+    def run() -> _T:
+        with lock_datasets(*dataset_paths):
+            return edit()
+
+    try:
+        return await asyncio.to_thread(run)
+    except DatasetBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.post("/dataset/delete", response_model=StatusResponse)
 async def delete_dataset(request: Request, path: str) -> StatusResponse:
     dataset_path = os.path.join(ROOT_DIR, path)
@@ -401,7 +438,8 @@ async def delete_dataset(request: Request, path: str) -> StatusResponse:
         )
 
     dataset = BaseDataset(path=dataset_path)
-    dataset.delete()
+    await edit_datasets([dataset_path], dataset.delete)
+    await asyncio.to_thread(get_dataset_catalog().remove, dataset_path)
 
     return StatusResponse(status="ok")
 
@@ -423,56 +461,30 @@ async def get_dataset_info(path: str) -> InfoResponse:
             detail="Invalid dataset path. Please use the delete button provided in the admin page to delete dataset.",
         )
 
-    meta_folder_path = os.path.join(
-        dataset_path,
-        "meta",
-    )
-
-    try:
-        info = InfoModel.from_json(
-            meta_folder_path=meta_folder_path,
-            format=cast(
-                Literal["lerobot_v2", "lerobot_v2.1"],
-                Path(path).parts[0],
-            ),
-        )
-    except Exception as e:
-        logger.warning(f"Error loading dataset info: {e}")
+    # The catalog scans the dataset and renders the thumbnails only if it changed
+    catalog = get_dataset_catalog()
+    entry = await asyncio.to_thread(catalog.get, dataset_path)
+    if entry is None:
         return InfoResponse(
             status="error",
         )
-
-    import cv2
+    thumbnails = await asyncio.to_thread(catalog.get_thumbnails, dataset_path)
 
     image_frames = {}
-    for key in info.features.observation_images.keys():
-        # Extract first frame from first video file
-        video_path = os.path.join(
-            dataset_path, "videos", "chunk-000", key, "episode_000000.mp4"
-        )
-        if os.path.exists(video_path):
-            cap = cv2.VideoCapture(video_path)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    # Resize the frame to a smaller size
-                    frame = cv2.resize(frame, (320, 240))
-                    # Convert the frame to bytes
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    image_frames[key] = base64.b64encode(buffer.tobytes()).decode(
-                        "utf-8"
-                    )
-                cap.release()
-        else:
-            logger.warning(f"Video file {video_path} not found.")
+    for key in entry.camera_keys:
+        if key not in thumbnails:
+            logger.warning(f"No video found for {key} in dataset {path}.")
             return InfoResponse(status="error")
+        image_frames[key] = base64.b64encode(thumbnails[key]).decode("utf-8")
 
     return InfoResponse(
         status="ok",
-        robot_type=info.robot_type,
-        robot_dof=info.features.observation_state.shape[0],
-        number_of_episodes=info.total_episodes,
-        image_keys=list(info.features.observation_images.keys()),
+        robot_type=entry.robot_type,
+        robot_dof=entry.robot_dof,
+        number_of_episodes=entry.total_episodes,
+        number_of_frames=entry.total_frames,
+        disk_size=entry.disk_size,
+        image_keys=entry.camera_keys,
         image_frames=image_frames,
     )
 
@@ -570,11 +582,16 @@ async def merge_datasets(merge_request: MergeDatasetsRequest) -> StatusResponse:
         path=os.path.join(ROOT_DIR, merge_request.second_dataset)
     )
     try:
-        initial_dataset.merge_datasets(
-            second_dataset=second_dataset,
-            new_dataset_name=merge_request.new_dataset_name,
-            video_transform=merge_request.image_key_mappings,
+        await edit_datasets(
+            [first_dataset_path, second_dataset_path],
+            lambda: initial_dataset.merge_datasets(
+                second_dataset=second_dataset,
+                new_dataset_name=merge_request.new_dataset_name,
+                video_transform=merge_request.image_key_mappings,
+            ),
         )
+    except HTTPException:
+        raise
     # if the dataset already exists, we raise an error
     except FileExistsError as e:
         raise HTTPException(
@@ -588,9 +605,33 @@ async def merge_datasets(merge_request: MergeDatasetsRequest) -> StatusResponse:
             detail=f"Error merging datasets: {e}",
         )
 
+    await update_catalog(
+        os.path.join(
+            os.path.dirname(first_dataset_path), merge_request.new_dataset_name
+        )
+    )
     return StatusResponse(status="ok")
 
 
+def get_hub_datasets() -> List[str]:
+    """
+    IDs of the datasets of the Hugging Face user or org with write access, cached for a
+    minute. Raises a ValueError if there is no such user or org.
+    """
+    username_or_orgid = get_cached_hf_username_or_orgid()
+    if username_or_orgid is None:
+        raise ValueError("No Hugging Face user or org with write access")
+    return _hub_datasets_cache.get(
+        username_or_orgid,
+        lambda: [
+            dataset.id
+            for dataset in HfApi().list_datasets(
+                author=username_or_orgid, limit=100, gated=False
+            )
+        ],
+    )
+
+
 @router.post("/dataset/list", response_model=DatasetListResponse)
 async def list_datasets() -> DatasetListResponse:
     """
@@ -614,20 +655,14 @@ async def list_datasets() -> DatasetListResponse:
 
     # Keep only directories
     try:
-        api = HfApi()
-        user_info = api.whoami()
-        # Get the username or org that has write access
-        username_or_orgid = parse_hf_username_or_orgid(user_info)
-        # List HF datasets
-        hf_datasets = list(
-            api.list_datasets(author=username_or_orgid, limit=100, gated=False)
-        )
+        # Network calls: cached, and run in a thread
+        hf_datasets = await asyncio.to_thread(get_hub_datasets)
         # Filter datasets that are in the local folder
         pushed_datasets = []
-        for dataset in hf_datasets:
-            only_name = dataset.id.split("/")[-1]
+        for dataset_id in hf_datasets:
+            only_name = dataset_id.split("/")[-1]
             if only_name in datasets_folders:
-                pushed_datasets.append(dataset.id)
+                pushed_datasets.append(dataset_id)
 
     except Exception:
         logger.info("No Hugging Face token found.")
@@ -665,26 +700,42 @@ async def delete_episode(query: DeleteEpisodeRequest) -> StatusResponse:
             detail="This feature is not available for v2 datasets. Please use the v2.1 dataset format.",
         )
 
-    # Delete the data file
-    dataset.delete_episode(episode_id=query.episode_id, update_hub=True)
+    # Delete the data file. The following episodes are renumbered by /dataset/compact,
+    # or before the dataset is pushed or downloaded.
+    await edit_datasets(
+        [dataset.path],
+        lambda: dataset.delete_episode(episode_id=query.episode_id, update_hub=True),
+    )
+    await update_catalog(dataset.path)
     return StatusResponse(status="ok")
 
 
 @router.post("/dataset/sync")
 async def sync_dataset(path: str) -> StatusResponse:
     # Extract dataset name et huggingface repo id from the path
-    dataset = BaseDataset(path=os.path.join(ROOT_DIR, path))
+    if path.startswith("lerobot"):
+        # Deleted episodes are compacted before the upload
+        dataset: BaseDataset = LeRobotDataset(path=os.path.join(ROOT_DIR, path))
+    else:
+        dataset = BaseDataset(path=os.path.join(ROOT_DIR, path))
 
-    dataset.sync_local_to_hub()
+    if isinstance(dataset, LeRobotDataset):
+        await edit_datasets([dataset.path], dataset.compact_episodes)
+    # The upload doesn't edit the dataset: recording can go on meanwhile
+    await asyncio.to_thread(BaseDataset.sync_local_to_hub, dataset)
+    # The dataset may have been compacted, and is now on the Hub
+    await update_catalog(dataset.path)
+    _hub_datasets_cache.clear()
 
     # Redirect to the parent directory after deletion
     return StatusResponse(status="ok")
 
 
 @router.get("/dataset/download")
-async def download_folder(folder_path: str) -> FileResponse:
+async def download_folder(folder_path: str) -> StreamingResponse:
     """
-    Download a folder as a ZIP file.
+    Download a folder as a ZIP file. The archive is streamed as the files are read:
+    the download starts right away, and no archive is written to disk.
     """
     # Construct the full path
     full_path = os.path.join(ROOT_DIR, folder_path)
@@ -693,13 +744,25 @@ async def download_folder(folder_path: str) -> FileResponse:
     if not os.path.exists(full_path) or not os.path.isdir(full_path):
         raise HTTPException(status_code=404, detail="Folder not found")
 
-    # Create a temporary ZIP file
-    zip_path = f"{full_path}.zip"
-    zip_folder(full_path, zip_path)
-
-    # Return the ZIP file as a response
-    return FileResponse(
-        zip_path, filename=os.path.basename(zip_path), media_type="application/zip"
+    # Don't export the gaps left by deleted episodes: LeRobot can't load them
+    if os.path.exists(os.path.join(full_path, "meta", "tombstones.json")):
+        dataset = LeRobotDataset(path=full_path)
+        await edit_datasets([full_path], dataset.compact_episodes)
+        await update_catalog(dataset.path)
+
+    filename = f"{os.path.basename(os.path.normpath(full_path))}.zip"
+    # Like FileResponse, non-ASCII file names are percent-encoded
+    quoted_filename = quote(filename)
+    content_disposition = (
+        f'attachment; filename="{filename}"'
+        if quoted_filename == filename
+        else f"attachment; filename*=utf-8''{quoted_filename}"
+    )
+    # The generator reads files: StreamingResponse iterates it in a thread pool
+    return StreamingResponse(
+        iter_zip_folder(full_path),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition},
     )
 
 
@@ -903,6 +966,7 @@ async def hf_download_dataset(query: HFDownloadDatasetRequest) -> StatusResponse
             ignore_patterns=[".git", ".gitignore"],
             force_download=True,
         )
+        await update_catalog(os.path.join(ROOT_DIR, "lerobot_v2.1", dataset_name))
 
         return StatusResponse(
             status="ok",
@@ -942,9 +1006,13 @@ async def repair_dataset(query: DatasetRepairRequest) -> StatusResponse:
 
     # For the moment, we repair parquets files only, we need to improve this function to recaculate the meta files as well
 
-    result = EpisodesModel.repair_parquets(
-        parquets_path=os.path.join(dataset_path, "data", "chunk-000"),
+    result = await edit_datasets(
+        [dataset_path],
+        lambda: EpisodesModel.repair_parquets(
+            parquets_path=os.path.join(dataset_path, "data", "chunk-000"),
+        ),
     )
+    await update_catalog(dataset_path)
 
     if result:
         return StatusResponse(status="ok")
@@ -978,17 +1046,30 @@ async def split_dataset(query: DatasetSplitRequest) -> StatusResponse:
     dataset = LeRobotDataset(path=dataset_path, enforce_path=True)
 
     try:
-        dataset.split_dataset(
-            split_ratio=query.split_ratio,
-            first_split_name=query.first_split_name,
-            second_split_name=query.second_split_name,
+        await edit_datasets(
+            [dataset_path],
+            lambda: dataset.split_dataset(
+                split_ratio=query.split_ratio,
+                first_split_name=query.first_split_name,
+                second_split_name=query.second_split_name,
+            ),
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.warning(f"Error splitting dataset: {e}")
         return StatusResponse(
             status="error",
             message=f"Error splitting dataset: {e}",
         )
+    # The dataset was compacted before being split
+    await update_catalog(
+        dataset_path,
+        *[
+            os.path.join(os.path.dirname(dataset.folder_full_path), split_name)
+            for split_name in [query.first_split_name, query.second_split_name]
+        ],
+    )
     return StatusResponse(status="ok", message="Dataset split successfully")
 
 
@@ -1015,11 +1096,58 @@ async def shuffle_dataset(query: DatasetShuffleRequest) -> StatusResponse:
     dataset = LeRobotDataset(path=dataset_path, enforce_path=True)
 
     try:
-        dataset.shuffle_dataset()
+        await edit_datasets([dataset_path], dataset.shuffle_dataset)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.warning(f"Error shuffling dataset: {e}")
         return StatusResponse(
             status="error",
             message=f"Error shuffling dataset: {e}",
         )
+    await update_catalog(dataset_path)
     return StatusResponse(status="ok", message="Dataset shuffled successfully")
+
+
+@router.post("/dataset/compact", response_model=StatusResponse)
+async def compact_dataset(query: DatasetCompactRequest) -> StatusResponse:
+    """
+    Renumber the episodes of a dataset after episodes were deleted.
+    This is done automatically before pushing, downloading, shuffling or splitting.
+    """
+    dataset_path = os.path.join(ROOT_DIR, query.dataset_path)
+    # Check if the path exists and is a directory
+    if not os.path.exists(dataset_path) or not os.path.isdir(dataset_path):
+        return StatusResponse(
+            status="error", message=f"Dataset {query.dataset_path} not found"
+        )
+
+    datatype = query.dataset_path.split("/")[0]
+    if datatype != "lerobot_v2.1":
+        return StatusResponse(
+            status="error",
+            message="You can only compact datasets of type v2.1",
+        )
+
+    dataset = LeRobotDataset(path=dataset_path, enforce_path=True)
+
+    try:
+        old_index_to_new_index = await edit_datasets(
+            [dataset_path], dataset.compact_episodes
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"Error compacting dataset: {e}")
+        return StatusResponse(
+            status="error",
+            message=f"Error compacting dataset: {e}",
+        )
+    await update_catalog(dataset_path)
+    renumbered = sum(
+        old_index != new_index
+        for old_index, new_index in old_index_to_new_index.items()
+    )
+    return StatusResponse(
+        status="ok", message=f"Dataset compacted, {renumbered} episodes renumbered"
+    )
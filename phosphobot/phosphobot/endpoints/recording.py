@@ -19,15 +19,20 @@ from phosphobot.models import (
     InfoModel,
     RecordingPlayRequest,
     RecordingStartRequest,
+    RecordingStatusResponse,
     RecordingStopRequest,
     RecordingStopResponse,
     StatusResponse,
 )
-from phosphobot.models.lerobot_dataset import InfoFeatures, LeRobotDataset
+from phosphobot.models.lerobot_dataset import (
+    InfoFeatures,
+    LeRobotDataset,
+    LeRobotEpisode,
+)
 from phosphobot.posthog import is_github_actions
 from phosphobot.recorder import Recorder, get_recorder
 from phosphobot.robot import RobotConnectionManager, get_rcm
-from phosphobot.utils import background_task_log_exceptions, get_home_app_path
+from phosphobot.utils import get_home_app_path
 
 router = APIRouter(tags=["recording"])
 
@@ -217,13 +222,8 @@ async def start_recording_episode(
             # This means the dataset exists but the number of cameras or robots is not consistent
             raise HTTPException(status_code=400, detail=str(e))
 
-    # Check if the recorder is not currently saving
-    if recorder.is_saving:
-        raise HTTPException(
-            status_code=400,
-            detail="Recorder is still saving an episode. Please wait a few seconds and try again.",
-        )
-
+    # Previous episodes may still be saving in the background: the new one is recorded
+    # meanwhile, with the next episode index.
     # Update recorder's robots
     await recorder.start(
         background_tasks=background_tasks,
@@ -250,18 +250,12 @@ async def start_recording_episode(
 @router.post("/recording/stop", response_model=RecordingStopResponse)
 async def stop_recording_episode(
     query: RecordingStopRequest,
-    background_tasks: BackgroundTasks,
     recorder: Recorder = Depends(get_recorder),
 ) -> RecordingStopResponse | HTTPException:
     """
     Stop the recording of the episode. The data is saved to disk to the user home directory, in the `phosphobot` folder.
+    The episode is saved in the background: the next one can be recorded right away. Check `/recording/status` to follow the save.
     """
-    if recorder.is_saving:
-        raise HTTPException(
-            status_code=400,
-            detail="Recorder is still saving an episode. Please wait a few seconds and try again.",
-        )
-
     if not recorder.is_recording:
         raise HTTPException(status_code=400, detail="No episode to stop")
 
@@ -276,13 +270,44 @@ async def stop_recording_episode(
         logger.info(
             "Episode stopped but not saved. Use the `save` parameter to save the episode."
         )
+        if isinstance(recorder.episode, LeRobotEpisode):
+            recorder.episode.abort_video_encoding()
         return RecordingStopResponse(episode_folder_path=None, episode_index=None)
 
-    background_tasks.add_task(background_task_log_exceptions(recorder.save_episode))
+    episode = recorder.episode
+    try:
+        # The episode is added to the dataset, its files are written in the background
+        await recorder.save_episode()
+    except Exception as e:
+        logger.opt(exception=e).error(f"Error while saving the episode: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Error while saving the episode: {e}"
+        )
 
     return RecordingStopResponse(
-        episode_folder_path=str(recorder.episode.dataset_path),
-        episode_index=recorder.episode.episode_index,
+        episode_folder_path=str(episode.dataset_path),
+        episode_index=episode.episode_index,
+    )
+
+
+@router.get("/recording/status", response_model=RecordingStatusResponse)
+async def recording_status(
+    recorder: Recorder = Depends(get_recorder),
+) -> RecordingStatusResponse:
+    """
+    Get the status of the current recording, with the timing of the recording loop
+    (jitter, camera and robot latencies, dropped ticks) to check the episode is recorded on-rate.
+    """
+    timing_metrics = recorder.timing_metrics
+    return RecordingStatusResponse(
+        is_recording=recorder.is_recording,
+        is_saving=recorder.is_saving,
+        episode_index=recorder.episode.episode_index if recorder.episode else None,
+        num_steps=recorder.episode.num_steps if recorder.episode else 0,
+        timing=timing_metrics.summary()
+        if timing_metrics is not None and timing_metrics.ticks > 0
+        else None,
+        saves=recorder.episode_saver.statuses(),
     )
 
 
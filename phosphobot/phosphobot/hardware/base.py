@@ -1,6 +1,7 @@
 import asyncio
 import atexit
 import json
+import threading
 import time
 from abc import abstractmethod
 from typing import Any, Dict, List, Literal, Optional, Tuple, Union
@@ -12,6 +13,8 @@ from scipy.spatial.transform import Rotation as R  # type: ignore
 
 from phosphobot.configs import config as cfg
 from phosphobot.hardware import get_sim
+from phosphobot.hardware.kinematics import KinematicChain
+from phosphobot.hardware.state import RobotStateBroadcaster
 from phosphobot.models import BaseRobot, BaseRobotConfig, BaseRobotInfo, Temperature
 from phosphobot.models.lerobot_dataset import FeatureDetails
 from phosphobot.utils import (
@@ -76,7 +79,11 @@ class BaseManipulator(BaseRobot):
 
     # status variables
     is_connected: bool = False
-    is_moving: bool = False
+    # Samples the state in the background. Set by start_state_broadcaster.
+    state_broadcaster: Optional[RobotStateBroadcaster] = None
+    # Whether the motors bus can be used from several threads at once. The state
+    # broadcaster reads it in the background: it's only started for these robots.
+    THREAD_SAFE_BUS: bool = False
     _add_debug_lines: bool = False
 
     # Gripper status. This is the value of the last closing command.
@@ -224,6 +231,11 @@ class BaseManipulator(BaseRobot):
             self.device_name = device_name
 
         self._add_debug_lines = add_debug_lines
+        # Positions written to the robot and not mirrored in the simulation yet (lazy mirroring)
+        self._pending_sim_pose: Dict[int, float] = {}
+        self._last_sim_sync = 0.0
+        # The control loops and the endpoints write and sync the pose from several threads
+        self._sim_pose_lock = threading.Lock()
 
         self.sim = get_sim()
 
@@ -299,6 +311,14 @@ class BaseManipulator(BaseRobot):
             joint_index=self.END_EFFECTOR_LINK_INDEX,
         )[0]
 
+        # Last positions sent to set_motors_positions, used to warm-start the IK
+        self._last_q_target_rad: Optional[np.ndarray] = None
+        self.kinematics: Optional[KinematicChain] = None
+        if cfg.KINEMATICS_BACKEND == "numpy":
+            self.kinematics = self._load_kinematics(
+                axis=axis, joint_names=[info[1].decode() for info in joint_infos]
+            )
+
         if not only_simulation:
             # Register the disconnect method to be called on exit
             atexit.register(self.move_to_sleep_sync)
@@ -490,6 +510,35 @@ class BaseManipulator(BaseRobot):
 
         If the IK with the orientation results in the robot not moving, we try without the orientation.
         """
+        if self.kinematics is not None:
+            # Warm-start from the last positions sent to the robot. In simulation,
+            # the joints may not have reached them: start from the simulated pose.
+            if (
+                self.is_connected
+                and self._last_q_target_rad is not None
+                and len(self._last_q_target_rad) == len(self.actuated_joints)
+            ):
+                initial_joints_position = self._last_q_target_rad
+            else:
+                self.sync_sim()
+                initial_joints_position = np.array(
+                    self.sim.get_joints_states(self.p_robot_id, self.actuated_joints)
+                )
+            # Like PyBullet, only constrain the orientation given a quaternion
+            if (
+                target_orientation_quaternions is not None
+                and len(target_orientation_quaternions) != 4
+            ):
+                target_orientation_quaternions = None
+            return self.kinematics.inverse_kinematics(
+                target_position=target_position_cartesian,
+                target_orientation_quaternion=target_orientation_quaternions,
+                initial_joints_position=initial_joints_position,
+            )
+
+        # The IK starts from the current pose in the simulation
+        self.sync_sim()
+
         if self.name == "koch-v1.1":
             # In the URDF of Koch 1.1, the limits are fucked up. So we add
             # limits in the inverse kinematics to make it work.
@@ -586,6 +635,49 @@ class BaseManipulator(BaseRobot):
 
         return np.array(target_q_rad)[np.array(self.actuated_joints)]
 
+    def _load_kinematics(
+        self, axis: List[float], joint_names: List[str]
+    ) -> Optional[KinematicChain]:
+        """
+        Build the NumPy kinematics from the URDF and check that they match the simulation.
+        Returns None to fall back to the PyBullet kinematics.
+        """
+        try:
+            kinematics = KinematicChain.from_urdf(
+                self.URDF_FILE_PATH,
+                end_effector_link_index=self.END_EFFECTOR_LINK_INDEX,
+                base_position=axis,
+                base_orientation=self.AXIS_ORIENTATION,
+            )
+        except Exception as e:
+            logger.warning(
+                f"Can't load the kinematics of {self.name} from its URDF, using PyBullet: {e}"
+            )
+            return None
+
+        joints_position = np.array(
+            self.sim.get_joints_states(self.p_robot_id, self.actuated_joints)
+        )
+        link_state = self.sim.get_link_state(
+            robot_id=self.p_robot_id,
+            link_index=self.END_EFFECTOR_LINK_INDEX,
+            compute_forward_kinematics=True,
+        )
+        if (
+            [joint.name for joint in kinematics.joints] != joint_names
+            or kinematics.actuated_joints != self.actuated_joints
+            or not np.allclose(
+                kinematics.forward_kinematics(joints_position)[0],
+                link_state[4],
+                atol=1e-4,
+            )
+        ):
+            logger.warning(
+                f"The kinematics of {self.name} don't match the simulation, using PyBullet."
+            )
+            return None
+        return kinematics
+
     def forward_kinematics(
         self, sync_robot_pos: bool = False
     ) -> Tuple[np.ndarray, np.ndarray]:
@@ -597,11 +689,21 @@ class BaseManipulator(BaseRobot):
         This means a tip of the plastic part.
         """
 
+        self.sync_sim()
+
         # Move the robot in simulation to the position of the motors to correct for desync
         if self.is_connected and sync_robot_pos:
             current_motor_positions = self.read_joints_position(
                 unit="rad", source="robot"
             )
+            if self.kinematics is not None:
+                position, rotation = self.kinematics.forward_kinematics(
+                    current_motor_positions
+                )
+                self._mirror_in_sim(
+                    self.actuated_joints, current_motor_positions.tolist()
+                )
+                return position, R.from_matrix(rotation).as_euler("xyz")
             self.sim.set_joints_states(
                 robot_id=self.p_robot_id,
                 joint_indices=self.actuated_joints,
@@ -610,6 +712,14 @@ class BaseManipulator(BaseRobot):
             # Update the simulation
             self.sim.step()
 
+        if self.kinematics is not None:
+            position, rotation = self.kinematics.forward_kinematics(
+                np.array(
+                    self.sim.get_joints_states(self.p_robot_id, self.actuated_joints)
+                )
+            )
+            return position, R.from_matrix(rotation).as_euler("xyz")
+
         # Get the link state of the end effector
         end_effector_link_state = self.sim.get_link_state(
             robot_id=self.p_robot_id,
@@ -708,6 +818,7 @@ class BaseManipulator(BaseRobot):
         else:
             # If the robot is not connected, we use the pybullet simulation
             # Retrieve joint angles using getJointStates
+            self.sync_sim()
             if joints_ids is None:
                 joints_ids = list(range(self.num_actuated_joints))
 
@@ -721,6 +832,22 @@ class BaseManipulator(BaseRobot):
             source_unit = "rad"
             output_position = current_position_rad
 
+        return self._convert_joints_position(
+            output_position,
+            source_unit=source_unit,
+            unit=unit,
+            min_value=min_value,
+            max_value=max_value,
+        )
+
+    def _convert_joints_position(
+        self,
+        output_position: np.ndarray,
+        source_unit: str,
+        unit: Literal["rad", "motor_units", "degrees", "other"],
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+    ) -> np.ndarray:
         if unit == "rad":
             if source_unit == "motor_units":
                 # Convert from motor units to radians
@@ -762,6 +889,51 @@ class BaseManipulator(BaseRobot):
 
         return output_position
 
+    def get_joints_position(
+        self,
+        unit: Literal["rad", "motor_units", "degrees", "other"] = "rad",
+        max_staleness: Optional[float] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Joints position of the robot, sampled at most max_staleness seconds ago.
+
+        Use the latest sample of the state broadcaster if it is recent enough. Otherwise,
+        read the robot and share the read with the other consumers of the broadcaster.
+        Without a state broadcaster, this is the same as read_joints_position.
+        """
+        if self.state_broadcaster is None or not self.state_broadcaster.is_running:
+            return self.read_joints_position(
+                unit=unit, min_value=min_value, max_value=max_value
+            )
+
+        state = self.state_broadcaster.latest(max_staleness=max_staleness)
+        if state is None:
+            state = self.state_broadcaster.sample()
+        return self._convert_joints_position(
+            state.joints_position.copy(),
+            source_unit="rad",
+            unit=unit,
+            min_value=min_value,
+            max_value=max_value,
+        )
+
+    def start_state_broadcaster(self, freq: int, telemetry_freq: float = 0) -> None:
+        """
+        Sample the joints (and the telemetry if telemetry_freq > 0) in a background thread.
+        """
+        self.stop_state_broadcaster()
+        self.state_broadcaster = RobotStateBroadcaster(
+            robot=self, freq=freq, telemetry_freq=telemetry_freq
+        )
+        self.state_broadcaster.start()
+
+    def stop_state_broadcaster(self) -> None:
+        if self.state_broadcaster is not None:
+            self.state_broadcaster.stop()
+            self.state_broadcaster = None
+
     def set_motors_positions(
         self, q_target_rad: np.ndarray, enable_gripper: bool = False
     ) -> None:
@@ -775,6 +947,7 @@ class BaseManipulator(BaseRobot):
 
         q_target_rad is in radians.
         """
+        self._last_q_target_rad = np.asarray(q_target_rad, dtype=float)
         if self.is_connected:
             q_target = self._radians_vec_to_motor_units(q_target_rad)
             if (
@@ -806,12 +979,52 @@ class BaseManipulator(BaseRobot):
             if len(target_positions) > len(joint_indices):
                 target_positions = target_positions[: len(joint_indices)]
 
+        self._mirror_in_sim(joint_indices, target_positions)
+
+    def _mirror_in_sim(
+        self, joint_indices: List[int], positions: List[float], step: bool = True
+    ) -> None:
+        """
+        Move the robot in the simulation to the positions written to the robot.
+        With lazy mirroring, the positions are only applied by the next sync_sim.
+        """
+        if cfg.SIM_MIRRORING == "lazy":
+            with self._sim_pose_lock:
+                self._pending_sim_pose.update(zip(joint_indices, positions))
+            return
+
         self.sim.set_joints_states(
             robot_id=self.p_robot_id,
             joint_indices=joint_indices,
-            target_positions=target_positions,
+            target_positions=positions,
         )
-        # Update the simulation
+        if step:
+            # Update the simulation
+            self.sim.step()
+
+    def sync_sim(self, force: bool = False) -> None:
+        """
+        Apply the positions pending from lazy mirroring to the simulation.
+        Called before reading the simulation. Unless force, the simulation is updated at most
+        SIM_MIRRORING_MAX_FREQ times per second: in between, it can lag by one period.
+        """
+        if not self._pending_sim_pose:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_sim_sync < 1 / cfg.SIM_MIRRORING_MAX_FREQ:
+            return
+
+        with self._sim_pose_lock:
+            pose, self._pending_sim_pose = self._pending_sim_pose, {}
+            self._last_sim_sync = now
+            if not pose:
+                # Applied by a concurrent sync
+                return
+            self.sim.set_joints_states(
+                robot_id=self.p_robot_id,
+                joint_indices=list(pose.keys()),
+                target_positions=list(pose.values()),
+            )
         self.sim.step()
 
     def read_gripper_command(self) -> float:
@@ -990,8 +1203,10 @@ class BaseManipulator(BaseRobot):
         )
 
         self.is_moving = True
-        self.set_motors_positions(goal_q_robot_rad)
-        self.is_moving = False
+        try:
+            self.set_motors_positions(goal_q_robot_rad)
+        finally:
+            self.is_moving = False
 
         # reset gripping status when going to init position
         self.update_object_gripping_status()
@@ -999,12 +1214,15 @@ class BaseManipulator(BaseRobot):
     def set_simulation_positions(self, joints: np.ndarray) -> None:
         """
         Move robot joints to the specified positions in the simulation.
+        The positions pending from lazy mirroring are dropped: they are older.
         """
-        self.sim.set_joints_states(
-            robot_id=self.p_robot_id,
-            joint_indices=self.actuated_joints,
-            target_positions=list(joints),
-        )
+        with self._sim_pose_lock:
+            self._pending_sim_pose.clear()
+            self.sim.set_joints_states(
+                robot_id=self.p_robot_id,
+                joint_indices=self.actuated_joints,
+                target_positions=list(joints),
+            )
         # Update the simulation
         self.sim.step()
 
@@ -1107,18 +1325,17 @@ class BaseManipulator(BaseRobot):
             open_position = self.upper_joint_limits[-1]
 
         if not self.is_object_gripped:
-            self.sim.set_joints_states(
-                robot_id=self.p_robot_id,
+            self._mirror_in_sim(
                 joint_indices=[self.GRIPPER_JOINT_INDEX],
-                target_positions=[
-                    close_position + (open_position - close_position) * open
-                ],
+                positions=[close_position + (open_position - close_position) * open],
+                step=False,
             )
 
     def get_observation(
         self,
         source: Literal["sim", "robot"],
         do_forward: bool = False,
+        max_staleness: Optional[float] = None,
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Get the observation of the robot.
@@ -1126,12 +1343,21 @@ class BaseManipulator(BaseRobot):
         This method should return the observation of the robot.
         Will be used to build an observation in a Step of an episode.
 
+        Args:
+            max_staleness: If set, the joints position can come from a sample of the
+                state broadcaster taken at most max_staleness seconds ago.
+
         Returns:
             - state: np.array state of the robot (7D)
             - joints_position: np.array joints position of the robot
         """
 
-        joints_position = self.read_joints_position(unit="rad", source=source)
+        if source == "robot" and max_staleness is not None:
+            joints_position = self.get_joints_position(
+                unit="rad", max_staleness=max_staleness
+            )
+        else:
+            joints_position = self.read_joints_position(unit="rad", source=source)
 
         if do_forward:
             effector_position, effector_orientation_euler_rad = (
@@ -1265,6 +1491,7 @@ class BaseManipulator(BaseRobot):
 
         # If the robot is not connected, we use the pybullet simulation
         # Retrieve joint angles using getJointStates
+        self.sync_sim()
         for idx, joint_id in enumerate(self.actuated_joints):
             # Joint torque is in the 4th element of the joint state tuple
             current_torque[idx] = self.sim.get_joint_state(
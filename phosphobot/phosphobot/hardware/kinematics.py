@@ -0,0 +1,382 @@
+"""
+Forward and inverse kinematics of the URDF robots in NumPy.
+
+This gives the same results as the PyBullet simulation for the serial chains of the bundled
+arms, without going through the global PyBullet client. Forward kinematics is vectorized over
+batches of joint states, e.g. to compute the cartesian positions of a whole episode offline.
+
+Joints and links are indexed like in PyBullet with URDF_MAINTAIN_LINK_ORDER: link i is the
+child of joint i, in the order of the links in the URDF file.
+"""
+
+import math
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R  # type: ignore
+
+MOVABLE_JOINT_TYPES = ("revolute", "continuous", "prismatic")
+_IDENTITY = np.eye(3)
+
+
+def _origin_transform(element: Optional[ET.Element]) -> np.ndarray:
+    """Homogeneous transform of an <origin xyz rpy> element."""
+    transform = np.eye(4)
+    if element is None:
+        return transform
+    xyz = [float(v) for v in element.get("xyz", "0 0 0").split()]
+    rpy = [float(v) for v in element.get("rpy", "0 0 0").split()]
+    # URDF rpy are fixed-axis rotations around x, then y, then z
+    transform[:3, :3] = R.from_euler("xyz", rpy).as_matrix()
+    transform[:3, 3] = xyz
+    return transform
+
+
+def _axis_rotations(axis: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Rotation matrices (N, 3, 3) of angles (N,) around a unit axis (Rodrigues)."""
+    x, y, z = axis
+    k = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    sin = np.sin(angles)[:, None, None]
+    cos = np.cos(angles)[:, None, None]
+    return np.eye(3) + sin * k + (1 - cos) * (k @ k)
+
+
+def _rotation_log(rotation: np.ndarray) -> np.ndarray:
+    """Rotation vector (axis * angle) of a rotation matrix."""
+    cos = (np.trace(rotation) - 1) / 2
+    if cos > 1 - 1e-10:
+        return np.zeros(3)
+    if cos < -1 + 1e-6:
+        # Close to pi: the formula below is unstable
+        return R.from_matrix(rotation).as_rotvec()
+    angle = math.acos(cos)
+    vee = np.array(
+        [
+            rotation[2, 1] - rotation[1, 2],
+            rotation[0, 2] - rotation[2, 0],
+            rotation[1, 0] - rotation[0, 1],
+        ]
+    )
+    return vee * angle / (2 * math.sin(angle))
+
+
+@dataclass
+class URDFJoint:
+    name: str
+    type: str
+    parent: str
+    child: str
+    # Transform from the parent link frame to the joint frame
+    origin: np.ndarray
+    # Unit axis of the joint, in the joint frame
+    axis: np.ndarray
+    lower: float
+    upper: float
+
+
+class KinematicChain:
+    """
+    Kinematics of a robot from its URDF file.
+
+    The joint positions are given for the actuated joints (revolute joints, like the
+    actuated_joints of the simulation), in radians. Only the joints between the base and the
+    end effector link move it: the other ones (e.g. the gripper fingers) are ignored.
+    """
+
+    def __init__(
+        self,
+        joints: List[URDFJoint],
+        end_effector_link_index: int,
+        base_position: Optional[Sequence[float]] = None,
+        base_orientation: Optional[Sequence[float]] = None,
+        end_effector_inertial_rotation: Optional[np.ndarray] = None,
+    ):
+        self.joints = joints
+        self.end_effector_link_index = end_effector_link_index
+        self.actuated_joints = [
+            index
+            for index, joint in enumerate(joints)
+            if joint.type in ("revolute", "continuous")
+        ]
+
+        # Pose of the base link in the world, like the basePosition and baseOrientation of loadURDF
+        self.base_transform = np.eye(4)
+        if base_orientation is not None:
+            quaternion = np.asarray(base_orientation, dtype=float)
+            self.base_transform[:3, :3] = R.from_quat(
+                quaternion / np.linalg.norm(quaternion)
+            ).as_matrix()
+        if base_position is not None:
+            self.base_transform[:3, 3] = base_position
+
+        # PyBullet reports the orientation of the inertial frame of the link
+        self.end_effector_inertial_rotation = (
+            end_effector_inertial_rotation
+            if end_effector_inertial_rotation is not None
+            else np.eye(3)
+        )
+
+        # Joints from the base to the end effector link
+        joint_by_child = {joint.child: index for index, joint in enumerate(joints)}
+        chain: List[int] = []
+        index: Optional[int] = end_effector_link_index
+        while index is not None:
+            chain.append(index)
+            index = joint_by_child.get(joints[index].parent)
+        self.chain = chain[::-1]
+        # Column in the actuated joint positions of each joint of the chain, -1 if not actuated
+        self._chain_columns = [
+            self.actuated_joints.index(index) if index in self.actuated_joints else -1
+            for index in self.chain
+        ]
+        # Skew matrices of the axes, for the Rodrigues rotations
+        self._skews = {}
+        self._skews_squared = {}
+        for index in self.chain:
+            x, y, z = joints[index].axis
+            skew = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+            self._skews[index] = skew
+            self._skews_squared[index] = skew @ skew
+        self.lower_limits = np.array(
+            [joints[index].lower for index in self.actuated_joints]
+        )
+        self.upper_limits = np.array(
+            [joints[index].upper for index in self.actuated_joints]
+        )
+
+    @classmethod
+    def from_urdf(
+        cls,
+        urdf_path: str,
+        end_effector_link_index: int,
+        base_position: Optional[Sequence[float]] = None,
+        base_orientation: Optional[Sequence[float]] = None,
+    ) -> "KinematicChain":
+        root = ET.parse(urdf_path).getroot()
+
+        # Like PyBullet with URDF_MAINTAIN_LINK_ORDER, joints are sorted in the order of their
+        # child link in the file
+        link_order = {
+            link.get("name"): index for index, link in enumerate(root.findall("link"))
+        }
+        joint_elements = sorted(
+            root.findall("joint"),
+            key=lambda element: link_order.get(
+                element.find("child").get("link"),  # type: ignore
+                len(link_order),
+            ),
+        )
+
+        joints = []
+        for element in joint_elements:
+            joint_type = element.get("type", "fixed")
+            if joint_type not in MOVABLE_JOINT_TYPES and joint_type != "fixed":
+                raise ValueError(
+                    f"Joint {element.get('name')} of type {joint_type} is not supported"
+                )
+            axis_element = element.find("axis")
+            axis = np.array(
+                [float(v) for v in axis_element.get("xyz", "1 0 0").split()]
+                if axis_element is not None
+                else [1.0, 0.0, 0.0]
+            )
+            limit = element.find("limit")
+            joints.append(
+                URDFJoint(
+                    name=element.get("name", ""),
+                    type=joint_type,
+                    parent=element.find("parent").get("link"),  # type: ignore
+                    child=element.find("child").get("link"),  # type: ignore
+                    origin=_origin_transform(element.find("origin")),
+                    axis=axis / np.linalg.norm(axis),
+                    lower=float(limit.get("lower", -np.pi))
+                    if limit is not None
+                    else -np.pi,
+                    upper=float(limit.get("upper", np.pi))
+                    if limit is not None
+                    else np.pi,
+                )
+            )
+
+        end_effector_link = joints[end_effector_link_index].child
+        inertial_rotation = None
+        for link in root.findall("link"):
+            if link.get("name") == end_effector_link:
+                inertial = link.find("inertial")
+                if inertial is not None:
+                    inertial_rotation = _origin_transform(inertial.find("origin"))[
+                        :3, :3
+                    ]
+
+        return cls(
+            joints=joints,
+            end_effector_link_index=end_effector_link_index,
+            base_position=base_position,
+            base_orientation=base_orientation,
+            end_effector_inertial_rotation=inertial_rotation,
+        )
+
+    def _chain_transforms(self, joints_position: np.ndarray) -> List[np.ndarray]:
+        """
+        World transforms (N, 4, 4) of the joint frames of the chain, after their motion,
+        for joints_position of shape (N, number of actuated joints).
+        """
+        batch_size = joints_position.shape[0]
+        transform = np.broadcast_to(self.base_transform, (batch_size, 4, 4))
+        transforms = []
+        for index, column in zip(self.chain, self._chain_columns):
+            joint = self.joints[index]
+            transform = transform @ joint.origin
+            if column >= 0:
+                motion = np.broadcast_to(np.eye(4), (batch_size, 4, 4)).copy()
+                motion[:, :3, :3] = _axis_rotations(
+                    joint.axis, joints_position[:, column]
+                )
+                transform = transform @ motion
+            transforms.append(transform)
+        return transforms
+
+    def _chain_frames(
+        self, joints_position: np.ndarray
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        World rotations and positions of the joint frames of the chain for a single joints
+        position. Faster than _chain_transforms for the iterations of the IK.
+        """
+        rotation = self.base_transform[:3, :3]
+        position = self.base_transform[:3, 3]
+        rotations = []
+        positions = []
+        for index, column in zip(self.chain, self._chain_columns):
+            joint = self.joints[index]
+            position = position + rotation @ joint.origin[:3, 3]
+            rotation = rotation @ joint.origin[:3, :3]
+            if column >= 0:
+                angle = joints_position[column]
+                skew = self._skews[index]
+                rotation = rotation @ (
+                    _IDENTITY
+                    + math.sin(angle) * skew
+                    + (1 - math.cos(angle)) * self._skews_squared[index]
+                )
+            rotations.append(rotation)
+            positions.append(position)
+        return rotations, positions
+
+    def forward_kinematics(
+        self, joints_position: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Position of the end effector link frame and rotation matrix of its inertial frame,
+        like PyBullet's getLinkState (worldLinkFramePosition, linkWorldOrientation).
+
+        joints_position is (number of actuated joints,) or (N, number of actuated joints).
+        Returns positions of shape (3,) or (N, 3), and rotations of shape (3, 3) or (N, 3, 3).
+        """
+        joints_position = np.asarray(joints_position, dtype=float)
+        if joints_position.ndim == 1:
+            rotations, positions = self._chain_frames(joints_position)
+            return positions[-1], rotations[-1] @ self.end_effector_inertial_rotation
+        transform = self._chain_transforms(joints_position)[-1]
+        return (
+            transform[:, :3, 3],
+            transform[:, :3, :3] @ self.end_effector_inertial_rotation,
+        )
+
+    def _jacobian(
+        self, rotations: List[np.ndarray], positions: List[np.ndarray]
+    ) -> np.ndarray:
+        jacobian = np.zeros((6, len(self.actuated_joints)))
+        moving = [
+            (rotation, position, index, column)
+            for rotation, position, index, column in zip(
+                rotations, positions, self.chain, self._chain_columns
+            )
+            if column >= 0
+        ]
+        if not moving:
+            return jacobian
+        axes = np.array(
+            [rotation @ self.joints[index].axis for rotation, _, index, _ in moving]
+        )
+        lever_arms = positions[-1] - np.array(
+            [position for _, position, _, _ in moving]
+        )
+        columns = [column for _, _, _, column in moving]
+        jacobian[:3, columns] = np.cross(axes, lever_arms).T
+        jacobian[3:, columns] = axes.T
+        return jacobian
+
+    def jacobian(self, joints_position: np.ndarray) -> np.ndarray:
+        """
+        Geometric jacobian (6, number of actuated joints) of the end effector: linear
+        velocity on the first 3 rows, angular velocity on the last 3, in the world frame.
+        """
+        return self._jacobian(
+            *self._chain_frames(np.asarray(joints_position, dtype=float))
+        )
+
+    def inverse_kinematics(
+        self,
+        target_position: np.ndarray,
+        target_orientation_quaternion: Optional[np.ndarray] = None,
+        initial_joints_position: Optional[np.ndarray] = None,
+        max_iterations: int = 100,
+        tolerance: float = 1e-4,
+        damping: float = 0.01,
+        orientation_weight: float = 0.2,
+    ) -> np.ndarray:
+        """
+        Damped least squares inverse kinematics, warm-started from initial_joints_position
+        (usually the previous solution). Returns the actuated joints positions in radians.
+
+        The orientation error is weighted by orientation_weight: arms with less than 6 joints
+        can't reach every orientation, so the position is favored.
+        """
+        q = (
+            np.zeros(len(self.actuated_joints))
+            if initial_joints_position is None
+            else np.clip(
+                np.asarray(initial_joints_position, dtype=float),
+                self.lower_limits,
+                self.upper_limits,
+            )
+        )
+        target_position = np.asarray(target_position, dtype=float)
+        target_rotation = (
+            R.from_quat(target_orientation_quaternion).as_matrix()
+            @ self.end_effector_inertial_rotation.T
+            if target_orientation_quaternion is not None
+            else None
+        )
+        rows = 6 if target_rotation is not None else 3
+        weights = np.array([1.0, 1.0, 1.0] + [orientation_weight] * 3)[:rows]
+        regularization = damping**2 * np.eye(rows)
+        previous_error_norm = np.inf
+
+        for _ in range(max_iterations):
+            rotations, positions = self._chain_frames(q)
+            error = np.empty(rows)
+            error[:3] = target_position - positions[-1]
+            if target_rotation is not None:
+                error[3:] = _rotation_log(target_rotation @ rotations[-1].T)
+            error *= weights
+            if np.linalg.norm(error[:3]) < tolerance and (
+                rows == 3 or np.linalg.norm(error[3:]) < tolerance
+            ):
+                break
+            # Unreachable targets: stop when the solution doesn't improve anymore
+            error_norm = float(np.linalg.norm(error))
+            if error_norm > previous_error_norm * (1 - 1e-3):
+                break
+            previous_error_norm = error_norm
+
+            jacobian = self._jacobian(rotations, positions)[:rows] * weights[:, None]
+            delta = jacobian.T @ np.linalg.solve(
+                jacobian @ jacobian.T + regularization, error
+            )
+            q = np.clip(q + delta, self.lower_limits, self.upper_limits)
+
+        return q
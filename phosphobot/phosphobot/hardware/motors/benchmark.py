@@ -0,0 +1,286 @@
+"""
+Benchmark of the motors buses and of the robot hot path, on emulated servos.
+
+Measures the rate and the per-call latency of sync reads and writes on the Feetech and
+Dynamixel buses, of read_joints_position and set_motors_positions, and the latency of a
+teleoperation command: from move_robot_absolute to the goal position reaching the servos.
+
+```
+uv run python -m phosphobot.hardware.motors.benchmark --baudrate 1000000 --latency 0.001
+```
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.hardware.motors.dynamixel import DynamixelMotorsBus  # type: ignore
+from phosphobot.hardware.motors.emulator import ServoBusEmulator, ServoProtocol
+from phosphobot.hardware.motors.feetech import FeetechMotorsBus  # type: ignore
+from phosphobot.models import LatencyStats
+from phosphobot.scheduler import latency_stats
+
+MOTOR_IDS = [1, 2, 3, 4, 5, 6]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    calls: int
+    # Calls per second
+    rate: float
+    latency_ms: LatencyStats
+
+
+@dataclass
+class EmulatorSettings:
+    baudrate: int = 1_000_000
+    # Latency of the USB serial adapter, in seconds
+    latency: float = 0.0
+    # Delay before each servo answers, in seconds
+    return_delay: float = 0.0
+
+    def emulator(self, protocol: ServoProtocol) -> ServoBusEmulator:
+        return ServoBusEmulator(
+            protocol,
+            motor_ids=MOTOR_IDS,
+            baudrate=self.baudrate,
+            latency=self.latency,
+            return_delay=self.return_delay,
+        )
+
+
+def measure(
+    name: str,
+    call: Callable[[], Any],
+    duration: float = 1.0,
+    warmup: int = 3,
+) -> BenchmarkResult:
+    """
+    Call `call` repeatedly for `duration` seconds. If it returns a float, it's used as
+    the latency of the call instead of its duration. Other return values are ignored.
+    """
+    for _ in range(warmup):
+        call()
+    latencies: List[float] = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        call_start = time.perf_counter()
+        latency = call()
+        latencies.append(
+            latency if isinstance(latency, float) else time.perf_counter() - call_start
+        )
+    elapsed = time.perf_counter() - start
+    return BenchmarkResult(
+        name=name,
+        calls=len(latencies),
+        rate=len(latencies) / elapsed,
+        latency_ms=latency_stats(latencies),
+    )
+
+
+def _write_latency(
+    emulator: ServoBusEmulator, address: int, start: float
+) -> Optional[float]:
+    """
+    Time until a write sent at start reached the servos. Waiting for it also keeps the
+    writes from piling up faster than the emulated bus can carry them.
+    """
+    write_time = emulator.wait_for_write(address, since=start)
+    return write_time - start if write_time is not None else None
+
+
+def benchmark_feetech_bus(
+    settings: EmulatorSettings, duration: float = 1.0
+) -> List[BenchmarkResult]:
+    motors = {f"motor_{i}": (i, "sts3215") for i in MOTOR_IDS}
+    positions = np.full(len(MOTOR_IDS), 2048)
+    with settings.emulator("feetech") as emulator:
+        bus = FeetechMotorsBus(port=emulator.port, motors=motors)  # type: ignore
+        bus.connect()
+
+        def sync_write() -> Optional[float]:
+            start = time.perf_counter()
+            bus.write("Goal_Position", positions)
+            return _write_latency(emulator, 42, start)
+
+        try:
+            return [
+                measure(
+                    "feetech sync read Present_Position",
+                    lambda: bus.read("Present_Position"),
+                    duration,
+                ),
+                measure("feetech sync write Goal_Position", sync_write, duration),
+                measure(
+                    "feetech read Present_Voltage (1 motor)",
+                    lambda: bus.read("Present_Voltage", "motor_1"),
+                    duration,
+                ),
+            ]
+        finally:
+            bus.disconnect()
+
+
+def benchmark_dynamixel_bus(
+    settings: EmulatorSettings, duration: float = 1.0
+) -> List[BenchmarkResult]:
+    motors = {f"motor_{i}": (i, "xl430-w250") for i in MOTOR_IDS}
+    positions = np.full(len(MOTOR_IDS), 2048)
+    with settings.emulator("dynamixel") as emulator:
+        bus = DynamixelMotorsBus(port=emulator.port, motors=motors)  # type: ignore
+        bus.connect()
+
+        def sync_write() -> Optional[float]:
+            start = time.perf_counter()
+            bus.write("Goal_Position", positions)
+            return _write_latency(emulator, 116, start)
+
+        try:
+            return [
+                measure(
+                    "dynamixel sync read Present_Position",
+                    lambda: bus.read("Present_Position"),
+                    duration,
+                ),
+                measure("dynamixel sync write Goal_Position", sync_write, duration),
+            ]
+        finally:
+            bus.disconnect()
+
+
+def benchmark_robot(
+    robot_name: str, settings: EmulatorSettings, duration: float = 1.0
+) -> List[BenchmarkResult]:
+    """The hot path of a robot connected to emulated servos, with the simulation headless."""
+    from phosphobot.configs import config
+    from phosphobot.hardware import KochHardware, SO100Hardware, get_sim
+    from phosphobot.types import SimulationMode
+
+    config.SIM_MODE = SimulationMode.headless
+    get_sim()
+
+    robot_class = SO100Hardware if robot_name == "so-100" else KochHardware
+    protocol: ServoProtocol = "feetech" if robot_class is SO100Hardware else "dynamixel"
+    goal_address = 42 if protocol == "feetech" else 116
+
+    with settings.emulator(protocol) as emulator:
+        robot = robot_class(device_name=emulator.port, serial_id="emulator")
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(robot.connect())
+        if robot.config is None:
+            # No calibration for the emulated servos
+            robot.config = robot.get_default_base_robot_config(
+                voltage="6V", raise_if_none=True
+            )
+        try:
+            q_rad = robot.read_joints_position(unit="rad", source="robot")
+            position, orientation = robot.forward_kinematics(sync_robot_pos=True)
+            step = 0
+
+            def teleop_command() -> Optional[float]:
+                # Small circles around the current position
+                nonlocal step
+                step += 1
+                angle = step * 0.1
+                target = position + 0.01 * np.array([np.cos(angle), np.sin(angle), 0])
+                start = time.perf_counter()
+                loop.run_until_complete(robot.move_robot_absolute(target, orientation))
+                return _write_latency(emulator, goal_address, start)
+
+            def set_motors_positions() -> Optional[float]:
+                start = time.perf_counter()
+                robot.set_motors_positions(q_rad)
+                return _write_latency(emulator, goal_address, start)
+
+            return [
+                measure(
+                    f"{robot.name} read_joints_position",
+                    lambda: robot.read_joints_position(unit="rad", source="robot"),
+                    duration,
+                ),
+                measure(
+                    f"{robot.name} set_motors_positions",
+                    set_motors_positions,
+                    duration,
+                ),
+                measure(
+                    f"{robot.name} teleop command (move_robot_absolute)",
+                    teleop_command,
+                    duration,
+                ),
+            ]
+        finally:
+            robot.disconnect()
+            loop.close()
+
+
+def run_benchmarks(
+    settings: EmulatorSettings, duration: float = 1.0
+) -> List[BenchmarkResult]:
+    return (
+        benchmark_feetech_bus(settings, duration)
+        + benchmark_dynamixel_bus(settings, duration)
+        + benchmark_robot("so-100", settings, duration)
+        + benchmark_robot("koch-v1.1", settings, duration)
+    )
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    lines = [
+        f"{'benchmark':<52} {'calls':>7} {'rate (Hz)':>10} {'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}"
+    ]
+    for result in results:
+        latency = result.latency_ms
+        lines.append(
+            f"{result.name:<52} {result.calls:>7} {result.rate:>10.1f}"
+            + "".join(
+                f" {value:>7.3f}" if value is not None else f" {'-':>7}"
+                for value in [
+                    latency.mean,
+                    latency.p50,
+                    latency.p95,
+                    latency.p99,
+                    latency.max,
+                ]
+            )
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the motors buses and the robot hot path on emulated servos. Latencies are in ms."
+    )
+    parser.add_argument("--baudrate", type=int, default=1_000_000)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Latency of the USB serial adapter, in seconds.",
+    )
+    parser.add_argument(
+        "--return-delay",
+        type=float,
+        default=0.0,
+        help="Delay before each servo answers, in seconds.",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=2.0, help="Duration of each benchmark."
+    )
+    args = parser.parse_args()
+
+    logger.remove()
+    settings = EmulatorSettings(
+        baudrate=args.baudrate, latency=args.latency, return_delay=args.return_delay
+    )
+    print(format_results(run_benchmarks(settings, duration=args.duration)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import os
+import select
+import threading
+import time
+import tty
+from typing import Dict, List, Literal, Optional, Tuple
+
+from loguru import logger
+
+from phosphobot.hardware.motors.dynamixel import X_SERIES_CONTROL_TABLE  # type: ignore
+from phosphobot.hardware.motors.feetech import SCS_SERIES_CONTROL_TABLE  # type: ignore
+
+ServoProtocol = Literal["feetech", "dynamixel"]
+
+INST_PING = 0x01
+INST_READ = 0x02
+INST_WRITE = 0x03
+INST_SYNC_READ = 0x82
+INST_SYNC_WRITE = 0x83
+BROADCAST_ID = 0xFE
+
+# Error bits of the status packets
+FEETECH_ERROR_INSTRUCTION = 0x40
+DYNAMIXEL_ERROR_INSTRUCTION = 0x02
+
+DYNAMIXEL_HEADER = b"\xff\xff\xfd\x00"
+
+
+def _dynamixel_crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_DYNAMIXEL_CRC_TABLE = _dynamixel_crc_table()
+
+
+def dynamixel_crc(data: bytes) -> int:
+    """CRC-16 (polynomial 0x8005) of the Dynamixel protocol 2.0."""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) ^ _DYNAMIXEL_CRC_TABLE[((crc >> 8) ^ byte) & 0xFF]) & 0xFFFF
+    return crc
+
+
+def _add_stuffing(data: bytes) -> bytes:
+    return data.replace(b"\xff\xff\xfd", b"\xff\xff\xfd\xfd")
+
+
+def _remove_stuffing(data: bytes) -> bytes:
+    return data.replace(b"\xff\xff\xfd\xfd", b"\xff\xff\xfd")
+
+
+class ServoBusEmulator:
+    """
+    Software stand-in for a bus of Feetech (SCS protocol) or Dynamixel (protocol 2.0)
+    servos, served on a pseudo-terminal. The motors buses connect to `port` like to a
+    USB serial adapter, so the whole hardware path runs on a machine without robots.
+
+    The emulator answers ping, read, write, sync read and sync write. Writing the goal
+    position sets the present position, as if the servos reached it instantly.
+
+    The timing of a real bus is simulated: the bytes take 10 bits each at `baudrate`,
+    the bus handles one packet at a time, each servo waits `return_delay` seconds before
+    answering, and the answers reach the host `latency` seconds later (the latency timer
+    of the USB serial adapter).
+
+    Usage:
+    ```
+    with ServoBusEmulator("feetech", motor_ids=[1, 2, 3, 4, 5, 6]) as emulator:
+        bus = FeetechMotorsBus(port=emulator.port, motors=...)
+    ```
+    """
+
+    def __init__(
+        self,
+        protocol: ServoProtocol,
+        motor_ids: List[int],
+        baudrate: int = 1_000_000,
+        latency: float = 0.0,
+        return_delay: float = 0.0,
+    ):
+        self.protocol = protocol
+        self.motor_ids = motor_ids
+        self.baudrate = baudrate
+        self.latency = latency
+        self.return_delay = return_delay
+
+        if protocol == "feetech":
+            control_table = SCS_SERIES_CONTROL_TABLE
+            self.model_number = 777  # STS3215
+        else:
+            control_table = X_SERIES_CONTROL_TABLE
+            self.model_number = 1060  # XL430-W250
+        # Goal register (address, size) -> present register address
+        self._mirrored_registers = {
+            control_table["Goal_Position"]: control_table["Present_Position"][0]
+        }
+        self.registers: Dict[int, bytearray] = {}
+        for motor_id in motor_ids:
+            registers = bytearray(1024)
+            self.registers[motor_id] = registers
+            self._set_register(registers, control_table["ID"], motor_id)
+            model_name = "Model" if protocol == "feetech" else "Model_Number"
+            self._set_register(registers, control_table[model_name], self.model_number)
+            for name, value in [
+                ("Present_Position", 2048),
+                ("Goal_Position", 2048),
+                # 12V and 35°C
+                ("Present_Voltage", 120),
+                ("Present_Input_Voltage", 120),
+                ("Present_Temperature", 35),
+                ("Max_Temperature_Limit", 70),
+                ("Temperature_Limit", 70),
+            ]:
+                if name in control_table:
+                    self._set_register(registers, control_table[name], value)
+
+        self.packets_received = 0
+        # time.perf_counter at which the last write (or sync write) of each address
+        # was done transmitting on the bus
+        self.last_write_time: Dict[int, float] = {}
+
+        self._lock = threading.Lock()
+        self._write_condition = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self.port = ""
+        # Time at which the bus is done transmitting the previous packets
+        self._bus_free_at = 0.0
+
+    @staticmethod
+    def _set_register(
+        registers: bytearray, address_size: Tuple[int, int], value: int
+    ) -> None:
+        address, size = address_size
+        registers[address : address + size] = value.to_bytes(size, "little")
+
+    def read_register(self, motor_id: int, address: int, size: int) -> int:
+        with self._lock:
+            data = self.registers[motor_id][address : address + size]
+        return int.from_bytes(data, "little")
+
+    def wait_for_write(
+        self, address: int, since: float, timeout: float = 1.0
+    ) -> Optional[float]:
+        """
+        Wait until a write to address, sent after since (time.perf_counter), reached the
+        servos. Returns the time it did, or None on timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        with self._write_condition:
+            while self.last_write_time.get(address, -1.0) < since:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._write_condition.wait(remaining)
+            write_time = self.last_write_time[address]
+        self._sleep_until(write_time)
+        return write_time
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._master_fd, self._slave_fd = os.openpty()
+        # No echo or newline translation on the serial line
+        tty.setraw(self._slave_fd)
+        self.port = os.ttyname(self._slave_fd)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"servo-emulator-{self.protocol}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = None
+        self._slave_fd = None
+
+    def __enter__(self) -> "ServoBusEmulator":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _byte_time(self, n_bytes: int) -> float:
+        # 1 start bit, 8 data bits, 1 stop bit
+        return n_bytes * 10 / self.baudrate
+
+    def _run(self) -> None:
+        assert self._master_fd is not None
+        buffer = b""
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([self._master_fd], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self._master_fd, 4096)
+            except OSError:
+                break
+            received_at = time.perf_counter()
+            while True:
+                packet, buffer = self._next_packet(buffer)
+                if packet is None:
+                    break
+                try:
+                    self._handle_packet(packet, received_at)
+                except Exception as e:
+                    logger.warning(f"Servo emulator failed to handle a packet: {e}")
+
+    def _next_packet(self, buffer: bytes) -> Tuple[Optional[bytes], bytes]:
+        """Split the first complete packet from the buffer, dropping the invalid bytes."""
+        header = b"\xff\xff" if self.protocol == "feetech" else DYNAMIXEL_HEADER
+        while True:
+            start = buffer.find(header)
+            if start < 0:
+                # Keep a possible partial header
+                return None, buffer[-(len(header) - 1) :]
+            buffer = buffer[start:]
+            if self.protocol == "feetech":
+                if len(buffer) < 4:
+                    return None, buffer
+                length = buffer[3] + 4
+            else:
+                if len(buffer) < 7:
+                    return None, buffer
+                length = int.from_bytes(buffer[5:7], "little") + 7
+            if len(buffer) < length:
+                return None, buffer
+            packet, rest = buffer[:length], buffer[length:]
+            if self._checksum_ok(packet):
+                return packet, rest
+            logger.debug(f"Servo emulator dropped a corrupted packet: {packet.hex()}")
+            buffer = buffer[len(header) :]
+
+    def _checksum_ok(self, packet: bytes) -> bool:
+        if self.protocol == "feetech":
+            return (~sum(packet[2:-1]) & 0xFF) == packet[-1]
+        return dynamixel_crc(packet[:-2]) == int.from_bytes(packet[-2:], "little")
+
+    def _status_packet(self, motor_id: int, error: int, params: bytes) -> bytes:
+        if self.protocol == "feetech":
+            body = bytes([motor_id, len(params) + 2, error]) + params
+            return b"\xff\xff" + body + bytes([~sum(body) & 0xFF])
+        body = _add_stuffing(bytes([0x55, error]) + params)
+        packet = (
+            DYNAMIXEL_HEADER
+            + bytes([motor_id])
+            + (len(body) + 2).to_bytes(2, "little")
+            + body
+        )
+        return packet + dynamixel_crc(packet).to_bytes(2, "little")
+
+    def _handle_packet(self, packet: bytes, received_at: float) -> None:
+        self.packets_received += 1
+        if self.protocol == "feetech":
+            motor_id, instruction, params = packet[2], packet[4], packet[5:-1]
+            address_size = 1
+        else:
+            motor_id, instruction = packet[4], packet[7]
+            params = _remove_stuffing(packet[8:-2])
+            address_size = 2
+
+        def address_and_length(data: bytes) -> Tuple[int, int]:
+            return (
+                int.from_bytes(data[:address_size], "little"),
+                int.from_bytes(data[address_size : 2 * address_size], "little"),
+            )
+
+        # The packet was on the bus since the previous one was done
+        bus_time = max(received_at, self._bus_free_at) + self._byte_time(len(packet))
+
+        # (motor_id, error, params) of the status packets, in the order they are sent
+        replies: List[Tuple[int, int, bytes]] = []
+        with self._lock:
+            if instruction == INST_SYNC_READ:
+                address, length = address_and_length(params)
+                for reply_id in params[2 * address_size :]:
+                    if reply_id in self.registers:
+                        data = bytes(
+                            self.registers[reply_id][address : address + length]
+                        )
+                        replies.append((reply_id, 0, data))
+            elif instruction == INST_SYNC_WRITE:
+                address, length = address_and_length(params)
+                data = params[2 * address_size :]
+                for start in range(0, len(data) - length, length + 1):
+                    write_id = data[start]
+                    if write_id in self.registers:
+                        self._write(
+                            write_id, address, data[start + 1 : start + 1 + length]
+                        )
+                self.last_write_time[address] = bus_time
+                self._write_condition.notify_all()
+            elif motor_id in self.registers or motor_id == BROADCAST_ID:
+                target_ids = (
+                    list(self.registers) if motor_id == BROADCAST_ID else [motor_id]
+                )
+                if instruction == INST_PING:
+                    params_out = b""
+                    if self.protocol == "dynamixel":
+                        params_out = self.model_number.to_bytes(2, "little") + b"\x2d"
+                    replies = [(target_id, 0, params_out) for target_id in target_ids]
+                elif instruction == INST_READ:
+                    address, length = address_and_length(params)
+                    replies = [
+                        (
+                            target_id,
+                            0,
+                            bytes(
+                                self.registers[target_id][address : address + length]
+                            ),
+                        )
+                        for target_id in target_ids
+                    ]
+                elif instruction == INST_WRITE:
+                    address = int.from_bytes(params[:address_size], "little")
+                    for target_id in target_ids:
+                        self._write(target_id, address, params[address_size:])
+                    self.last_write_time[address] = bus_time
+                    self._write_condition.notify_all()
+                    replies = [(target_id, 0, b"") for target_id in target_ids]
+                else:
+                    error = (
+                        FEETECH_ERROR_INSTRUCTION
+                        if self.protocol == "feetech"
+                        else DYNAMIXEL_ERROR_INSTRUCTION
+                    )
+                    replies = [(target_id, error, b"") for target_id in target_ids]
+                # Broadcast instructions are not answered, except pings
+                if motor_id == BROADCAST_ID and instruction != INST_PING:
+                    replies = []
+
+        for reply_id, error, data in replies:
+            reply = self._status_packet(reply_id, error, data)
+            bus_time += self.return_delay + self._byte_time(len(reply))
+            self._sleep_until(bus_time + self.latency)
+            if self._master_fd is not None:
+                os.write(self._master_fd, reply)
+        self._bus_free_at = bus_time
+
+    def _write(self, motor_id: int, address: int, data: bytes) -> None:
+        registers = self.registers[motor_id]
+        registers[address : address + len(data)] = data
+        for (goal_address, size), present_address in self._mirrored_registers.items():
+            if address <= goal_address and goal_address + size <= address + len(data):
+                registers[present_address : present_address + size] = registers[
+                    goal_address : goal_address + size
+                ]
+
+    @staticmethod
+    def _sleep_until(deadline: float) -> None:
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
@@ -20,9 +20,9 @@ import math
 import queue
 import threading
 import time
+from concurrent.futures import Future
 from copy import deepcopy
 from typing import Dict, List, Optional, Tuple, Union
-from uuid import uuid4
 
 import numpy as np
 import scservo_sdk as scs
@@ -327,63 +327,113 @@ class FeetechMotorsBus:
 
         # Adding for port already in use error
 
-        self.task_queue = queue.Queue()
+        # Tasks are (action, args, kwargs, future). None wakes up the worker to stop it.
+        self.task_queue: queue.SimpleQueue = queue.SimpleQueue()
         self.worker_thread = None
         self._stop_event = threading.Event()
+        # Reads queued but not started yet, by (data_name, motor_names). Identical reads
+        # submitted concurrently share the same future, so they make a single GroupSyncRead.
+        # Emptied when another task is submitted: a read never joins one queued before a write.
+        self._pending_reads: Dict[tuple, Future] = {}
+        self._submit_lock = threading.Lock()
 
     def _worker(self):
         """The single worker thread that processes all requests in FIFO order."""
         # The worker needs its own reference to the SDK
 
-        while not self._stop_event.is_set():
-            try:
-                task_id, action, args, kwargs, result_queue = self.task_queue.get(
-                    timeout=0.01
-                )
+        while True:
+            # Block until a task is submitted: no polling
+            task = self.task_queue.get()
+            if task is None:
+                break
+            action, args, kwargs, future = task
 
-                result = None
-                error = None
+            if action == "read":
+                # Later identical reads will trigger a new transaction
+                with self._submit_lock:
+                    key = self._read_key(*args)
+                    if self._pending_reads.get(key) is future:
+                        del self._pending_reads[key]
 
-                try:
-                    # --- Task Dispatcher ---
-                    if action == "connect":
-                        self._perform_connect()
-                    elif action == "disconnect":
-                        self._perform_disconnect()
-                    elif action == "read":
-                        result = self._perform_read(*args, **kwargs)
-                    elif action == "write":
-                        self._perform_write(*args, **kwargs)
-                    elif action == "read_with_motor_ids":
-                        result = self._perform_read_with_motor_ids(*args, **kwargs)
-                    elif action == "write_with_motor_ids":
-                        self._perform_write_with_motor_ids(*args, **kwargs)
-                    elif action == "set_bus_baudrate":
-                        self._perform_set_bus_baudrate(*args, **kwargs)
-
-                except Exception as e:
-                    error = e
-
-                result_queue.put((result, error))
-
-            except queue.Empty:
+            if not future.set_running_or_notify_cancel():
                 continue
 
+            try:
+                # --- Task Dispatcher ---
+                result = None
+                if action == "connect":
+                    self._perform_connect()
+                elif action == "disconnect":
+                    self._perform_disconnect()
+                elif action == "read":
+                    result = self._perform_read(*args, **kwargs)
+                elif action == "write":
+                    self._perform_write(*args, **kwargs)
+                elif action == "read_with_motor_ids":
+                    result = self._perform_read_with_motor_ids(*args, **kwargs)
+                elif action == "write_with_motor_ids":
+                    self._perform_write_with_motor_ids(*args, **kwargs)
+                elif action == "set_bus_baudrate":
+                    self._perform_set_bus_baudrate(*args, **kwargs)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+
+        # Fail the tasks submitted while stopping
+        with self._submit_lock:
+            self._pending_reads.clear()
+            while True:
+                try:
+                    task = self.task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None and task[3].set_running_or_notify_cancel():
+                    task[3].set_exception(
+                        ConnectionError("Worker thread is not running.")
+                    )
+
+    def _read_key(self, data_name, motor_names=None) -> tuple:
+        if motor_names is None:
+            motor_names = self.motor_names
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+        return (data_name, tuple(motor_names))
+
+    def _submit_task(self, action, args=(), kwargs={}) -> Future:
+        """Queue a task for the worker thread and return its future."""
+        with self._submit_lock:
+            if (
+                self._stop_event.is_set()
+                or self.worker_thread is None
+                or not self.worker_thread.is_alive()
+            ):
+                raise ConnectionError("Worker thread is not running.")
+
+            if action == "read" and not kwargs:
+                key = self._read_key(*args)
+                future = self._pending_reads.get(key)
+                if future is not None:
+                    return future
+                future = Future()
+                self._pending_reads[key] = future
+            else:
+                # The reads queued before a write may return the values before the write
+                self._pending_reads.clear()
+                future = Future()
+            self.task_queue.put((action, args, kwargs, future))
+        return future
+
     def _submit_task_and_wait(self, action, args=(), kwargs={}):
         """Helper function to submit a task and block until a result is available."""
-        if self._stop_event.is_set() or not self.worker_thread.is_alive():
-            raise ConnectionError("Worker thread is not running.")
-
-        task_id = uuid4()
-        result_queue = queue.Queue(maxsize=1)  # Per-task result channel
-        task = (task_id, action, args, kwargs, result_queue)
-        self.task_queue.put(task)
+        return self._submit_task(action, args, kwargs).result()
 
-        # Block and wait for the result
-        result, error = result_queue.get()
-        if error:
-            raise error
-        return result
+    def _stop_worker(self):
+        with self._submit_lock:
+            self._stop_event.set()
+            # Wake up the worker once the tasks already queued are processed
+            self.task_queue.put(None)
+        if self.worker_thread is not threading.current_thread():
+            self.worker_thread.join()
 
     # --- Public-Facing API ---
     # These methods just submit tasks to the queue.
@@ -396,7 +446,11 @@ class FeetechMotorsBus:
         self.worker_thread = threading.Thread(target=self._worker, daemon=True)
         self.worker_thread.start()
         # The 'connect' task initializes the port handler inside the worker
-        self._submit_task_and_wait("connect")
+        try:
+            self._submit_task_and_wait("connect")
+        except Exception:
+            self._stop_worker()
+            raise
         self.is_connected = True
 
     def disconnect(self):
@@ -404,13 +458,16 @@ class FeetechMotorsBus:
             raise RobotDeviceNotConnectedError(...)
 
         # Signal the worker to stop processing new tasks and shut down
-        self._submit_task_and_wait("disconnect")
-        self._stop_event.set()
-        self.worker_thread.join()
+        try:
+            self._submit_task_and_wait("disconnect")
+        finally:
+            self._stop_worker()
         self.is_connected = False
 
     def read(self, data_name, motor_names=None):
-        return self._submit_task_and_wait("read", args=(data_name, motor_names))
+        values = self._submit_task_and_wait("read", args=(data_name, motor_names))
+        # The array may be shared with concurrent callers of the same read
+        return values.copy()
 
     def write(self, data_name, values, motor_names=None):
         return self._submit_task_and_wait(
@@ -35,7 +35,6 @@ class PiperHardware(BaseManipulator):
     CALIBRATION_POSITION = [0, 0, 0, 0, 0, 0]
 
     is_object_gripped = False
-    is_moving = False
     robot_connected = False
 
     GRIPPER_MAX_ANGLE = 99  # In degree
@@ -27,14 +27,18 @@ class PyBulletSimulation:
     def __init__(
         self,
         sim_mode: SimulationMode = SimulationMode.headless,
+        physics: bool = True,
     ) -> None:
         """
         Initialize the PyBullet simulation environment.
 
         Args:
             sim_mode (SimulationMode): Simulation mode - "headless" or "gui"
+            physics (bool): Step the physics in a background thread. If False, the simulation
+                is only used for kinematics: joint states are set directly and step() does nothing.
         """
         self.sim_mode = sim_mode
+        self.physics = physics
         self.connected = False
         self.robots: dict = {}  # Store loaded robots
         self._running = False
@@ -44,7 +48,8 @@ class PyBulletSimulation:
         self._lock = threading.Lock()
 
         self.init_simulation()
-        self.start_stepping()
+        if self.physics:
+            self.start_stepping()
 
     def init_simulation(self) -> None:
         """
@@ -157,6 +162,10 @@ class PyBulletSimulation:
         """
         Increment the pending step counter (non-blocking).
         """
+        if not self.physics:
+            # Joint states are already set directly
+            return
+
         if not self.connected or not p.isConnected():
             logger.warning("Simulation is not connected, cannot enqueue step")
             return
@@ -329,6 +338,12 @@ class PyBulletSimulation:
             logger.warning("Simulation is not connected, cannot set joint states")
             return
 
+        if not self.physics:
+            # No stepping to move the joints with the motors: teleport them
+            for joint_index, target_position in zip(joint_indices, target_positions):
+                p.resetJointState(robot_id, joint_index, target_position)
+            return
+
         p.setJointMotorControlArray(
             bodyIndex=robot_id,
             jointIndices=joint_indices,
@@ -649,6 +664,6 @@ def get_sim() -> PyBulletSimulation:
     if sim is None:
         from phosphobot.configs import config
 
-        sim = PyBulletSimulation(sim_mode=config.SIM_MODE)
+        sim = PyBulletSimulation(sim_mode=config.SIM_MODE, physics=config.SIM_PHYSICS)
 
     return sim
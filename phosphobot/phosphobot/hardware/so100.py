@@ -29,6 +29,9 @@ class SO100Hardware(BaseManipulator):
     END_EFFECTOR_LINK_INDEX = 4
     GRIPPER_JOINT_INDEX = 5
 
+    # The Feetech bus worker runs the reads and writes one at a time
+    THREAD_SAFE_BUS = True
+
     # Feetech settings
     motors: Dict[str, List[object]] = {
         # name: (index, model)
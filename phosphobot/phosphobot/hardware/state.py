@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.models import Temperature
+
+if TYPE_CHECKING:
+    from phosphobot.hardware.base import BaseManipulator
+
+
+@dataclass
+class RobotState:
+    """A sample of the state of a robot."""
+
+    # time.perf_counter at the middle of the joints read
+    timestamp: float
+    # Joints position in radians, as returned by read_joints_position
+    joints_position: np.ndarray
+    # Telemetry, only set on the samples where it was read
+    torque: Optional[np.ndarray] = None
+    voltage: Optional[np.ndarray] = None
+    temperature: Optional[List[Temperature]] = None
+
+    @property
+    def age(self) -> float:
+        return time.perf_counter() - self.timestamp
+
+    @property
+    def has_telemetry(self) -> bool:
+        return (
+            self.torque is not None
+            or self.voltage is not None
+            or self.temperature is not None
+        )
+
+
+class RobotStateBroadcaster:
+    """
+    Sample the state of a robot at a fixed rate in a background thread.
+
+    The samples are kept in a ring buffer, so the recorder, the AI control loops and the
+    endpoints share the same timestamped reads instead of each polling the motors bus.
+    Consumers ask for the latest sample with a staleness bound, and read the robot
+    themselves when the broadcaster is late (see BaseManipulator.get_joints_position).
+
+    Torque, voltage and temperature are read one motor at a time, so they are sampled at
+    a lower rate (telemetry_freq). Set it to 0 to only sample the joints.
+
+    The thread only reads the bus while the samples are used: it pauses when no consumer
+    asked for the joints (or the telemetry) for idle_timeout seconds, and resumes on the
+    next request. The motors bus of the robot must be thread-safe (THREAD_SAFE_BUS).
+    """
+
+    def __init__(
+        self,
+        robot: "BaseManipulator",
+        freq: int,
+        telemetry_freq: float = 0,
+        history_size: int = 256,
+        idle_timeout: float = 2.0,
+    ):
+        if freq <= 0:
+            raise ValueError(f"Frequency must be positive, got {freq}")
+        self.robot = robot
+        self.freq = freq
+        self.telemetry_freq = telemetry_freq
+        self.idle_timeout = idle_timeout
+        self._history: Deque[RobotState] = deque(maxlen=history_size)
+        self._latest_telemetry: Optional[RobotState] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # time.perf_counter of the last requests for the joints and for the telemetry
+        self._last_demand = -float("inf")
+        self._last_telemetry_demand = -float("inf")
+        # Set by the consumers to wake up the paused thread
+        self._demand_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"state-{self.robot.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._demand_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def sample(self, telemetry: bool = False) -> RobotState:
+        """
+        Read the robot now and add the sample to the ring buffer.
+        Called by the background thread, and by consumers when the latest sample is too old.
+        """
+        start = time.perf_counter()
+        joints_position = self.robot.read_joints_position(unit="rad", source="robot")
+        state = RobotState(
+            timestamp=(start + time.perf_counter()) / 2,
+            joints_position=joints_position,
+        )
+        if telemetry:
+            state.torque = self.robot.current_torque()
+            state.voltage = self.robot.current_voltage()
+            state.temperature = self.robot.current_temperature()
+
+        with self._lock:
+            # Keep the buffer sorted when a consumer sampled concurrently
+            if not self._history or self._history[-1].timestamp <= state.timestamp:
+                self._history.append(state)
+            if telemetry:
+                self._latest_telemetry = state
+        return state
+
+    def latest(self, max_staleness: Optional[float] = None) -> Optional[RobotState]:
+        """The latest sample, or None if there is none younger than max_staleness seconds."""
+        self._mark_demand()
+        with self._lock:
+            state = self._history[-1] if self._history else None
+        if state is None or (max_staleness is not None and state.age > max_staleness):
+            return None
+        return state
+
+    def latest_telemetry(
+        self, max_staleness: Optional[float] = None
+    ) -> Optional[RobotState]:
+        """The latest sample with torque, voltage and temperature."""
+        self._mark_demand(telemetry=True)
+        with self._lock:
+            state = self._latest_telemetry
+        if state is None or (max_staleness is not None and state.age > max_staleness):
+            return None
+        return state
+
+    def history(self, since: Optional[float] = None) -> List[RobotState]:
+        """The samples in the ring buffer taken after since (time.perf_counter), oldest first."""
+        self._mark_demand()
+        with self._lock:
+            states = list(self._history)
+        if since is not None:
+            states = [state for state in states if state.timestamp > since]
+        return states
+
+    def _mark_demand(self, telemetry: bool = False) -> None:
+        now = time.perf_counter()
+        self._last_demand = now
+        if telemetry:
+            self._last_telemetry_demand = now
+        self._demand_event.set()
+
+    def _is_idle(self, now: float) -> bool:
+        return now - self._last_demand > self.idle_timeout
+
+    def _run(self) -> None:
+        period = 1 / self.freq
+        telemetry_period = 1 / self.telemetry_freq if self.telemetry_freq > 0 else None
+        next_deadline = time.perf_counter()
+        next_telemetry = next_deadline
+        failing = False
+
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            if self._is_idle(now):
+                # Nobody uses the samples: leave the bus alone until a consumer asks again
+                self._demand_event.clear()
+                if self._is_idle(time.perf_counter()):
+                    self._demand_event.wait()
+                next_deadline = time.perf_counter()
+                continue
+
+            telemetry = (
+                telemetry_period is not None
+                and now >= next_telemetry
+                and now - self._last_telemetry_demand <= self.idle_timeout
+            )
+            try:
+                self.sample(telemetry=telemetry)
+                if failing:
+                    logger.info(f"Sampling the state of {self.robot.name} again")
+                    failing = False
+            except Exception as e:
+                # Only log when the reads start failing, not at every tick
+                if not failing:
+                    logger.warning(
+                        f"Failed to sample the state of {self.robot.name}: {e}"
+                    )
+                    failing = True
+            if telemetry and telemetry_period is not None:
+                next_telemetry = now + telemetry_period
+
+            # Absolute deadlines: skip the ticks missed by a slow read instead of drifting
+            next_deadline += period
+            now = time.perf_counter()
+            if next_deadline < now:
+                next_deadline += (now - next_deadline) // period * period + period
+            self._stop_event.wait(next_deadline - now)
@@ -140,11 +140,15 @@ class URDFLoader(BaseManipulator):
         self.is_connected = False
 
     def get_observation(
-        self, source: Literal["sim", "robot"], do_forward: bool = False
+        self,
+        source: Literal["sim", "robot"],
+        do_forward: bool = False,
+        max_staleness: Optional[float] = None,
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Gets the robot's observation. If ZMQ is configured, it will initialize the
         connection on the first call and then read the latest data from the listener thread.
+        max_staleness is ignored: the robot lives in the simulation.
         """
         if self.zmq_server_url and self.zmq_topic:
             # Lazy initialization of ZMQ (if possible)
@@ -1,13 +1,14 @@
 import asyncio
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Coroutine, Dict, List, Optional, Union
+from typing import Any, Coroutine, Deque, Dict, List, Optional, Set, Union
 
 import numpy as np
 from loguru import logger
 
-from phosphobot.control_signal import ControlSignal
+from phosphobot.control_signal import LeaderFollowerSignal
 from phosphobot.hardware import (
     BaseManipulator,
     RemotePhosphobot,
@@ -16,6 +17,8 @@ from phosphobot.hardware import (
 )
 from phosphobot.hardware.piper import PiperHardware
 from phosphobot.hardware.sim import PyBulletSimulation
+from phosphobot.models import LeaderFollowerPairStatus
+from phosphobot.scheduler import latency_stats
 from phosphobot.utils import background_task_log_exceptions
 
 
@@ -25,17 +28,65 @@ class RobotPair:
     follower: Union[BaseManipulator, RemotePhosphobot]
 
 
+def _robot_description(robot: Union[BaseManipulator, RemotePhosphobot]) -> str:
+    return f"{robot.name} {robot.device_name}" if robot.device_name else robot.name
+
+
+class PairTiming:
+    """
+    Achieved rate and read/write latencies of a robot pair, over its last iterations.
+    Written by the control loop of the pair, read by the /status endpoint.
+    """
+
+    def __init__(self, pair: RobotPair, loop_index: int, window: int = 300):
+        self.leader = _robot_description(pair.leader)
+        self.follower = _robot_description(pair.follower)
+        self.loop_index = loop_index
+        self._lock = threading.Lock()
+        self._timestamps: Deque[float] = deque(maxlen=window)
+        self._read_latency: Deque[float] = deque(maxlen=window)
+        self._write_latency: Deque[float] = deque(maxlen=window)
+
+    def add(self, timestamp: float, read_latency: float, write_latency: float) -> None:
+        with self._lock:
+            self._timestamps.append(timestamp)
+            self._read_latency.append(read_latency)
+            self._write_latency.append(write_latency)
+
+    def summary(self) -> LeaderFollowerPairStatus:
+        with self._lock:
+            timestamps = list(self._timestamps)
+            read_latency = list(self._read_latency)
+            write_latency = list(self._write_latency)
+        freq = None
+        if len(timestamps) >= 2 and timestamps[-1] > timestamps[0]:
+            freq = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+        return LeaderFollowerPairStatus(
+            leader=self.leader,
+            follower=self.follower,
+            loop_index=self.loop_index,
+            freq=freq,
+            read_latency_ms=latency_stats(read_latency),
+            write_latency_ms=latency_stats(write_latency),
+        )
+
+
 class LeaderFollowerThread(threading.Thread):
     """
-    A dedicated thread to run the leader-follower control loop.
-    This offloads the intensive loop from the main asyncio event loop,
+    A dedicated thread to run the leader-follower control loops.
+    This offloads the intensive loops from the main asyncio event loop,
     allowing for better performance and parallelism.
+
+    The pairs on independent buses (ex: two SO-100 pairs on separate USB ports) are
+    mirrored concurrently, each in its own control loop, so that the period of a loop
+    is not the sum of the bus latencies of all the pairs. Pairs sharing a robot or a bus
+    run in the same loop. All the loops stop on the same control signal.
     """
 
     def __init__(
         self,
         robot_pairs: List[RobotPair],
-        control_signal: ControlSignal,
+        control_signal: LeaderFollowerSignal,
         invert_controls: bool,
         enable_gravity_compensation: bool,
         compensation_values: Optional[Dict[str, int]],
@@ -51,6 +102,8 @@ class LeaderFollowerThread(threading.Thread):
         self.loop_period = 1 / 60 if self.enable_gravity_compensation else 1 / 150
         self.original_pid_gains: Dict[str, list] = {}
         self.warning_dropping_joints_displayed = False
+        # The loops share the simulation to compute the gravity compensation
+        self._sim_lock = threading.Lock()
 
     def _run_async(self, coro: Coroutine) -> Any:
         """Helper function to run async code from within the thread."""
@@ -197,13 +250,76 @@ class LeaderFollowerThread(threading.Thread):
             )
         )
 
+        groups = self._group_pairs()
+        timings = [
+            [PairTiming(pair, loop_index=loop_index) for pair in pairs]
+            for loop_index, pairs in enumerate(groups)
+        ]
+        self.control_signal.set_timings(
+            [timing for loop_timings in timings for timing in loop_timings]
+        )
+        if len(groups) > 1:
+            logger.info(
+                f"Running {len(groups)} leader-follower control loops concurrently."
+            )
+
+        loops = [
+            threading.Thread(
+                target=self._control_loop,
+                args=(pairs, loop_timings),
+                name=f"leader-follower-{loop_index}",
+                daemon=True,
+            )
+            for loop_index, (pairs, loop_timings) in enumerate(zip(groups, timings))
+        ]
+        try:
+            for loop in loops:
+                loop.start()
+            for loop in loops:
+                loop.join()
+        finally:
+            self._cleanup_robots()
+            logger.info("Leader-follower control stopped.")
+
+    @staticmethod
+    def _bus_key(robot: Union[BaseManipulator, RemotePhosphobot]) -> str:
+        """Robots with the same key can't be used concurrently."""
+        if robot.device_name:
+            return robot.device_name
+        return f"robot-{id(robot)}"
+
+    def _group_pairs(self) -> List[List[RobotPair]]:
+        """
+        Group the pairs that share a robot or a bus, directly or through other pairs.
+        Each group runs in its own control loop.
+        """
+        groups: List[List[RobotPair]] = []
+        groups_keys: List[Set[str]] = []
+        for pair in self.robot_pairs:
+            pair_group = [pair]
+            pair_keys = {self._bus_key(pair.leader), self._bus_key(pair.follower)}
+            # Merge the groups this pair connects
+            connected = [
+                index for index, keys in enumerate(groups_keys) if keys & pair_keys
+            ]
+            for index in reversed(connected):
+                pair_group = groups.pop(index) + pair_group
+                pair_keys |= groups_keys.pop(index)
+            groups.append(pair_group)
+            groups_keys.append(pair_keys)
+        return groups
+
+    def _control_loop(self, pairs: List[RobotPair], timings: List[PairTiming]) -> None:
+        """Mirror the pairs of a group until the control signal is stopped."""
         try:
             while self.control_signal.is_in_loop():
                 start_time = time.perf_counter()
 
-                for pair in self.robot_pairs:
+                for pair, timing in zip(pairs, timings):
                     leader, follower = pair.leader, pair.follower
+                    read_start = time.perf_counter()
                     pos_rad = leader.read_joints_position(unit="rad", source="robot")
+                    read_end = time.perf_counter()
 
                     if any(np.isnan(pos_rad)):
                         logger.warning(
@@ -225,16 +341,19 @@ class LeaderFollowerThread(threading.Thread):
                         self._simple_mirroring_step(
                             leader=leader, follower=follower, pos_rad=pos_rad
                         )
+                    timing.add(
+                        timestamp=read_start,
+                        read_latency=read_end - read_start,
+                        write_latency=time.perf_counter() - read_end,
+                    )
 
                 elapsed = time.perf_counter() - start_time
                 sleep_time = max(0, self.loop_period - elapsed)
                 time.sleep(sleep_time)
         except Exception as e:
             logger.error(f"Error in leader-follower control loop: {e}")
+            # Stop the other loops too
             self.control_signal.stop()
-        finally:
-            self._cleanup_robots()
-            logger.info("Leader-follower control stopped.")
 
     def _simple_mirroring_step(
         self,
@@ -289,15 +408,16 @@ class LeaderFollowerThread(threading.Thread):
         joint_indices = list(range(num_joints))
 
         # Update PyBullet simulation to calculate gravity torque
-        for i, idx in enumerate(joint_indices):
-            self.sim.set_joint_state(leader.p_robot_id, idx, pos_rad[i])
-
-        tau_g = self.sim.inverse_dynamics(
-            leader.p_robot_id,
-            positions=list(pos_rad),
-            velocities=[0.0] * num_joints,
-            accelerations=[0.0] * num_joints,
-        )
+        with self._sim_lock:
+            for i, idx in enumerate(joint_indices):
+                self.sim.set_joint_state(leader.p_robot_id, idx, pos_rad[i])
+
+            tau_g = self.sim.inverse_dynamics(
+                leader.p_robot_id,
+                positions=list(pos_rad),
+                velocities=[0.0] * num_joints,
+                accelerations=[0.0] * num_joints,
+            )
         tau_g = list(tau_g)
 
         # Apply custom compensation values if they exist
@@ -347,7 +467,7 @@ class LeaderFollowerThread(threading.Thread):
 @background_task_log_exceptions
 async def start_leader_follower_loop(
     robot_pairs: list[RobotPair],
-    control_signal: ControlSignal,
+    control_signal: LeaderFollowerSignal,
     invert_controls: bool,
     enable_gravity_compensation: bool,
     compensation_values: Optional[Dict[str, int]],
@@ -49,6 +49,10 @@ class ServerStatus(BaseModel):
         False,
         description="Whether the leader-follower control is currently active.",
     )
+    leader_follower_pairs: List["LeaderFollowerPairStatus"] = Field(
+        default_factory=list,
+        description="Timing of the leader-follower pairs, while the control is active.",
+    )
     server_ip: str = Field(
         ..., description="IP address of the phosphobot server", examples=["192.168.1.X"]
     )
@@ -66,6 +70,10 @@ class RobotStatus(BaseModel):
     is_object_gripped: Optional[bool] = None
     is_object_gripped_source: Optional[Literal["left", "right"]] = None
     nb_actions_received: int
+    # Commands replaced by a more recent one before being run
+    nb_actions_coalesced: int = 0
+    # Commands skipped: rate limited, stale, or the robot was busy
+    nb_actions_dropped: int = 0
 
 
 class EndEffectorReadRequest(BaseModel):
@@ -321,6 +329,11 @@ class JointsReadRequest(BaseModel):
         "robot",
         description="Source of the joint angles. 'sim' means the angles are read from the simulation, 'robot' means the angles are read from the hardware.",
     )
+    max_staleness: Optional[float] = Field(
+        0.1,
+        ge=0,
+        description="Maximum age in seconds of the joint angles read from the robot. If the robot state is sampled in the background, a sample younger than this is returned instead of reading the hardware. Set to None to always read the hardware.",
+    )
 
 
 class JointsWriteRequest(BaseModel):
@@ -363,7 +376,7 @@ class TorqueReadResponse(BaseModel):
     Response to read the torque of the robot.
     """
 
-    current_torque: List[float] = Field(
+    current_torque: List[Optional[float]] = Field(
         ...,
         description="A list of length 6, with the current torque of each joint.",
     )
@@ -411,6 +424,9 @@ class InfoResponse(BaseModel):
     robot_type: Optional[str] = None
     robot_dof: Optional[int] = None
     number_of_episodes: Optional[int] = None
+    number_of_frames: Optional[int] = None
+    # Size of the dataset on disk, in bytes
+    disk_size: Optional[int] = None
     image_keys: Optional[List[str]] = None
     image_frames: Optional[Dict[str, str]] = None
 
@@ -496,6 +512,14 @@ class DatasetShuffleRequest(BaseModel):
     )
 
 
+class DatasetCompactRequest(BaseModel):
+    dataset_path: str = Field(
+        ...,
+        description="Path to the dataset to compact",
+        examples=["/lerobot_v2.1/example_dataset"],
+    )
+
+
 class SpawnStatusResponse(StatusResponse):
     """
     Response to spawn a server.
@@ -613,6 +637,132 @@ class RecordingStopResponse(BaseModel):
     )
 
 
+class LatencyStats(BaseModel):
+    """
+    Summary of a duration measured at every tick of a control or recording loop, in milliseconds.
+    """
+
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+
+
+class LeaderFollowerPairStatus(BaseModel):
+    """
+    Timing of the control loop of a leader-follower pair, over its last iterations.
+    """
+
+    leader: str = Field(..., description="Name and device of the leader robot.")
+    follower: str = Field(..., description="Name and device of the follower robot.")
+    loop_index: int = Field(
+        ...,
+        description="Index of the control loop running the pair. Pairs sharing a robot or a bus run in the same loop, other pairs run concurrently.",
+    )
+    freq: Optional[float] = Field(
+        None,
+        description="Achieved mirroring rate in Hz. None if the pair was not mirrored yet.",
+    )
+    read_latency_ms: LatencyStats = Field(
+        default_factory=LatencyStats,
+        description="Time to read the joints of the leader.",
+    )
+    write_latency_ms: LatencyStats = Field(
+        default_factory=LatencyStats,
+        description="Time to command the follower (and the leader with gravity compensation).",
+    )
+
+
+class RecordingTimingStats(BaseModel):
+    """
+    Timing of the recording loop, used to check that an episode is recorded at the requested frequency.
+    """
+
+    freq: int = Field(..., description="Requested recording frequency in Hz.")
+    overrun_policy: Literal["skip", "duplicate"] = Field(
+        ...,
+        description="What is done with the ticks missed because a loop iteration took longer than 1/freq."
+        + " `skip` drops them, `duplicate` records the previous step again.",
+    )
+    ticks: int = Field(..., description="Number of ticks that recorded a new step.")
+    dropped_ticks: int = Field(
+        ..., description="Number of ticks missed and not recorded."
+    )
+    duplicated_ticks: int = Field(
+        ..., description="Number of ticks missed and filled with the previous step."
+    )
+    effective_freq: Optional[float] = Field(
+        None,
+        description="Number of recorded steps per second of recording. None if fewer than 2 ticks.",
+    )
+    jitter_ms: LatencyStats = Field(
+        ..., description="Delay between the deadline of a tick and its actual start."
+    )
+    capture_latency_ms: LatencyStats = Field(
+        ..., description="Time to get the frames of all the cameras."
+    )
+    robot_read_latency_ms: LatencyStats = Field(
+        ..., description="Time to read the observations of all the robots."
+    )
+    tick_duration_ms: LatencyStats = Field(
+        ..., description="Total processing time of a tick."
+    )
+    duplicate_frames: int = Field(
+        0,
+        description="Number of frames recorded twice because a camera didn't send a new frame in time.",
+    )
+    stale_frames: int = Field(
+        0,
+        description="Number of frames captured more than a camera frame period away from the robot read.",
+    )
+    frame_offset_ms: LatencyStats = Field(
+        default_factory=LatencyStats,
+        description="Largest gap between the capture time of the frames of a step and the robot read.",
+    )
+
+
+class EpisodeSaveStatus(BaseModel):
+    """
+    Status of an episode saved in the background, after the recording was stopped.
+    """
+
+    dataset_name: str
+    episode_index: int
+    status: Literal["queued", "saving", "saved", "failed"] = "queued"
+    stage: Optional[str] = Field(
+        default=None,
+        description="What is being saved: data, videos, meta or push (to the Hugging Face Hub).",
+    )
+    error: Optional[str] = None
+    queued_at: float = Field(
+        ..., description="Time the episode was queued, as a unix timestamp."
+    )
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class RecordingStatusResponse(BaseModel):
+    """
+    Status of the current recording.
+    """
+
+    is_recording: bool
+    is_saving: bool
+    episode_index: Optional[int] = Field(
+        None, description="Index of the current episode, if any."
+    )
+    num_steps: int = Field(0, description="Number of steps in the current episode.")
+    timing: Optional[RecordingTimingStats] = Field(
+        None,
+        description="Timing of the recording loop of the current episode, if any.",
+    )
+    saves: List[EpisodeSaveStatus] = Field(
+        default_factory=list,
+        description="Episodes being saved in the background, and the last ones saved.",
+    )
+
+
 class RecordingPlayRequest(BaseModel):
     """
     Request to play a recorded episode.
@@ -933,6 +1083,12 @@ class StartAIControlRequest(BaseModel):
         None,
         description="If angle_format is 'other', this is the maximum angle value used in the model. If None and angle_format is 'other', will raise an error.",
     )
+    prefetch_threshold: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Only for ACT. Request the next action chunk when this many actions are left, while the robot keeps executing the current chunk. This hides the inference latency. If None, the robot waits for each chunk once the previous one is done.",
+        examples=[20],
+    )
 
     @model_validator(mode="after")
     def check_angle_format(self) -> "StartAIControlRequest":
@@ -135,6 +135,11 @@ class BaseEpisode(BaseModel, ABC):
             "Subclasses must implement dataset_path to return the correct path."
         )
 
+    @property
+    def num_steps(self) -> int:
+        """Number of recorded steps in the episode."""
+        return len(self.steps)
+
     @property
     def episode_index(self) -> int:
         idx = self.metadata.get("episode_index")
@@ -0,0 +1,265 @@
+"""
+Catalog of the local datasets, in a SQLite database in the app's folder.
+
+For each dataset, the catalog holds what the browse pages show: the robot, the number of
+episodes and frames, the camera keys, the episode parquets, the size on disk and a
+thumbnail of each camera. The app updates an entry when the episodes of its dataset are
+saved, deleted, merged or split. When read, an entry is checked against the modification
+times of the meta files and of the data folders, so a dataset changed by another program
+is scanned again. Thumbnails are only rendered again when their video changes.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from phosphobot.models.lerobot_dataset import InfoModel
+from phosphobot.utils import get_home_app_path
+
+# Size of the thumbnails, (width, height)
+THUMBNAIL_SIZE = (320, 240)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    dataset_path TEXT NOT NULL,
+    camera_key TEXT NOT NULL,
+    -- Identity of the video the thumbnail was rendered from
+    video_key TEXT NOT NULL,
+    jpeg BLOB NOT NULL,
+    PRIMARY KEY (dataset_path, camera_key)
+);
+"""
+
+
+class DatasetCatalogEntry(BaseModel):
+    """What the catalog knows about a dataset."""
+
+    # Absolute path of the dataset folder
+    path: str
+    robot_type: str
+    robot_dof: int
+    total_episodes: int
+    total_frames: int
+    camera_keys: List[str] = Field(default_factory=list)
+    # Parquets of the episodes, sorted
+    episode_paths: List[str] = Field(default_factory=list)
+    # Size of the files of the dataset in bytes. Hard-linked files are counted once.
+    disk_size: int = 0
+    updated_at: float = Field(default_factory=time.time)
+
+
+def _file_key(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_dataset_fingerprint(dataset_path: str) -> Optional[str]:
+    """
+    Identity of the meta files and of the data folders of a dataset: saving, deleting or
+    renumbering episodes changes it. Returns None if the dataset has no meta/info.json.
+    """
+    try:
+        parts = [f"info:{_file_key(os.path.join(dataset_path, 'meta', 'info.json'))}"]
+    except FileNotFoundError:
+        return None
+    for meta_file in ["episodes.jsonl", "tombstones.json"]:
+        meta_file_path = os.path.join(dataset_path, "meta", meta_file)
+        if os.path.exists(meta_file_path):
+            parts.append(f"{meta_file}:{_file_key(meta_file_path)}")
+    # Adding or removing a parquet changes the modification time of its folder
+    for data_folder in sorted(Path(dataset_path).glob("data/chunk-*")):
+        parts.append(f"{data_folder.name}:{_file_key(str(data_folder))}")
+    return "|".join(parts)
+
+
+def get_disk_size(folder_path: str) -> int:
+    """Size of the files in a folder, recursively. Hard-linked files are counted once."""
+    disk_size = 0
+    seen: Set[Tuple[int, int]] = set()
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            try:
+                stat = os.stat(os.path.join(root, file))
+            except FileNotFoundError:
+                continue
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+            disk_size += stat.st_size
+    return disk_size
+
+
+def render_thumbnail(video_path: str) -> Optional[bytes]:
+    """
+    JPEG of the first frame of a video, resized to THUMBNAIL_SIZE.
+    Returns None if the video can't be read.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        frame = cv2.resize(frame, THUMBNAIL_SIZE)
+        ret, buffer = cv2.imencode(".jpg", frame)
+        return buffer.tobytes() if ret else None
+    finally:
+        cap.release()
+
+
+class DatasetCatalog:
+    """
+    Catalog of the local datasets, by absolute path. Thread safe: every call opens its
+    own connection to the database.
+    """
+
+    def __init__(self, catalog_path: str) -> None:
+        self.catalog_path = catalog_path
+        os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            # Readers don't wait for the updates done by the episode saver
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.catalog_path, timeout=30)
+
+    def get(self, dataset_path: str) -> Optional[DatasetCatalogEntry]:
+        """
+        The entry of a dataset. If the dataset changed since it was last scanned, it's
+        scanned again. Returns None if the path is not a dataset.
+        """
+        dataset_path = os.path.abspath(dataset_path)
+        fingerprint = get_dataset_fingerprint(dataset_path)
+        if fingerprint is None:
+            self.remove(dataset_path)
+            return None
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT fingerprint, entry FROM datasets WHERE path = ?",
+                (dataset_path,),
+            ).fetchone()
+        if row is not None and row[0] == fingerprint:
+            return DatasetCatalogEntry.model_validate_json(row[1])
+        return self.update(dataset_path)
+
+    def update(self, dataset_path: str) -> Optional[DatasetCatalogEntry]:
+        """
+        Scan a dataset and store its entry. Call it after modifying the dataset.
+        Returns None, and removes the entry, if the path is not a readable dataset.
+        """
+        dataset_path = os.path.abspath(dataset_path)
+        # Read before the scan: if the dataset changes during the scan, it's scanned again
+        fingerprint = get_dataset_fingerprint(dataset_path)
+        if fingerprint is None:
+            self.remove(dataset_path)
+            return None
+        try:
+            info = InfoModel.from_json(
+                meta_folder_path=os.path.join(dataset_path, "meta")
+            )
+        except Exception as e:
+            logger.warning(f"Error loading dataset info of {dataset_path}: {e}")
+            self.remove(dataset_path)
+            return None
+
+        entry = DatasetCatalogEntry(
+            path=dataset_path,
+            robot_type=info.robot_type,
+            robot_dof=info.features.observation_state.shape[0],
+            total_episodes=info.total_episodes,
+            total_frames=info.total_frames,
+            camera_keys=list(info.features.observation_images.keys()),
+            episode_paths=[
+                str(path)
+                for path in sorted(Path(dataset_path).glob("data/chunk-*/**/*.parquet"))
+            ],
+            disk_size=get_disk_size(dataset_path),
+        )
+
+        with closing(self._connect()) as connection:
+            rendered_video_keys = dict(
+                connection.execute(
+                    "SELECT camera_key, video_key FROM thumbnails WHERE dataset_path = ?",
+                    (dataset_path,),
+                ).fetchall()
+            )
+        thumbnails: Dict[str, Tuple[str, bytes]] = {}
+        for camera_key in entry.camera_keys:
+            # Thumbnail of the first episode: deleted episodes have no video
+            video_paths = sorted(
+                Path(dataset_path).glob(f"videos/chunk-*/{camera_key}/episode_*.mp4")
+            )
+            if not video_paths:
+                continue
+            video_key = _file_key(str(video_paths[0]))
+            if rendered_video_keys.get(camera_key) == video_key:
+                continue
+            jpeg = render_thumbnail(str(video_paths[0]))
+            if jpeg is not None:
+                thumbnails[camera_key] = (video_key, jpeg)
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO datasets (path, fingerprint, entry) VALUES (?, ?, ?)",
+                (dataset_path, fingerprint, entry.model_dump_json()),
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO thumbnails (dataset_path, camera_key, video_key, jpeg) VALUES (?, ?, ?, ?)",
+                [
+                    (dataset_path, camera_key, video_key, jpeg)
+                    for camera_key, (video_key, jpeg) in thumbnails.items()
+                ],
+            )
+            # Thumbnails of the cameras removed from the dataset
+            connection.executemany(
+                "DELETE FROM thumbnails WHERE dataset_path = ? AND camera_key = ?",
+                [
+                    (dataset_path, camera_key)
+                    for camera_key in rendered_video_keys
+                    if camera_key not in entry.camera_keys
+                ],
+            )
+        return entry
+
+    def remove(self, dataset_path: str) -> None:
+        """Remove the entry of a deleted dataset."""
+        dataset_path = os.path.abspath(dataset_path)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM datasets WHERE path = ?", (dataset_path,))
+            connection.execute(
+                "DELETE FROM thumbnails WHERE dataset_path = ?", (dataset_path,)
+            )
+
+    def get_thumbnails(self, dataset_path: str) -> Dict[str, bytes]:
+        """JPEG thumbnails of the cameras of a dataset, by camera key."""
+        dataset_path = os.path.abspath(dataset_path)
+        with closing(self._connect()) as connection:
+            return dict(
+                connection.execute(
+                    "SELECT camera_key, jpeg FROM thumbnails WHERE dataset_path = ?",
+                    (dataset_path,),
+                ).fetchall()
+            )
+
+
+@lru_cache()
+def get_dataset_catalog() -> DatasetCatalog:
+    """
+    Return the catalog of the datasets, in the app's folder.
+    """
+    return DatasetCatalog(str(get_home_app_path() / "cache" / "catalog.sqlite"))
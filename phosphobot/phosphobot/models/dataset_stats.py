@@ -0,0 +1,314 @@
+"""
+Statistics of LeRobot datasets, computed per episode and merged.
+
+The moments of an episode (count, sum, square sum, min and max of each feature) are
+computed from the columns of its parquet read with pyarrow, and from the histograms of
+its videos decoded with PyAV. Episodes are processed in parallel, and the moments of each
+file are cached: recomputing the stats of a dataset only reads the files that changed.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from phosphobot.utils import NdArrayAsList, get_home_app_path, get_video_histogram
+
+
+class FeatureMoments(BaseModel):
+    """
+    Count, sum, square sum, min and max of a feature, per dimension.
+    Images have one dimension per channel, and their values are normalized to [0, 1].
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    count: int
+    sum: NdArrayAsList
+    square_sum: NdArrayAsList
+    min: NdArrayAsList
+    max: NdArrayAsList
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.sum / self.count
+
+    @property
+    def std(self) -> np.ndarray:
+        variance = self.square_sum / self.count - self.mean**2
+        # Rounding errors can make the variance slightly negative
+        return np.sqrt(np.maximum(variance, 0))
+
+    def merge(self, other: "FeatureMoments") -> "FeatureMoments":
+        return FeatureMoments(
+            count=self.count + other.count,
+            sum=self.sum + other.sum,
+            square_sum=self.square_sum + other.square_sum,
+            min=np.minimum(self.min, other.min),
+            max=np.maximum(self.max, other.max),
+        )
+
+
+class EpisodeFiles(BaseModel):
+    """The files of an episode of a LeRobot dataset."""
+
+    episode_index: int
+    parquet_path: str
+    # Camera key (e.g. observation.images.main) -> path of the video
+    video_paths: Dict[str, str] = Field(default_factory=dict)
+
+
+class MomentsCacheModel(BaseModel):
+    """
+    The moments of the files of a dataset, keyed by the identity of the file
+    (device, inode, size and modification time) and the settings they were computed with.
+    A renamed or hard-linked file keeps its moments.
+    """
+
+    # Key of the parquet -> column -> moments
+    parquets: Dict[str, Dict[str, FeatureMoments]] = Field(default_factory=dict)
+    # Key of the video -> moments
+    videos: Dict[str, FeatureMoments] = Field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, cache_path: str) -> "MomentsCacheModel":
+        """
+        Read the cache. If the file does not exist or is invalid, return an empty cache.
+        """
+        if not os.path.exists(cache_path):
+            return cls()
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return cls.model_validate(json.load(f))
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Ignoring invalid stats cache {cache_path}: {e}")
+            return cls()
+
+    def save(self, cache_path: str) -> None:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first, so that an interrupted run keeps the old cache
+        temporary_path = f"{cache_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(self.model_dump_json())
+        os.replace(temporary_path, cache_path)
+
+
+def get_default_cache_path(dataset_path: str) -> str:
+    """Path of the moments cache of a dataset, in the app's folder."""
+    dataset_hash = hashlib.sha1(
+        os.path.abspath(dataset_path).encode("utf-8")
+    ).hexdigest()[:16]
+    return str(get_home_app_path() / "cache" / "stats" / f"{dataset_hash}.json")
+
+
+def find_episodes_files(dataset_path: str) -> List[EpisodeFiles]:
+    """
+    List the parquets of the episodes of a dataset, with their videos.
+    The dataset path is the folder containing the data, videos and meta folders.
+    """
+    dataset = Path(dataset_path)
+    videos_by_episode: Dict[str, Dict[str, str]] = {}
+    for video_path in sorted(dataset.glob("videos/chunk-*/*/episode_*.mp4")):
+        videos_by_episode.setdefault(video_path.stem, {})[video_path.parent.name] = str(
+            video_path
+        )
+    return [
+        EpisodeFiles(
+            episode_index=int(parquet_path.stem.split("_")[-1]),
+            parquet_path=str(parquet_path),
+            video_paths=videos_by_episode.get(parquet_path.stem, {}),
+        )
+        for parquet_path in sorted(dataset.glob("data/chunk-*/episode_*.parquet"))
+    ]
+
+
+def _column_values(column: pa.ChunkedArray) -> Optional[np.ndarray]:
+    """
+    The values of a numeric column as a 2D array of shape (rows, dimension).
+    Returns None for the other columns, and for list columns with lists of different lengths.
+    """
+    array = column.combine_chunks()
+    if pa.types.is_fixed_size_list(array.type) or pa.types.is_list(array.type):
+        if not (
+            pa.types.is_integer(array.type.value_type)
+            or pa.types.is_floating(array.type.value_type)
+        ):
+            return None
+        if len(array) == 0:
+            return None
+        values = array.flatten().to_numpy(zero_copy_only=False)
+        if values.size % len(array) != 0 or (
+            pa.types.is_list(array.type)
+            and len(np.unique(array.value_lengths().to_numpy(zero_copy_only=False)))
+            != 1
+        ):
+            return None
+        return values.reshape(len(array), -1)
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+        return array.to_numpy(zero_copy_only=False).reshape(-1, 1)
+    return None
+
+
+def compute_parquet_moments(parquet_path: str) -> Dict[str, FeatureMoments]:
+    """
+    Compute the moments of the numeric columns of an episode parquet.
+    Each column is read as a contiguous array: scalar columns have one dimension.
+    """
+    table = pq.read_table(parquet_path)
+    moments: Dict[str, FeatureMoments] = {}
+    for column_name in table.column_names:
+        values = _column_values(table.column(column_name))
+        if values is None:
+            continue
+        if np.issubdtype(values.dtype, np.floating):
+            # Like when deleting an episode, steps without values (all NaN) are ignored
+            values = values[~np.all(np.isnan(values), axis=1)]
+        if len(values) == 0:
+            continue
+        float_values = values.astype(np.float64)
+        moments[column_name] = FeatureMoments(
+            count=len(values),
+            sum=float_values.sum(axis=0),
+            square_sum=np.square(float_values).sum(axis=0),
+            min=values.min(axis=0),
+            max=values.max(axis=0),
+        )
+    return moments
+
+
+def compute_video_moments(
+    video_path: str, frame_stride: int = 1, scale: float = 1.0
+) -> FeatureMoments:
+    """
+    Compute the moments of the RGB channels of a video, normalized to [0, 1].
+    See get_video_histogram for frame_stride and scale.
+    """
+    histogram, nb_pixels = get_video_histogram(
+        video_path, frame_stride=frame_stride, scale=scale
+    )
+    # Normalized value of each bin
+    values = np.arange(256, dtype=np.float64) / 255.0
+    non_empty_bins = histogram > 0
+    first_bin = np.argmax(non_empty_bins, axis=1)
+    last_bin = 255 - np.argmax(non_empty_bins[:, ::-1], axis=1)
+    return FeatureMoments(
+        count=nb_pixels,
+        sum=histogram @ values,
+        square_sum=histogram @ values**2,
+        min=values[first_bin],
+        max=values[last_bin],
+    )
+
+
+def _file_key(path: str, settings: str = "") -> str:
+    stat = os.stat(path)
+    return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}{settings}"
+
+
+def merge_moments(
+    moments_list: List[Dict[str, FeatureMoments]],
+) -> Dict[str, FeatureMoments]:
+    """Merge the moments of several episodes, feature by feature."""
+    merged: Dict[str, FeatureMoments] = {}
+    for moments in moments_list:
+        for feature, feature_moments in moments.items():
+            merged[feature] = (
+                merged[feature].merge(feature_moments)
+                if feature in merged
+                else feature_moments
+            )
+    return merged
+
+
+def compute_episodes_moments(
+    episodes_files: List[EpisodeFiles],
+    frame_stride: int = 1,
+    scale: float = 1.0,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Dict[int, Dict[str, FeatureMoments]]:
+    """
+    Compute the moments of the features of each episode: the columns of its parquet and
+    its videos, keyed by camera key. Returns the moments of each episode, by episode index.
+
+    The files are processed in a thread pool: reading parquets with pyarrow, decoding videos
+    with PyAV and computing histograms with OpenCV release the GIL. With a cache_path, the
+    moments of the files that did not change since the last call are read from the cache.
+
+    frame_stride and scale make the image stats approximate but faster, see
+    get_video_histogram. The default values give the exact stats.
+    """
+    cache = (
+        MomentsCacheModel.from_json(cache_path) if cache_path else MomentsCacheModel()
+    )
+    updated_cache = MomentsCacheModel()
+    video_settings = f":{frame_stride}:{scale}"
+
+    def read_parquet(key: str, path: str) -> None:
+        updated_cache.parquets[key] = compute_parquet_moments(path)
+
+    def read_video(key: str, path: str) -> None:
+        updated_cache.videos[key] = compute_video_moments(path, frame_stride, scale)
+
+    # Key of each file, and the files to read. Hard-linked videos are read once.
+    parquet_keys: Dict[int, str] = {}
+    video_keys: Dict[int, Dict[str, str]] = {}
+    jobs: Dict[str, Tuple[Callable[[str, str], None], str]] = {}
+    for episode in episodes_files:
+        key = _file_key(episode.parquet_path)
+        parquet_keys[episode.episode_index] = key
+        if key in cache.parquets:
+            updated_cache.parquets[key] = cache.parquets[key]
+        else:
+            jobs[key] = (read_parquet, episode.parquet_path)
+        video_keys[episode.episode_index] = {}
+        for camera_key, video_path in episode.video_paths.items():
+            key = _file_key(video_path, video_settings)
+            video_keys[episode.episode_index][camera_key] = key
+            if key in cache.videos:
+                updated_cache.videos[key] = cache.videos[key]
+            else:
+                jobs[key] = (read_video, video_path)
+
+    if jobs:
+        logger.info(f"Computing the stats of {len(jobs)} files, the others are cached")
+    nb_done = 0
+    last_logged_percent = 0
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="dataset_stats"
+    ) as executor:
+        futures = [
+            executor.submit(function, key, path)
+            for key, (function, path) in jobs.items()
+        ]
+        for future in as_completed(futures):
+            # Raise the first error
+            future.result()
+            nb_done += 1
+            if progress_callback is not None:
+                progress_callback(nb_done, len(jobs))
+            percent = 100 * nb_done // len(jobs)
+            if percent >= last_logged_percent + 10:
+                last_logged_percent = percent
+                logger.info(f"Computing stats: {percent}% ({nb_done}/{len(jobs)})")
+
+    if cache_path:
+        # Only keep the files of the dataset in the cache
+        updated_cache.save(cache_path)
+
+    episodes_moments: Dict[int, Dict[str, FeatureMoments]] = {}
+    for episode_index, parquet_key in parquet_keys.items():
+        episode_moments = dict(updated_cache.parquets[parquet_key])
+        for camera_key, video_key in video_keys[episode_index].items():
+            episode_moments[camera_key] = updated_cache.videos[video_key]
+        episodes_moments[episode_index] = episode_moments
+    return episodes_moments
@@ -0,0 +1,255 @@
+from typing import Dict, Iterator, List, Optional, cast
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.models.dataset import Observation, Step
+
+
+class GrowableArray:
+    """
+    Preallocated array of rows that doubles its capacity when full.
+    Appending a row is a copy into the preallocated memory (amortized O(1)).
+    The row shape is fixed by the first appended row.
+    """
+
+    def __init__(self, dtype: type = np.float32, initial_capacity: int = 1024):
+        self.dtype = dtype
+        self.initial_capacity = max(1, initial_capacity)
+        self._data: Optional[np.ndarray] = None
+        self._length = 0
+        # Missing rows appended before the row shape was known
+        self._leading_missing = 0
+
+    def __len__(self) -> int:
+        return self._leading_missing + self._length
+
+    @property
+    def row_shape(self) -> Optional[tuple]:
+        return None if self._data is None else self._data.shape[1:]
+
+    @property
+    def values(self) -> Optional[np.ndarray]:
+        """
+        All the rows, missing rows are NaN. This is a view on the preallocated memory
+        unless rows were missing before the first value. None if no value was appended.
+        """
+        if self._data is None:
+            return None
+        if self._leading_missing == 0:
+            return self._data[: self._length]
+        missing = np.full(
+            (self._leading_missing, *self._data.shape[1:]), np.nan, dtype=self.dtype
+        )
+        return np.concatenate([missing, self._data[: self._length]])
+
+    def append(self, row: np.ndarray) -> None:
+        if self._data is None:
+            self._data = np.empty(
+                (self.initial_capacity, *np.shape(row)), dtype=self.dtype
+            )
+        elif self._length == self._data.shape[0]:
+            grown = np.empty(
+                (2 * self._data.shape[0], *self._data.shape[1:]), dtype=self.dtype
+            )
+            grown[: self._length] = self._data
+            self._data = grown
+        self._data[self._length] = row
+        self._length += 1
+
+    def append_missing(self) -> None:
+        """Append a row of NaN. Before the row shape is known, missing rows are only counted."""
+        if self._data is None:
+            self._leading_missing += 1
+        else:
+            self.append(np.full(self._data.shape[1:], np.nan, dtype=self.dtype))
+
+    def set_last(self, row: np.ndarray) -> None:
+        """Replace the last row."""
+        if self._data is None:
+            # The last row is a missing row that was only counted
+            self._leading_missing -= 1
+            self.append(row)
+        else:
+            self._data[self._length - 1] = row
+
+
+class FrameBlocks:
+    """
+    Frames of a camera stored in fixed-size preallocated blocks.
+    Unlike GrowableArray, adding a block never copies the frames already stored,
+    so memory doesn't spike when a long episode outgrows its storage.
+    """
+
+    def __init__(self, block_size: int = 256):
+        self.block_size = max(1, block_size)
+        self._blocks: List[np.ndarray] = []
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, frame: np.ndarray) -> None:
+        if self._blocks and frame.shape != self._blocks[0].shape[1:]:
+            raise ValueError(
+                f"Frame shape {frame.shape} doesn't match the previous frames {self._blocks[0].shape[1:]}"
+            )
+        index_in_block = self.length % self.block_size
+        if index_in_block == 0:
+            self._blocks.append(
+                np.empty((self.block_size, *frame.shape), dtype=frame.dtype)
+            )
+        self._blocks[-1][index_in_block] = frame
+        self.length += 1
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(self.length):
+            yield self._blocks[i // self.block_size][i % self.block_size]
+
+
+class EpisodeBuffer:
+    """
+    Columnar storage for the steps of an episode being recorded.
+
+    Instead of keeping one Step (with its Observation) per recorded frame, the values are
+    copied into preallocated NumPy columns. Saving the episode then works on whole columns
+    instead of iterating over Python objects.
+
+    Rows without a value for a column (e.g. no action yet, or an empty array) are filled with NaN.
+    """
+
+    def __init__(self, initial_capacity: int = 1024, frames_block_size: int = 256):
+        self.joints_position = GrowableArray(np.float32, initial_capacity)
+        self.action = GrowableArray(np.float32, initial_capacity)
+        self.state = GrowableArray(np.float32, initial_capacity)
+        self.action_cartesian = GrowableArray(np.float32, initial_capacity)
+        self.timestamp = GrowableArray(np.float64, initial_capacity)
+        self.frames_block_size = frames_block_size
+        self.frames: Dict[str, FrameBlocks] = {}
+        self.language_instruction: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.joints_position)
+
+    @staticmethod
+    def _append_row(column: GrowableArray, value: Optional[np.ndarray]) -> None:
+        if value is not None and np.size(value) > 0:
+            value = np.asarray(value).reshape(-1)
+            if column.row_shape is None or value.shape == column.row_shape:
+                column.append(value)
+                return
+            logger.warning(
+                f"Got a row of shape {value.shape} for a column of shape {column.row_shape}. Filling with NaN."
+            )
+        column.append_missing()
+
+    def append_step(
+        self, step: Step, frames: Optional[Dict[str, np.ndarray]] = None
+    ) -> None:
+        """
+        Copy the values of the step into the columns.
+        `frames` maps camera keys to the frames to store. Don't pass frames that are
+        already encoded elsewhere (streaming encoding).
+        """
+        joints_position = step.observation.joints_position
+        if len(self) > 0 and np.all(np.isnan(joints_position)):
+            logger.warning(
+                f"Step {len(self)} has NaN joint_positions. Copying from previous step."
+            )
+            joints_position = self.joints_position.values[-1].copy()  # type: ignore
+            step.observation.joints_position = joints_position
+
+        self.joints_position.append(joints_position)
+        self._append_row(self.action, step.action)
+        self._append_row(self.state, step.observation.state)
+        self._append_row(self.action_cartesian, step.action_cartesian)
+        self.timestamp.append(
+            np.array(
+                step.observation.timestamp
+                if step.observation.timestamp is not None
+                else np.nan
+            )
+        )
+        if self.language_instruction is None:
+            self.language_instruction = step.observation.language_instruction
+
+        for camera_key, frame in (frames or {}).items():
+            if camera_key not in self.frames:
+                self.frames[camera_key] = FrameBlocks(self.frames_block_size)
+            self.frames[camera_key].append(frame)
+
+    def set_last_action(self, action: np.ndarray) -> None:
+        """Set the action of the last step (the action that led to the current observation)."""
+        if len(self) == 0 or np.size(action) == 0:
+            return
+        action = np.asarray(action).reshape(-1)
+        if self.action.row_shape is None or self.action.row_shape == action.shape:
+            self.action.set_last(action)
+
+    def get_actions_and_observations(
+        self, episode_index: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the (action, observation.state) columns after filling missing values, like the
+        sanity check done on steps: a missing action is replaced by the observation of the same
+        step and a missing observation by the action.
+
+        Raises:
+            ValueError: if both the action and the observation of a step are missing.
+        """
+        joints_position = cast(np.ndarray, self.joints_position.values).copy()
+        actions = self.action.values
+        actions = (
+            np.full_like(joints_position, np.nan) if actions is None else actions.copy()
+        )
+
+        missing_action = np.isnan(actions).any(axis=1)
+        missing_observation = np.isnan(joints_position).any(axis=1)
+        if not missing_action.any() and not missing_observation.any():
+            return actions, joints_position
+
+        if (missing_action & missing_observation).any():
+            raise ValueError(
+                f"Step action and observation in episode {episode_index} are None or NaN"
+            )
+        if actions.shape[1:] != joints_position.shape[1:]:
+            raise ValueError(
+                f"Step action or observation in episode {episode_index} is None or NaN and "
+                + f"actions of shape {actions.shape[1:]} can't be filled with observations of shape {joints_position.shape[1:]}"
+            )
+        logger.warning(
+            f"Action or observation in episode {episode_index} is None or NaN, automatically filling in the value."
+        )
+        actions[missing_action] = joints_position[missing_action]
+        joints_position[missing_observation] = actions[missing_observation]
+        return actions, joints_position
+
+    def to_steps(self) -> List[Step]:
+        """
+        Build Step objects (without images) from the columns, for code that iterates
+        over steps, e.g. BaseEpisode.play.
+        """
+        actions = self.action.values
+        states = self.state.values
+        timestamps = cast(np.ndarray, self.timestamp.values)
+        steps = []
+        for i, joints_position in enumerate(
+            cast(np.ndarray, self.joints_position.values)
+        ):
+            steps.append(
+                Step(
+                    observation=Observation(
+                        joints_position=joints_position,
+                        state=states[i] if states is not None else np.array([]),
+                        timestamp=None
+                        if np.isnan(timestamps[i])
+                        else float(timestamps[i]),
+                        language_instruction=self.language_instruction,
+                    ),
+                    action=actions[i] if actions is not None else None,
+                    is_first=i == 0,
+                    is_last=i == len(self) - 1,
+                    is_terminal=i == len(self) - 1,
+                )
+            )
+        return steps
@@ -1,13 +1,31 @@
+import asyncio
+import contextlib
+import copy
 import json
 import os
 import shutil
+import sys
 import tempfile
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Tuple, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from huggingface_hub import delete_file, upload_folder
 from loguru import logger
 from pydantic import (
@@ -15,23 +33,148 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
     field_validator,
     model_validator,
 )
 
 from phosphobot.models.dataset import BaseDataset, BaseEpisode, Step
+from phosphobot.models.dataset_stats import (
+    EpisodeFiles,
+    FeatureMoments,
+    compute_episodes_moments,
+    find_episodes_files,
+    get_default_cache_path,
+    merge_moments,
+)
+from phosphobot.models.episode_buffer import EpisodeBuffer
 from phosphobot.models.robot import BaseRobot
 from phosphobot.types import VideoCodecs
 from phosphobot.utils import (
     NdArrayAsList,
+    StreamingVideoEncoder,
     compute_sum_squaresum_framecount_from_video,
-    create_video_file,
-    get_field_min_max,
     get_home_app_path,
+    get_image_histogram,
 )
 
 DEFAULT_FILE_ENCODING = "utf-8"
 
+# Image stats are computed by a single background thread, so the updates
+# of a StatsModel never run concurrently and are applied in order
+_image_stats_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="image_stats"
+)
+
+# ioctl cloning a file on copy-on-write filesystems (btrfs, xfs), from linux/fs.h
+_FICLONE = 0x40049409
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    Reflink src to dst where the filesystem supports it, else hard-link it, else copy it.
+    Only used for files that are never modified in place, like the videos.
+    """
+    if sys.platform == "linux":
+        import fcntl
+
+        try:
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            return
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Other device, or a filesystem without hard links
+        shutil.copyfile(src, dst)
+
+
+def _set_parquet_columns(table: pa.Table, columns: Dict[str, np.ndarray]) -> pa.Table:
+    """Replace the values of columns of a parquet table, keeping their position."""
+    for column, values in columns.items():
+        table = table.set_column(
+            table.schema.get_field_index(column), column, pa.array(values)
+        )
+    return table
+
+
+def _rewrite_parquet_indexes(
+    src: str,
+    dst: str,
+    episode_index: int,
+    first_frame_index: int,
+    task_mapping: Dict[int, int],
+) -> None:
+    """
+    Write the parquet of an episode to dst with its new episode_index and index, and its
+    task_index mapped. Reading and writing parquets with pyarrow releases the GIL.
+    """
+    table = pq.read_table(src)
+    nb_rows = table.num_rows
+    task_indexes = table.column("task_index").to_numpy()
+    unique_task_indexes, inverse = np.unique(task_indexes, return_inverse=True)
+    table = _set_parquet_columns(
+        table,
+        {
+            "episode_index": np.full(nb_rows, episode_index, dtype=np.int64),
+            "index": np.arange(nb_rows, dtype=np.int64) + first_frame_index,
+            "task_index": np.array(
+                [task_mapping.get(int(t), int(t)) for t in unique_task_indexes],
+                dtype=np.int64,
+            )[inverse],
+        },
+    )
+    pq.write_table(table, dst)
+
+
+def _renumber_episodes_for_merge(
+    episodes_model: "EpisodesModel",
+    episodes_stats_model: "EpisodesStatsModel",
+    frame_offset: int,
+) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Renumber the episodes of a dataset to merge, in memory: the gaps left by deleted
+    episodes are removed, and the files of the dataset are not modified.
+    Returns the mapping from the old to the new episode indexes, and the index of the
+    first frame of each old episode, offset by frame_offset.
+    """
+    old_index_to_new_index: Dict[int, int] = {}
+    old_index_to_first_frame: Dict[int, int] = {}
+    first_frame_index = frame_offset
+    for new_index, episode in enumerate(
+        sorted(episodes_model.episodes, key=lambda episode: episode.episode_index)
+    ):
+        old_index_to_new_index[episode.episode_index] = new_index
+        old_index_to_first_frame[episode.episode_index] = first_frame_index
+        first_frame_index += episode.length
+    if any(old != new for old, new in old_index_to_new_index.items()):
+        episodes_model.update_for_episode_removal(
+            episode_to_delete_index=-1,
+            old_index_to_new_index=old_index_to_new_index,
+        )
+        episodes_stats_model.update_for_episode_removal(
+            episode_to_delete_index=-1,
+            old_index_to_new_index=old_index_to_new_index,
+        )
+    return old_index_to_new_index, old_index_to_first_frame
+
+
+_Model = TypeVar("_Model", bound=BaseModel)
+
+
+def _copy_model(model: Optional[_Model]) -> Optional[_Model]:
+    return model.model_copy(deep=True) if model is not None else None
+
+
+def _update_image_stats(stats_model: "StatsModel", step: Step) -> None:
+    try:
+        stats_model.update_images(step)
+    except Exception as e:
+        logger.error(f"Failed to update the image stats: {e}")
+
 
 class LeRobotDataset(BaseDataset):
     format_version: Literal["lerobot_v2", "lerobot_v2.1"] = "lerobot_v2.1"
@@ -71,6 +214,10 @@ class LeRobotDataset(BaseDataset):
         self.stats_model: Optional[StatsModel] = None  # For lerobot_v2
         self.episodes_model: Optional[EpisodesModel] = None
         self.tasks_model: Optional[TasksModel] = None
+        self.tombstones_model: Optional[TombstonesModel] = None
+        # Committed episodes whose files could not be written, with their length. Shared
+        # with the snapshots of the meta models (see snapshot_meta_models).
+        self._discarded_episodes: Dict[int, int] = {}
         logger.info(
             f"LeRobotDataset manager initialized for path: {self.folder_full_path}"
         )
@@ -132,6 +279,10 @@ class LeRobotDataset(BaseDataset):
             self.tasks_model = TasksModel.from_jsonl(
                 meta_folder_path=self.meta_folder_full_path
             )
+        if self.tombstones_model is None or force:
+            self.tombstones_model = TombstonesModel.from_json(
+                meta_folder_path=self.meta_folder_full_path
+            )
         # Consistency checks and fix
         if self.info_model.total_frames != sum(
             [e.length for e in self.episodes_model.episodes]
@@ -182,7 +333,16 @@ class LeRobotDataset(BaseDataset):
             raise ValueError(
                 "InfoModel not initialized in LeRobotDataset. Call initialize_meta_models_if_needed first."
             )
-        return self.info_model.total_episodes  # total_episodes is 0-indexed for next
+        # total_episodes is 0-indexed for next. Deleted episodes keep their index until
+        # the dataset is compacted.
+        return self.info_model.total_episodes + self.nb_deleted_episodes
+
+    @property
+    def nb_deleted_episodes(self) -> int:
+        """Number of episodes deleted since the dataset was last compacted."""
+        if self.tombstones_model is None:
+            return 0
+        return len(self.tombstones_model.episodes)
 
     def get_current_total_frames(self) -> int:
         if self.info_model is None:
@@ -192,6 +352,7 @@ class LeRobotDataset(BaseDataset):
     def save_all_meta_models(self) -> None:
         """Saves all currently loaded meta models to disk."""
         logger.debug(f"Saving all meta models for dataset: {self.dataset_name}")
+        self._remove_discarded_episodes()
         if self.info_model:
             self.info_model.save(self.meta_folder_full_path)
         if self.episodes_stats_model:
@@ -204,6 +365,65 @@ class LeRobotDataset(BaseDataset):
             self.tasks_model.save(self.meta_folder_full_path)
         logger.debug("All meta models saved.")
 
+    def snapshot_meta_models(self) -> "LeRobotDataset":
+        """
+        Copy of the dataset manager with copies of its meta models. Used to save the meta
+        files of an episode while the next episode is recorded in the original models.
+        """
+        snapshot = copy.copy(self)
+        snapshot.info_model = _copy_model(self.info_model)
+        snapshot.episodes_model = _copy_model(self.episodes_model)
+        snapshot.tasks_model = _copy_model(self.tasks_model)
+        snapshot.episodes_stats_model = _copy_model(self.episodes_stats_model)
+        snapshot.stats_model = _copy_model(self.stats_model)
+        snapshot.tombstones_model = _copy_model(self.tombstones_model)
+        return snapshot
+
+    def discard_episode(self, episode_index: int, length: int) -> None:
+        """
+        Remove a committed episode whose files could not be written from the meta models.
+        The episodes committed after it keep their index: the discarded episode is
+        recorded in meta/tombstones.json, like a deleted episode. The snapshots of the
+        following episodes don't list it either when they are written.
+        """
+        self._discarded_episodes[episode_index] = length
+        self._remove_discarded_episodes()
+        if self.tombstones_model is None:
+            self.tombstones_model = TombstonesModel.from_json(
+                meta_folder_path=self.meta_folder_full_path
+            )
+        if episode_index not in self.tombstones_model.episode_indexes:
+            self.tombstones_model.add(episode_index=episode_index, length=length)
+        tombstones_model = TombstonesModel.from_json(
+            meta_folder_path=self.meta_folder_full_path
+        )
+        if episode_index not in tombstones_model.episode_indexes:
+            tombstones_model.add(episode_index=episode_index, length=length)
+            tombstones_model.save(meta_folder_path=self.meta_folder_full_path)
+
+    def _remove_discarded_episodes(self) -> None:
+        """Remove the discarded episodes from the meta models, if they are still listed."""
+        if self.episodes_model is None:
+            return
+        listed_indexes = {
+            episode.episode_index for episode in self.episodes_model.episodes
+        }
+        for episode_index, length in self._discarded_episodes.items():
+            if episode_index not in listed_indexes:
+                continue
+            self.episodes_model.remove_episode(episode_index=episode_index)
+            if self.episodes_stats_model is not None:
+                self.episodes_stats_model.remove_episode(episode_index=episode_index)
+            if self.info_model is not None:
+                self.info_model.total_episodes -= 1
+                self.info_model.total_frames -= length
+                self.info_model.total_videos -= len(
+                    self.info_model.features.observation_images
+                )
+                self.info_model.splits = {
+                    "train": f"0:{self.info_model.total_episodes}"
+                }
+
     def delete_episode(self, episode_id: int, update_hub: bool = True) -> None:
         """
         Delete the episode data from the dataset.
@@ -211,7 +431,13 @@ class LeRobotDataset(BaseDataset):
         and updates the meta data.
         JSON format not supported
 
-        If update_hub is True, also delete the episode data from the Hugging Face repository
+        The following episodes keep their index: only the files of the deleted episode
+        are read and removed, and the deletion is recorded in meta/tombstones.json.
+        Call compact_episodes to renumber the episodes.
+
+        If update_hub is True, also delete the episode files from the Hugging Face
+        repository and upload the meta folder. The episodes on the Hub are renumbered
+        the next time the dataset is pushed.
         """
 
         episode_data_path = self.get_episode_data_path(episode_id)
@@ -268,11 +494,33 @@ class LeRobotDataset(BaseDataset):
             episode_parquet = pd.DataFrame()
         tasks_model.update_for_episode_removal(
             df_episode_to_delete=episode_parquet,
-            data_folder_full_path=self.data_folder_full_path,
+            episodes_model=episodes_model,
         )
         tasks_model.save(meta_folder_path=self.meta_folder_full_path)
         logger.info("Tasks model updated")
 
+        if info_model.codebase_version == "v2.1":
+            episodes_stats_model.remove_episode(episode_index=episode_id)
+            episodes_stats_model.save(meta_folder_path=self.meta_folder_full_path)
+            logger.info("Episodes stats model updated")
+        elif info_model.codebase_version == "v2.0" and not episode_parquet.empty:
+            # Subtract the episode from the sums. This reads the number of frames in
+            # info.json and the videos of the episode, so it's done before updating them.
+            # The min and max are recomputed by compact_episodes.
+            stats_model.compute_count_square_sum_framecount_from_mean_std(
+                meta_folder_path=self.meta_folder_full_path
+            )
+            stats_model._update_for_episode_removal_mean_std_count(
+                df_episode_to_delete=episode_parquet
+            )
+            stats_model._update_for_episode_removal_images_stats(
+                folder_videos_path=self.videos_folder_full_path,
+                episode_to_delete_index=episode_id,
+                meta_folder_path=self.meta_folder_full_path,
+            )
+            stats_model.save(meta_folder_path=self.meta_folder_full_path)
+            logger.info("Stats model updated")
+
         info_model.update_for_episode_removal(
             df_episode_to_delete=episode_parquet,
         )
@@ -282,50 +530,203 @@ class LeRobotDataset(BaseDataset):
         # Delete the actual episode files (parquet and mp4 video)
         episode_to_delete.delete(update_hub=update_hub, repo_id=self.repo_id)
 
-        # Rename the remaining episodes to keep the numbering consistent
-        # be sure to reindex AFTER deleting the episode data
-        old_index_to_new_index = self.reindex_episodes(
-            nb_steps_deleted_episode=len(episode_to_delete.steps),
-            folder_path=self.data_folder_full_path,
+        episodes_model.remove_episode(episode_index=episode_id)
+        episodes_model.save(
+            meta_folder_path=self.meta_folder_full_path, save_mode="overwrite"
         )
-        # Reindex the episode videos
-        for camera_folder_full_path in self.get_camera_folders_full_paths():
-            self.reindex_episodes(
-                folder_path=camera_folder_full_path,
-                old_index_to_new_index=old_index_to_new_index,  # type: ignore
+        logger.info("Episodes model updated")
+
+        # The index of the episode and the global indexes of its frames stay used
+        # until the dataset is compacted
+        tombstones_model = TombstonesModel.from_json(
+            meta_folder_path=self.meta_folder_full_path
+        )
+        tombstones_model.add(episode_index=episode_id, length=len(episode_parquet))
+        tombstones_model.save(meta_folder_path=self.meta_folder_full_path)
+
+        if update_hub:
+            upload_folder(
+                folder_path=self.meta_folder_full_path,
+                repo_id=self.repo_id,
+                repo_type="dataset",
+                path_in_repo="meta",
             )
 
+    def compact_episodes(self) -> Dict[int, int]:
+        """
+        Renumber the episodes to remove the gaps left by deleted episodes.
+
+        This is a single pass over the episodes that follow the first deleted one: each
+        parquet is rewritten once with its new episode_index and index, and the videos
+        are renamed. Returns the mapping from the old to the new episode indexes, empty
+        if no episode was deleted.
+        """
+        tombstones_model = TombstonesModel.from_json(
+            meta_folder_path=self.meta_folder_full_path
+        )
+        if not tombstones_model.episodes:
+            return {}
+
+        logger.info(
+            f"Compacting dataset {self.dataset_name}: {len(tombstones_model.episodes)} deleted episodes"
+        )
+        info_model = InfoModel.from_json(meta_folder_path=self.meta_folder_full_path)
+        episodes_model = EpisodesModel.from_jsonl(
+            meta_folder_path=self.meta_folder_full_path,
+            format=cast(Literal["lerobot_v2", "lerobot_v2.1"], self.format_version),
+        )
+        old_index_to_new_index = {
+            episode.episode_index: new_index
+            for new_index, episode in enumerate(episodes_model.episodes)
+        }
+        first_deleted_index = min(tombstones_model.episode_indexes)
+        camera_folders = self.get_camera_folders_full_paths()
+
+        # Global index of the first frame of the next episode to rewrite
+        global_frame_index = sum(
+            episode.length
+            for episode in episodes_model.episodes
+            if episode.episode_index < first_deleted_index
+        )
+        for episode in episodes_model.episodes:
+            old_index = episode.episode_index
+            if old_index < first_deleted_index:
+                continue
+            new_index = old_index_to_new_index[old_index]
+            # The episodes are in increasing order and new_index <= old_index, so the
+            # destination files were removed by a deletion or renamed by a previous step
+            old_data_path = self.get_episode_data_path(old_index)
+            table = pq.read_table(old_data_path)
+            nb_rows = table.num_rows
+            table = _set_parquet_columns(
+                table,
+                {
+                    "episode_index": np.full(nb_rows, new_index, dtype=np.int64),
+                    "index": np.arange(nb_rows, dtype=np.int64) + global_frame_index,
+                },
+            )
+            global_frame_index += nb_rows
+            pq.write_table(table, self.get_episode_data_path(new_index))
+            if new_index == old_index:
+                continue
+            os.remove(old_data_path)
+            for camera_folder in camera_folders:
+                old_video_path = os.path.join(
+                    camera_folder, f"episode_{old_index:06d}.mp4"
+                )
+                if os.path.exists(old_video_path):
+                    os.rename(
+                        old_video_path,
+                        os.path.join(camera_folder, f"episode_{new_index:06d}.mp4"),
+                    )
+
+        ### Meta files ###
         episodes_model.update_for_episode_removal(
-            episode_to_delete_index=episode_id,
+            episode_to_delete_index=-1,
             old_index_to_new_index=old_index_to_new_index,
         )
         episodes_model.save(
             meta_folder_path=self.meta_folder_full_path, save_mode="overwrite"
         )
-        logger.info("Episodes model updated")
-
         if info_model.codebase_version == "v2.1":
+            episodes_stats_model = EpisodesStatsModel.from_jsonl(
+                meta_folder_path=self.meta_folder_full_path
+            )
             episodes_stats_model.update_for_episode_removal(
-                episode_to_delete_index=episode_id,
+                episode_to_delete_index=-1,
                 old_index_to_new_index=old_index_to_new_index,
             )
             episodes_stats_model.save(meta_folder_path=self.meta_folder_full_path)
-            logger.info("Episodes stats model updated")
         elif info_model.codebase_version == "v2.0":
-            # Update for episode removal is not implemented
-            stats_model.update_for_episode_removal(
+            stats_model = StatsModel.from_json(
+                meta_folder_path=self.meta_folder_full_path
+            )
+            stats_model._update_for_episode_removal_min_max(
                 data_folder_path=self.data_folder_full_path,
+                meta_folder_path=self.meta_folder_full_path,
+                episode_to_delete_index=-1,
             )
             stats_model.save(meta_folder_path=self.meta_folder_full_path)
-            logger.info("Stats model updated")
+        info_model.splits = {"train": f"0:{info_model.total_episodes}"}
+        info_model.save(meta_folder_path=self.meta_folder_full_path)
 
-        if update_hub:
-            upload_folder(
-                folder_path=self.meta_folder_full_path,
-                repo_id=self.repo_id,
-                repo_type="dataset",
-                path_in_repo="meta",
+        TombstonesModel().save(meta_folder_path=self.meta_folder_full_path)
+        # The meta files were rewritten: the models are loaded again when needed
+        self.info_model = None
+        self.episodes_model = None
+        self.episodes_stats_model = None
+        self.stats_model = None
+        self.tombstones_model = None
+        logger.success(f"Dataset {self.dataset_name} compacted")
+        return old_index_to_new_index
+
+    def recompute_stats(
+        self,
+        frame_stride: int = 1,
+        scale: float = 1.0,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Recompute the stats of the dataset from its parquets and videos:
+        meta/episodes_stats.jsonl for v2.1, meta/stats.json for v2.0.
+
+        The episodes are processed in parallel, and the files that did not change since
+        the last recomputation are read from a cache. frame_stride and scale make the
+        image stats approximate but faster, see get_video_histogram.
+        """
+        info_model = InfoModel.from_json(meta_folder_path=self.meta_folder_full_path)
+        episodes_moments = compute_episodes_moments(
+            find_episodes_files(str(self.folder_full_path)),
+            frame_stride=frame_stride,
+            scale=scale,
+            max_workers=max_workers,
+            cache_path=get_default_cache_path(str(self.folder_full_path)),
+        )
+
+        if info_model.codebase_version == "v2.1":
+            episodes_stats_model = EpisodesStatsModel.from_jsonl(
+                meta_folder_path=self.meta_folder_full_path
+            )
+            episodes_stats = {
+                episode_stats.episode_index: episode_stats
+                for episode_stats in episodes_stats_model.episodes_stats
+            }
+            for episode_index, moments in episodes_moments.items():
+                if episode_index not in episodes_stats:
+                    episodes_stats[episode_index] = EpisodesStatsFeatures(
+                        episode_index=episode_index
+                    )
+                episodes_stats[episode_index].stats.update_from_moments(moments)
+            # Episodes without files don't have stats
+            episodes_stats_model.episodes_stats = [
+                episodes_stats[episode_index]
+                for episode_index in sorted(episodes_moments.keys())
+            ]
+            episodes_stats_model.save(meta_folder_path=self.meta_folder_full_path)
+            self.episodes_stats_model = None
+        elif info_model.codebase_version == "v2.0":
+            stats_model = StatsModel.from_json(
+                meta_folder_path=self.meta_folder_full_path
+            )
+            stats_model.update_from_moments(
+                merge_moments(list(episodes_moments.values()))
+            )
+            stats_model.save(meta_folder_path=self.meta_folder_full_path)
+            self.stats_model = None
+        else:
+            raise NotImplementedError(
+                f"Codebase version {info_model.codebase_version} not supported, should be v2.1 or v2.0"
             )
+        logger.success(f"Stats of dataset {self.dataset_name} recomputed")
+
+    def push_dataset_to_hub(self, branch_path: Optional[str] = None) -> None:
+        # The LeRobot format expects contiguous episode indexes
+        self.compact_episodes()
+        super().push_dataset_to_hub(branch_path=branch_path)
+
+    def sync_local_to_hub(self) -> None:
+        self.compact_episodes()
+        super().sync_local_to_hub()
 
     def merge_datasets(
         self,
@@ -335,12 +736,8 @@ class LeRobotDataset(BaseDataset):
         check_format: bool = True,
     ) -> None:
         """
-        Merge multiple datasets into one.
-        This will create a new dataset with the merged data.
-
         Merge `self` with `second_dataset` and create a new dataset.
-
-        Dataset Structure
+        See merge_multiple_datasets.
 
         Args:
             second_dataset (Dataset): Dataset to merge with `self`.
@@ -350,6 +747,41 @@ class LeRobotDataset(BaseDataset):
                 from this dataset to the corresponding folders in
                 ``second_dataset``. It ensures videos are copied to the correct
                 location.
+        """
+        self.merge_multiple_datasets(
+            other_datasets=[second_dataset],
+            new_dataset_name=new_dataset_name,
+            video_transforms=[video_transform],
+            check_format=check_format,
+        )
+
+    def merge_multiple_datasets(
+        self,
+        other_datasets: List["LeRobotDataset"],
+        new_dataset_name: str,
+        video_transforms: List[Dict[str, str]],
+        check_format: bool = True,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        Merge `self` with other datasets in one pass and create a new dataset.
+        The episodes of each dataset follow the episodes of the previous ones.
+
+        The videos are not modified: they are reflinked or hard-linked when the
+        filesystem allows it, instead of copied. The parquets are rewritten with their
+        episode_index, index and task_index offset, in parallel.
+
+        Args:
+            other_datasets (List[Dataset]): Datasets to merge with `self`, in order.
+            new_dataset_name (str): Name of the folder where the merged dataset
+                will be created.
+            video_transforms (List[dict[str, str]]): For each other dataset, mapping of
+                camera folder names from this dataset to the corresponding folders in
+                the other dataset.
+            max_workers (int, optional): Number of files written in parallel.
+            progress_callback (Callable[[int, int], None], optional): Called with the
+                number of files done and the total number of files.
 
         The resulting dataset will follow this structure:
 
@@ -369,12 +801,15 @@ class LeRobotDataset(BaseDataset):
             ├── episodes_stats.jsonl
         / README.md
         """
+        if len(video_transforms) != len(other_datasets):
+            raise ValueError("Expected one video transform per dataset to merge")
         # Check that all datasets have the same format
         if check_format:
-            if second_dataset.format_version != self.format_version:
-                raise ValueError(
-                    f"Dataset {second_dataset.dataset_name} has a different format: {second_dataset.format_version}"
-                )
+            for other_dataset in other_datasets:
+                if other_dataset.format_version != self.format_version:
+                    raise ValueError(
+                        f"Dataset {other_dataset.dataset_name} has a different format: {other_dataset.format_version}"
+                    )
 
         path_result_dataset = os.path.join(
             os.path.dirname(self.folder_full_path),
@@ -385,174 +820,189 @@ class LeRobotDataset(BaseDataset):
             raise ValueError(
                 f"Dataset {new_dataset_name} already exists in {path_result_dataset}"
             )
-        os.makedirs(path_result_dataset, exist_ok=True)
-
-        path_to_videos = os.path.join(
-            path_result_dataset,
-            "videos",
-            "chunk-000",
-        )
-        os.makedirs(path_to_videos, exist_ok=True)
-
-        ### VIDEOS
-        logger.debug("Moving videos to the new dataset")
-
-        # Start by moving videos to the new dataset
-        for video_key in video_transform.keys():
-            video_folder = video_key
-            src_folder = os.path.join(self.videos_folder_full_path, video_folder)
-            if os.path.exists(src_folder):
-                # Move the video folder to the new dataset
-                shutil.copytree(
-                    src_folder,
-                    os.path.join(path_to_videos, video_folder),
-                )
-
-                video_files = [f for f in os.listdir(src_folder) if f.endswith(".mp4")]
-                nb_videos = len(video_files)
-
-                # Move the videos from the second dataset to the new dataset and increment the index
-                second_video_folder = video_transform[video_key]
-                video_folder_full_path = os.path.join(
-                    second_dataset.videos_folder_full_path,
-                    second_video_folder,
-                )
-                for video_file in os.listdir(video_folder_full_path):
-                    if video_file.endswith(".mp4"):
-                        # Get the index of the video
-                        video_index = int(video_file.split("_")[-1].split(".")[0])
-                        # Rename the video file
-                        new_video_file = f"episode_{video_index + nb_videos:06d}.mp4"
-                        # Move the video file to the new dataset
-                        shutil.copy(
-                            os.path.join(video_folder_full_path, video_file),
-                            os.path.join(path_to_videos, video_folder, new_video_file),
-                        )
+        path_to_videos = os.path.join(path_result_dataset, "videos", "chunk-000")
+        path_to_data = os.path.join(path_result_dataset, "data", "chunk-000")
+        meta_folder_path = os.path.join(path_result_dataset, "meta")
+        camera_keys = list(video_transforms[0].keys()) if video_transforms else []
+        for folder in [path_to_data, meta_folder_path] + [
+            os.path.join(path_to_videos, camera_key) for camera_key in camera_keys
+        ]:
+            os.makedirs(folder, exist_ok=True)
 
         ### META DATA
         logger.debug("Recreating meta files")
-        meta_folder_path = os.path.join(path_result_dataset, "meta")
-        os.makedirs(meta_folder_path, exist_ok=True)
-
-        #### Tasks Model
-        logger.debug("Creating tasks.jsonl")
-        initial_tasks = TasksModel.from_jsonl(
-            meta_folder_path=self.meta_folder_full_path
-        )
-        second_tasks = TasksModel.from_jsonl(
-            meta_folder_path=second_dataset.meta_folder_full_path
-        )
-        tasks_mapping_second_to_first, new_number_of_tasks = initial_tasks.merge_with(
-            second_task_model=second_tasks,
-            meta_folder_to_save_to=meta_folder_path,
-        )
-
-        #### Episodes Model
-        logger.debug("Creating episodes.jsonl")
-        initial_episodes = EpisodesModel.from_jsonl(
+        tasks_model = TasksModel.from_jsonl(meta_folder_path=self.meta_folder_full_path)
+        episodes_model = EpisodesModel.from_jsonl(
             meta_folder_path=self.meta_folder_full_path,
             format="lerobot_v2.1",
         )
-        second_episodes = EpisodesModel.from_jsonl(
-            meta_folder_path=second_dataset.meta_folder_full_path,
-            format="lerobot_v2.1",
-        )
-        initial_episodes.merge_with(
-            second_episodes_model=second_episodes,
-            meta_folder_to_save_to=meta_folder_path,
-        )
-
-        #### Info Model
-        logger.debug("Creating info.json")
-
-        first_info = InfoModel.from_json(
+        info_model = InfoModel.from_json(
             meta_folder_path=self.meta_folder_full_path,
             format="lerobot_v2.1",
         )
-        second_info = InfoModel.from_json(
-            meta_folder_path=second_dataset.meta_folder_full_path,
-            format="lerobot_v2.1",
-        )
-
-        first_info.merge_with(
-            second_info_model=second_info,
-            meta_folder_to_save_to=meta_folder_path,
-            new_nb_tasks=new_number_of_tasks,
-        )
-
-        #### Stats model
-        logger.debug("Creating episodes_stats.jsonl")
-
-        first_stats = EpisodesStatsModel.from_jsonl(
+        stats_model = EpisodesStatsModel.from_jsonl(
             meta_folder_path=self.meta_folder_full_path
         )
-        second_stats = EpisodesStatsModel.from_jsonl(
-            meta_folder_path=second_dataset.meta_folder_full_path
-        )
-        first_stats.merge_with(
-            second_stats_model=second_stats,
-            meta_folder_path=meta_folder_path,
-        )
-
-        ### PARQUET FILES
-        logger.debug("Moving parquet files to the new dataset")
-
-        # Move the parquet files to the new dataset
-        path_to_data = os.path.join(
-            path_result_dataset,
-            "data",
-            "chunk-000",
-        )
-        os.makedirs(path_to_data, exist_ok=True)
-        for parquet_file in os.listdir(self.data_folder_full_path):
-            if parquet_file.endswith(".parquet"):
-                # Move the parquet file to the new dataset
-                shutil.copy(
-                    os.path.join(self.data_folder_full_path, parquet_file),
-                    os.path.join(path_to_data, parquet_file),
-                )
-
-        # Reload the first dataset info model
-        first_info = InfoModel.from_json(
-            meta_folder_path=self.meta_folder_full_path,
-            format="lerobot_v2.1",
+        # The episodes of each dataset follow the episodes of the previous ones. The
+        # gaps left by deleted episodes are removed while merging: the datasets to merge
+        # are not compacted.
+        episode_mapping, first_frames = _renumber_episodes_for_merge(
+            episodes_model, stats_model, frame_offset=0
         )
-
-        # Move the parquet files from the second dataset to the new dataset and edit them
-        # - Rename the parquet file
-        # - Update the episode index in the parquet file
-        # - Update the index in the parquet file
-        # - Update the task index in the parquet file
-
-        for parquet_file in os.listdir(second_dataset.data_folder_full_path):
-            if parquet_file.endswith(".parquet"):
-                # Get the index of the parquet file
-                parquet_index = int(parquet_file.split("_")[-1].split(".")[0])
-                # Rename the parquet file
-                new_parquet_file = (
-                    f"episode_{parquet_index + first_info.total_episodes:06d}.parquet"
-                )
-                # Move the parquet file to the new dataset
-                shutil.copy(
-                    os.path.join(second_dataset.data_folder_full_path, parquet_file),
-                    os.path.join(path_to_data, new_parquet_file),
-                )
-
-                # Load the parquet file
-                df = pd.read_parquet(
-                    os.path.join(path_to_data, new_parquet_file),
+        # For each dataset: (dataset, camera folder of each camera key, new episode
+        # index and first frame index of each old episode index, task mapping)
+        merged_datasets: List[
+            Tuple[
+                "LeRobotDataset",
+                Dict[str, str],
+                Dict[int, int],
+                Dict[int, int],
+                Dict[int, int],
+            ]
+        ] = [
+            (
+                self,
+                {key: key for key in camera_keys},
+                episode_mapping,
+                first_frames,
+                {},
+            )
+        ]
+        for other_dataset, video_transform in zip(other_datasets, video_transforms):
+            episode_offset = info_model.total_episodes
+            frame_offset = info_model.total_frames
+            task_mapping, new_number_of_tasks = tasks_model.merge_with(
+                second_task_model=TasksModel.from_jsonl(
+                    meta_folder_path=other_dataset.meta_folder_full_path
+                ),
+                meta_folder_to_save_to=meta_folder_path,
+            )
+            other_episodes_model = EpisodesModel.from_jsonl(
+                meta_folder_path=other_dataset.meta_folder_full_path,
+                format="lerobot_v2.1",
+            )
+            other_stats_model = EpisodesStatsModel.from_jsonl(
+                meta_folder_path=other_dataset.meta_folder_full_path
+            )
+            episode_mapping, first_frames = _renumber_episodes_for_merge(
+                other_episodes_model, other_stats_model, frame_offset=frame_offset
+            )
+            episodes_model.merge_with(
+                second_episodes_model=other_episodes_model,
+                meta_folder_to_save_to=meta_folder_path,
+            )
+            info_model.merge_with(
+                second_info_model=InfoModel.from_json(
+                    meta_folder_path=other_dataset.meta_folder_full_path,
+                    format="lerobot_v2.1",
+                ),
+                meta_folder_to_save_to=meta_folder_path,
+                new_nb_tasks=new_number_of_tasks,
+            )
+            stats_model.merge_with(
+                second_stats_model=other_stats_model,
+                meta_folder_path=meta_folder_path,
+            )
+            merged_datasets.append(
+                (
+                    other_dataset,
+                    video_transform,
+                    {
+                        old_index: new_index + episode_offset
+                        for old_index, new_index in episode_mapping.items()
+                    },
+                    first_frames,
+                    task_mapping,
                 )
+            )
 
-                df["episode_index"] = df["episode_index"] + first_info.total_episodes
-                df["task_index"] = df["task_index"].replace(
-                    tasks_mapping_second_to_first,
+        ### VIDEOS AND PARQUET FILES
+        # The files are independent: they are written in parallel
+        jobs: List[Tuple[Callable[..., None], tuple]] = []
+        for (
+            dataset,
+            camera_folders,
+            episode_mapping,
+            first_frames,
+            task_mapping,
+        ) in merged_datasets:
+            for camera_key, camera_folder in camera_folders.items():
+                src_folder = os.path.join(
+                    dataset.videos_folder_full_path, camera_folder
                 )
-                df["index"] = df["index"] + first_info.total_frames
+                if not os.path.exists(src_folder):
+                    continue
+                for video_file in os.listdir(src_folder):
+                    if not video_file.endswith(".mp4"):
+                        continue
+                    video_index = int(video_file.split("_")[-1].split(".")[0])
+                    if video_index not in episode_mapping:
+                        logger.warning(
+                            f"Skipping {video_file} of {dataset.dataset_name}: not in episodes.jsonl"
+                        )
+                        continue
+                    new_video_file = f"episode_{episode_mapping[video_index]:06d}.mp4"
+                    jobs.append(
+                        (
+                            _link_or_copy,
+                            (
+                                os.path.join(src_folder, video_file),
+                                os.path.join(
+                                    path_to_videos, camera_key, new_video_file
+                                ),
+                            ),
+                        )
+                    )
+            for parquet_file in os.listdir(dataset.data_folder_full_path):
+                if not parquet_file.endswith(".parquet"):
+                    continue
+                parquet_index = int(parquet_file.split("_")[-1].split(".")[0])
+                if parquet_index not in episode_mapping:
+                    logger.warning(
+                        f"Skipping {parquet_file} of {dataset.dataset_name}: not in episodes.jsonl"
+                    )
+                    continue
+                new_index = episode_mapping[parquet_index]
+                src = os.path.join(dataset.data_folder_full_path, parquet_file)
+                dst = os.path.join(path_to_data, f"episode_{new_index:06d}.parquet")
+                if dataset is self and new_index == parquet_index:
+                    # Episode before the first deleted one. The parquets can be
+                    # rewritten in place later (compaction, repair), so they are copied
+                    # rather than linked
+                    jobs.append((shutil.copyfile, (src, dst)))
+                else:
+                    jobs.append(
+                        (
+                            _rewrite_parquet_indexes,
+                            (
+                                src,
+                                dst,
+                                new_index,
+                                first_frames[parquet_index],
+                                task_mapping,
+                            ),
+                        )
+                    )
 
-                # Save the parquet file
-                df.to_parquet(
-                    os.path.join(path_to_data, new_parquet_file),
-                )
+        logger.info(
+            f"Merging {len(merged_datasets)} datasets into {new_dataset_name}: {len(jobs)} files"
+        )
+        nb_done = 0
+        last_logged_percent = 0
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="merge_datasets"
+        ) as executor:
+            futures = [executor.submit(function, *args) for function, args in jobs]
+            for future in as_completed(futures):
+                # Raise the first error
+                future.result()
+                nb_done += 1
+                if progress_callback is not None:
+                    progress_callback(nb_done, len(jobs))
+                percent = 100 * nb_done // len(jobs)
+                if percent >= last_logged_percent + 10:
+                    last_logged_percent = percent
+                    logger.info(f"Merging datasets: {percent}% ({nb_done}/{len(jobs)})")
 
         # Create README file
         logger.debug("Creating README file")
@@ -595,6 +1045,9 @@ class LeRobotDataset(BaseDataset):
         if split_ratio <= 0 or split_ratio >= 1:
             raise ValueError(f"Split ratio {split_ratio} should be between 0 and 1")
 
+        # The episodes are split by index
+        self.compact_episodes()
+
         first_dataset_path = os.path.join(
             os.path.dirname(self.folder_full_path),
             first_split_name,
@@ -947,6 +1400,8 @@ class LeRobotDataset(BaseDataset):
             raise ValueError(
                 f"Dataset {self.dataset_name} is not in v2.1 format, cannot shuffle"
             )
+        # The permutation is over contiguous episode indexes
+        self.compact_episodes()
 
         # Find the number of episodes in the dataset
         logger.info("Shuffling the dataset episodes")
@@ -1173,6 +1628,20 @@ class LeRobotEpisode(BaseEpisode):
     target_size: tuple[int, int]  # For video creation (width, height)
     is_cartesian: bool = False  # Whether to save cartesian coordinates
     add_metadata: Optional[Dict[str, list]] = None  # Extra metadata to save
+    # Columnar storage of the recorded steps (None for episodes loaded from parquet)
+    buffer: Optional[EpisodeBuffer] = None
+    # Encode videos while recording instead of keeping the frames in memory
+    streaming_encoding: bool = False
+    # One encoder per camera key, opened on the first frame of the camera
+    _video_encoders: Dict[str, StreamingVideoEncoder] = PrivateAttr(
+        default_factory=dict
+    )
+    # Last update of the image stats submitted to the background thread
+    _image_stats_future: Optional[Future] = PrivateAttr(default=None)
+    # Set by commit(), written by write()
+    _committed_table: Optional[pa.Table] = PrivateAttr(default=None)
+    _committed_meta: Optional[LeRobotDataset] = PrivateAttr(default=None)
+    _is_committed: bool = PrivateAttr(default=False)
 
     # Paths are derived from the dataset_manager and episode_index (from metadata)
     @property
@@ -1234,6 +1703,7 @@ class LeRobotEpisode(BaseEpisode):
         all_camera_key_names: List[str],
         add_metadata: Optional[Dict[str, list]] = None,
         save_cartesian: bool = False,
+        streaming_encoding: bool = False,
         **kwargs: Dict[str, Any],
     ) -> "LeRobotEpisode":
         # Ensure meta models are loaded/initialized in the dataset manager
@@ -1292,30 +1762,57 @@ class LeRobotEpisode(BaseEpisode):
             target_size=target_size,
             is_cartesian=save_cartesian,
             add_metadata=add_metadata,
+            # Preallocate a minute of recording, the buffer grows if needed
+            buffer=EpisodeBuffer(initial_capacity=freq * 60),
+            streaming_encoding=streaming_encoding,
         )
         return episode
 
+    @property
+    def num_steps(self) -> int:
+        if self.buffer is not None:
+            return len(self.buffer)
+        return len(self.steps)
+
     async def append_step(self, step: Step, **kwargs: Dict[str, Any]) -> None:
-        self.add_step(step)  # Appends to self.steps, manages is_first/is_last flags
+        if self.buffer is not None:
+            # Copy the step into the columns, the Step object isn't kept
+            self.buffer.append_step(
+                step,
+                frames=None
+                if self.streaming_encoding
+                else self._get_step_frames_by_camera_key(step),
+            )
+        else:
+            self.add_step(step)  # Appends to self.steps, manages is_first/is_last flags
 
         current_step_in_episode_index = (
-            len(self.steps) - 1
+            self.num_steps - 1
         )  # 0-indexed count of steps in this episode
 
         # Update live meta models stored in the dataset_manager
+        stats_model: Optional[StatsModel] = None
         if self.dataset_manager.format_version == "lerobot_v2.1":
             assert self.dataset_manager.episodes_stats_model is not None
-            self.dataset_manager.episodes_stats_model.update(
+            stats_model = self.dataset_manager.episodes_stats_model.update(
                 step=step,
                 episode_index=self.episode_index,  # from self.metadata
                 current_step_index=current_step_in_episode_index,
+                update_images=False,
             )
         elif self.dataset_manager.format_version == "lerobot_v2":
             assert self.dataset_manager.stats_model is not None
-            self.dataset_manager.stats_model.update(
+            stats_model = self.dataset_manager.stats_model
+            stats_model.update(
                 step=step,
                 episode_index=self.episode_index,
                 current_step_index=current_step_in_episode_index,
+                update_images=False,
+            )
+        if stats_model is not None:
+            # The image stats are computed in a background thread, off the recording loop
+            self._image_stats_future = _image_stats_executor.submit(
+                _update_image_stats, stats_model, step
             )
 
         assert self.dataset_manager.episodes_model is not None
@@ -1327,218 +1824,225 @@ class LeRobotEpisode(BaseEpisode):
         # tasks_model.update will add the instruction as a new task if it's not already present
         self.dataset_manager.tasks_model.update(step=step)
 
-    def _convert_to_le_robot_episode_model(self) -> "LeRobotEpisodeModel":
-        """Converts internal steps to the LeRobotEpisodeModel for Parquet saving."""
-        assert self.dataset_manager.info_model is not None
-        # global_frame_offset is the total number of frames in the dataset *before* this episode's frames.
-        global_frame_offset = self.dataset_manager.info_model.total_frames
-
-        episode_data_dict: Dict[str, List] = {
-            "action": [],
-            "observation.state": [],
-            "timestamp": [],
-            "task_index": [],
-            "episode_index": [],
-            "frame_index": [],
-            "index": [],
-        }
-        if self.is_cartesian:
-            episode_data_dict["action.cartesian"] = []
-            episode_data_dict["observation.cartesian.state"] = []
-        if self.add_metadata:
-            for key in self.add_metadata.keys():
-                episode_data_dict[key] = []
-
-        # We rewrite the timestamps based on the frequency to validate LeRobot tests
-        timestamps_for_episode = (np.arange(len(self.steps)) / self.freq).tolist()
+        if self.streaming_encoding:
+            # Stats are computed above, the frames are only needed by the encoders now
+            self._stream_step_frames(step)
 
-        episode_data_dict["timestamp"] = timestamps_for_episode
+    def update_previous_step(self, current_step_data: Step) -> None:
+        if self.buffer is not None:
+            self.buffer.set_last_action(current_step_data.observation.joints_position)
+        else:
+            super().update_previous_step(current_step_data)
 
-        for local_frame_idx, step_item in enumerate(self.steps):
-            episode_data_dict["episode_index"].append(
-                self.episode_index
-            )  # from self.metadata
-            episode_data_dict["frame_index"].append(
-                local_frame_idx
-            )  # 0 to N-1 for this episode
-            # LeRobot's "observation.state" is our "joints_position"
-            episode_data_dict["observation.state"].append(
-                step_item.observation.joints_position.astype(np.float32)
-            )
-            # "index" is the global frame index across the entire dataset
-            episode_data_dict["index"].append(local_frame_idx + global_frame_offset)
-            episode_data_dict["task_index"].append(self.metadata["task_index"])
-            # If cartesian, add those fields too
-            if self.is_cartesian:
-                episode_data_dict["observation.cartesian.state"].append(
-                    step_item.observation.state.astype(np.float32)
+    def _get_step_frames_by_camera_key(self, step: Step) -> Dict[str, np.ndarray]:
+        """
+        Match the frames of a step with the camera keys of the InfoModel.
+        Same positional matching as save(): main image first, then the secondary images.
+        """
+        assert self.dataset_manager.info_model is not None
+        frames_by_key: Dict[str, np.ndarray] = {}
+        for i, cam_key_in_info in enumerate(
+            self.dataset_manager.info_model.features.observation_images.keys()
+        ):
+            frame: Optional[np.ndarray] = None
+            if cam_key_in_info == "observation.images.main":
+                frame = step.observation.main_image
+            elif 0 <= i - 1 < len(step.observation.secondary_images):
+                frame = step.observation.secondary_images[i - 1]
+            if frame is not None and frame.size > 0:
+                frames_by_key[cam_key_in_info] = frame
+        return frames_by_key
+
+    def _stream_step_frames(self, step: Step) -> None:
+        """Send the frames of the step to the video encoders."""
+        assert self.dataset_manager.info_model is not None
+        observation_images = self.dataset_manager.info_model.features.observation_images
+        for cam_key_in_info, frame in self._get_step_frames_by_camera_key(step).items():
+            encoder = self._video_encoders.get(cam_key_in_info)
+            if encoder is None:
+                video_feature_details = observation_images[cam_key_in_info]
+                encoder = StreamingVideoEncoder(
+                    output_path=str(self._get_video_path(camera_key=cam_key_in_info)),
+                    # video_feature_details.shape is [height, width, channels]
+                    target_size=(
+                        video_feature_details.shape[1],
+                        video_feature_details.shape[0],
+                    ),
+                    fps=video_feature_details.info.video_fps,
+                    codec=video_feature_details.info.video_codec,
                 )
-                if step_item.action_cartesian is not None:
-                    episode_data_dict["action.cartesian"].append(
-                        step_item.action_cartesian.astype(np.float32)
-                    )
-
-            # Additional metadata fields, if any
-            if self.add_metadata:
-                for key, values_list in self.add_metadata.items():
-                    episode_data_dict[key].append(values_list)
+                self._video_encoders[cam_key_in_info] = encoder
+            encoder.add_frame(frame)
+
+    def wait_for_image_stats(self) -> None:
+        """Wait until the image stats of all the recorded steps are computed."""
+        if self._image_stats_future is not None:
+            # The background thread handles the updates in order
+            self._image_stats_future.result()
+            self._image_stats_future = None
+
+    def discard(self) -> None:
+        """
+        Remove a committed episode whose write failed: its files, and its entries in the
+        meta models of the dataset manager.
+        """
+        self.abort_video_encoding()
+        paths = [self._parquet_path]
+        if self.dataset_manager.info_model is not None:
+            paths += [
+                self._get_video_path(camera_key)
+                for camera_key in self.dataset_manager.info_model.features.observation_images
+            ]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.dataset_manager.discard_episode(
+            episode_index=self.episode_index, length=self.num_steps
+        )
+        self._committed_table = None
+        self._committed_meta = None
+        logger.warning(
+            f"LeRobotEpisode {self.episode_index} discarded from '{self.dataset_manager.dataset_name}'."
+        )
 
-            if (
-                step_item.action is None
-            ):  # Should have been set by update_previous_step, except for the very last step
-                if (
-                    local_frame_idx == len(self.steps) - 1
-                ):  # Last step, action can be a placeholder (e.g., repeat joints_position)
-                    logger.debug(
-                        f"Last step (idx {local_frame_idx}) of episode {self.episode_index} has no action; using its own joints_position."
-                    )
-                    episode_data_dict["action"].append(
-                        step_item.observation.joints_position.astype(
-                            np.float32
-                        ).tolist()
-                    )
-                else:  # Should not happen for intermediate steps
-                    raise ValueError(
-                        f"Step {local_frame_idx} in episode {self.episode_index} has no action set before saving."
-                    )
-            else:
-                episode_data_dict["action"].append(
-                    step_item.action.astype(np.float32).tolist()
-                )
+    def abort_video_encoding(self) -> None:
+        """
+        Stop the streaming video encoders of an episode that won't be saved
+        and remove the partial video files.
+        """
+        for cam_key_in_info, encoder in self._video_encoders.items():
+            logger.debug(
+                f"Aborting video encoding for {cam_key_in_info} (episode {self.episode_index})"
+            )
+            encoder.abort()
+        self._video_encoders = {}
 
-        # Basic validation for main camera frames (if any)
-        main_cam_frames = self.get_episode_frames_main_camera()
-        if main_cam_frames:
-            first_frame_shape = main_cam_frames[0].shape
-            if not all(
-                f.shape == first_frame_shape and f.ndim == 3 for f in main_cam_frames
-            ):
+    def _close_video_encoders(self) -> None:
+        """Flush the streaming video encoders. Their files are complete once this returns."""
+        assert self.dataset_manager.info_model is not None
+        observation_images = self.dataset_manager.info_model.features.observation_images
+        for cam_key_in_info in observation_images:
+            encoder = self._video_encoders.pop(cam_key_in_info, None)
+            if encoder is None:
                 logger.warning(
-                    "Main camera frames have inconsistent shapes or dimensions."
+                    f"No frames found for camera {cam_key_in_info} in episode {self.episode_index}. Skipping video saving."
                 )
-                # This could be an error depending on strictness:
-                # raise ValueError("All main_image frames must have the same dimensions and be 3-channel RGB images.")
-
-        return LeRobotEpisodeModel(**episode_data_dict)
-
-    async def save(self, **kwargs: Dict[str, Any]) -> None:
-        if not self.steps:
-            logger.warning(
-                f"LeRobotEpisode {self.episode_index} has no steps. Skipping save."
+                continue
+            if encoder.pending_frames > 0:
+                logger.debug(
+                    f"Waiting for {encoder.pending_frames} frames to be encoded for {cam_key_in_info}"
+                )
+            try:
+                saved_path = encoder.close()
+            except (ValueError, RuntimeError) as e:
+                logger.error(
+                    f"Failed to save video for {cam_key_in_info} (episode {self.episode_index}): {e}"
+                )
+                continue
+            logger.debug(
+                f"Video for {cam_key_in_info} (episode {self.episode_index}) saved to {saved_path} ({encoder.frame_count} frames)"
             )
-            return
+            if encoder.dropped_frames > 0:
+                logger.warning(
+                    f"{encoder.dropped_frames} frames of {cam_key_in_info} (episode {self.episode_index}) were dropped because the encoder was too slow, and replaced by the previous frame."
+                )
 
-        logger.info(
-            f"Saving LeRobotEpisode {self.episode_index} for dataset '{self.dataset_manager.dataset_name}'..."
+    def _to_arrow_table(self) -> pa.Table:
+        """Build the parquet table of the episode from the columns of the buffer."""
+        assert self.buffer is not None
+        assert self.dataset_manager.info_model is not None
+        nb_steps = len(self.buffer)
+        # global_frame_offset is the total number of frames in the dataset *before* this episode's frames.
+        # The frames of deleted episodes keep their indexes until the dataset is compacted.
+        global_frame_offset = self.dataset_manager.info_model.total_frames
+        if self.dataset_manager.tombstones_model is not None:
+            global_frame_offset += self.dataset_manager.tombstones_model.total_frames
+        actions, observations = self.buffer.get_actions_and_observations(
+            self.episode_index
         )
-        assert (
-            self.dataset_manager.info_model is not None
-        )  # Should have been initialized
 
-        # Sanity check: make sure the actions and observations don't have any null or nan values
-        for step in self.steps:
-            if step.action is None or np.isnan(step.action).any():
-                # Attempt to repair the action by using the observation's joints_position
-                if (
-                    step.observation.joints_position is not None
-                    and not np.isnan(step.observation.joints_position).any()
-                ):
-                    logger.warning(
-                        f"Action in episode {self.episode_index} is None or NaN, automatically filling in the value."
-                    )
-                    step.action = step.observation.joints_position
-                else:
-                    raise ValueError(
-                        f"Step action in episode {self.episode_index} is None or NaN"
-                    )
-            if (
-                step.observation.joints_position is None
-                or np.isnan(step.observation.joints_position).any()
+        columns: Dict[str, pa.Array] = {
+            "action": _float_list_array(actions),
+            # LeRobot's "observation.state" is our "joints_position"
+            "observation.state": _float_list_array(observations),
+            # We rewrite the timestamps based on the frequency to validate LeRobot tests
+            "timestamp": pa.array(np.arange(nb_steps) / self.freq),
+            "task_index": pa.array(
+                np.full(nb_steps, self.metadata["task_index"], dtype=np.int64)
+            ),
+            "episode_index": pa.array(
+                np.full(nb_steps, self.episode_index, dtype=np.int64)
+            ),
+            # 0 to N-1 for this episode
+            "frame_index": pa.array(np.arange(nb_steps, dtype=np.int64)),
+            # "index" is the global frame index across the entire dataset
+            "index": pa.array(
+                np.arange(nb_steps, dtype=np.int64) + global_frame_offset
+            ),
+        }
+        if self.is_cartesian:
+            for key, cartesian_values in (
+                ("action.cartesian", self.buffer.action_cartesian.values),
+                ("observation.cartesian.state", self.buffer.state.values),
             ):
-                # Attempt to repair the observation by using the action
-                if step.action is not None and not np.isnan(step.action).any():
+                if cartesian_values is None:
                     logger.warning(
-                        f"Observation in episode {self.episode_index} is None or NaN, automatically filling in the value."
-                    )
-                    step.observation.joints_position = step.action
-                else:
-                    raise ValueError(
-                        f"Step observation in episode {self.episode_index} is None or NaN"
+                        f"No {key} recorded in episode {self.episode_index}. Skipping the column."
                     )
+                    continue
+                columns[key] = _float_list_array(cartesian_values)
+        if self.add_metadata:
+            for key, values_list in self.add_metadata.items():
+                columns[key] = pa.array([values_list] * nb_steps)
+
+        table = pa.table(columns)
+        if "timing" in self.metadata:
+            # Recording timings aren't part of the LeRobot format: they are stored in the
+            # key-value metadata of the parquet file, which is ignored when loading the dataset
+            table = table.replace_schema_metadata(
+                {"phosphobot.timing": json.dumps(self.metadata["timing"])}
+            )
+        return table
 
-        # 1. Save Parquet data for the episode
-        lerobot_parquet_model = self._convert_to_le_robot_episode_model()
-        lerobot_parquet_model.to_parquet(str(self._parquet_path))
-        logger.debug(
-            f"Episode data for {self.episode_index} saved to {self._parquet_path}"
-        )
+    @property
+    def is_committed(self) -> bool:
+        """Whether the episode was added to the dataset by commit()."""
+        return self._is_committed
 
-        # 2. Save Videos for the episode
-        main_camera_frames = self.get_episode_frames_main_camera()
-        secondary_camera_frames_by_cam = (
-            self.get_episode_frames_secondary_cameras()
-        )  # List of frame lists
-
-        # Iterate through camera configurations in InfoModel to ensure all expected videos are handled
-        for i, (cam_key_in_info, video_feature_details) in enumerate(
-            self.dataset_manager.info_model.features.observation_images.items()
-        ):
-            frames_for_this_video: Optional[List[np.ndarray]] = None
+    def commit(self) -> None:
+        """
+        Add the episode to the meta models of the dataset manager, and keep a copy of
+        them and the parquet table of the episode for write().
 
-            if cam_key_in_info == "observation.images.main":
-                frames_for_this_video = main_camera_frames
-            else:  # Secondary camera
-                # Try to match cam_key_in_info with available secondary_camera_frames_by_cam
-                # This assumes secondary_camera_frames_by_cam is ordered as per info_model's secondary keys.
-                # A more robust match would use actual keys if secondary_images in Observation were a dict.
-                # For now, simple positional matching after main.
-                secondary_cam_idx = (
-                    i - 1
-                )  # If i=0 is main, i=1 is first secondary (idx 0 in list)
-                if 0 <= secondary_cam_idx < len(secondary_camera_frames_by_cam):
-                    frames_for_this_video = secondary_camera_frames_by_cam[
-                        secondary_cam_idx
-                    ]
+        This is quick: the next episode can be recorded with the same dataset manager
+        right after, with the next episode index, while this one is written.
+        """
+        logger.info(
+            f"Committing LeRobotEpisode {self.episode_index} for dataset '{self.dataset_manager.dataset_name}'..."
+        )
+        assert (
+            self.dataset_manager.info_model is not None
+        )  # Should have been initialized
 
-            if frames_for_this_video and len(frames_for_this_video) > 0:
-                video_file_path = self._get_video_path(camera_key=cam_key_in_info)
-                # target_size for create_video_file is (width, height)
-                # video_feature_details.shape is [height, width, channels]
-                video_target_size = (
-                    video_feature_details.shape[1],
-                    video_feature_details.shape[0],
+        if self.buffer is None:
+            # Episode built from a list of steps instead of being recorded
+            self.buffer = EpisodeBuffer(initial_capacity=len(self.steps))
+            for step in self.steps:
+                self.buffer.append_step(
+                    step, frames=self._get_step_frames_by_camera_key(step)
                 )
 
-                saved_path = create_video_file(
-                    frames=np.array(
-                        frames_for_this_video
-                    ),  # create_video_file expects np.array of frames
-                    output_path=str(video_file_path),
-                    target_size=video_target_size,  # Ensure this is (width, height)
-                    fps=video_feature_details.info.video_fps,
-                    codec=video_feature_details.info.video_codec,
-                )
-                if (isinstance(saved_path, str) and os.path.exists(saved_path)) or (
-                    isinstance(saved_path, tuple)
-                    and all(os.path.exists(p) for p in saved_path)
-                ):  # Stereo case
-                    logger.debug(
-                        f"Video for {cam_key_in_info} (episode {self.episode_index}) saved to {video_file_path}"
-                    )
-                else:
-                    logger.error(
-                        f"Failed to save video for {cam_key_in_info} (episode {self.episode_index}) to {video_file_path}"
-                    )
-            else:
-                logger.warning(
-                    f"No frames found for camera {cam_key_in_info} in episode {self.episode_index}. Skipping video saving."
-                )
+        # Missing actions and observations are filled in, or raise a ValueError.
+        # The global indexes of the frames start at the current total number of frames.
+        self._committed_table = self._to_arrow_table()
 
-        # 3. Update Dataset-level InfoModel (after this episode is fully processed)
-        self.dataset_manager.info_model.total_frames += len(self.steps)
+        # Update Dataset-level InfoModel
+        self.dataset_manager.info_model.total_frames += self.num_steps
         # total_episodes should be the count of saved episodes. If this is episode N, total_episodes becomes N+1.
         # This assumes episodes are saved sequentially and episode_index is 0-based.
-        self.dataset_manager.info_model.total_episodes = self.episode_index + 1
+        self.dataset_manager.info_model.total_episodes = (
+            self.episode_index + 1 - self.dataset_manager.nb_deleted_episodes
+        )
         self.dataset_manager.info_model.total_videos += len(
             self.dataset_manager.info_model.features.observation_images
         )
@@ -1553,12 +2057,110 @@ class LeRobotEpisode(BaseEpisode):
                 self.metadata["task_index"] + 1
             )
 
-        # 4. Save all (potentially updated) meta models from the dataset manager
-        self.dataset_manager.save_all_meta_models()
+        # The meta files are written as they are now, with the stats of all the frames
+        self.wait_for_image_stats()
+        self._committed_meta = self.dataset_manager.snapshot_meta_models()
+        self._is_committed = True
+
+    def write(self, on_stage: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Write the files of a committed episode: its parquet, its videos, then the meta
+        files of the dataset as they were when it was committed. This is blocking: the
+        videos may have to be encoded. on_stage is called with "data", "videos" and "meta".
+        """
+        if self._committed_table is None or self._committed_meta is None:
+            raise ValueError(
+                f"LeRobotEpisode {self.episode_index} must be committed before being written."
+            )
+
+        # 1. Save Parquet data for the episode
+        if on_stage is not None:
+            on_stage("data")
+        pq.write_table(self._committed_table, str(self._parquet_path))
+        logger.debug(
+            f"Episode data for {self.episode_index} saved to {self._parquet_path}"
+        )
+
+        # 2. Save Videos for the episode
+        if on_stage is not None:
+            on_stage("videos")
+        if self.streaming_encoding:
+            self._close_video_encoders()
+        else:
+            self._save_buffered_videos()
+
+        # 3. Save the meta models, as they were when the episode was committed
+        if on_stage is not None:
+            on_stage("meta")
+        self._committed_meta.save_all_meta_models()
+        self._committed_table = None
+        self._committed_meta = None
         logger.success(
             f"LeRobotEpisode {self.episode_index} and all dataset meta files saved for '{self.dataset_manager.dataset_name}'."
         )
 
+    async def save(self, **kwargs: Dict[str, Any]) -> None:
+        """
+        Commit and write the episode. Both run in a thread so the event loop keeps
+        running. To record the next episode while this one is written, call commit()
+        and run write() in the background instead.
+        """
+        if self.num_steps == 0:
+            logger.warning(
+                f"LeRobotEpisode {self.episode_index} has no steps. Skipping save."
+            )
+            return
+
+        await asyncio.to_thread(self.commit)
+        await asyncio.to_thread(self.write)
+
+    def _save_buffered_videos(self) -> None:
+        """Encode the videos of the episode from the frames stored in the buffer."""
+        assert self.buffer is not None
+        assert self.dataset_manager.info_model is not None
+
+        # Feed all the encoders first so the cameras are encoded in parallel
+        for (
+            cam_key_in_info,
+            video_feature_details,
+        ) in self.dataset_manager.info_model.features.observation_images.items():
+            frames_for_this_video = self.buffer.frames.get(cam_key_in_info)
+            if frames_for_this_video is None or len(frames_for_this_video) == 0:
+                continue
+            encoder = StreamingVideoEncoder(
+                output_path=str(self._get_video_path(camera_key=cam_key_in_info)),
+                # video_feature_details.shape is [height, width, channels]
+                target_size=(
+                    video_feature_details.shape[1],
+                    video_feature_details.shape[0],
+                ),
+                fps=video_feature_details.info.video_fps,
+                codec=video_feature_details.info.video_codec,
+            )
+            for frame in frames_for_this_video:
+                # The frames are already in memory: wait for the encoder, don't drop any
+                encoder.add_frame(frame, timeout=None)
+            self._video_encoders[cam_key_in_info] = encoder
+
+        self._close_video_encoders()
+
+    async def play(
+        self,
+        robots: List[BaseRobot],
+        playback_speed: float = 1.0,
+        interpolation_factor: int = 4,
+        replicate: bool = False,
+    ) -> None:
+        if self.buffer is not None and len(self.steps) != len(self.buffer):
+            # Replaying a recorded episode: steps are only stored in the buffer
+            self.steps = self.buffer.to_steps()
+        await super().play(
+            robots=robots,
+            playback_speed=playback_speed,
+            interpolation_factor=interpolation_factor,
+            replicate=replicate,
+        )
+
     @classmethod
     def from_parquet(
         cls,
@@ -1723,6 +2325,22 @@ class LeRobotEpisode(BaseEpisode):
             )
 
 
+def _float_list_array(values: np.ndarray) -> pa.ListArray:
+    """
+    Convert a 2D array to a parquet list column, one list per row.
+    Values are rounded to float32 and stored as double, like the lists of floats
+    written by pandas in the existing datasets.
+    """
+    values = np.asarray(values, dtype=np.float32).astype(np.float64)
+    nb_rows, row_size = values.shape
+    offsets = np.arange(0, (nb_rows + 1) * row_size, row_size, dtype=np.int32)
+    return pa.ListArray.from_arrays(
+        pa.array(offsets),
+        pa.array(values.reshape(-1)),
+        type=pa.list_(pa.field("element", pa.float64())),
+    )
+
+
 class LeRobotEpisodeModel(BaseModel):
     model_config = ConfigDict(extra="allow")
 
@@ -1871,30 +2489,32 @@ class TasksModel(BaseModel):
             )
 
     def update_for_episode_removal(
-        self, df_episode_to_delete: pd.DataFrame, data_folder_full_path: str
+        self, df_episode_to_delete: pd.DataFrame, episodes_model: "EpisodesModel"
     ) -> None:
         """
         Update the tasks when removing an episode from the dataset.
-        We count the number of occurences of task_index in the dataset.
-        If the episode is the only one with this task_index, we remove it from the tasks.jsonl file.
+        The tasks of the other episodes are read from episodes.jsonl.
+        If the episode is the only one with this task, we remove it from the tasks.jsonl file.
         """
         if df_episode_to_delete.empty:
             return
 
-        # For each file in the data folder get the task indexes (unique)
-        task_indexes: List[int] = []
-        for file in os.listdir(data_folder_full_path):
-            if file.endswith(".parquet"):
-                df = pd.read_parquet(f"{data_folder_full_path}/{file}")
-                task_indexes.extend(df["task_index"].unique())
+        episode_to_delete_index = int(df_episode_to_delete["episode_index"].iloc[0])
+        remaining_tasks = {
+            task
+            for episode in episodes_model.episodes
+            if episode.episode_index != episode_to_delete_index
+            for task in episode.tasks
+        }
 
         for task_index in df_episode_to_delete["task_index"].unique():
             task_index = int(task_index)
-            # delete the line in tasks.jsonl if and only if the task index in this episode is the only one in the dataset
-            if task_indexes.count(task_index) == 1:
-                self.tasks = [
-                    task for task in self.tasks if task.task_index != task_index
-                ]
+            # delete the line in tasks.jsonl if and only if no other episode has this task
+            self.tasks = [
+                task
+                for task in self.tasks
+                if task.task_index != task_index or task.task in remaining_tasks
+            ]
 
     def save(self, meta_folder_path: str) -> None:
         """
@@ -2087,6 +2707,10 @@ class EpisodesModel(BaseModel):
 
         incorrect_episodes = False
         _episodes_features: dict[int, EpisodesFeatures] = {}
+        # The gaps left by deleted episodes are expected until the dataset is compacted
+        deleted_indexes = set(
+            TombstonesModel.from_json(meta_folder_path).episode_indexes
+        )
 
         with open(
             f"{meta_folder_path}/episodes.jsonl", "r", encoding=DEFAULT_FILE_ENCODING
@@ -2100,7 +2724,7 @@ class EpisodesModel(BaseModel):
                     missing_indexes = [
                         i
                         for i in range(last_index + 1, episodes_feature.episode_index)
-                        if i not in _episodes_features
+                        if i not in _episodes_features and i not in deleted_indexes
                     ]
                     if missing_indexes:
                         incorrect_episodes = True
@@ -2345,6 +2969,78 @@ class EpisodesModel(BaseModel):
             episode.episode_index: episode for episode in self.episodes
         }
 
+    def remove_episode(self, episode_index: int) -> None:
+        """
+        Remove the line of an episode, without renumbering the following episodes.
+        """
+        self.episodes = [
+            episode
+            for episode in self.episodes
+            if episode.episode_index != episode_index
+        ]
+        self._episodes_features = {
+            episode.episode_index: episode for episode in self.episodes
+        }
+
+
+class TombstoneFeatures(BaseModel):
+    """
+    Features for each deleted episode in the tombstones.json file.
+    """
+
+    episode_index: int
+    length: int = 0
+
+
+class TombstonesModel(BaseModel):
+    """
+    Episodes deleted from the dataset since it was last compacted.
+
+    Deleting an episode removes its files and its meta lines, but keeps the indexes of
+    the following episodes: the gaps are recorded in meta/tombstones.json until
+    LeRobotDataset.compact_episodes renumbers the episodes.
+    """
+
+    episodes: List[TombstoneFeatures] = Field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, meta_folder_path: str) -> "TombstonesModel":
+        """
+        Read the tombstones.json file in the meta folder path.
+        If the file does not exist, no episode was deleted.
+        """
+        path = os.path.join(meta_folder_path, "tombstones.json")
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding=DEFAULT_FILE_ENCODING) as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, meta_folder_path: str) -> None:
+        """
+        Save the tombstones.json file. It's removed when there are no deleted episodes.
+        """
+        path = os.path.join(meta_folder_path, "tombstones.json")
+        if not self.episodes:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        with open(path, "w", encoding=DEFAULT_FILE_ENCODING) as f:
+            f.write(self.model_dump_json(indent=4))
+
+    def add(self, episode_index: int, length: int) -> None:
+        self.episodes.append(
+            TombstoneFeatures(episode_index=episode_index, length=length)
+        )
+
+    @property
+    def episode_indexes(self) -> List[int]:
+        return [episode.episode_index for episode in self.episodes]
+
+    @property
+    def total_frames(self) -> int:
+        """Number of frames of the deleted episodes, whose global indexes are still used."""
+        return sum(episode.length for episode in self.episodes)
+
 
 class Stats(BaseModel):
     """
@@ -2360,6 +3056,8 @@ class Stats(BaseModel):
     sum: Optional[NdArrayAsList] = None
     square_sum: Optional[NdArrayAsList] = None
     count: int = 0
+    # Images: counts of each uint8 value per channel, not yet added to sum and square_sum
+    _histogram: Optional[np.ndarray] = PrivateAttr(default=None)
 
     @field_validator("count", mode="before")
     @classmethod
@@ -2444,54 +3142,95 @@ class Stats(BaseModel):
         Update the stats with the new image.
         The stats are in dim 3 for RGB.
         We normalize with the number of pixels.
+
+        uint8 images are only counted in a histogram of their values per channel, which is
+        much cheaper than converting them to float. The histogram gives the exact sum,
+        square sum, min and max, which are added to the stats by compute_from_rolling_images().
         """
 
+        if image_value is None:
+            return None
+
         assert image_value.ndim == 3, "Image value must be 3D"
 
-        if image_value is None:
+        if image_value.dtype == np.uint8 and image_value.shape[2] == 3:
+            histogram = get_image_histogram(image_value)
+            if self._histogram is None:
+                self._histogram = histogram
+            else:
+                self._histogram += histogram
             return None
 
+        image_norm_32 = image_value.astype(dtype=np.float32) / 255.0
+        self._add_image_values(
+            channel_min=np.min(image_norm_32, axis=(0, 1)),
+            channel_max=np.max(image_norm_32, axis=(0, 1)),
+            channel_sum=np.sum(image_norm_32, axis=(0, 1)),
+            channel_square_sum=np.sum(image_norm_32**2, axis=(0, 1)),
+            nb_pixels=image_norm_32.shape[0] * image_norm_32.shape[1],
+        )
+
+    def _add_image_values(
+        self,
+        channel_min: np.ndarray,
+        channel_max: np.ndarray,
+        channel_sum: np.ndarray,
+        channel_square_sum: np.ndarray,
+        nb_pixels: int,
+    ) -> None:
+        """Add the per-channel min, max, sum and square sum of normalized pixels to the stats."""
         # Compute the square sum if not available
         if self.square_sum is None and self.std is not None and self.mean is not None:
             self.square_sum = self.std**2 + self.mean**2
 
-        image_norm_32 = image_value.astype(dtype=np.float32) / 255.0
-
-        # Update the max and min
+        # Update the max and min, with the same shape as the mean and std
         if self.max is None:
-            self.max = np.max(image_norm_32, axis=(0, 1)).reshape(3, 1, 1)
+            self.max = channel_max.reshape(3, 1, 1)
         else:
-            image_max_pixel = np.max(image_norm_32, axis=(0, 1)).reshape(3, 1, 1)
             # maximum is the max in each channel
-            self.max = np.maximum(self.max, image_max_pixel)
+            self.max = np.maximum(self.max, channel_max.reshape(3, 1, 1))
 
         if self.min is None:
-            self.min = np.min(image_norm_32, axis=(0, 1)).reshape(3, 1, 1)
-            # Reshape to have the same shape as the mean and std
-            self.min = self.min.reshape(3, 1, 1)
+            self.min = channel_min.reshape(3, 1, 1)
         else:
-            image_min_pixel = np.min(image_norm_32, axis=(0, 1)).reshape(3, 1, 1)
             # Set the min to the min in each channel
-            self.min = np.minimum(self.min, image_min_pixel)
-            # Reshape to have the same shape as the mean and std
-            self.min = self.min.reshape(3, 1, 1) if self.min is not None else self.min
+            self.min = np.minimum(self.min, channel_min.reshape(3, 1, 1))
 
         # Update the rolling sum and square sum
-        nb_pixels = image_norm_32.shape[0] * image_norm_32.shape[1]
-        # Convert to int32 to avoid overflow when computing the square sum
         if self.sum is None or self.square_sum is None:
-            self.sum = np.sum(image_norm_32, axis=(0, 1))
-            self.square_sum = np.sum(image_norm_32**2, axis=(0, 1))
+            self.sum = channel_sum
+            self.square_sum = channel_square_sum
             self.count = nb_pixels
         else:
-            self.sum = self.sum + np.sum(image_norm_32, axis=(0, 1))
-            self.square_sum = self.square_sum + np.sum(image_norm_32**2, axis=(0, 1))
+            self.sum = self.sum + channel_sum
+            self.square_sum = self.square_sum + channel_square_sum
             self.count += nb_pixels
 
+    def _add_image_histogram(self) -> None:
+        """Add the images counted in the histogram to the rolling sum and square sum."""
+        if self._histogram is None:
+            return
+        histogram, self._histogram = self._histogram, None
+
+        # Normalized value of each bin
+        values = np.arange(256, dtype=np.float64) / 255.0
+        non_empty_bins = histogram > 0
+        first_bin = np.argmax(non_empty_bins, axis=1)
+        last_bin = 255 - np.argmax(non_empty_bins[:, ::-1], axis=1)
+        self._add_image_values(
+            channel_min=values[first_bin].astype(np.float32),
+            channel_max=values[last_bin].astype(np.float32),
+            channel_sum=histogram @ values,
+            channel_square_sum=histogram @ values**2,
+            # Every channel has one value per pixel
+            nb_pixels=int(histogram[0].sum()),
+        )
+
     def compute_from_rolling_images(self) -> None:
         """
         Compute the mean and std from the rolling sum and square sum for images.
         """
+        self._add_image_histogram()
 
         if self.count == 0:
             logger.error("Count is 0. Cannot compute mean and std for images.")
@@ -2523,6 +3262,23 @@ class Stats(BaseModel):
                 # Use (1, 1, 1) as max for the first episode
                 self.max = np.ones((3, 1, 1), dtype=np.float32)
 
+    @classmethod
+    def from_moments(cls, moments: FeatureMoments, is_image: bool = False) -> "Stats":
+        """
+        Create the stats of a feature from its moments, computed from the dataset files.
+        Like the stats of images recorded by the app, they have the shape (3, 1, 1).
+        """
+        shape = (3, 1, 1) if is_image else moments.sum.shape
+        return cls(
+            max=moments.max.reshape(shape),
+            min=moments.min.reshape(shape),
+            mean=moments.mean.reshape(shape),
+            std=moments.std.reshape(shape),
+            sum=moments.sum,
+            square_sum=moments.square_sum,
+            count=moments.count,
+        )
+
 
 class StatsModel(BaseModel):
     """
@@ -2659,9 +3415,11 @@ class StatsModel(BaseModel):
         step: Step,
         episode_index: int,
         current_step_index: int,
+        update_images: bool = True,
     ) -> None:
         """
         Updates the stats with the given step.
+        Pass update_images=False to call update_images() separately, e.g. in a background thread.
         """
 
         self.action.update(
@@ -2682,6 +3440,13 @@ class StatsModel(BaseModel):
         # This should be the index of the instruction as it's in tasks.jsonl (TasksModel)
         self.task_index.update(np.array([0]))
 
+        if update_images:
+            self.update_images(step)
+
+    def update_images(self, step: Step) -> None:
+        """
+        Updates the stats of the images with the frames of the given step.
+        """
         main_image = step.observation.main_image
         if main_image is not None:
             if "observation.images.main" not in self.observation_images.keys():
@@ -2703,6 +3468,22 @@ class StatsModel(BaseModel):
                 f"observation.images.secondary_{image_index}"
             ].update_image(image)
 
+    def update_from_moments(self, moments: Dict[str, FeatureMoments]) -> None:
+        """
+        Replace the stats of the features with their moments computed from the dataset
+        files, see compute_episodes_moments. The keys are the features of info.json.
+        """
+        for field_name, field in StatsModel.model_fields.items():
+            feature = field.serialization_alias or field_name
+            if feature in moments and isinstance(getattr(self, field_name), Stats):
+                setattr(self, field_name, Stats.from_moments(moments[feature]))
+
+        for feature, feature_moments in moments.items():
+            if "image" in feature:
+                self.observation_images[feature] = Stats.from_moments(
+                    feature_moments, is_image=True
+                )
+
     def save(self, meta_folder_path: str) -> None:
         """
         Save the stats to the meta folder path.
@@ -3001,24 +3782,19 @@ class StatsModel(BaseModel):
             meta_folder_path=meta_folder_path
         )
 
-        # Load all the other parquet files in one dataFrame
-        li_data_folder_filenames = [
-            file
+        # The min and max of the other episodes, read from their parquets in parallel
+        episodes_files = [
+            EpisodeFiles(
+                episode_index=int(file.split(".")[0].split("_")[-1]),
+                parquet_path=os.path.join(data_folder_path, file),
+            )
             for file in os.listdir(data_folder_path)
             if file.endswith(".parquet")
             and file != f"episode_{episode_to_delete_index:06d}.parquet"
         ]
-        if len(li_data_folder_filenames) == 0:
+        if len(episodes_files) == 0:
             return
-
-        # Load all episodes
-        all_episodes = [
-            pd.read_parquet(str(os.path.join(data_folder_path, file)))
-            for file in li_data_folder_filenames
-        ]
-
-        # Combine all episodes
-        all_episodes_df = pd.concat(all_episodes)
+        moments = merge_moments(list(compute_episodes_moments(episodes_files).values()))
 
         for field_name, field in StatsModel.model_fields.items():
             # TODO task_index is not updated since we do not support multiple tasks
@@ -3032,15 +3808,9 @@ class StatsModel(BaseModel):
                 "observation.state" if field_name == "observation_state" else field_name
             )
             # Update statistics
-            if field_name in all_episodes_df.keys():
-                (field_value.min, field_value.max) = get_field_min_max(
-                    all_episodes_df, field_name
-                )
-                # The value should be a numpy ndarray, even if it's a int or float
-                if not isinstance(field_value.min, np.ndarray):
-                    field_value.min = np.array([field_value.min])
-                if not isinstance(field_value.max, np.ndarray):
-                    field_value.max = np.array([field_value.max])
+            if field_name in moments:
+                field_value.min = moments[field_name].min
+                field_value.max = moments[field_name].max
 
     def update_for_episode_removal(self, data_folder_path: str) -> None:
         # TODO: Handle everything in one function
@@ -3155,9 +3925,15 @@ class EpisodesStatsModel(BaseModel):
     save_cartesian: bool = False
     add_metadata: Optional[Dict[str, list]] = None
 
-    def update(self, step: Step, episode_index: int, current_step_index: int) -> None:
+    def update(
+        self,
+        step: Step,
+        episode_index: int,
+        current_step_index: int,
+        update_images: bool = True,
+    ) -> StatsModel:
         """
-        Updates the episodes_stats with the given step.
+        Updates the episodes_stats with the given step and returns the stats of the episode.
         """
         # Check if the episode index already exists
         if (
@@ -3169,8 +3945,9 @@ class EpisodesStatsModel(BaseModel):
                 step=step,
                 episode_index=episode_index,
                 current_step_index=current_step_index,
+                update_images=update_images,
             )
-            return
+            return self.episodes_stats[-1].stats
 
         # If the episode index does not exist, create a new entry
         new_episode_stats = EpisodesStatsFeatures(
@@ -3183,8 +3960,10 @@ class EpisodesStatsModel(BaseModel):
             step=step,
             episode_index=episode_index,
             current_step_index=current_step_index,
+            update_images=update_images,
         )
         self.episodes_stats.append(new_episode_stats)
+        return new_episode_stats.stats
 
     def to_jsonl(self, meta_folder_path: str) -> None:
         """
@@ -3317,6 +4096,16 @@ class EpisodesStatsModel(BaseModel):
                         current_max_index
                     )
 
+    def remove_episode(self, episode_index: int) -> None:
+        """
+        Remove the stats of an episode, without renumbering the following episodes.
+        """
+        self.episodes_stats = [
+            episode_stats
+            for episode_stats in self.episodes_stats
+            if episode_stats.episode_index != episode_index
+        ]
+
     def merge_with(
         self, second_stats_model: "EpisodesStatsModel", meta_folder_path: str
     ) -> None:
@@ -3885,7 +4674,7 @@ class InfoModel(BaseModel):
         )
 
         self.total_episodes = nb_episodes
-        self.total_frames += len(episode.steps)
+        self.total_frames += episode.num_steps
         # Count the number of videos in every subfolder
         video_path = os.path.join(episode.dataset_path, "videos", "chunk-000")
         total_videos = 0
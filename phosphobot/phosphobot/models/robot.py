@@ -1,5 +1,6 @@
 import asyncio
 import json
+import threading
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
@@ -32,7 +33,36 @@ class RobotConfigStatus(BaseModel):
 class BaseRobot(ABC):
     name: str
     is_connected: bool = False
-    is_moving: bool = False
+
+    @property
+    def _stopped_event(self) -> threading.Event:
+        # Created on first use: the robots don't all call BaseRobot.__init__
+        event = self.__dict__.get("_stopped")
+        if event is None:
+            event = threading.Event()
+            event.set()
+            event = self.__dict__.setdefault("_stopped", event)
+        return event
+
+    @property
+    def is_moving(self) -> bool:
+        return not self._stopped_event.is_set()
+
+    @is_moving.setter
+    def is_moving(self, value: bool) -> None:
+        if value:
+            self._stopped_event.clear()
+        else:
+            self._stopped_event.set()
+
+    async def wait_until_stopped(self, timeout: float) -> bool:
+        """
+        Wait for the current move of the robot to finish.
+        Returns False if the robot is still moving after timeout seconds.
+        """
+        if not self.is_moving:
+            return True
+        return await asyncio.to_thread(self._stopped_event.wait, timeout)
 
     @abstractmethod
     def set_motors_positions(
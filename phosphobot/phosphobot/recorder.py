@@ -1,39 +1,173 @@
 import asyncio
+import functools
 import os
+import queue
+import threading
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Literal, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Literal, Optional, Tuple
 
 import numpy as np
 from fastapi import BackgroundTasks, Depends
 from loguru import logger
 
-from phosphobot.camera import AllCameras, BaseCamera, get_all_cameras
+from phosphobot.camera import AllCameras, SyncedFrames, get_all_cameras
 from phosphobot.configs import config
-from phosphobot.hardware import BaseRobot
+from phosphobot.hardware import BaseManipulator, BaseRobot
 
 # New imports for refactored Episode structure
 from phosphobot.models import (
-    BaseDataset,
     BaseEpisode,
+    EpisodeSaveStatus,
     JsonEpisode,
     LeRobotDataset,
     LeRobotEpisode,
     Observation,
     Step,
 )
+from phosphobot.models.dataset_catalog import get_dataset_catalog
 from phosphobot.rerun_visualizer import RerunVisualizer
 from phosphobot.robot import RobotConnectionManager, get_rcm
+from phosphobot.scheduler import FixedRateScheduler, TimingMetrics
 from phosphobot.types import VideoCodecs
 from phosphobot.utils import background_task_log_exceptions, get_home_app_path
 
 recorder = None  # Global variable to store the recorder instance
 
+# Held while a dataset is compacted or edited, and while an episode gets its index in a
+# dataset: the edits renumber the episodes, or rewrite the meta files
+_dataset_lock = threading.Lock()
+
+
+class DatasetBusyError(Exception):
+    """Raised when editing a dataset whose episodes are being recorded or saved."""
+
+
+@contextmanager
+def lock_datasets(*dataset_paths: str) -> Iterator[None]:
+    """
+    Hold while datasets are edited outside the recorder (deletion, compaction, merge...).
+    Raises a DatasetBusyError if episodes of one of them are being recorded or saved:
+    their meta files, written later, would overwrite the changes.
+    """
+    with _dataset_lock:
+        if recorder is not None:
+            for dataset_path in dataset_paths:
+                if recorder.is_dataset_in_use(dataset_path):
+                    raise DatasetBusyError(
+                        f"Episodes of {dataset_path} are being recorded or saved. Try again once they are saved."
+                    )
+        yield
+
+
+class EpisodeSaver:
+    """
+    Saves the episodes in a worker thread, so that the server keeps serving and the next
+    episode can be recorded while the previous one is written and its videos encoded.
+
+    The jobs are run one at a time, in the order they were submitted: the meta files of
+    a dataset are written in the order its episodes were committed.
+    """
+
+    # Number of finished saves kept for the status
+    max_history: int = 10
+
+    def __init__(self) -> None:
+        self._jobs: queue.Queue[Tuple[EpisodeSaveStatus, Callable]] = queue.Queue()
+        self._lock = threading.Lock()
+        # Saves queued or running, and the last ones finished
+        self._pending: List[Tuple[EpisodeSaveStatus, str]] = []
+        self._history: Deque[EpisodeSaveStatus] = deque(maxlen=self.max_history)
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        status: EpisodeSaveStatus,
+        dataset_path: str,
+        save: Callable[[Callable[[str], None]], None],
+    ) -> None:
+        """
+        Queue a save. save is called in the worker thread with a callback to report the
+        stage of the save.
+        """
+        with self._lock:
+            self._pending.append((status, dataset_path))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="episode_saver", daemon=True
+                )
+                self._worker.start()
+        self._jobs.put((status, save))
+
+    def _run(self) -> None:
+        while True:
+            status, save = self._jobs.get()
+            with self._lock:
+                status.status = "saving"
+                status.started_at = time.time()
+            try:
+                save(functools.partial(self._set_stage, status))
+                with self._lock:
+                    status.status = "saved"
+                logger.success(
+                    f"Episode {status.episode_index} of dataset '{status.dataset_name}' saved in {time.time() - status.started_at:.1f}s."
+                )
+            except Exception as e:
+                logger.opt(exception=e).error(
+                    f"Error while saving episode {status.episode_index} of dataset '{status.dataset_name}': {e}"
+                )
+                with self._lock:
+                    status.status = "failed"
+                    status.error = str(e)
+            finally:
+                with self._lock:
+                    status.finished_at = time.time()
+                    self._pending = [
+                        pending for pending in self._pending if pending[0] is not status
+                    ]
+                    self._history.append(status)
+                self._jobs.task_done()
+
+    def _set_stage(self, status: EpisodeSaveStatus, stage: str) -> None:
+        with self._lock:
+            status.stage = stage
+
+    @property
+    def is_saving(self) -> bool:
+        with self._lock:
+            return len(self._pending) > 0
+
+    def has_pending(
+        self, dataset_path: str, exclude: Optional[EpisodeSaveStatus] = None
+    ) -> bool:
+        """Whether episodes of the dataset, other than exclude, are waiting to be written."""
+        dataset_path = os.path.abspath(dataset_path)
+        with self._lock:
+            return any(
+                os.path.abspath(path) == dataset_path and status is not exclude
+                for status, path in self._pending
+            )
+
+    def statuses(self) -> List[EpisodeSaveStatus]:
+        """The last saves finished, then the saves running and queued."""
+        with self._lock:
+            return [
+                status.model_copy()
+                for status in list(self._history)
+                + [status for status, _ in self._pending]
+            ]
+
+    def wait(self) -> None:
+        """Block until all the saves queued are finished."""
+        self._jobs.join()
+
 
 class Recorder:
     episode_format: Literal["json", "lerobot_v2", "lerobot_v2.1"] = "lerobot_v2.1"
 
-    is_saving: bool = False
     is_recording: bool = False
     episode: Optional[BaseEpisode] = None  # Link to an Episode instance
     start_ts: Optional[float]
@@ -42,6 +176,11 @@ class Recorder:
     cameras: AllCameras
     robots: list[BaseRobot]
 
+    # Timings of the record loop of the current episode
+    timing_metrics: Optional[TimingMetrics] = None
+    # Last frames recorded, to detect cameras sending the same frame twice
+    _last_synced_frames: Optional[SyncedFrames] = None
+
     # Performance optimization: thread pools for concurrent operations
     _image_thread_pool: Optional[ThreadPoolExecutor] = None
     _robot_thread_pool: Optional[ThreadPoolExecutor] = None
@@ -53,6 +192,11 @@ class Recorder:
     # _current_branch_path_for_push: Optional[str] = None
     # _use_push_to_hub_after_save: bool = False
 
+    @property
+    def is_saving(self) -> bool:
+        """Whether episodes are being saved in the background."""
+        return self.episode_saver.is_saving
+
     @property
     def episode_recording_folder(
         self,
@@ -63,6 +207,11 @@ class Recorder:
         self.robots = robots
         self.cameras = cameras
         self.rerun_visualizer = RerunVisualizer()
+        self.episode_saver = EpisodeSaver()
+        # Dataset of the last episode, reused while its episodes are being written
+        self._dataset_manager: Optional[LeRobotDataset] = None
+        # Committing an episode and starting the next one must not interleave
+        self._episode_lock = asyncio.Lock()
 
         # Initialize thread pools for performance optimization
         self._max_image_workers = max(
@@ -104,6 +253,45 @@ class Recorder:
         add_metadata: Optional[
             Dict[str, list]
         ] = None,  # Additional metadata to save with each step
+    ) -> None:
+        async with self._episode_lock:
+            await self._start(
+                background_tasks=background_tasks,
+                robots=robots,
+                actions_robots_mapping=actions_robots_mapping,
+                observations_robots_mapping=observations_robots_mapping,
+                codec=codec,
+                freq=freq,
+                target_size=target_size,
+                dataset_name=dataset_name,
+                instruction=instruction,
+                episode_format=episode_format,
+                cameras_ids_to_record=cameras_ids_to_record,
+                use_push_to_hf=use_push_to_hf,
+                branch_path=branch_path,
+                enable_rerun=enable_rerun,
+                save_cartesian=save_cartesian,
+                add_metadata=add_metadata,
+            )
+
+    async def _start(
+        self,
+        background_tasks: BackgroundTasks,
+        robots: List[BaseRobot],
+        actions_robots_mapping: Dict[int, Literal["sim", "robot"]],
+        observations_robots_mapping: Dict[int, Literal["sim", "robot"]],
+        codec: VideoCodecs,
+        freq: int,
+        target_size: Optional[Tuple[int, int]],
+        dataset_name: str,
+        instruction: Optional[str],
+        episode_format: Literal["json", "lerobot_v2", "lerobot_v2.1"],
+        cameras_ids_to_record: Optional[List[int]],
+        use_push_to_hf: bool,
+        branch_path: Optional[str],
+        enable_rerun: bool,
+        save_cartesian: bool,
+        add_metadata: Optional[Dict[str, list]],
     ) -> None:
         if target_size is None:
             target_size = (config.DEFAULT_VIDEO_SIZE[0], config.DEFAULT_VIDEO_SIZE[1])
@@ -114,6 +302,10 @@ class Recorder:
             )
             await self.stop()  # Stop does not save, just halts the loop
 
+        if isinstance(self.episode, LeRobotEpisode) and not self.episode.is_committed:
+            # The previous episode was not saved: stop its video encoders
+            self.episode.abort_video_encoding()
+
         self.robots = robots
         self.actions_robots_mapping = actions_robots_mapping
         self.observations_robots_mapping = observations_robots_mapping
@@ -147,23 +339,39 @@ class Recorder:
             dataset_full_path = os.path.join(
                 self.episode_recording_folder, episode_format, dataset_name
             )
-            # LeRobotDataset constructor will ensure directories like meta, data, videos exist.
-            lerobot_dataset_manager = LeRobotDataset(path=dataset_full_path)
-
-            robots_to_initialize = [
-                robots[i] for i in observations_robots_mapping.keys()
-            ]
-            self.episode = await LeRobotEpisode.start_new(
-                dataset_manager=lerobot_dataset_manager,  # Pass the dataset manager
-                robots=robots_to_initialize,
-                codec=codec,
-                freq=freq,
-                target_size=target_size,
-                instruction=instruction,
-                all_camera_key_names=self.cameras.get_all_camera_key_names(),
-                add_metadata=add_metadata,
-                save_cartesian=save_cartesian,
-            )
+            await asyncio.to_thread(_dataset_lock.acquire)
+            try:
+                if (
+                    self._dataset_manager is not None
+                    and self._dataset_manager.path == str(Path(dataset_full_path))
+                    and self.episode_saver.has_pending(self._dataset_manager.path)
+                ):
+                    # The previous episodes are still being written: their meta files
+                    # on disk are not up to date, but they are committed in the meta
+                    # models in memory.
+                    lerobot_dataset_manager = self._dataset_manager
+                else:
+                    # LeRobotDataset constructor will ensure directories like meta, data, videos exist.
+                    lerobot_dataset_manager = LeRobotDataset(path=dataset_full_path)
+                self._dataset_manager = lerobot_dataset_manager
+
+                robots_to_initialize = [
+                    robots[i] for i in observations_robots_mapping.keys()
+                ]
+                self.episode = await LeRobotEpisode.start_new(
+                    dataset_manager=lerobot_dataset_manager,  # Pass the dataset manager
+                    robots=robots_to_initialize,
+                    codec=codec,
+                    freq=freq,
+                    target_size=target_size,
+                    instruction=instruction,
+                    all_camera_key_names=self.cameras.get_all_camera_key_names(),
+                    add_metadata=add_metadata,
+                    save_cartesian=save_cartesian,
+                    streaming_encoding=config.STREAMING_VIDEO_ENCODING,
+                )
+            finally:
+                _dataset_lock.release()
         else:
             logger.error(f"Unknown episode format: {self.episode_format}")
             raise ValueError(f"Unknown episode format: {self.episode_format}")
@@ -175,6 +383,8 @@ class Recorder:
 
         self.is_recording = True
         self.start_ts = time.perf_counter()
+        self.timing_metrics = None
+        self._last_synced_frames = None
 
         background_tasks.add_task(
             background_task_log_exceptions(self.record_loop),
@@ -203,23 +413,33 @@ class Recorder:
             logger.info("No active recording to stop.")
         # self.episode remains as is, until save_episode or a new start clears it.
 
-    async def save_episode(self) -> None:
-        if self.is_saving:
-            logger.warning("Already in the process of saving an episode. Please wait.")
-            return None  # Or raise an error/return a specific status
+    async def save_episode(self) -> Optional[EpisodeSaveStatus]:
+        """
+        Stop the recording and save the episode in the background. The episode is added
+        to the dataset right away, so that the next one can be recorded while its data
+        and videos are written. Returns the status of the save, updated as it progresses.
+        """
+        async with self._episode_lock:
+            return await self._save_episode()
 
+    async def _save_episode(self) -> Optional[EpisodeSaveStatus]:
         if not self.episode:
             logger.error(
                 "No episode data found. Was recording started and were steps recorded?"
             )
             return None
 
-        if not self.episode.steps:
+        if self.episode.num_steps == 0:
             logger.warning("Episode contains no steps. Nothing to save.")
             self.episode = None  # Clear the empty episode
             return None
 
-        self.is_saving = True
+        if isinstance(self.episode, LeRobotEpisode) and self.episode.is_committed:
+            logger.warning(
+                f"Episode {self.episode.episode_index} is already saved or being saved."
+            )
+            return None
+
         # Ensure recording is stopped before saving
         if self.is_recording:
             logger.info("Stopping active recording before saving.")
@@ -237,28 +457,142 @@ class Recorder:
             f"Starting to save episode for dataset '{dataset_name_for_log}' (format: {episode_format_for_log})..."
         )
 
-        try:
-            await episode_to_save.save()  # The episode handles all its saving logic
-            logger.success(
-                f"Episode saved successfully for dataset '{dataset_name_for_log}'."
+        if self.timing_metrics is not None and self.timing_metrics.ticks > 0:
+            # Saved with the episode, to check afterwards that it was recorded on-rate
+            episode_to_save.metadata["timing"] = (
+                self.timing_metrics.summary().model_dump()
             )
 
-        except Exception as e:
-            logger.error(f"An error occurred during episode saving: {e}", exc_info=True)
-            # Depending on the severity, you might not want to clear self.episode here,
-            # to allow for a retry or manual inspection. For now, it's cleared in finally.
-            raise  # Re-throw for higher level handling if necessary
-        finally:
-            self.is_saving = False
-            # self.episode = None # Clear episode if not cleared on success (e.g. if push fails but save was ok)
-
-        if self.use_push_to_hf and isinstance(self.episode, LeRobotEpisode):
-            self.push_to_hub(
-                dataset_path=str(self.episode.dataset_path),
-                branch_path=self.branch_path,
-            )
+        status = EpisodeSaveStatus(
+            dataset_name=dataset_name_for_log,
+            episode_index=episode_to_save.episode_index,
+            queued_at=time.time(),
+        )
+        if isinstance(episode_to_save, LeRobotEpisode):
+            dataset_path = episode_to_save.dataset_manager.path
+            use_push_to_hf = self.use_push_to_hf
+            branch_path = self.branch_path
+
+            def save(on_stage: Callable[[str], None]) -> None:
+                try:
+                    episode_to_save.write(on_stage=on_stage)
+                except Exception:
+                    self._discard_episode(episode_to_save, status=status)
+                    raise
+                # The browse pages show the new episode and its thumbnails right away
+                try:
+                    get_dataset_catalog().update(dataset_path)
+                except Exception as e:
+                    logger.warning(f"Error updating the catalog of {dataset_path}: {e}")
+                if use_push_to_hf:
+                    on_stage("push")
+                    self._push_after_write(
+                        episode=episode_to_save,
+                        status=status,
+                        dataset_path=dataset_path,
+                        branch_path=branch_path,
+                    )
+
+            def commit() -> None:
+                # The dataset is not edited between the commit and the queuing
+                with _dataset_lock:
+                    episode_to_save.commit()
+                    self.episode_saver.submit(
+                        status, dataset_path=dataset_path, save=save
+                    )
+
+            # Quick: the episode gets its place in the dataset, the files are written after
+            await asyncio.to_thread(commit)
+            return status
+
+        dataset_path = str(episode_to_save.dataset_path)
+
+        def save_json(on_stage: Callable[[str], None]) -> None:
+            on_stage("data")
+            asyncio.run(episode_to_save.save())
+
+        self.episode_saver.submit(status, dataset_path=dataset_path, save=save_json)
+        return status
+
+    def _discard_episode(
+        self, episode: LeRobotEpisode, status: EpisodeSaveStatus
+    ) -> None:
+        """
+        Roll back an episode whose write failed: remove it from the meta models in memory,
+        and don't reuse its dataset manager once the other episodes are saved.
+        """
+        with _dataset_lock:
+            try:
+                episode.discard()
+            except Exception as e:
+                logger.opt(exception=e).error(
+                    f"Error discarding episode {episode.episode_index}: {e}"
+                )
+            if self._dataset_manager is episode.dataset_manager and not (
+                self.is_dataset_in_use(
+                    episode.dataset_manager.path,
+                    exclude_status=status,
+                    exclude_episode=episode,
+                )
+            ):
+                self._dataset_manager = None
 
-        return None
+    def is_dataset_in_use(
+        self,
+        dataset_path: str,
+        exclude_status: Optional[EpisodeSaveStatus] = None,
+        exclude_episode: Optional[BaseEpisode] = None,
+    ) -> bool:
+        """
+        Whether episodes of the dataset, other than the excluded ones, are being
+        recorded, or are waiting to be written.
+        """
+        dataset_path = os.path.abspath(dataset_path)
+        if self.episode_saver.has_pending(dataset_path, exclude=exclude_status):
+            return True
+        current_episode = self.episode
+        # A committed episode is waiting to be written, or was written
+        return (
+            isinstance(current_episode, LeRobotEpisode)
+            and current_episode is not exclude_episode
+            and not current_episode.is_committed
+            and os.path.abspath(current_episode.dataset_manager.path) == dataset_path
+        )
+
+    def _push_after_write(
+        self,
+        episode: LeRobotEpisode,
+        status: EpisodeSaveStatus,
+        dataset_path: str,
+        branch_path: Optional[str],
+    ) -> None:
+        """
+        Push the dataset after an episode was written, unless other episodes of the
+        dataset are being recorded or written: they got their index before the deleted
+        episodes are compacted, so the push is left to the last of them.
+        """
+        with _dataset_lock:
+            if self.is_dataset_in_use(
+                dataset_path, exclude_status=status, exclude_episode=episode
+            ):
+                logger.info(
+                    f"Other episodes of {dataset_path} are being recorded or saved: the dataset will be pushed after the last one."
+                )
+                return
+            try:
+                # The LeRobot format expects contiguous episode indexes
+                old_index_to_new_index = LeRobotDataset(
+                    path=dataset_path
+                ).compact_episodes()
+            except Exception as e:
+                logger.opt(exception=e).error(
+                    f"Error compacting dataset {dataset_path} before the push: {e}"
+                )
+                return
+            if old_index_to_new_index:
+                # The meta models in memory were loaded before the compaction
+                self._dataset_manager = None
+        self.push_to_hub(dataset_path=dataset_path, branch_path=branch_path)
 
     def push_to_hub(self, dataset_path: str, branch_path: Optional[str] = None) -> None:
         logger.info(
@@ -267,7 +601,8 @@ class Recorder:
         try:
             # Dataset class needs to be robust enough to be initialized with the full path
             # e.g., "recordings/lerobot_v2.1/my_dataset_name"
-            dataset_obj = BaseDataset(path=dataset_path)
+            # Deleted episodes are compacted before the push
+            dataset_obj = LeRobotDataset(path=dataset_path)
             dataset_obj.push_dataset_to_hub(branch_path=branch_path)
             logger.success(
                 f"Successfully pushed dataset {dataset_path} to Hugging Face Hub."
@@ -307,14 +642,38 @@ class Recorder:
             f"Record loop engaged for episode {self.episode.episode_index if self.episode else 'N/A'}. Cameras: {self.cameras.camera_ids=} ({self.cameras.main_camera=})"
         )
 
+        scheduler = FixedRateScheduler(freq=self.freq)
+        scheduler.start(self.start_ts)
+        timing_metrics = self.timing_metrics = TimingMetrics(
+            freq=self.freq, overrun_policy=config.RECORDING_OVERRUN_POLICY
+        )
+        previous_step: Optional[Step] = None
+
         step_count = 0
         while self.is_recording:  # This flag is controlled by self.stop()
+            # Sleep until the absolute deadline of the next tick, so that overruns don't drift
+            tick = await scheduler.wait_next_tick()
+            if not self.is_recording:
+                break
             loop_iteration_start_time = time.perf_counter()
 
-            # --- Optimized Image Gathering with Parallel Processing ---
+            # --- Optimized Robot Observation with Parallel Processing ---
+            (
+                final_observation_state,
+                final_observation_joints_position,
+                final_action_state,
+                final_action_joints_position,
+            ) = await self._gather_robot_observations_parallel(
+                save_cartesian=save_cartesian
+            )
+            robot_read_end_time = time.perf_counter()
+
+            # --- Frames captured the nearest to the robot read ---
             main_frames, secondary_frames = await self._gather_frames_parallel(
                 target_size=target_size,
+                timestamp=(loop_iteration_start_time + robot_read_end_time) / 2,
             )
+            capture_end_time = time.perf_counter()
 
             if main_frames and len(main_frames) > 0:
                 main_frame = main_frames[0]
@@ -323,16 +682,6 @@ class Recorder:
                     (target_size[1], target_size[0], 3), dtype=np.uint8
                 )
 
-            # --- Optimized Robot Observation with Parallel Processing ---
-            (
-                final_observation_state,
-                final_observation_joints_position,
-                final_action_state,
-                final_action_joints_position,
-            ) = await self._gather_robot_observations_parallel(
-                save_cartesian=save_cartesian
-            )
-
             current_time_in_episode = loop_iteration_start_time - self.start_ts
 
             # The language instruction for the step should be the one active for this episode.
@@ -377,9 +726,18 @@ class Recorder:
                     f"Recording: Processing Step {step_count} for episode {self.episode.episode_index if self.episode else 'N/A'}"
                 )
 
+            if (
+                tick.missed > 0
+                and previous_step is not None
+                and timing_metrics.overrun_policy == "duplicate"
+            ):
+                # Keep the episode on the wall-clock timeline: the missed ticks hold the previous step
+                for _ in range(tick.missed):
+                    await self.episode.append_step(previous_step.model_copy())
+
             # Order: update previous, then add current.
             if (
-                self.episode.steps and final_action_joints_position is None
+                self.episode.num_steps > 0 and final_action_joints_position is None
             ):  # If there's a previous step
                 # The 'action' of the previous step is the 'joints_position' of the current observation
                 self.episode.update_previous_step(step)
@@ -387,19 +745,45 @@ class Recorder:
             # Append the current step. Episode's append_step will handle its internal logic
             # (like updating meta files for LeRobot format).
             await self.episode.append_step(step)
+            previous_step = step
 
             elapsed_this_iteration = time.perf_counter() - loop_iteration_start_time
-            time_to_wait = max((1 / self.freq) - elapsed_this_iteration, 0)
-
-            # Log performance metrics every 100 steps
-            if step_count % 100 == 0:
+            synced_frames = self._last_synced_frames
+            timing_metrics.add_tick(
+                tick,
+                capture_latency=capture_end_time - robot_read_end_time,
+                robot_read_latency=robot_read_end_time - loop_iteration_start_time,
+                tick_duration=elapsed_this_iteration,
+                duplicate_frames=len(synced_frames.duplicate_camera_ids)
+                if synced_frames
+                else 0,
+                stale_frames=len(synced_frames.stale_camera_ids)
+                if synced_frames
+                else 0,
+                frame_offset=synced_frames.max_offset if synced_frames else None,
+            )
+            if synced_frames and (
+                synced_frames.duplicate_camera_ids or synced_frames.stale_camera_ids
+            ):
                 logger.debug(
-                    f"Step {step_count}: Processing time: {elapsed_this_iteration:.3f}s, Target: {1 / self.freq:.3f}s"
+                    f"Step {step_count}: Duplicate frames from cameras {synced_frames.duplicate_camera_ids}, "
+                    + f"stale frames from cameras {synced_frames.stale_camera_ids}"
+                )
+            if tick.missed > 0:
+                logger.debug(
+                    f"Step {step_count}: Missed {tick.missed} tick(s) ({config.RECORDING_OVERRUN_POLICY}). Processing time: {elapsed_this_iteration:.3f}s, Target: {1 / self.freq:.3f}s"
                 )
 
-            await asyncio.sleep(time_to_wait)
             step_count += 1
 
+        if timing_metrics.ticks > 0:
+            summary = timing_metrics.summary()
+            logger.info(
+                f"Recording timing: {summary.ticks} ticks, {summary.dropped_ticks} dropped, "
+                + f"{summary.duplicated_ticks} duplicated, jitter p99 {summary.jitter_ms.p99:.1f}ms, "
+                + f"effective frequency {summary.effective_freq or 0:.1f}Hz (target {self.freq}Hz)"
+            )
+
         if self.rerun_visualizer and self.rerun_visualizer.enabled:
             self.rerun_visualizer.finalize()
 
@@ -408,78 +792,45 @@ class Recorder:
         )
 
     async def _gather_frames_parallel(
-        self, target_size: tuple[int, int]
+        self, target_size: tuple[int, int], timestamp: Optional[float] = None
     ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
         """
-        Simple parallel frame capture - each camera runs independently.
-        Returns (main_frames, secondary_frames).
+        Get the frames of the recorded cameras captured the nearest to timestamp.
+        Each camera is read in parallel. Returns (main_frames, secondary_frames).
         """
-        loop = asyncio.get_event_loop()
-
-        # Get all cameras and their roles
         main_camera = self.cameras.main_camera
-        secondary_cameras = self.cameras.get_secondary_cameras()
-
-        # Submit individual camera capture tasks
-        camera_futures = []
-
-        # Main camera
-        if (
-            main_camera
-            and hasattr(main_camera, "camera_id")
-            and main_camera.camera_id is not None
-        ):
-            future = loop.run_in_executor(
-                self._image_thread_pool,
-                self._capture_single_camera,
-                main_camera,
-                target_size,
-            )
-            camera_futures.append(("main", main_camera.camera_id, future))
-
-        # Secondary cameras
-        for camera in secondary_cameras:
-            if hasattr(camera, "camera_id") and camera.camera_id is not None:
-                future = loop.run_in_executor(
-                    self._image_thread_pool,
-                    self._capture_single_camera,
-                    camera,
-                    target_size,
-                )
-                camera_futures.append(("secondary", camera.camera_id, future))
+        main_camera_id = getattr(main_camera, "camera_id", None)
+        secondary_camera_ids: List[int] = [
+            camera_id
+            for camera in self.cameras.get_secondary_cameras()
+            if (camera_id := getattr(camera, "camera_id", None)) is not None
+        ]
+        camera_ids = (
+            [main_camera_id] if main_camera_id is not None else []
+        ) + secondary_camera_ids
+
+        synced_frames = await asyncio.to_thread(
+            self.cameras.get_synced_frames,
+            camera_ids=camera_ids,
+            timestamp=timestamp,
+            resize=target_size,
+            previous=self._last_synced_frames,
+            executor=self._image_thread_pool,
+        )
+        self._last_synced_frames = synced_frames
 
-        # Wait for all camera captures
         main_frames = []
-        secondary_frames = []
-
-        for role, camera_id, future in camera_futures:
-            try:
-                frame = await future
-                if frame is not None:
-                    if role == "main":
-                        main_frames.append(frame)
-                    else:
-                        secondary_frames.append(frame)
-            except Exception as e:
-                logger.warning(f"Failed to capture frame from camera {camera_id}: {e}")
-
+        if main_camera_id is not None:
+            main_frame = synced_frames.get_frame(main_camera_id)
+            if main_frame is not None:
+                main_frames.append(main_frame)
+        secondary_frames = [
+            frame
+            for frame in map(synced_frames.get_frame, secondary_camera_ids)
+            if frame is not None
+        ]
         return main_frames, secondary_frames
 
-    def _capture_single_camera(
-        self, camera: BaseCamera, target_size: tuple[int, int]
-    ) -> Optional[np.ndarray]:
-        """
-        Capture frame from a single camera.
-        This runs in the thread pool.
-        """
-        try:
-            return camera.get_rgb_frame(resize=target_size)
-        except Exception as e:
-            logger.warning(
-                f"Exception capturing frame from camera {getattr(camera, 'camera_id', 'unknown')}: {e}"
-            )
-            return None
-
     async def _gather_robot_observations_parallel(
         self, save_cartesian: Optional[bool] = False
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
@@ -499,13 +850,14 @@ class Recorder:
         # Submit individual robot observation tasks
         robot_observations_futures = []
         robot_actions_future = []
-        for idx, robot in enumerate(self.robots):
-            assert isinstance(robot, BaseRobot), (
-                "Robot must be an instance of BaseRobot."
-            )
-            if idx in self.observations_robots_mapping:
-                source = self.observations_robots_mapping[idx]
-                future_observations_real = loop.run_in_executor(
+        # A robot can be both in action and observation mappings: read it once per source
+        futures_by_robot_and_source: Dict[Tuple[int, str], asyncio.Future] = {}
+
+        def get_future(
+            robot: BaseRobot, idx: int, source: Literal["sim", "robot"]
+        ) -> asyncio.Future:
+            if (idx, source) not in futures_by_robot_and_source:
+                futures_by_robot_and_source[(idx, source)] = loop.run_in_executor(
                     self._robot_thread_pool,
                     self._get_single_robot_observation,
                     robot,
@@ -513,19 +865,18 @@ class Recorder:
                     source,
                     save_cartesian,
                 )
-                robot_observations_futures.append(future_observations_real)
-            # A robot can be both in action and observation mappings
+            return futures_by_robot_and_source[(idx, source)]
+
+        for idx, robot in enumerate(self.robots):
+            assert isinstance(robot, BaseRobot), (
+                "Robot must be an instance of BaseRobot."
+            )
+            if idx in self.observations_robots_mapping:
+                source = self.observations_robots_mapping[idx]
+                robot_observations_futures.append(get_future(robot, idx, source))
             if idx in self.actions_robots_mapping:
                 source = self.actions_robots_mapping[idx]
-                future_actions_real = loop.run_in_executor(
-                    self._robot_thread_pool,
-                    self._get_single_robot_observation,
-                    robot,
-                    idx,
-                    source,
-                    save_cartesian,
-                )
-                robot_actions_future.append(future_actions_real)
+                robot_actions_future.append(get_future(robot, idx, source))
 
         # Wait for all robot observations
         all_robots_observation_states = []
@@ -607,6 +958,13 @@ class Recorder:
         This runs in the thread pool.
         """
         try:
+            if isinstance(robot, BaseManipulator) and robot.state_broadcaster:
+                # Share the sample of the state broadcaster if it's within half a tick
+                return robot.get_observation(
+                    source=source,
+                    do_forward=do_forward if do_forward else False,
+                    max_staleness=0.5 / self.freq,
+                )
             return robot.get_observation(
                 source=source, do_forward=do_forward if do_forward else False
             )
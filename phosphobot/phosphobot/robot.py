@@ -11,6 +11,7 @@ from serial.tools.list_ports_common import ListPortInfo
 
 from phosphobot.configs import config
 from phosphobot.hardware import (
+    BaseManipulator,
     BaseRobot,
     KochHardware,
     LeKiwi,
@@ -66,7 +67,31 @@ class RobotConnectionManager:
     def __del__(self) -> None:
         # Disconnect all robots
         for robot in self._all_robots:
-            robot.disconnect()
+            self._disconnect_robot(robot)
+
+    def _start_state_broadcaster(self, robot: BaseRobot) -> None:
+        """
+        Sample the state of a connected arm in the background, so that its consumers
+        share the reads instead of each polling the motors.
+        """
+        if (
+            config.STATE_BROADCAST_FREQ > 0
+            and isinstance(robot, BaseManipulator)
+            # URDFLoader robots live in the simulation
+            and not isinstance(robot, URDFLoader)
+            # Otherwise the background reads clash with the other requests on the port
+            and robot.THREAD_SAFE_BUS
+            and robot.is_connected
+        ):
+            robot.start_state_broadcaster(
+                freq=config.STATE_BROADCAST_FREQ,
+                telemetry_freq=config.STATE_TELEMETRY_FREQ,
+            )
+
+    def _disconnect_robot(self, robot: BaseRobot) -> None:
+        if isinstance(robot, BaseManipulator):
+            robot.stop_state_broadcaster()
+        robot.disconnect()
 
     def _scan_ports(self) -> tuple[list, list]:
         """
@@ -181,6 +206,7 @@ class RobotConnectionManager:
 
                 if robot is not None and robot.is_connected:
                     logger.success(f"Connected to {robot_class.name} on {port.device}.")
+                    self._start_state_broadcaster(robot)
                     self._all_robots.append(robot)
                     # Mark both device and serial as connected
                     connected_devices.add(port.device)
@@ -206,6 +232,7 @@ class RobotConnectionManager:
                     )
                     continue
                 if robot is not None and robot.is_connected:
+                    self._start_state_broadcaster(robot)
                     self._all_robots.append(robot)
                     logger.success(f"Connected to Agilex Piper on {can_name}")
 
@@ -245,7 +272,7 @@ class RobotConnectionManager:
             ):
                 # First, disconnect all robots
                 for robot in self._all_robots:
-                    robot.disconnect()
+                    self._disconnect_robot(robot)
                 self.available_ports = ports
                 self.available_can_ports = can_ports
                 await self._find_robots()
@@ -315,6 +342,7 @@ class RobotConnectionManager:
             )
         robot = robot_class(**connection_details)
         await robot.connect()
+        self._start_state_broadcaster(robot)
         self._all_robots.append(robot)
         self._manually_added_robots.append(robot)
         logger.success(
@@ -337,7 +365,7 @@ class RobotConnectionManager:
             )
 
         robot = await self.get_robot(robot_id=robot_id)
-        robot.disconnect()
+        self._disconnect_robot(robot)
         self._all_robots.remove(robot)
         if robot in self._manually_added_robots:
             # Remove from manually added robots if it was added manually
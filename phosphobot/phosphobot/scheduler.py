@@ -0,0 +1,181 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import List, Literal, Optional
+
+import numpy as np
+
+from phosphobot.models import LatencyStats, RecordingTimingStats
+
+
+@dataclass
+class Tick:
+    """A tick of a FixedRateScheduler."""
+
+    # Index of the tick since the scheduler started
+    index: int
+    # Absolute time (time.perf_counter) at which the tick was supposed to start
+    deadline: float
+    # How late the tick actually started, in seconds
+    lateness: float
+    # Number of ticks whose deadline passed while the previous tick was running
+    missed: int
+
+
+class FixedRateScheduler:
+    """
+    Run a loop at a fixed rate by sleeping until absolute deadlines.
+
+    The deadline of tick n is start + n / freq, so the time spent in an iteration
+    doesn't accumulate as drift. When an iteration overruns, the ticks whose deadline
+    has passed are reported as missed and the loop resumes on the latest deadline.
+
+    Usage:
+    ```
+    scheduler = FixedRateScheduler(freq=30)
+    while running:
+        tick = await scheduler.wait_next_tick()
+        ...
+    ```
+    """
+
+    def __init__(self, freq: int):
+        if freq <= 0:
+            raise ValueError(f"Frequency must be positive, got {freq}")
+        self.freq = freq
+        self.period = 1 / freq
+        self.start_time: Optional[float] = None
+        self._next_index = 0
+
+    def start(self, start_time: Optional[float] = None) -> None:
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self._next_index = 0
+
+    def deadline(self, index: int) -> float:
+        if self.start_time is None:
+            raise RuntimeError("Scheduler is not started")
+        return self.start_time + index * self.period
+
+    async def wait_next_tick(self) -> Tick:
+        """
+        Sleep until the deadline of the next tick and return it.
+        If the deadline of later ticks already passed, they are skipped.
+        """
+        if self.start_time is None:
+            self.start()
+
+        now = time.perf_counter()
+        latest_index = math.floor((now - self.deadline(0)) / self.period)
+        missed = max(0, latest_index - self._next_index)
+        index = self._next_index + missed
+
+        deadline = self.deadline(index)
+        if deadline > now:
+            await asyncio.sleep(deadline - now)
+
+        self._next_index = index + 1
+        return Tick(
+            index=index,
+            deadline=deadline,
+            lateness=max(0.0, time.perf_counter() - deadline),
+            missed=missed,
+        )
+
+
+def latency_stats(values: List[float]) -> LatencyStats:
+    """Summary of durations in seconds, converted to milliseconds."""
+    if not values:
+        return LatencyStats()
+    values_ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99])
+    return LatencyStats(
+        mean=float(values_ms.mean()),
+        p50=float(p50),
+        p95=float(p95),
+        p99=float(p99),
+        max=float(values_ms.max()),
+    )
+
+
+class TimingMetrics:
+    """
+    Per-tick timings of a recording loop, used to check that a dataset is on-rate.
+    """
+
+    def __init__(
+        self, freq: int, overrun_policy: Literal["skip", "duplicate"] = "skip"
+    ):
+        self.freq = freq
+        self.overrun_policy = overrun_policy
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.duplicated_ticks = 0
+        self.jitter: List[float] = []
+        self.capture_latency: List[float] = []
+        self.robot_read_latency: List[float] = []
+        self.tick_duration: List[float] = []
+        self.duplicate_frames = 0
+        self.stale_frames = 0
+        self.frame_offset: List[float] = []
+        self.first_deadline: Optional[float] = None
+        self.last_deadline: Optional[float] = None
+
+    def add_tick(
+        self,
+        tick: Tick,
+        capture_latency: float,
+        robot_read_latency: float,
+        tick_duration: float,
+        duplicate_frames: int = 0,
+        stale_frames: int = 0,
+        frame_offset: Optional[float] = None,
+    ) -> None:
+        """
+        duplicate_frames and stale_frames are the number of cameras that sent a frame already recorded,
+        or a frame too far from the tick. frame_offset is the largest gap between the frames and the robot read.
+        """
+        self.ticks += 1
+        if self.first_deadline is None:
+            self.first_deadline = tick.deadline
+        self.last_deadline = tick.deadline
+        if tick.missed > 0:
+            if self.overrun_policy == "duplicate":
+                self.duplicated_ticks += tick.missed
+            else:
+                self.dropped_ticks += tick.missed
+        self.jitter.append(tick.lateness)
+        self.capture_latency.append(capture_latency)
+        self.robot_read_latency.append(robot_read_latency)
+        self.tick_duration.append(tick_duration)
+        self.duplicate_frames += duplicate_frames
+        self.stale_frames += stale_frames
+        if frame_offset is not None:
+            self.frame_offset.append(frame_offset)
+
+    def summary(self) -> RecordingTimingStats:
+        # Rate of the recorded steps (duplicates included) over the time they span
+        effective_freq = None
+        if (
+            self.first_deadline is not None
+            and self.last_deadline is not None
+            and self.last_deadline > self.first_deadline
+        ):
+            effective_freq = (self.ticks + self.duplicated_ticks - 1) / (
+                self.last_deadline - self.first_deadline
+            )
+        return RecordingTimingStats(
+            freq=self.freq,
+            overrun_policy=self.overrun_policy,
+            ticks=self.ticks,
+            dropped_ticks=self.dropped_ticks,
+            duplicated_ticks=self.duplicated_ticks,
+            effective_freq=effective_freq,
+            jitter_ms=latency_stats(self.jitter),
+            capture_latency_ms=latency_stats(self.capture_latency),
+            robot_read_latency_ms=latency_stats(self.robot_read_latency),
+            tick_duration_ms=latency_stats(self.tick_duration),
+            duplicate_frames=self.duplicate_frames,
+            stale_frames=self.stale_frames,
+            frame_offset_ms=latency_stats(self.frame_offset),
+        )
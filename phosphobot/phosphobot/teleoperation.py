@@ -2,7 +2,7 @@ import asyncio
 import json
 import time
 from copy import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import lru_cache
 from typing import Dict, Literal, Optional, Tuple, cast
@@ -31,6 +31,16 @@ class RobotState:
     gripped: bool = False
 
 
+@dataclass
+class CommandSlot:
+    """Latest command received from a source, run by the actuator task of the source."""
+
+    command: Optional[AppControlData] = None
+    # Set when a new command is put in the slot
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+
 class TeleopManager:
     robot_id: Optional[int]
     rcm: RobotConnectionManager
@@ -40,6 +50,8 @@ class TeleopManager:
     vr_scaling: float
     MOVE_TIMEOUT: float = 1.0  # seconds
     MAX_INSTRUCTIONS_PER_SEC: int = 200
+    # Max rate at which the actuator task of a source moves the robots
+    ACTUATOR_FREQ: int = 100
 
     def __init__(
         self, rcm: RobotConnectionManager, robot_id: Optional[int] = None
@@ -61,6 +73,15 @@ class TeleopManager:
         self._robots: list[BaseManipulator | BaseMobileRobot] = []
         self.is_initializing: bool = False
 
+        # Latest command wins: one slot and one actuator task per session and source
+        self._slots: Dict[Tuple[str, str], CommandSlot] = {}
+        # Serialize the moves of a robot controlled by several sources
+        self._robot_locks: Dict[int, asyncio.Lock] = {}
+        # Commands replaced by a newer one before being run, and commands skipped
+        # (rate limited, stale, robot still moving, move timed out). Reset every report.
+        self.coalesced_counter = 0
+        self.dropped_counter = 0
+
     def allow_instruction(self) -> bool:
         """Simple 1-second sliding window rate limiter."""
         if self.is_initializing:
@@ -179,31 +200,26 @@ class TeleopManager:
         target_position *= self.vr_scaling
         target_orientation_rad = np.deg2rad(target_orient_deg) + initial_orientation_rad
 
-        # if robot.is_moving, wait for it to stop
-        start_wait_time = time.perf_counter()
-        while (
-            robot.is_moving
-            and time.perf_counter() - start_wait_time < self.MOVE_TIMEOUT
-        ):
-            await asyncio.sleep(0.00001)
-        if time.perf_counter() - start_wait_time >= self.MOVE_TIMEOUT:
+        # Moved by something else (ex: an AI control loop): wait for it to stop
+        if not await robot.wait_until_stopped(timeout=self.MOVE_TIMEOUT):
             logger.warning(
                 f"Robot {robot.name} is still moving after {self.MOVE_TIMEOUT}s; skipping this command"
             )
-            # skip gripper & counting if move failed
+            self.dropped_counter += 1
             return False
 
         try:
-            # off-load blocking move_robot into threadpool + enforce timeout
-            await asyncio.wait_for(
-                robot.move_robot_absolute(target_position, target_orientation_rad),
-                timeout=self.MOVE_TIMEOUT,
-            )
+            async with self._robot_lock(robot):
+                await asyncio.wait_for(
+                    robot.move_robot_absolute(target_position, target_orientation_rad),
+                    timeout=self.MOVE_TIMEOUT,
+                )
         except asyncio.TimeoutError:
             logger.warning(
                 f"move_robot timed out after {self.MOVE_TIMEOUT}s; skipping this command"
             )
             # skip gripper & counting if move failed
+            self.dropped_counter += 1
             return False
 
         robot.control_gripper(open_command=target_open)
@@ -226,8 +242,6 @@ class TeleopManager:
         # - some trig ?
         # - progressive acceleration ?
 
-        start_wait_time = time.perf_counter()
-
         # deadzone: zero if below 0.3
         if abs(control_data.direction_x) < 0.5:
             control_data.direction_x = 0.0
@@ -241,31 +255,29 @@ class TeleopManager:
         rz = -control_data.direction_x * np.pi / 2
         x = control_data.direction_y / 100
 
-        while (
-            robot.is_moving
-            and time.perf_counter() - start_wait_time < self.MOVE_TIMEOUT
-        ):
-            await asyncio.sleep(0.00001)
-        if time.perf_counter() - start_wait_time >= self.MOVE_TIMEOUT:
+        if not await robot.wait_until_stopped(timeout=self.MOVE_TIMEOUT):
             logger.warning(
                 f"Robot {robot.name} is still moving after {self.MOVE_TIMEOUT}s; skipping this command"
             )
+            self.dropped_counter += 1
             return False
 
         try:
-            await asyncio.wait_for(
-                robot.move_robot_absolute(
-                    target_position=np.array([x, 0, 0]),
-                    target_orientation_rad=np.array([0, 0, rz]),
-                ),
-                timeout=0.1,
-            )
+            async with self._robot_lock(robot):
+                await asyncio.wait_for(
+                    robot.move_robot_absolute(
+                        target_position=np.array([x, 0, 0]),
+                        target_orientation_rad=np.array([0, 0, rz]),
+                    ),
+                    timeout=0.1,
+                )
             self.action_counter += 1
             return True
         except asyncio.TimeoutError:
             logger.warning(
                 f"move_robot timed out for mobile robot {robot.name}; skipping this command"
             )
+            self.dropped_counter += 1
             return False
 
     async def process_control_data(self, control_data: AppControlData) -> bool:
@@ -285,15 +297,19 @@ class TeleopManager:
         # Check timestamp freshness
         if control_data.timestamp is not None:
             if control_data.timestamp <= state.last_timestamp:
+                self.dropped_counter += 1
                 return False
             # Check if the timestamp is too old
             if time.time() - control_data.timestamp > self.MOVE_TIMEOUT:
                 logger.warning(
                     f"Control data timestamp {control_data.timestamp} is too old, skipping command"
                 )
+                self.dropped_counter += 1
                 return False
 
-            state.last_timestamp = time.time()
+            # Compare client timestamps: a command coalesced in the slot was sent
+            # before the previous one was run, but after it was sent
+            state.last_timestamp = control_data.timestamp
 
         # If robot_id is set, get the specific robot and move it accordingly
         if self.robot_id is not None:
@@ -333,6 +349,95 @@ class TeleopManager:
 
         return True
 
+    async def _get_robots(
+        self, control_data: AppControlData
+    ) -> list[BaseManipulator | BaseMobileRobot]:
+        """The robots moved by the control data."""
+        if self.robot_id is not None:
+            return self._robots[self.robot_id : self.robot_id + 1]
+        robots = [
+            await self.get_manipulator_robot(control_data.source),
+            await self.get_mobile_robot(control_data.source),
+        ]
+        return [robot for robot in robots if robot is not None]
+
+    def _robot_lock(self, robot: BaseManipulator | BaseMobileRobot) -> asyncio.Lock:
+        lock = self._robot_locks.get(id(robot))
+        if lock is None:
+            lock = asyncio.Lock()
+            self._robot_locks[id(robot)] = lock
+        return lock
+
+    def submit_control_data(
+        self, control_data: AppControlData, session: str = "default"
+    ) -> None:
+        """
+        Put the control data in the slot of its source and return immediately.
+
+        The actuator task of the source runs the latest command of the slot: if the
+        previous command was not run yet, it's replaced by this one. This way, a client
+        sending faster than the robot moves doesn't build up a backlog of old commands.
+
+        session identifies the connection (WebSocket, UDP server) sending the commands:
+        its actuator tasks are stopped with stop_actuators(session).
+        """
+        key = (session, control_data.source)
+        slot = self._slots.get(key)
+        if (
+            slot is None
+            or slot.task is None
+            or slot.task.done()
+            or slot.task.get_loop() is not asyncio.get_running_loop()
+        ):
+            slot = CommandSlot()
+            slot.task = asyncio.create_task(
+                self._run_actuator(slot), name=f"teleop-{session}-{control_data.source}"
+            )
+            self._slots[key] = slot
+
+        if slot.command is not None:
+            self.coalesced_counter += 1
+        slot.command = control_data
+        slot.event.set()
+
+    async def _run_actuator(self, slot: CommandSlot) -> None:
+        """Run the latest command of the slot, at most ACTUATOR_FREQ times per second."""
+        period = 1 / self.ACTUATOR_FREQ
+        while True:
+            await slot.event.wait()
+            slot.event.clear()
+            if slot.command is None:
+                continue
+            # Let the moves started by something else finish: the commands received
+            # in the meantime are coalesced, and the newest one is run
+            for robot in await self._get_robots(slot.command):
+                await robot.wait_until_stopped(timeout=self.MOVE_TIMEOUT)
+            command, slot.command = slot.command, None
+            if command is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                await self.process_control_data(command)
+            except Exception as e:
+                logger.exception(
+                    f"Error processing control data from {command.source}: {e}"
+                )
+            # The commands received in the meantime are coalesced in the slot
+            await asyncio.sleep(max(0.0, period - (time.perf_counter() - start)))
+
+    def stop_actuators(self, session: Optional[str] = None) -> None:
+        """
+        Cancel the actuator tasks of the session, or all of them if session is None.
+        Pending commands are discarded.
+        """
+        for key in list(self._slots):
+            if session is not None and key[0] != session:
+                continue
+            slot = self._slots.pop(key)
+            if slot.task is not None:
+                slot.task.cancel()
+
     async def send_status_updates(
         self, websocket: Optional[WebSocket] = None
     ) -> list[RobotStatus]:
@@ -358,8 +463,21 @@ class TeleopManager:
 
         # Send periodic action count
         if (now - self.last_report).total_seconds() > 1:
-            updates.append(RobotStatus(nb_actions_received=self.action_counter))
+            updates.append(
+                RobotStatus(
+                    nb_actions_received=self.action_counter,
+                    nb_actions_coalesced=self.coalesced_counter,
+                    nb_actions_dropped=self.dropped_counter,
+                )
+            )
+            if self.coalesced_counter or self.dropped_counter:
+                logger.debug(
+                    f"Teleoperation: {self.action_counter} actions, "
+                    + f"{self.coalesced_counter} coalesced, {self.dropped_counter} dropped"
+                )
             self.action_counter = 0
+            self.coalesced_counter = 0
+            self.dropped_counter = 0
             self.last_report = now
 
         # Send updates if websocket is provided
@@ -379,6 +497,8 @@ class TeleopManager:
 
 teleop_manager = None
 udp_server = None
+# Session of the commands received by the UDP server
+UDP_SESSION = "udp"
 
 
 @dataclass
@@ -394,8 +514,8 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
         self.transport: Optional[asyncio.DatagramTransport] = None
 
         # Worker pool configuration
-        # We use a single worker because we want to process packets sequentially
-        # (they are robotics movements, not parallelizable)
+        # The worker only decodes the packets: the robots are moved by the actuator
+        # tasks of the manager, which only run the latest command of each source.
         self.worker_count = 1
         self.packet_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)  # Bounded queue
         self.workers: list[asyncio.Task] = []
@@ -437,6 +557,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
     def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
         # Fast path: immediate rate limiting check
         if not self.manager.allow_instruction():
+            self.manager.dropped_counter += 1
             if self.transport:
                 self.transport.sendto(self.error_responses["rate_limited"], addr)
             return
@@ -447,6 +568,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
             self.packet_queue.put_nowait(packet)
         except asyncio.QueueFull:
             # Queue is full, drop packet with error response
+            self.manager.dropped_counter += 1
             if self.transport:
                 self.transport.sendto(self.error_responses["queue_full"], addr)
             logger.warning(f"Packet queue full, dropping packet from {addr}")
@@ -481,6 +603,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
 
         # Check packet age (drop stale packets)
         if time.time() - packet.timestamp > 0.1:  # 100ms timeout
+            self.manager.dropped_counter += 1
             return
 
         # Fast decode - most packets should be valid UTF-8
@@ -510,9 +633,9 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
             self.transport.sendto(error_msg, addr)
             return
 
-        # Process control data
+        # Hand the control data to the actuator task of its source
         try:
-            await self.manager.process_control_data(control)
+            self.manager.submit_control_data(control, session=UDP_SESSION)
 
             # Send status updates
             updates = await self.manager.send_status_updates()
@@ -584,6 +707,8 @@ class UDPServer:
         """
         if self.transport:
             self.transport.close()
+            # Don't run the commands received before the stop
+            self.manager.stop_actuators(UDP_SESSION)
             logger.info("UDP server transport closed")
             self.transport = None
             self.protocol = None
@@ -24,6 +24,9 @@ CameraTypes = Literal[
     "zmq",
 ]
 
+# Channel order of a color frame
+PixelFormat = Literal["rgb", "bgr"]
+
 
 class SimulationMode(str, Enum):
     headless = "headless"
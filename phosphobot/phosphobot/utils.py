@@ -6,16 +6,33 @@ import ipaddress
 import json
 import os
 import platform
+import queue
 import re
 import shutil
 import socket
 import subprocess
 import sys
+import threading
+import time
 import traceback
 import zipfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated, Any, Callable, Dict, Literal, Optional, Tuple, Union
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import av
 import netifaces
@@ -228,13 +245,83 @@ def login_to_hf(revalidate: bool = True) -> bool:
         return False
 
 
-def zip_folder(folder_path: str, zip_path: str) -> None:
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+# Files already compressed: stored as they are in ZIP archives, deflating them is slow and
+# does not make them smaller
+ZIP_STORED_EXTENSIONS = {
+    ".mp4",
+    ".avi",
+    ".mkv",
+    ".webm",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".zip",
+    ".gz",
+}
+
+
+class _ZipStreamBuffer:
+    """Unseekable file where zipfile writes the archive, emptied by iter_zip_folder."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip_folder(folder_path: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of a folder, chunk by chunk, as its files are read: nothing is
+    written to disk, and the memory used is bounded by chunk_size. The files with an
+    extension in ZIP_STORED_EXTENSIONS are stored, the others are deflated.
+    """
+    buffer = _ZipStreamBuffer()
+    # zipfile writes the sizes and CRC of each file after its data, as the stream
+    # cannot be seeked back
+    with zipfile.ZipFile(buffer, "w") as zipf:
         for root, dirs, files in os.walk(folder_path):
-            for file in files:
+            dirs.sort()
+            for file in sorted(files):
                 file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, folder_path)
-                zipf.write(file_path, arcname)
+                # The size of the file is used to know if ZIP64 extensions are needed
+                zinfo = zipfile.ZipInfo.from_file(
+                    file_path, os.path.relpath(file_path, folder_path)
+                )
+                zinfo.compress_type = (
+                    zipfile.ZIP_STORED
+                    if os.path.splitext(file)[1].lower() in ZIP_STORED_EXTENSIONS
+                    else zipfile.ZIP_DEFLATED
+                )
+                with open(file_path, "rb") as source, zipf.open(zinfo, "w") as dest:
+                    while chunk := source.read(chunk_size):
+                        dest.write(chunk)
+                        data = buffer.pop()
+                        if data:
+                            yield data
+                data = buffer.pop()
+                if data:
+                    yield data
+    # Central directory, written when the archive is closed
+    yield buffer.pop()
+
+
+def zip_folder(folder_path: str, zip_path: str) -> None:
+    with open(zip_path, "wb") as f:
+        for chunk in iter_zip_folder(folder_path):
+            f.write(chunk)
 
 
 def is_can_plugged(interface: str = "can0") -> bool:
@@ -419,6 +506,103 @@ NdArrayAsList = Annotated[
 ]
 
 
+# Map FourCC-style codec literals to PyAV codec names
+_AV_CODEC_MAP = {
+    "avc1": "h264",
+    "avc3": "h264",
+    "mp4v": "mpeg4",
+    "hev1": "hevc",
+    "hvc1": "hevc",
+    "av01": "av1",
+    "vp09": "vp9",
+}
+
+
+def _open_video_container(
+    path: str, size: Tuple[int, int], fps: float, codec_av: str
+) -> Tuple[av.container.output.OutputContainer, av.VideoStream]:  # type: ignore
+    """
+    Open a PyAV output container with a single yuv420p video stream.
+    `size` is (width, height) and `codec_av` is a PyAV codec name (e.g. "h264").
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    container = av.open(path, mode="w")
+
+    # pick encoder options based on codec
+    encoder_opts: Dict[str, str] = {}
+    if codec_av in ("h264", "mpeg4", "hevc"):
+        # CRF = quality (lower = better), preset = speed/efficiency trade-off
+        encoder_opts = {"crf": "18", "preset": "slow"}
+    elif codec_av == "av1":
+        # AV1 needs slightly higher CRF to match visually (~30),
+        # and cpu-used trades speed vs. quality (0=slowest/best)
+        encoder_opts = {
+            "crf": "30",
+            "cpu-used": "4",
+            "row-mt": "1",  # multi-threading
+            "tile-columns": "2",  # parallel tile encoding
+        }
+    elif codec_av == "vp9":
+        # VP9: crf + speed (0=best, 5=fastest)
+        encoder_opts = {"crf": "30", "speed": "1"}
+    elif codec_av == "mpeg4":
+        # old MPEG-4 Part 2: no CRF, use qscale OR fixed bitrate
+        # Lower qscale = better quality. 2–5 is a good range.
+        encoder_opts = {"qscale": "2"}
+    # else: leave encoder_opts empty for codecs that don’t support these flags
+
+    stream: av.VideoStream = container.add_stream(  # type: ignore
+        codec_av,
+        rate=fps,
+        options=encoder_opts or None,  # type: ignore
+    )
+    # Force a minimum bitrate for mpeg4 to avoid artifacts
+    if codec_av == "mpeg4":
+        # ~5 Mb/s
+        stream.bit_rate = 5_000_000  # type: ignore
+
+    stream.width, stream.height = size  # type: ignore
+    stream.pix_fmt = "yuv420p"  # type: ignore
+    return container, stream
+
+
+def _encode_video_frame(
+    frame: np.ndarray,
+    stream: av.VideoStream,  # type: ignore
+    container: av.container.output.OutputContainer,
+    size: Tuple[int, int],
+) -> None:
+    """Resize an RGB frame to `size` (width, height), encode it and mux the packets."""
+    # Convert to uint8 RGB if needed
+    if frame.dtype != np.uint8:
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+    # Wrap as PyAV frame and resize/convert
+    video_frame = av.VideoFrame.from_ndarray(frame, format="rgb24")
+    video_frame = video_frame.reformat(width=size[0], height=size[1], format="yuv420p")
+    for packet in stream.encode(video_frame):
+        container.mux(packet)
+
+
+def _flush_video_stream(
+    stream: av.VideoStream,  # type: ignore
+    container: av.container.output.OutputContainer,
+) -> None:
+    """Flush the remaining packets buffered in the encoder."""
+    for packet in stream.encode():
+        container.mux(packet)
+
+
+def _is_stereo_frame(width: int, height: int) -> bool:
+    """Stereo cameras output side-by-side frames with an aspect ratio >= 8/3."""
+    return width / height >= 8 / 3
+
+
+def _stereo_video_paths(output_path: str) -> Tuple[str, str]:
+    """Return the (left, right) video paths for a stereo camera output path."""
+    base, suffix = output_path.rsplit("/episode", 1)
+    return f"{base}.left/episode{suffix}", f"{base}.right/episode{suffix}"
+
+
 def create_video_file(
     frames: np.ndarray,
     target_size: Tuple[int, int],
@@ -444,17 +628,7 @@ def create_video_file(
         ValueError: If frames array is empty or has incorrect shape.
         RuntimeError: If writing fails unexpectedly.
     """
-    # Map FourCC-style codec literals to PyAV codec names
-    CODEC_MAP = {
-        "avc1": "h264",
-        "avc3": "h264",
-        "mp4v": "mpeg4",
-        "hev1": "hevc",
-        "hvc1": "hevc",
-        "av01": "av1",
-        "vp09": "vp9",
-    }
-    codec_av = CODEC_MAP.get(codec, codec)
+    codec_av = _AV_CODEC_MAP.get(codec, codec)
     logger.info(f"Using codec: {codec}")
 
     # Validate input array
@@ -466,93 +640,30 @@ def create_video_file(
     if num_frames == 0:
         raise ValueError("Frames array is empty (N=0)")
 
-    aspect_ratio = w / h
-    is_stereo = aspect_ratio >= 8 / 3
-    logger.info(f"Stereo={is_stereo}, aspect_ratio={aspect_ratio:.2f}")
-
-    def open_container(
-        path: str, size: Tuple[int, int]
-    ) -> Tuple[av.container.output.OutputContainer, av.VideoStream]:  # type: ignore
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        container = av.open(path, mode="w")
-
-        # pick encoder options based on codec
-        encoder_opts: Dict[str, str] = {}
-        if codec_av in ("h264", "mpeg4", "hevc"):
-            # CRF = quality (lower = better), preset = speed/efficiency trade-off
-            encoder_opts = {"crf": "18", "preset": "slow"}
-        elif codec_av == "av1":
-            # AV1 needs slightly higher CRF to match visually (~30),
-            # and cpu-used trades speed vs. quality (0=slowest/best)
-            encoder_opts = {
-                "crf": "30",
-                "cpu-used": "4",
-                "row-mt": "1",  # multi-threading
-                "tile-columns": "2",  # parallel tile encoding
-            }
-        elif codec_av == "vp9":
-            # VP9: crf + speed (0=best, 5=fastest)
-            encoder_opts = {"crf": "30", "speed": "1"}
-        elif codec_av == "mpeg4":
-            # old MPEG-4 Part 2: no CRF, use qscale OR fixed bitrate
-            # Lower qscale = better quality. 2–5 is a good range.
-            encoder_opts = {"qscale": "2"}
-        # else: leave encoder_opts empty for codecs that don’t support these flags
-
-        stream: av.VideoStream = container.add_stream(  # type: ignore
-            codec_av,
-            rate=fps,
-            options=encoder_opts or None,  # type: ignore
-        )
-        # Force a minimum bitrate for mpeg4 to avoid artifacts
-        if codec_av == "mpeg4":
-            # ~5 Mb/s
-            stream.bit_rate = 5_000_000  # type: ignore
-
-        stream.width, stream.height = size  # type: ignore
-        stream.pix_fmt = "yuv420p"  # type: ignore
-        return container, stream
-
-    def process_and_encode(
-        frame: np.ndarray,
-        stream: av.VideoStream,  # type: ignore
-        container: av.container.output.OutputContainer,
-        size: Tuple[int, int],
-    ) -> None:
-        # Convert to uint8 RGB if needed
-        if frame.dtype != np.uint8:
-            frame = np.clip(frame, 0, 255).astype(np.uint8)
-        # Wrap as PyAV frame and resize/convert
-        video_frame = av.VideoFrame.from_ndarray(frame, format="rgb24")
-        video_frame = video_frame.reformat(
-            width=size[0], height=size[1], format="yuv420p"
-        )
-        for packet in stream.encode(video_frame):
-            container.mux(packet)
+    is_stereo = _is_stereo_frame(w, h)
+    logger.info(f"Stereo={is_stereo}, aspect_ratio={w / h:.2f}")
 
     if is_stereo:
         size = (target_size[0] // 2, target_size[1])
-        base, suffix = output_path.rsplit("/episode", 1)
-        left_path = f"{base}.left/episode{suffix}"
-        right_path = f"{base}.right/episode{suffix}"
+        left_path, right_path = _stereo_video_paths(output_path)
 
         left_ct = right_ct = None
         try:
-            left_ct, left_stream = open_container(left_path, size)
-            right_ct, right_stream = open_container(right_path, size)
+            left_ct, left_stream = _open_video_container(left_path, size, fps, codec_av)
+            right_ct, right_stream = _open_video_container(
+                right_path, size, fps, codec_av
+            )
 
             mid_w = w // 2
             for frame in frames:
                 left_frame = frame[:, :mid_w, :]
                 right_frame = frame[:, mid_w:, :]
-                process_and_encode(left_frame, left_stream, left_ct, size)
-                process_and_encode(right_frame, right_stream, right_ct, size)
+                _encode_video_frame(left_frame, left_stream, left_ct, size)
+                _encode_video_frame(right_frame, right_stream, right_ct, size)
 
             # flush encoders
-            for packet in left_stream.encode():
-                left_ct.mux(packet)
-            for packet in right_stream.encode():
-                right_ct.mux(packet)
+            _flush_video_stream(left_stream, left_ct)
+            _flush_video_stream(right_stream, right_ct)
 
             return left_path, right_path
 
@@ -569,13 +680,12 @@ def create_video_file(
         size = target_size
         container = None
         try:
-            container, stream = open_container(output_path, size)
+            container, stream = _open_video_container(output_path, size, fps, codec_av)
             for frame in frames:
-                process_and_encode(frame, stream, container, size)
+                _encode_video_frame(frame, stream, container, size)
 
             # flush encoder
-            for packet in stream.encode():
-                container.mux(packet)
+            _flush_video_stream(stream, container)
 
             return output_path
 
@@ -587,6 +697,210 @@ def create_video_file(
                 container.close()
 
 
+class StreamingVideoEncoder:
+    """
+    Encode RGB frames into a video file while they are being recorded.
+
+    Frames passed to add_frame() are queued and encoded by a background thread, so the
+    recording loop never waits for the encoder and frames don't need to be kept in memory
+    until the end of the episode. The container is opened on the first frame, because the
+    frame shape tells whether the camera is stereo (same left/right split as create_video_file).
+
+    The queue is bounded by max_pending_frames (2 seconds of video by default), so an
+    encoder slower than real time doesn't fill the memory with raw frames. When it's full,
+    add_frame() drops the frame and the previous one is encoded in its place: the video
+    keeps one frame per recorded step. The dropped frames are counted in dropped_frames.
+
+    Call close() to flush the encoder and get the path(s) of the video file(s), or abort()
+    to stop encoding and remove the partial files.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        target_size: Tuple[int, int],
+        fps: float,
+        codec: VideoCodecs,
+        max_pending_frames: Optional[int] = None,
+    ) -> None:
+        self.output_path = output_path
+        self.target_size = target_size
+        self.fps = fps
+        self.codec = codec
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.max_pending_frames = max_pending_frames or max(1, int(2 * fps))
+
+        # (frame, number of times the previous frame is encoded before it). The frame is
+        # None to stop the encoder.
+        self._queue: "queue.Queue[Tuple[Optional[np.ndarray], int]]" = queue.Queue(
+            maxsize=self.max_pending_frames
+        )
+        # Frames dropped since the last frame queued
+        self._frames_to_repeat = 0
+        self._closed = False
+        self._aborted = False
+        self._error: Optional[BaseException] = None
+        self._output_paths: Union[str, Tuple[str, str], None] = None
+        # List of (container, stream, size, column slice) opened on the first frame
+        self._outputs: list = []
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"video_encoder_{os.path.basename(os.path.dirname(output_path))}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def pending_frames(self) -> int:
+        """Number of frames waiting to be encoded."""
+        return self._queue.qsize()
+
+    def add_frame(self, frame: np.ndarray, timeout: Optional[float] = 0.0) -> bool:
+        """
+        Queue an RGB frame of shape (H, W, 3) for encoding.
+
+        If max_pending_frames frames are waiting, wait up to timeout seconds for the
+        encoder (forever if None). By default, this doesn't block. If the encoder is still
+        behind, the frame is dropped and the previous frame is encoded in its place.
+        Returns False if the frame was dropped.
+        """
+        if self._closed:
+            raise RuntimeError(f"Video encoder for {self.output_path} is closed")
+        if self._error is not None:
+            # The encoder thread has stopped, don't accumulate frames in memory
+            return False
+        try:
+            self._queue.put((frame, self._frames_to_repeat), timeout=timeout)
+        except queue.Full:
+            self.dropped_frames += 1
+            self._frames_to_repeat += 1
+            if self.dropped_frames == 1:
+                logger.warning(
+                    f"The video encoder of {self.output_path} is slower than the recording: "
+                    + "frames are dropped and replaced by the previous frame."
+                )
+            return False
+        self._frames_to_repeat = 0
+        return True
+
+    def close(self) -> Union[str, Tuple[str, str]]:
+        """
+        Wait for all queued frames to be encoded, flush the encoder and close the file(s).
+
+        Returns:
+            Union[str, Tuple[str, str]]: Path(s) to the created video file(s). Tuple for stereo.
+
+        Raises:
+            ValueError: If no frame was added to the encoder.
+            RuntimeError: If encoding failed.
+        """
+        if not self._closed:
+            self._closed = True
+            # The last frames dropped are replaced by the last frame queued
+            self._queue.put((None, self._frames_to_repeat))
+        self._thread.join()
+
+        if self._error is not None:
+            raise RuntimeError(
+                f"Error writing video {self.output_path}: {self._error}"
+            ) from self._error
+        if self._output_paths is None:
+            raise ValueError(f"No frames were encoded for {self.output_path}")
+        return self._output_paths
+
+    def abort(self) -> None:
+        """Stop encoding, drop the queued frames and delete the partial video file(s)."""
+        self._closed = True
+        self._aborted = True
+        # Drop the backlog so the encoder thread exits as soon as possible
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put((None, 0))
+        self._thread.join()
+
+        if self._output_paths is None:
+            return
+        paths = (
+            self._output_paths
+            if isinstance(self._output_paths, tuple)
+            else (self._output_paths,)
+        )
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _open(self, frame: np.ndarray) -> None:
+        if frame.ndim != 3 or frame.shape[-1] != 3:
+            raise ValueError(
+                f"Frames must be a 3D array with shape (H, W, 3), got {frame.shape}"
+            )
+        codec_av = _AV_CODEC_MAP.get(self.codec, self.codec)
+        h, w, _ = frame.shape
+        if _is_stereo_frame(w, h):
+            size = (self.target_size[0] // 2, self.target_size[1])
+            left_path, right_path = _stereo_video_paths(self.output_path)
+            mid_w = w // 2
+            self._output_paths = (left_path, right_path)
+            for path, columns in (
+                (left_path, slice(0, mid_w)),
+                (right_path, slice(mid_w, None)),
+            ):
+                container, stream = _open_video_container(
+                    path, size, self.fps, codec_av
+                )
+                self._outputs.append((container, stream, size, columns))
+        else:
+            self._output_paths = self.output_path
+            container, stream = _open_video_container(
+                self.output_path, self.target_size, self.fps, codec_av
+            )
+            self._outputs.append((container, stream, self.target_size, slice(None)))
+        logger.debug(
+            f"Streaming encoder opened for {self._output_paths} (codec: {self.codec})"
+        )
+
+    def _encode(self, frame: np.ndarray) -> None:
+        for container, stream, size, columns in self._outputs:
+            _encode_video_frame(frame[:, columns, :], stream, container, size)
+        self.frame_count += 1
+
+    def _run(self) -> None:
+        previous_frame: Optional[np.ndarray] = None
+        try:
+            while True:
+                frame, nb_repeats = self._queue.get()
+                if self._aborted:
+                    break
+                if previous_frame is not None:
+                    # In place of the frames dropped by add_frame()
+                    for _ in range(nb_repeats):
+                        self._encode(previous_frame)
+                if frame is None:
+                    break
+                if not self._outputs:
+                    self._open(frame)
+                self._encode(frame)
+                previous_frame = frame
+
+            # An aborted encoder only needs its files closed
+            if self._aborted:
+                return
+            for container, stream, _, _ in self._outputs:
+                _flush_video_stream(stream, container)
+        except Exception as e:
+            logger.error(f"Error writing video {self.output_path}", exc_info=True)
+            self._error = e
+        finally:
+            for container, _, _, _ in self._outputs:
+                container.close()
+
+
 def get_home_app_path() -> Path:
     """
     Return the path to the app's folder in the user's home directory.
@@ -609,60 +923,94 @@ def get_home_app_path() -> Path:
     return home_path
 
 
+def get_video_histogram(
+    video_path: str,
+    frame_stride: int = 1,
+    scale: float = 1.0,
+) -> Tuple[np.ndarray, int]:
+    """
+    Decode a video and count the occurrences of each value of its RGB frames, per channel.
+    Returns a float64 array of shape (3, 256) and the number of pixels of the video
+    (number of frames x height x width).
+
+    To go faster, only one frame every frame_stride is counted, downscaled by scale. The
+    counts are then weighted to represent all the pixels of the video. Downscaling averages
+    neighboring pixels, so it lowers the std. The default values give the exact histogram.
+    """
+    histogram = np.zeros((3, 256), dtype=np.int64)
+    nb_pixels = 0
+    nb_sampled_pixels = 0
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        # Decode on several threads
+        stream.thread_type = "AUTO"
+        for frame_index, frame in enumerate(container.decode(stream)):
+            nb_pixels += frame.width * frame.height
+            if frame_index % frame_stride != 0:
+                continue
+            if scale != 1.0:
+                image = frame.to_ndarray(
+                    format="rgb24",
+                    width=max(1, round(frame.width * scale)),
+                    height=max(1, round(frame.height * scale)),
+                )
+            else:
+                image = frame.to_ndarray(format="rgb24")
+            histogram += get_image_histogram(image)
+            nb_sampled_pixels += image.shape[0] * image.shape[1]
+
+    weighted_histogram = histogram.astype(np.float64)
+    if nb_sampled_pixels > 0 and nb_sampled_pixels != nb_pixels:
+        weighted_histogram *= nb_pixels / nb_sampled_pixels
+    return weighted_histogram, nb_pixels
+
+
 def compute_sum_squaresum_framecount_from_video(
     video_path: str,
     raise_if_not_found: bool = False,
+    frame_stride: int = 1,
+    scale: float = 1.0,
 ) -> Tuple[np.ndarray, np.ndarray, int]:
     """
     Process a video file and calculate the sum of RGB values and sum of squares of RGB values for each frame.
     Returns a list of np.ndarray corresponding respectively to the sum of RGB values, sum of squares of RGB values and nb_pixel.
     We divide by 255.0 RGB values to normalize the values to the range [0, 1].
-    """
-    import cv2
-
-    # Open the video file
-    cap = cv2.VideoCapture(video_path)
 
-    if not cap.isOpened():
+    The sums are computed from the histogram of the video, see get_video_histogram
+    for frame_stride and scale.
+    """
+    try:
+        histogram, nb_pixel = get_video_histogram(
+            video_path, frame_stride=frame_stride, scale=scale
+        )
+    except (OSError, av.error.FFmpegError) as e:
         if raise_if_not_found:
             raise FileNotFoundError(
                 f"Error: Could not open video at path: {video_path}"
-            )
+            ) from e
         logger.warning(
             f"Error: Could not open video at path: {video_path}. Returning 0."
         )
         return (np.zeros(3, dtype=np.float32), np.zeros(3, dtype=np.float32), 0)
 
-    nb_pixel = 0
-    total_sum_rgb = np.zeros(3, dtype=np.float32)  # To store sum of RGB values
-    total_sum_squares = np.zeros(
-        3, dtype=np.float32
-    )  # To store sum of squares of RGB values
-    while True:
-        # Read a frame from the video
-        ret, frame = cap.read()
-        # If the frame was not read successfully, break the loop
-        if not ret:
-            break
-
-        # Convert the frame from BGR to RGB (OpenCV uses BGR by default)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) / 255.0
-        # Calculate the sum of RGB values for the frame
-        sum_rgb = np.sum(frame_rgb, axis=(0, 1))
-        # Calculate the sum of squares of RGB values for the frame
-        sum_squares = np.sum(frame_rgb**2, axis=(0, 1))
-        # Accumulate the sums
-        # Cannot cast ufunc 'add' output from dtype('float64') to dtype('uint64') with casting rule 'same_kind'
-        total_sum_rgb = total_sum_rgb + sum_rgb
-        total_sum_squares = total_sum_squares + sum_squares
-
-        # nb Pixel
-        nb_pixel += frame_rgb.shape[0] * frame_rgb.shape[1]
-
-    # Release the video capture object
-    # TODO: If problem of dimension maybe transposing arrays is needed.
-    cap.release()
-    return (total_sum_rgb, total_sum_squares, nb_pixel)
+    # Normalized value of each bin
+    values = np.arange(256, dtype=np.float64) / 255.0
+    return (histogram @ values, histogram @ values**2, nb_pixel)
+
+
+def get_image_histogram(image: np.ndarray) -> np.ndarray:
+    """
+    Count the occurrences of each value of a uint8 image of shape (H, W, C), per channel.
+    Returns an int64 array of shape (C, 256).
+    """
+    import cv2
+
+    return np.stack(
+        [
+            cv2.calcHist([image], [channel], None, [256], [0, 256]).reshape(256)
+            for channel in range(image.shape[2])
+        ]
+    ).astype(np.int64)
 
 
 def get_field_min_max(df: pd.DataFrame, field_name: str) -> tuple:
@@ -690,14 +1038,10 @@ def get_field_min_max(df: pd.DataFrame, field_name: str) -> tuple:
 
     # If the field values are lists or arrays, compute element-wise min, max
     if isinstance(sample_value, (list, np.ndarray)):
-        # Check that df[field_name].values is a np.ndarray
-        array_values = df[field_name].values
-
+        # Stack the values once in a contiguous 2D array
         # No overload variant of "vstack" matches argument type "ndarray[Any, Any]"
-        return (
-            np.min(np.vstack(array_values), axis=0),  # type: ignore
-            np.max(np.vstack(array_values), axis=0),  # type: ignore
-        )
+        array_values = np.vstack(df[field_name].values)  # type: ignore
+        return (np.min(array_values, axis=0), np.max(array_values, axis=0))
     else:
         # Otherwise, assume the field is numeric and return the scalar min.
         return (df[field_name].min(), df[field_name].max())
@@ -776,6 +1120,64 @@ def get_hf_username_or_orgid() -> Optional[str]:
         return None
 
 
+_T = TypeVar("_T")
+
+
+class TTLCache(Generic[_T]):
+    """
+    Values by key, computed when missing and kept for ttl seconds. Thread safe: the value
+    is computed outside of the lock, so concurrent misses may compute it twice. The
+    exceptions raised by compute are not cached.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, _T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], _T]) -> _T:
+        with self._lock:
+            cached = self._values.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        value = compute()
+        with self._lock:
+            self._values[key] = (time.monotonic(), value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+# whoami of the Hugging Face tokens, by token
+_hf_username_or_orgid_cache: TTLCache[Optional[str]] = TTLCache(ttl=300)
+
+
+def get_cached_hf_username_or_orgid() -> Optional[str]:
+    """
+    Returns the username or organization name with write access of the Hugging Face token
+    the app is logged in with. Returns None if there is no token or whoami failed.
+
+    whoami is a network call: its result is cached for 5 minutes. Failures are not
+    cached, so the next call retries. Logging in with another token does a new call.
+    """
+    from huggingface_hub import get_token
+
+    hf_token = get_token()
+    if not hf_token:
+        return None
+
+    try:
+        return _hf_username_or_orgid_cache.get(
+            hf_token,
+            lambda: parse_hf_username_or_orgid(HfApi().whoami(token=hf_token)),
+        )
+    except Exception as e:
+        logger.debug(f"Error getting Hugging Face username or org ID: {e}")
+        return None
+
+
 def get_hf_token() -> Optional[str]:
     """
     Returns the hf token from the token file.
@@ -0,0 +1,57 @@
+"""
+Tests for the ACT action chunks prefetching and the negotiation of the wire format.
+
+```
+uv run pytest tests/phosphobot/test_act.py
+```
+"""
+
+import httpx
+import numpy as np
+
+from phosphobot.am.act import ACT, blend_action_chunks
+
+
+def test_blend_action_chunks_drops_stale_prefix():
+    remaining = np.zeros((3, 1, 6))
+    new_chunk = np.ones((10, 1, 6))
+
+    blended = blend_action_chunks(remaining, new_chunk, elapsed_steps=4)
+
+    # 4 stale actions dropped, 3 actions cross-faded, then the rest of the new chunk
+    assert blended.shape == (6, 1, 6)
+    weights = blended[:3, 0, 0]
+    assert np.all(np.diff(weights) > 0)
+    assert 0 < weights[0] and weights[-1] < 1
+    assert np.all(blended[3:] == 1)
+
+
+def test_blend_action_chunks_edge_cases():
+    remaining = np.zeros((3, 6))
+    new_chunk = np.ones((5, 6))
+
+    assert np.array_equal(blend_action_chunks(np.array([]), new_chunk, 0), new_chunk)
+    # The whole new chunk is stale
+    assert np.array_equal(blend_action_chunks(remaining, new_chunk, 5), remaining)
+
+
+def test_wire_format_kept_after_a_successful_health_check():
+    health_statuses = [503, 200]
+    health_checks = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        health_checks.append(request.url.path)
+        return httpx.Response(
+            health_statuses.pop(0), json={"wire_formats": ["msgpack", "json_numpy"]}
+        )
+
+    model = ACT()
+    model.sync_client = httpx.Client(
+        base_url="http://localhost:8080", transport=httpx.MockTransport(handler)
+    )
+    # The server is not ready: fall back for this request only
+    assert model.negotiate_wire_format() == "json_numpy"
+    assert model.wire_format is None
+    assert model.negotiate_wire_format() == "msgpack"
+    assert model.negotiate_wire_format() == "msgpack"
+    assert health_checks == ["/health", "/health"]
@@ -190,3 +190,55 @@ async def test_rotate_robot_z(robot: BaseManipulator):
     await move_robot_testing(
         robot, np.array([0, 0, 0]), np.array([0, 0, 0.1]), atol_pos=2e-2
     )
+
+
+@pytest.mark.parametrize("robot", ["so100"], indirect=True)
+def test_lazy_sim_mirroring(robot: BaseManipulator, monkeypatch):
+    monkeypatch.setattr(config, "SIM_MIRRORING", "lazy")
+    applied: list = []
+    monkeypatch.setattr(
+        robot.sim,
+        "set_joints_states",
+        lambda robot_id, joint_indices, target_positions: applied.append(
+            dict(zip(joint_indices, target_positions))
+        ),
+    )
+
+    robot._mirror_in_sim([0, 1], [0.1, 0.2])
+    robot._mirror_in_sim([1], [0.3])
+    assert applied == []
+    # The latest positions are applied once, when the simulation is read
+    robot.sync_sim(force=True)
+    robot.sync_sim(force=True)
+    assert applied == [{0: 0.1, 1: 0.3}]
+
+    # Positions set in the simulation replace the pending ones
+    robot._mirror_in_sim([0], [0.5])
+    robot.set_simulation_positions(np.zeros(len(robot.actuated_joints)))
+    robot.sync_sim(force=True)
+    assert applied[1:] == [{joint: 0.0 for joint in robot.actuated_joints}]
+
+
+@pytest.mark.parametrize("robot", ["so100"], indirect=True)
+def test_sim_without_physics(robot: BaseManipulator, monkeypatch):
+    # Let the stepping thread finish the pending steps: only one must run afterwards
+    step_thread = robot.sim._step_thread
+    robot.sim.stop_stepping()
+    if step_thread is not None:
+        step_thread.join()
+    monkeypatch.setattr(robot.sim, "physics", False)
+    try:
+        joints = np.linspace(-0.5, 0.5, len(robot.actuated_joints))
+        robot.set_simulation_positions(joints)
+        # The joints are set directly, without stepping the physics
+        np.testing.assert_allclose(
+            robot.sim.get_joints_states(robot.p_robot_id, robot.actuated_joints),
+            joints,
+            atol=1e-6,
+        )
+        assert robot.read_joints_position(unit="rad", source="sim") == pytest.approx(
+            joints, abs=1e-6
+        )
+    finally:
+        monkeypatch.undo()
+        robot.sim.start_stepping()
@@ -0,0 +1,120 @@
+"""
+Tests for the frame buffers of the cameras: the synchronization of the cameras to a
+timestamp, the JPEG encoder shared by the MJPEG streams and the ZMQ camera.
+
+```
+uv run pytest tests/phosphobot/test_camera.py
+```
+"""
+
+import asyncio
+import base64
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from phosphobot.camera import AllCameras, ZMQCamera
+from phosphobot.configs import config
+
+PERIOD = 1 / 30
+
+
+def make_camera(camera_id: int, timestamps: List[float]) -> ZMQCamera:
+    """A camera whose buffer holds one frame per timestamp, filled with its index."""
+    camera = ZMQCamera(disable=True, camera_id=camera_id)
+    camera.fps = 30
+    for i, timestamp in enumerate(timestamps):
+        camera._push_frame(np.full((24, 32, 3), i, dtype=np.uint8))
+        assert camera._frame_buffer is not None
+        camera._frame_buffer[-1].timestamp = timestamp
+    return camera
+
+
+def test_synced_frames_are_the_nearest_to_the_timestamp(monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_CAMERAS", False)
+    all_cameras = AllCameras()
+    now = time.perf_counter()
+    all_cameras.add_custom_camera(
+        make_camera(0, [now - 3 * PERIOD, now - 2 * PERIOD, now - PERIOD, now])
+    )
+    # This camera stopped sending frames half a second ago
+    all_cameras.add_custom_camera(make_camera(1, [now - 0.6, now - 0.5]))
+
+    synced_frames = all_cameras.get_synced_frames([0, 1], timestamp=now - 1.8 * PERIOD)
+    first_frame = synced_frames.get_frame(0)
+    assert first_frame is not None and np.all(first_frame == 1)
+    assert synced_frames.frames[0].timestamp == now - 2 * PERIOD
+    # The latest frame of the other camera is too old to be synced with the first one
+    second_frame = synced_frames.get_frame(1)
+    assert second_frame is not None and np.all(second_frame == 1)
+    assert synced_frames.stale_camera_ids == [1]
+    assert synced_frames.max_offset > 0.4
+
+    # The cameras returned the same frames again
+    next_frames = all_cameras.get_synced_frames(
+        [0, 1], timestamp=now - 1.8 * PERIOD, previous=synced_frames
+    )
+    assert next_frames.duplicate_camera_ids == [0, 1]
+
+
+def test_jpeg_stream_encoder_is_shared(monkeypatch):
+    camera = make_camera(0, [])
+    camera.is_active = True
+    encoded: List[int] = []
+    imencode = cv2.imencode
+
+    def count_imencode(*args, **kwargs):
+        encoded.append(1)
+        return imencode(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "imencode", count_imencode)
+
+    async def main() -> None:
+        encoder = camera.get_jpeg_stream_encoder(target_size=None, quality=80)
+        first_client = encoder.add_subscriber()
+        second_client = encoder.add_subscriber()
+        assert camera.get_jpeg_stream_encoder(target_size=None, quality=80) is encoder
+
+        for i in range(3):
+            camera._push_frame(np.full((24, 32, 3), i, dtype=np.uint8))
+            first_jpeg = await asyncio.wait_for(first_client.get(), timeout=2)
+            second_jpeg = await asyncio.wait_for(second_client.get(), timeout=2)
+            assert first_jpeg is second_jpeg
+        # Each frame is encoded once for both clients
+        assert len(encoded) == 3
+
+        # The encoder stops with its last subscriber
+        encoder.remove_subscriber(first_client)
+        encoder.remove_subscriber(second_client)
+        assert encoder._task is not None
+        await asyncio.wait_for(encoder._task, timeout=2)
+        assert encoder.nb_subscribers == 0
+
+    asyncio.run(main())
+    camera.is_active = False
+
+
+def test_zmq_camera_stores_rgb_frames():
+    camera = ZMQCamera(disable=True)
+    rgb_frame = np.zeros((24, 32, 3), dtype=np.uint8)
+    rgb_frame[..., 0] = 255
+    camera._process_frame_data(
+        {
+            "shape": list(rgb_frame.shape),
+            "dtype": str(rgb_frame.dtype),
+            "frame_bytes": base64.b64encode(rgb_frame.tobytes()).decode(),
+        }
+    )
+
+    # The frame is stored as received, and converted for the consumers asking for BGR
+    timestamped_frame = camera.get_timestamped_frame()
+    assert timestamped_frame is not None
+    np.testing.assert_array_equal(timestamped_frame.frame, rgb_frame)
+    bgr_frame = camera.get_timestamped_frame(pixel_format="bgr")
+    assert bgr_frame is not None
+    np.testing.assert_array_equal(bgr_frame.frame, rgb_frame[..., ::-1])
+    rgb = camera.get_rgb_frame()
+    assert rgb is not None
+    np.testing.assert_array_equal(rgb, rgb_frame)
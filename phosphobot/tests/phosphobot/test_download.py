@@ -0,0 +1,76 @@
+"""
+Tests for the download of datasets as ZIP archives streamed as the files are read.
+
+```
+uv run pytest tests/phosphobot/test_download.py
+```
+"""
+
+import io
+import os
+import zipfile
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from phosphobot.endpoints import pages
+from phosphobot.utils import iter_zip_folder
+
+
+def create_dataset(path: str) -> None:
+    os.makedirs(os.path.join(path, "meta"))
+    os.makedirs(os.path.join(path, "videos", "chunk-000"))
+    with open(os.path.join(path, "meta", "info.json"), "w") as f:
+        f.write('{"fps": 30}' * 1000)
+    with open(
+        os.path.join(path, "videos", "chunk-000", "episode_000000.mp4"), "wb"
+    ) as f:
+        f.write(np.random.bytes(300_000))
+
+
+def test_zip_stream_stores_videos_and_bounds_chunks(tmp_path):
+    dataset_path = str(tmp_path / "dataset")
+    create_dataset(dataset_path)
+
+    chunks = list(iter_zip_folder(dataset_path, chunk_size=64 * 1024))
+
+    # The archive is yielded as the files are read
+    assert len(chunks) > 4
+    assert max(len(chunk) for chunk in chunks) < 65 * 1024
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        infos = {info.filename: info for info in archive.infolist()}
+        assert sorted(infos) == [
+            "meta/info.json",
+            "videos/chunk-000/episode_000000.mp4",
+        ]
+        video = infos["videos/chunk-000/episode_000000.mp4"]
+        assert video.compress_type == zipfile.ZIP_STORED
+        assert infos["meta/info.json"].compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("meta/info.json") == b'{"fps": 30}' * 1000
+
+
+def test_download_endpoint_streams_zip(tmp_path, monkeypatch):
+    create_dataset(str(tmp_path / "lerobot_v2.1" / "dataset"))
+    monkeypatch.setattr(pages, "ROOT_DIR", str(tmp_path))
+    app = FastAPI()
+    app.include_router(pages.router)
+    client = TestClient(app)
+
+    response = client.get(
+        "/dataset/download", params={"folder_path": "lerobot_v2.1/dataset"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert (
+        response.headers["content-disposition"] == 'attachment; filename="dataset.zip"'
+    )
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert len(archive.infolist()) == 2
+    # No archive is left next to the dataset
+    assert os.listdir(tmp_path / "lerobot_v2.1") == ["dataset"]
+
+    missing = client.get("/dataset/download", params={"folder_path": "missing"})
+    assert missing.status_code == 404
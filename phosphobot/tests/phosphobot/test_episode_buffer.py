@@ -0,0 +1,95 @@
+"""
+Tests for the columnar episode buffer used while recording.
+
+```
+uv run pytest tests/phosphobot/test_episode_buffer.py
+```
+"""
+
+import numpy as np
+import pytest
+
+from phosphobot.models.dataset import Observation, Step
+from phosphobot.models.episode_buffer import EpisodeBuffer, FrameBlocks, GrowableArray
+
+
+def make_step(joints_position: np.ndarray, action=None, timestamp: float = 0.0) -> Step:
+    return Step(
+        observation=Observation(
+            joints_position=joints_position,
+            state=np.zeros(7),
+            timestamp=timestamp,
+            language_instruction="pick up the cube",
+        ),
+        action=action,
+    )
+
+
+def test_growable_array_grows_and_keeps_rows():
+    array = GrowableArray(np.float32, initial_capacity=2)
+    for i in range(5):
+        array.append(np.full(3, i))
+
+    assert len(array) == 5
+    assert array.values is not None
+    np.testing.assert_array_equal(array.values[:, 0], np.arange(5))
+
+
+def test_growable_array_missing_rows_before_first_value():
+    array = GrowableArray(np.float32)
+    array.append_missing()
+    array.append(np.ones(2))
+
+    assert len(array) == 2
+    assert array.values is not None
+    assert np.isnan(array.values[0]).all()
+    np.testing.assert_array_equal(array.values[1], np.ones(2))
+
+
+def test_frame_blocks_iterates_in_order():
+    blocks = FrameBlocks(block_size=2)
+    for i in range(5):
+        blocks.append(np.full((4, 4, 3), i, dtype=np.uint8))
+
+    assert [int(frame[0, 0, 0]) for frame in blocks] == list(range(5))
+    with pytest.raises(ValueError):
+        blocks.append(np.zeros((2, 2, 3), dtype=np.uint8))
+
+
+def test_buffer_copies_previous_joints_when_nan():
+    buffer = EpisodeBuffer(initial_capacity=4)
+    buffer.append_step(make_step(np.arange(6.0), action=np.arange(6.0)))
+    buffer.append_step(make_step(np.full(6, np.nan), action=np.arange(6.0)))
+
+    assert buffer.joints_position.values is not None
+    np.testing.assert_array_equal(buffer.joints_position.values[1], np.arange(6.0))
+
+
+def test_buffer_set_last_action_and_fill_missing():
+    buffer = EpisodeBuffer(initial_capacity=4)
+    buffer.append_step(make_step(np.zeros(6)))
+    buffer.set_last_action(np.ones(6))
+    buffer.append_step(make_step(np.full(6, 2.0)))
+
+    actions, observations = buffer.get_actions_and_observations(episode_index=0)
+
+    np.testing.assert_array_equal(actions[0], np.ones(6))
+    # The last step has no action: its own position is used
+    np.testing.assert_array_equal(actions[1], np.full(6, 2.0))
+    np.testing.assert_array_equal(observations[1], np.full(6, 2.0))
+
+
+def test_buffer_to_steps():
+    buffer = EpisodeBuffer(initial_capacity=4)
+    for i in range(3):
+        buffer.append_step(
+            make_step(np.full(6, i), action=np.full(6, i + 1), timestamp=i / 30)
+        )
+
+    steps = buffer.to_steps()
+
+    assert len(steps) == 3
+    assert steps[0].is_first and steps[-1].is_last
+    assert steps[2].observation.timestamp == pytest.approx(2 / 30)
+    assert steps[1].action is not None
+    np.testing.assert_array_equal(steps[1].action, np.full(6, 2))
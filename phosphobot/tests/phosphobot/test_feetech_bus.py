@@ -0,0 +1,131 @@
+"""
+Tests for the worker thread of the Feetech motors bus, without hardware.
+
+```
+uv run pytest tests/phosphobot/test_feetech_bus.py
+```
+"""
+
+import threading
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from phosphobot.hardware.motors.feetech import FeetechMotorsBus
+
+
+class FakeFeetechMotorsBus(FeetechMotorsBus):
+    """Replace the serial transactions with slow fakes that count the calls."""
+
+    def __init__(self):
+        super().__init__(
+            port="/dev/null",
+            motors={"shoulder": (1, "sts3215"), "elbow": (2, "sts3215")},
+        )
+        self.reads: List[tuple] = []
+        self.writes = 0
+        self.submitted = 0
+        self._submitted_lock = threading.Lock()
+        # Cleared to hold the writes until the test sets it
+        self.writes_released = threading.Event()
+        self.writes_released.set()
+
+    def _submit_task(self, action, args=(), kwargs={}):
+        future = super()._submit_task(action, args, kwargs)
+        with self._submitted_lock:
+            self.submitted += 1
+        return future
+
+    def _perform_connect(self):
+        pass
+
+    def _perform_disconnect(self):
+        pass
+
+    def _perform_read(self, data_name, motor_names=None):
+        self.reads.append((data_name, motor_names))
+        time.sleep(0.02)
+        return np.arange(len(self.motors))
+
+    def _perform_write(self, data_name, values, motor_names=None):
+        self.writes += 1
+        self.writes_released.wait()
+        time.sleep(0.05)
+
+
+def test_concurrent_identical_reads_are_coalesced():
+    bus = FakeFeetechMotorsBus()
+    bus.connect()
+    # Keep the worker busy until all the reads are queued
+    bus.writes_released.clear()
+    writer = threading.Thread(target=bus.write, args=("Goal_Position", 0))
+    writer.start()
+    while bus.writes == 0:
+        time.sleep(0.001)
+
+    results = []
+    readers = [
+        threading.Thread(target=lambda: results.append(bus.read("Present_Position")))
+        for _ in range(8)
+    ]
+    readers.append(
+        threading.Thread(
+            target=lambda: results.append(bus.read("Present_Position", "elbow"))
+        )
+    )
+    for reader in readers:
+        reader.start()
+    while bus.submitted < 1 + len(readers):
+        time.sleep(0.001)
+    bus.writes_released.set()
+    for reader in readers + [writer]:
+        reader.join()
+
+    # One transaction for all the reads of all the motors, one for the elbow
+    assert sorted(bus.reads, key=str) == [
+        ("Present_Position", "elbow"),
+        ("Present_Position", None),
+    ]
+    assert len(results) == 9
+    # Each caller gets its own array
+    assert len({id(result) for result in results}) == 9
+
+    # A read submitted after the previous one started makes a new transaction
+    bus.read("Present_Position")
+    assert len(bus.reads) == 3
+    bus.disconnect()
+
+
+def test_disconnect_stops_the_worker():
+    bus = FakeFeetechMotorsBus()
+    bus.connect()
+    bus.disconnect()
+
+    assert not bus.worker_thread.is_alive()
+    with pytest.raises(ConnectionError):
+        bus.read("Present_Position")
+
+
+def test_read_after_write_is_not_coalesced_with_earlier_read():
+    bus = FakeFeetechMotorsBus()
+    bus.connect()
+    # Keep the worker busy so that the tasks queue up
+    busy_writer = threading.Thread(target=bus.write, args=("Goal_Position", 0))
+    busy_writer.start()
+    time.sleep(0.01)
+
+    before_write = bus._submit_task("read", ("Torque_Enable",))
+    write = bus._submit_task("write", ("Torque_Enable", 1))
+    after_write = bus._submit_task("read", ("Torque_Enable",))
+    # Joins the read queued after the write
+    after_write_again = bus._submit_task("read", ("Torque_Enable",))
+
+    assert after_write is not before_write
+    assert after_write_again is after_write
+    for future in [before_write, write, after_write]:
+        future.result()
+    busy_writer.join()
+    assert bus.reads == [("Torque_Enable", None), ("Torque_Enable", None)]
+    bus.disconnect()
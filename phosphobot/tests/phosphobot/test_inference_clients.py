@@ -0,0 +1,247 @@
+"""
+Tests for the clients of the gr00t and Pi0.5 inference servers: the gr00t multipart
+protocol and its fallback to pickle, and the asynchronous clients, which don't block the
+event loop, time out, are cancelled when the control signal is stopped and recover for
+the next request.
+
+```
+uv run pytest tests/phosphobot/test_inference_clients.py
+```
+"""
+
+import asyncio
+import pickle
+import socket
+import threading
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+import websockets.asyncio.server
+import zmq
+
+from phosphobot.am.gr00t import (
+    AsyncInferenceClient,
+    BaseInferenceClient,
+    BaseInferenceServer,
+    BasePolicy,
+    RobotInferenceServer,
+)
+from phosphobot.am.pi05 import AsyncWebsocketClientPolicy
+from phosphobot.am.wire import Packer, unpackb
+from phosphobot.control_signal import AIControlSignal, ControlStoppedError
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def slow_get_action(data: Dict[str, Any]) -> Dict[str, Any]:
+    time.sleep(data["delay"])
+    return {"id": data["id"]}
+
+
+def echo(data: Dict[str, Any]) -> Dict[str, Any]:
+    # The arrays of multipart requests are views on the received frames
+    return {
+        "data": data,
+        "owndata": {key: value.flags.owndata for key, value in data.items()},
+    }
+
+
+def start_gr00t_server(allow_pickle: bool = False) -> int:
+    port = get_free_port()
+    server = BaseInferenceServer(host="127.0.0.1", port=port, allow_pickle=allow_pickle)
+    server.register_endpoint("get_action", slow_get_action)
+    server.register_endpoint("echo", echo)
+    threading.Thread(target=server.run, daemon=True).start()
+    return port
+
+
+@pytest.fixture(scope="module")
+def gr00t_port() -> int:
+    return start_gr00t_server()
+
+
+def start_pickle_only_server() -> int:
+    """A server that only speaks pickle, like the Isaac-GR00T inference service."""
+    port = get_free_port()
+    context = zmq.Context.instance()
+    server_socket = context.socket(zmq.REP)
+    server_socket.bind(f"tcp://127.0.0.1:{port}")
+
+    def run() -> None:
+        while True:
+            raw = server_socket.recv()
+            try:
+                request = pickle.loads(raw)
+            except Exception:
+                server_socket.send(b"ERROR")
+                continue
+            result = {"data": request.get("data")}
+            server_socket.send(pickle.dumps({"status": "ok", "result": result}))
+
+    threading.Thread(target=run, daemon=True).start()
+    return port
+
+
+def test_gr00t_arrays_sent_as_multipart(gr00t_port):
+    observations = {
+        "video.main": np.random.randint(0, 255, (1, 240, 320, 3), dtype=np.uint8),
+        # Not contiguous
+        "state.arm": np.arange(12, dtype=np.float64).reshape(2, 6)[:, ::2],
+    }
+    client = BaseInferenceClient(host="127.0.0.1", port=gr00t_port)
+    response = client.call_endpoint("echo", observations)
+
+    assert client.wire_format == "multipart"
+    for key, value in observations.items():
+        np.testing.assert_array_equal(response["data"][key], value)
+        assert response["data"][key].dtype == value.dtype
+        assert not response["owndata"][key]
+
+
+def test_gr00t_falls_back_to_pickle_for_legacy_servers():
+    port = start_pickle_only_server()
+    client = BaseInferenceClient(host="127.0.0.1", port=port)
+    state = np.arange(6, dtype=np.float32)
+    response = client.call_endpoint("get_action", {"state.arm": state})
+    assert client.wire_format == "pickle"
+    np.testing.assert_array_equal(response["data"]["state.arm"], state)
+
+    async def main() -> None:
+        async_client = AsyncInferenceClient(host="127.0.0.1", port=port)
+        response = await async_client.get_action({"state.arm": state})
+        assert async_client.wire_format == "pickle"
+        np.testing.assert_array_equal(response["data"]["state.arm"], state)
+        async_client.close()
+
+    asyncio.run(main())
+
+
+def test_gr00t_server_refuses_pickle_by_default():
+    port = start_gr00t_server()
+    client = BaseInferenceClient(host="127.0.0.1", port=port)
+    client.wire_format = "pickle"
+    with pytest.raises(RuntimeError):
+        client.call_endpoint("echo", {"state.arm": np.zeros(6)})
+    # The multipart protocol still works
+    client.wire_format = None
+    client.call_endpoint("echo", {"state.arm": np.zeros(6)})
+    assert client.wire_format == "multipart"
+
+    # Legacy clients are accepted when the server opts in
+    legacy_port = start_gr00t_server(allow_pickle=True)
+    legacy_client = BaseInferenceClient(host="127.0.0.1", port=legacy_port)
+    legacy_client.wire_format = "pickle"
+    response = legacy_client.call_endpoint("echo", {"state.arm": np.zeros(6)})
+    np.testing.assert_array_equal(response["data"]["state.arm"], np.zeros(6))
+
+
+class InPlacePolicy(BasePolicy):
+    """A policy that normalizes the observations in place, like the gr00t transforms."""
+
+    def get_action(self, observations: Dict[str, Any]) -> Dict[str, Any]:
+        observations["state.arm"] /= 2
+        return {"action.arm": observations["state.arm"]}
+
+    def get_modality_config(self) -> Dict[str, Any]:
+        return {}
+
+
+def test_gr00t_policy_gets_writable_arrays():
+    port = get_free_port()
+    server = RobotInferenceServer(InPlacePolicy(), host="127.0.0.1", port=port)
+    threading.Thread(target=server.run, daemon=True).start()
+    client = BaseInferenceClient(host="127.0.0.1", port=port)
+    response = client.call_endpoint("get_action", {"state.arm": np.ones(6)})
+    assert client.wire_format == "multipart"
+    np.testing.assert_array_equal(response["action.arm"], np.full(6, 0.5))
+
+
+async def count_ticks(ticks: list) -> None:
+    while True:
+        await asyncio.sleep(0.01)
+        ticks.append(1)
+
+
+def test_gr00t_client_times_out_without_blocking(gr00t_port):
+    async def main() -> None:
+        client = AsyncInferenceClient(host="127.0.0.1", port=gr00t_port, timeout_ms=200)
+        ticks: list = []
+        ticker = asyncio.create_task(count_ticks(ticks))
+        with pytest.raises(TimeoutError):
+            await client.get_action({"id": 1, "delay": 0.5})
+        ticker.cancel()
+        # The event loop kept running while waiting for the server
+        assert len(ticks) >= 10
+
+        # The late reply of the first request is not read by the next one
+        response = await client.call_endpoint(
+            "get_action", {"id": 2, "delay": 0.0}, timeout=5
+        )
+        assert response == {"id": 2}
+        client.close()
+
+    asyncio.run(main())
+
+
+def test_gr00t_inference_cancelled_when_signal_stopped(gr00t_port):
+    async def main() -> None:
+        client = AsyncInferenceClient(host="127.0.0.1", port=gr00t_port)
+        control_signal = AIControlSignal()
+        control_signal.start()
+        asyncio.get_running_loop().call_later(0.1, control_signal.stop)
+
+        start = time.perf_counter()
+        with pytest.raises(ControlStoppedError):
+            await control_signal.run_until_stopped(
+                client.get_action({"id": 3, "delay": 1.0})
+            )
+        assert time.perf_counter() - start < 0.5
+
+        assert await client.get_action({"id": 4, "delay": 0.0}) == {"id": 4}
+        client.close()
+
+    asyncio.run(main())
+
+
+def test_pi05_client_reconnects():
+    async def handler(connection: websockets.asyncio.server.ServerConnection) -> None:
+        packer = Packer()
+        await connection.send(packer.pack({"server": "test"}))
+        async for message in connection:
+            obs = unpackb(message)
+            await asyncio.sleep(obs["delay"])
+            await connection.send(
+                packer.pack({"actions": np.zeros((2, 6)), "id": obs["id"]})
+            )
+            if obs.get("close"):
+                await connection.close()
+                return
+
+    async def main() -> None:
+        port = get_free_port()
+        async with websockets.asyncio.server.serve(handler, "127.0.0.1", port):
+            client = AsyncWebsocketClientPolicy(
+                host="127.0.0.1", port=port, timeout=0.2
+            )
+            response = await client.infer({"id": 1, "delay": 0.0})
+            assert response["id"] == 1
+            assert response["actions"].shape == (2, 6)
+            assert client.get_server_metadata() == {"server": "test"}
+
+            with pytest.raises(TimeoutError):
+                await client.infer({"id": 2, "delay": 0.5})
+            assert (await client.infer({"id": 3, "delay": 0.0}))["id"] == 3
+
+            # The server closes the connection: the next request reconnects
+            await client.infer({"id": 4, "delay": 0.0, "close": True})
+            await asyncio.sleep(0.1)
+            assert (await client.infer({"id": 5, "delay": 0.0}))["id"] == 5
+            await client.close()
+
+    asyncio.run(main())
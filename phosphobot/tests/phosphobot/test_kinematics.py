@@ -0,0 +1,65 @@
+"""
+Tests for the NumPy kinematics, against the PyBullet simulation.
+
+```
+uv run pytest tests/phosphobot/test_kinematics.py
+```
+"""
+
+import numpy as np
+import pytest
+
+from phosphobot.configs import config
+from phosphobot.hardware import KochHardware, SO100Hardware, get_sim
+from phosphobot.types import SimulationMode
+
+
+@pytest.fixture(params=[SO100Hardware, KochHardware])
+def robot(request):
+    config.SIM_MODE = SimulationMode.headless
+    get_sim()
+    return request.param()
+
+
+def random_joints_positions(robot, n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    lower = robot.kinematics.lower_limits
+    upper = robot.kinematics.upper_limits
+    # Stay away from the limits, where the IK is clipped
+    return rng.uniform(
+        lower + 0.2 * (upper - lower), upper - 0.2 * (upper - lower), (n, len(lower))
+    )
+
+
+def test_forward_kinematics_matches_pybullet(robot):
+    assert robot.kinematics is not None
+    joints_positions = random_joints_positions(robot, 5)
+    positions, rotations = robot.kinematics.forward_kinematics(joints_positions)
+
+    for joints_position, position, rotation in zip(
+        joints_positions, positions, rotations
+    ):
+        for joint_index, joint_position in zip(robot.actuated_joints, joints_position):
+            robot.sim.set_joint_state(robot.p_robot_id, joint_index, joint_position)
+        link_state = robot.sim.get_link_state(
+            robot_id=robot.p_robot_id,
+            link_index=robot.END_EFFECTOR_LINK_INDEX,
+            compute_forward_kinematics=True,
+        )
+        assert np.allclose(position, link_state[4], atol=1e-5)
+        # The single configuration path gives the same result as the batched one
+        single_position, single_rotation = robot.kinematics.forward_kinematics(
+            joints_position
+        )
+        assert np.allclose(single_position, position)
+        assert np.allclose(single_rotation, rotation)
+
+
+def test_inverse_kinematics_reaches_forward_kinematics(robot):
+    for joints_position in random_joints_positions(robot, 5):
+        position, _ = robot.kinematics.forward_kinematics(joints_position)
+        solution = robot.kinematics.inverse_kinematics(
+            position, initial_joints_position=joints_position + 0.1
+        )
+        reached, _ = robot.kinematics.forward_kinematics(solution)
+        assert np.linalg.norm(reached - position) < 1e-3
@@ -0,0 +1,106 @@
+"""
+Tests for the control loops of the leader-follower, without hardware.
+
+```
+uv run pytest tests/phosphobot/test_leader_follower.py
+```
+"""
+
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from phosphobot.control_signal import LeaderFollowerSignal
+from phosphobot.leader_follower import LeaderFollowerThread, RobotPair
+
+
+class FakeRobot:
+    """The methods used by the leader-follower, with a bus that takes 5 ms per transaction."""
+
+    name = "fake"
+    initial_position = np.zeros(3)
+    initial_orientation_rad = np.zeros(3)
+    GRIPPER_JOINT_INDEX = 5
+    SERVO_IDS = [1, 2, 3, 4, 5, 6]
+
+    def __init__(self, device_name: str):
+        self.device_name = device_name
+        self.threads: List[str] = []
+
+    def _transaction(self) -> None:
+        self.threads.append(threading.current_thread().name)
+        time.sleep(0.005)
+
+    def read_joints_position(self, **kwargs) -> np.ndarray:
+        self._transaction()
+        return np.zeros(6)
+
+    def set_motors_positions(self, **kwargs) -> None:
+        self._transaction()
+
+    def control_gripper(self, **kwargs) -> None:
+        pass
+
+    def _rad_to_open_command(self, radians: float) -> float:
+        return 0.0
+
+    def enable_torque(self) -> None:
+        pass
+
+    def disable_torque(self) -> None:
+        pass
+
+
+def make_thread(robot_pairs: List[RobotPair]) -> LeaderFollowerThread:
+    return LeaderFollowerThread(
+        robot_pairs=robot_pairs,
+        control_signal=LeaderFollowerSignal(),
+        invert_controls=False,
+        enable_gravity_compensation=False,
+        compensation_values=None,
+        sim=None,  # type: ignore
+    )
+
+
+def test_pairs_sharing_a_bus_are_grouped():
+    a, b, c, d, e = (FakeRobot(f"/dev/ttyACM{i}") for i in range(5))
+    pairs = [
+        RobotPair(leader=a, follower=b),  # type: ignore
+        RobotPair(leader=c, follower=d),  # type: ignore
+        RobotPair(leader=e, follower=FakeRobot("/dev/ttyACM1")),  # type: ignore
+    ]
+    groups = make_thread(pairs)._group_pairs()
+
+    assert groups == [[pairs[1]], [pairs[0], pairs[2]]]
+
+
+def test_independent_pairs_run_concurrently():
+    leaders = [FakeRobot("/dev/ttyACM0"), FakeRobot("/dev/ttyACM2")]
+    followers = [FakeRobot("/dev/ttyACM1"), FakeRobot("/dev/ttyACM3")]
+    thread = make_thread(
+        [
+            RobotPair(leader=leader, follower=follower)  # type: ignore
+            for leader, follower in zip(leaders, followers)
+        ]
+    )
+    thread.control_signal.start()
+    thread.start()
+    time.sleep(0.3)
+    pairs_status = thread.control_signal.pairs_status()
+    thread.control_signal.stop()
+    thread.join()
+
+    # Each pair is mirrored in its own loop
+    assert {leaders[0].threads[0], leaders[1].threads[0]} == {
+        "leader-follower-0",
+        "leader-follower-1",
+    }
+    assert [status.loop_index for status in pairs_status] == [0, 1]
+    for status in pairs_status:
+        assert status.freq is not None and status.freq > 0
+        assert status.read_latency_ms.mean is not None
+        assert status.read_latency_ms.mean >= 5
+    # Once stopped, the timings are not reported anymore
+    assert thread.control_signal.pairs_status() == []
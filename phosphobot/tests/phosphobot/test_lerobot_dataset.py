@@ -0,0 +1,608 @@
+"""
+Tests for the operations on LeRobot datasets: saving episodes in the background,
+deletion of episodes with tombstones, compaction, merge, recomputation of the stats, the
+catalog of the datasets and the streaming video encoder.
+
+```
+uv run pytest tests/phosphobot/test_lerobot_dataset.py
+```
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+import av
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+from phosphobot.configs import config
+from phosphobot.hardware import SO100Hardware, get_sim
+from phosphobot.models import (
+    EpisodeSaveStatus,
+    EpisodesModel,
+    InfoModel,
+    LeRobotDataset,
+)
+from phosphobot.models import dataset_catalog
+from phosphobot.models.dataset import Observation, Step
+from phosphobot.models.dataset_catalog import DatasetCatalog
+from phosphobot.models.dataset_stats import (
+    compute_episodes_moments,
+    find_episodes_files,
+)
+from phosphobot.models.lerobot_dataset import (
+    EpisodesStatsModel,
+    LeRobotEpisode,
+    Stats,
+    TombstonesModel,
+)
+from phosphobot import recorder as recorder_module
+from phosphobot.recorder import (
+    DatasetBusyError,
+    EpisodeSaver,
+    Recorder,
+    lock_datasets,
+)
+from phosphobot import utils
+from phosphobot.types import SimulationMode
+from phosphobot.utils import StreamingVideoEncoder
+
+CAMERA_KEY = "observation.images.main"
+
+
+async def record_steps(
+    dataset: LeRobotDataset, robot: SO100Hardware, nb_steps: int
+) -> LeRobotEpisode:
+    """Record an episode, without saving it."""
+    episode = await LeRobotEpisode.start_new(
+        dataset_manager=dataset,
+        robots=[robot],
+        codec="mp4v",
+        freq=10,
+        target_size=(32, 24),
+        instruction="pick up the cube",
+        all_camera_key_names=[CAMERA_KEY],
+    )
+    for i in range(nb_steps):
+        await episode.append_step(
+            Step(
+                observation=Observation(
+                    main_image=np.full((24, 32, 3), i, dtype=np.uint8),
+                    joints_position=np.full(6, float(i)),
+                    state=np.zeros(7),
+                    timestamp=i / 10,
+                    language_instruction="pick up the cube",
+                ),
+                action=np.full(6, float(i)),
+            )
+        )
+    return episode
+
+
+def record_episode(
+    dataset: LeRobotDataset, robot: SO100Hardware, nb_steps: int
+) -> None:
+    async def record() -> None:
+        episode = await record_steps(dataset, robot, nb_steps)
+        await episode.save()
+
+    asyncio.run(record())
+
+
+def get_robot() -> SO100Hardware:
+    config.SIM_MODE = SimulationMode.headless
+    get_sim()
+    return SO100Hardware()
+
+
+def record_dataset(path: str, episodes_nb_steps: List[int]) -> str:
+    robot = get_robot()
+    for nb_steps in episodes_nb_steps:
+        # A new dataset manager per episode, like the recorder
+        record_episode(LeRobotDataset(path=path), robot, nb_steps)
+    return path
+
+
+@pytest.fixture
+def dataset_path(tmp_path) -> str:
+    return record_dataset(str(tmp_path / "lerobot_v2.1" / "test_dataset"), [3, 4, 5, 6])
+
+
+def data_files(dataset: LeRobotDataset) -> list:
+    return sorted(os.listdir(dataset.data_folder_full_path))
+
+
+def test_next_episode_recorded_while_previous_is_written(tmp_path):
+    dataset = LeRobotDataset(path=str(tmp_path / "lerobot_v2.1" / "test_dataset"))
+    robot = get_robot()
+
+    # The first episode is committed, and the second one recorded before it's written
+    first_episode = asyncio.run(record_steps(dataset, robot, 3))
+    first_episode.commit()
+    second_episode = asyncio.run(record_steps(dataset, robot, 4))
+    assert second_episode.episode_index == 1
+    second_episode.commit()
+
+    # The meta files are written as they were when each episode was committed
+    stages: List[str] = []
+    first_episode.write(on_stage=stages.append)
+    assert stages == ["data", "videos", "meta"]
+    assert (
+        InfoModel.from_json(
+            meta_folder_path=dataset.meta_folder_full_path
+        ).total_episodes
+        == 1
+    )
+    second_episode.write()
+
+    dataset = LeRobotDataset(path=dataset.folder_full_path)
+    dataset.load_meta_models()
+    assert dataset.info_model is not None and dataset.episodes_model is not None
+    assert dataset.info_model.total_episodes == 2
+    assert dataset.info_model.total_frames == 7
+    assert len(dataset.episodes_model.episodes) == 2
+    assert data_files(dataset) == ["episode_000000.parquet", "episode_000001.parquet"]
+    second_data = pd.read_parquet(
+        os.path.join(dataset.data_folder_full_path, "episode_000001.parquet")
+    )
+    assert second_data["index"].tolist() == [3, 4, 5, 6]
+
+
+def test_push_waits_for_the_episodes_recorded_meanwhile(dataset_path, monkeypatch):
+    LeRobotDataset(path=dataset_path).delete_episode(episode_id=1, update_hub=False)
+    recorder = Recorder(robots=[], cameras=SimpleNamespace(camera_ids=[]))  # type: ignore
+    pushed: List[str] = []
+    monkeypatch.setattr(
+        recorder,
+        "push_to_hub",
+        lambda dataset_path, branch_path=None: pushed.append(dataset_path),
+    )
+    robot = get_robot()
+
+    # The next episode is recorded while the previous one is written
+    dataset = LeRobotDataset(path=dataset_path)
+    first_episode = asyncio.run(record_steps(dataset, robot, 2))
+    first_episode.commit()
+    second_episode = asyncio.run(record_steps(dataset, robot, 3))
+    assert second_episode.episode_index == 5
+    recorder.episode = second_episode
+    first_status = EpisodeSaveStatus(
+        dataset_name="test_dataset", episode_index=4, queued_at=time.time()
+    )
+    first_episode.write()
+    recorder._push_after_write(
+        episode=first_episode,
+        status=first_status,
+        dataset_path=dataset.path,
+        branch_path=None,
+    )
+    # Compacting would renumber the second episode: the push is left to it
+    assert pushed == []
+    assert TombstonesModel.from_json(dataset.meta_folder_full_path).episode_indexes
+    second_episode.commit()
+    second_episode.write()
+    recorder._push_after_write(
+        episode=second_episode,
+        status=EpisodeSaveStatus(
+            dataset_name="test_dataset", episode_index=5, queued_at=time.time()
+        ),
+        dataset_path=dataset.path,
+        branch_path=None,
+    )
+    assert pushed == [dataset.path]
+    assert data_files(dataset) == [f"episode_{i:06d}.parquet" for i in range(5)]
+    info = InfoModel.from_json(meta_folder_path=dataset.meta_folder_full_path)
+    assert info.total_episodes == 5
+    assert info.total_frames == 3 + 5 + 6 + 2 + 3
+
+
+def test_failed_write_is_rolled_back(dataset_path, monkeypatch):
+    recorder = Recorder(robots=[], cameras=SimpleNamespace(camera_ids=[]))  # type: ignore
+    robot = get_robot()
+    dataset = LeRobotDataset(path=dataset_path)
+    recorder._dataset_manager = dataset
+
+    # The second episode is committed before the write of the first one fails
+    first_episode = asyncio.run(record_steps(dataset, robot, 2))
+    first_episode.commit()
+    second_episode = asyncio.run(record_steps(dataset, robot, 3))
+    second_episode.commit()
+
+    def fail() -> None:
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(first_episode, "_close_video_encoders", fail)
+    monkeypatch.setattr(first_episode, "_save_buffered_videos", fail)
+    with pytest.raises(OSError):
+        first_episode.write()
+    first_status = EpisodeSaveStatus(
+        dataset_name="test_dataset", episode_index=4, queued_at=time.time()
+    )
+    recorder._discard_episode(first_episode, status=first_status)
+    # Its files are removed, and the next episode doesn't reuse the dataset manager
+    assert "episode_000004.parquet" not in data_files(dataset)
+    assert recorder._dataset_manager is None
+
+    # The meta files of the second episode don't list the failed one
+    second_episode.write()
+    info = InfoModel.from_json(meta_folder_path=dataset.meta_folder_full_path)
+    assert info.total_episodes == 5
+    assert info.total_frames == 3 + 4 + 5 + 6 + 3
+    assert TombstonesModel.from_json(dataset.meta_folder_full_path).episode_indexes == [
+        4
+    ]
+    episodes = EpisodesModel.from_jsonl(
+        meta_folder_path=dataset.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [episode.episode_index for episode in episodes.episodes] == [0, 1, 2, 3, 5]
+
+
+def test_dataset_edits_wait_for_the_saves(dataset_path, monkeypatch):
+    recorder = Recorder(robots=[], cameras=SimpleNamespace(camera_ids=[]))  # type: ignore
+    monkeypatch.setattr(recorder_module, "recorder", recorder)
+    status = EpisodeSaveStatus(
+        dataset_name="test_dataset", episode_index=4, queued_at=time.time()
+    )
+    recorder.episode_saver.submit(
+        status,
+        dataset_path=dataset_path,
+        save=lambda on_stage: time.sleep(0.2),
+    )
+
+    # An episode of the dataset is being saved: editing it would lose the episode
+    with pytest.raises(DatasetBusyError):
+        with lock_datasets(dataset_path):
+            pass
+    # Other datasets can be edited
+    with lock_datasets(os.path.join(os.path.dirname(dataset_path), "other")):
+        pass
+
+    deadline = time.time() + 5
+    while recorder.episode_saver.has_pending(dataset_path) and time.time() < deadline:
+        time.sleep(0.05)
+    with lock_datasets(dataset_path):
+        pass
+
+
+def test_episode_saver_runs_saves_in_order():
+    saver = EpisodeSaver()
+    saved: List[int] = []
+
+    def save(episode_index: int, delay: float) -> Callable:
+        def run(on_stage: Callable[[str], None]) -> None:
+            on_stage("data")
+            time.sleep(delay)
+            if episode_index == 2:
+                raise ValueError("Disk full")
+            saved.append(episode_index)
+
+        return run
+
+    for episode_index, delay in enumerate([0.1, 0.0, 0.0]):
+        saver.submit(
+            EpisodeSaveStatus(
+                dataset_name="test_dataset",
+                episode_index=episode_index,
+                queued_at=time.time(),
+            ),
+            dataset_path="test_dataset",
+            save=save(episode_index, delay),
+        )
+    assert saver.is_saving and saver.has_pending("test_dataset")
+    saver.wait()
+
+    assert saved == [0, 1]
+    assert not saver.is_saving
+    assert [status.status for status in saver.statuses()] == [
+        "saved",
+        "saved",
+        "failed",
+    ]
+    assert saver.statuses()[2].error == "Disk full"
+
+
+def test_delete_keeps_indexes_then_compact_renumbers(dataset_path):
+    dataset = LeRobotDataset(path=dataset_path)
+    dataset.delete_episode(episode_id=1, update_hub=False)
+
+    # Only the deleted episode is removed, the others keep their index
+    assert data_files(dataset) == [
+        "episode_000000.parquet",
+        "episode_000002.parquet",
+        "episode_000003.parquet",
+    ]
+    info = InfoModel.from_json(meta_folder_path=dataset.meta_folder_full_path)
+    assert info.total_episodes == 3
+    assert info.total_frames == 3 + 5 + 6
+    tombstones = TombstonesModel.from_json(dataset.meta_folder_full_path)
+    assert tombstones.episode_indexes == [1]
+    episodes = EpisodesModel.from_jsonl(
+        meta_folder_path=dataset.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [episode.episode_index for episode in episodes.episodes] == [0, 2, 3]
+
+    # A new episode doesn't reuse the index or the frames of the deleted one
+    record_episode(LeRobotDataset(path=dataset_path), SO100Hardware(), 2)
+    new_episode = pd.read_parquet(dataset.get_episode_data_path(4))
+    assert list(new_episode["index"]) == [18, 19]
+
+    dataset.load_meta_models()
+    assert dataset.get_next_episode_index() == 5
+    old_index_to_new_index = dataset.compact_episodes()
+
+    assert old_index_to_new_index == {0: 0, 2: 1, 3: 2, 4: 3}
+    # The meta models of the instance are loaded again from the compacted files
+    assert dataset.info_model is None and dataset.episodes_model is None
+    dataset.load_meta_models()
+    assert dataset.get_next_episode_index() == 4
+    assert data_files(dataset) == [f"episode_{i:06d}.parquet" for i in range(4)]
+    camera_folder = os.path.join(dataset.videos_folder_full_path, CAMERA_KEY)
+    assert sorted(os.listdir(camera_folder)) == [
+        f"episode_{i:06d}.mp4" for i in range(4)
+    ]
+    all_frames = pd.concat(
+        pd.read_parquet(dataset.get_episode_data_path(i)) for i in range(4)
+    )
+    assert list(all_frames["index"]) == list(range(3 + 5 + 6 + 2))
+    assert list(all_frames["episode_index"]) == [0] * 3 + [1] * 5 + [2] * 6 + [3] * 2
+    # The episode with 5 steps is now episode 1
+    episode_1 = pd.read_parquet(dataset.get_episode_data_path(1))
+    assert list(episode_1["frame_index"]) == list(range(5))
+    assert not os.path.exists(
+        os.path.join(dataset.meta_folder_full_path, "tombstones.json")
+    )
+    episodes = EpisodesModel.from_jsonl(
+        meta_folder_path=dataset.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [(e.episode_index, e.length) for e in episodes.episodes] == [
+        (0, 3),
+        (1, 5),
+        (2, 6),
+        (3, 2),
+    ]
+    # Nothing left to compact
+    assert dataset.compact_episodes() == {}
+
+
+def test_merge_multiple_datasets(tmp_path):
+    root = tmp_path / "lerobot_v2.1"
+    first = LeRobotDataset(path=record_dataset(str(root / "first"), [2, 3]))
+    second = LeRobotDataset(path=record_dataset(str(root / "second"), [4]))
+    third = LeRobotDataset(path=record_dataset(str(root / "third"), [5, 6]))
+    progress: List[int] = []
+
+    first.merge_multiple_datasets(
+        other_datasets=[second, third],
+        new_dataset_name="merged",
+        video_transforms=[{CAMERA_KEY: CAMERA_KEY}, {CAMERA_KEY: CAMERA_KEY}],
+        progress_callback=lambda done, total: progress.append(done),
+    )
+
+    merged = LeRobotDataset(path=str(root / "merged"))
+    # 5 parquets and 5 videos
+    assert progress == list(range(1, 11))
+    info = InfoModel.from_json(meta_folder_path=merged.meta_folder_full_path)
+    assert info.total_episodes == 5
+    assert info.total_frames == 2 + 3 + 4 + 5 + 6
+    all_frames = pd.concat(
+        pd.read_parquet(merged.get_episode_data_path(i)) for i in range(5)
+    )
+    assert list(all_frames["index"]) == list(range(20))
+    assert list(all_frames["episode_index"]) == [
+        i for i, nb_steps in enumerate([2, 3, 4, 5, 6]) for _ in range(nb_steps)
+    ]
+    assert set(all_frames["task_index"]) == {0}
+    episodes = EpisodesModel.from_jsonl(
+        meta_folder_path=merged.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [e.length for e in episodes.episodes] == [2, 3, 4, 5, 6]
+    # The videos are the files of the merged datasets
+    merged_video = os.path.join(
+        merged.videos_folder_full_path, CAMERA_KEY, "episode_000004.mp4"
+    )
+    third_video = os.path.join(
+        third.videos_folder_full_path, CAMERA_KEY, "episode_000001.mp4"
+    )
+    with open(merged_video, "rb") as f, open(third_video, "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_merge_datasets_with_deleted_episodes(tmp_path):
+    root = tmp_path / "lerobot_v2.1"
+    first = LeRobotDataset(path=record_dataset(str(root / "first"), [2, 3, 4]))
+    second = LeRobotDataset(path=record_dataset(str(root / "second"), [5, 6, 7]))
+    first.delete_episode(episode_id=1, update_hub=False)
+    second.delete_episode(episode_id=0, update_hub=False)
+    second_files = sorted(
+        str(path.relative_to(second.folder_full_path))
+        for path in Path(second.folder_full_path).rglob("*")
+    )
+
+    first.merge_multiple_datasets(
+        other_datasets=[second],
+        new_dataset_name="merged",
+        video_transforms=[{CAMERA_KEY: CAMERA_KEY}],
+    )
+
+    # The merged datasets are not compacted
+    assert data_files(first) == ["episode_000000.parquet", "episode_000002.parquet"]
+    assert TombstonesModel.from_json(second.meta_folder_full_path).episode_indexes == [
+        0
+    ]
+    assert (
+        sorted(
+            str(path.relative_to(second.folder_full_path))
+            for path in Path(second.folder_full_path).rglob("*")
+        )
+        == second_files
+    )
+
+    # The merged dataset has contiguous indexes
+    merged = LeRobotDataset(path=str(root / "merged"))
+    assert data_files(merged) == [f"episode_{i:06d}.parquet" for i in range(4)]
+    all_frames = pd.concat(
+        pd.read_parquet(merged.get_episode_data_path(i)) for i in range(4)
+    )
+    assert list(all_frames["index"]) == list(range(2 + 4 + 6 + 7))
+    assert list(all_frames["episode_index"]) == [
+        i for i, nb_steps in enumerate([2, 4, 6, 7]) for _ in range(nb_steps)
+    ]
+    episodes = EpisodesModel.from_jsonl(
+        meta_folder_path=merged.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [(e.episode_index, e.length) for e in episodes.episodes] == [
+        (0, 2),
+        (1, 4),
+        (2, 6),
+        (3, 7),
+    ]
+    episodes_stats = EpisodesStatsModel.from_jsonl(
+        meta_folder_path=merged.meta_folder_full_path
+    )
+    assert [e.episode_index for e in episodes_stats.episodes_stats] == [0, 1, 2, 3]
+    camera_folder = os.path.join(merged.videos_folder_full_path, CAMERA_KEY)
+    assert sorted(os.listdir(camera_folder)) == [
+        f"episode_{i:06d}.mp4" for i in range(4)
+    ]
+
+
+def test_recompute_stats(dataset_path):
+    dataset = LeRobotDataset(path=dataset_path)
+    meta_folder_path = dataset.meta_folder_full_path
+    recorded = EpisodesStatsModel.from_jsonl(meta_folder_path=meta_folder_path)
+
+    dataset.recompute_stats()
+
+    recomputed = EpisodesStatsModel.from_jsonl(meta_folder_path=meta_folder_path)
+    assert [e.episode_index for e in recomputed.episodes_stats] == [0, 1, 2, 3]
+    for before, after in zip(recorded.episodes_stats, recomputed.episodes_stats):
+        for field in ["observation_state", "action", "frame_index"]:
+            before_stats = getattr(before.stats, field)
+            after_stats = getattr(after.stats, field)
+            assert after_stats.count == before_stats.count
+            assert np.allclose(after_stats.mean, before_stats.mean)
+            assert np.allclose(after_stats.std, before_stats.std)
+            assert np.allclose(after_stats.min, before_stats.min)
+            assert np.allclose(after_stats.max, before_stats.max)
+        # The frames are plain images, decoded almost exactly from the video
+        image_stats = Stats.model_validate(after.stats.observation_images[CAMERA_KEY])
+        nb_steps = before.stats.frame_index.count
+        assert image_stats.count == nb_steps * 24 * 32
+        assert image_stats.mean is not None and image_stats.mean.shape == (3, 1, 1)
+        assert np.allclose(image_stats.mean, (nb_steps - 1) / 2 / 255, atol=1 / 255)
+
+
+def test_stats_cache_only_reads_changed_files(dataset_path, tmp_path):
+    cache_path = str(tmp_path / "stats_cache.json")
+    episodes_files = find_episodes_files(dataset_path)
+    nb_read_files: List[int] = []
+
+    def compute() -> dict:
+        progress: List[int] = [0]
+        moments = compute_episodes_moments(
+            episodes_files,
+            cache_path=cache_path,
+            progress_callback=lambda done, total: progress.append(done),
+        )
+        nb_read_files.append(progress[-1])
+        return moments
+
+    first = compute()
+    second = compute()
+    # Rewrite the parquet of an episode
+    parquet_path = episodes_files[2].parquet_path
+    df = pd.read_parquet(parquet_path)
+    os.remove(parquet_path)
+    df.to_parquet(parquet_path)
+    compute()
+
+    # 4 parquets and 4 videos, then nothing, then the rewritten parquet
+    assert nb_read_files == [8, 0, 1]
+    assert second.keys() == first.keys()
+    for episode_index, moments in first.items():
+        for feature, feature_moments in moments.items():
+            assert np.array_equal(
+                second[episode_index][feature].sum, feature_moments.sum
+            )
+
+
+def test_catalog_only_scans_changed_datasets(dataset_path, tmp_path, monkeypatch):
+    catalog = DatasetCatalog(str(tmp_path / "catalog.sqlite"))
+    rendered_videos: List[str] = []
+    render_thumbnail = dataset_catalog.render_thumbnail
+
+    def render(video_path: str) -> Optional[bytes]:
+        rendered_videos.append(os.path.basename(video_path))
+        return render_thumbnail(video_path)
+
+    monkeypatch.setattr(dataset_catalog, "render_thumbnail", render)
+
+    entry = catalog.get(dataset_path)
+    assert entry is not None
+    assert entry.total_episodes == 4
+    assert entry.total_frames == 3 + 4 + 5 + 6
+    assert entry.camera_keys == [CAMERA_KEY]
+    assert len(entry.episode_paths) == 4
+    assert entry.disk_size > 0
+    thumbnail = cv2.imdecode(
+        np.frombuffer(catalog.get_thumbnails(dataset_path)[CAMERA_KEY], np.uint8),
+        cv2.IMREAD_COLOR,
+    )
+    assert thumbnail.shape == (240, 320, 3)
+    # Unchanged dataset: read from the catalog
+    assert catalog.get(dataset_path) == entry
+    assert rendered_videos == ["episode_000000.mp4"]
+
+    # The first episode is deleted: the thumbnail is rendered from the next one
+    LeRobotDataset(path=dataset_path).delete_episode(episode_id=0, update_hub=False)
+    entry = catalog.get(dataset_path)
+    assert entry is not None
+    assert entry.total_episodes == 3
+    assert len(entry.episode_paths) == 3
+    assert rendered_videos == ["episode_000000.mp4", "episode_000001.mp4"]
+
+    # A new episode: the thumbnail is kept
+    record_episode(LeRobotDataset(path=dataset_path), get_robot(), 2)
+    entry = catalog.update(dataset_path)
+    assert entry is not None
+    assert entry.total_episodes == 4
+    assert len(rendered_videos) == 2
+
+    shutil.rmtree(dataset_path)
+    assert catalog.get(dataset_path) is None
+    assert catalog.get_thumbnails(dataset_path) == {}
+
+
+def test_streaming_encoder_bounds_pending_frames(tmp_path, monkeypatch):
+    encode_video_frame = utils._encode_video_frame
+
+    def slow_encode_video_frame(*args, **kwargs) -> None:
+        time.sleep(0.01)
+        encode_video_frame(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "_encode_video_frame", slow_encode_video_frame)
+    encoder = StreamingVideoEncoder(
+        output_path=str(tmp_path / "episode_000000.mp4"),
+        target_size=(32, 24),
+        fps=10,
+        codec="mp4v",
+        max_pending_frames=4,
+    )
+    accepted = [
+        encoder.add_frame(np.full((24, 32, 3), i, dtype=np.uint8)) for i in range(30)
+    ]
+    assert encoder.pending_frames <= 4
+    assert encoder.dropped_frames == accepted.count(False) > 0
+    video_path = encoder.close()
+
+    # The dropped frames are replaced by the previous frame: one frame per step
+    assert encoder.frame_count == 30
+    with av.open(video_path) as container:
+        assert sum(1 for _ in container.decode(video=0)) == 30
@@ -0,0 +1,56 @@
+"""
+Tests for the servo bus emulator, through the real motors buses.
+
+```
+uv run pytest tests/phosphobot/test_motors_emulator.py
+```
+"""
+
+import numpy as np
+
+from phosphobot.hardware.motors.benchmark import EmulatorSettings, benchmark_feetech_bus
+from phosphobot.hardware.motors.dynamixel import DynamixelMotorsBus
+from phosphobot.hardware.motors.emulator import ServoBusEmulator
+from phosphobot.hardware.motors.feetech import FeetechMotorsBus
+
+
+def test_feetech_bus_round_trip():
+    motors = {"motor_1": (1, "sts3215"), "motor_2": (2, "sts3215")}
+    with ServoBusEmulator("feetech", motor_ids=[1, 2]) as emulator:
+        bus = FeetechMotorsBus(port=emulator.port, motors=motors)  # type: ignore
+        bus.connect()
+        try:
+            assert list(bus.read("Present_Position")) == [2048, 2048]
+            bus.write("Goal_Position", np.array([1000, 3000]))
+            assert list(bus.read("Present_Position")) == [1000, 3000]
+            assert list(bus.read("Present_Voltage", "motor_2")) == [120]
+        finally:
+            bus.disconnect()
+    assert emulator.read_register(2, 42, 2) == 3000
+
+
+def test_dynamixel_bus_round_trip():
+    motors = {"motor_1": (1, "xl430-w250"), "motor_2": (2, "xl430-w250")}
+    with ServoBusEmulator("dynamixel", motor_ids=[1, 2]) as emulator:
+        bus = DynamixelMotorsBus(port=emulator.port, motors=motors)  # type: ignore
+        bus.connect()
+        try:
+            # 0xFDFFFF needs byte stuffing on the wire
+            bus.write("Goal_Position", np.array([0xFDFFFF, -500]))
+            assert list(bus.read("Present_Position")) == [0xFDFFFF, -500]
+        finally:
+            bus.disconnect()
+
+
+def test_benchmark_feetech_bus():
+    results = benchmark_feetech_bus(EmulatorSettings(), duration=0.2)
+
+    assert [result.name for result in results] == [
+        "feetech sync read Present_Position",
+        "feetech sync write Goal_Position",
+        "feetech read Present_Voltage (1 motor)",
+    ]
+    for result in results:
+        # Loose floor: a 1 Mbps bus does more than 1000 transactions per second
+        assert result.rate > 50
+        assert result.latency_ms.p50 is not None and result.latency_ms.p50 > 0
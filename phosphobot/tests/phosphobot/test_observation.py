@@ -0,0 +1,72 @@
+"""
+Tests for the observation assembler of the AI control loops.
+
+```
+uv run pytest tests/phosphobot/test_observation.py
+```
+"""
+
+import asyncio
+import time
+from typing import Any, List
+
+import numpy as np
+
+from phosphobot.am.observation import ImageInput, ObservationAssembler
+from phosphobot.camera import SyncedFrames, TimestampedFrame
+
+
+class FakeCameras:
+    def get_synced_frames(
+        self, camera_ids: List[int], timestamp: float, **kwargs: Any
+    ) -> SyncedFrames:
+        frames = {
+            camera_id: TimestampedFrame(
+                timestamp=time.perf_counter(),
+                sequence_id=0,
+                frame=np.full((480, 640, 3), camera_id, dtype=np.uint8),
+                pixel_format="bgr",
+            )
+            for camera_id in camera_ids
+            if camera_id != 2
+        }
+        return SyncedFrames(
+            timestamp=timestamp,
+            frames=frames,
+            duplicate_camera_ids=[],
+            stale_camera_ids=[],
+        )
+
+
+class FakeRobot:
+    def read_joints_position(self) -> np.ndarray:
+        return np.arange(6, dtype=np.float32)
+
+
+def test_assemble_observation():
+    assembler = ObservationAssembler(
+        all_cameras=FakeCameras(),  # type: ignore
+        robots=[FakeRobot(), FakeRobot()],  # type: ignore
+        image_inputs=[
+            ImageInput(key="main", camera_id=1, size=(320, 240)),
+            ImageInput(key="batched", camera_id=1, size=(224, 224), batch_dim=True),
+            ImageInput(key="missing", camera_id=2, size=(224, 224)),
+        ],
+        read_state=lambda robot: robot.read_joints_position(),
+    )
+
+    first = asyncio.run(assembler.assemble())
+    second = asyncio.run(assembler.assemble())
+    third = asyncio.run(assembler.assemble())
+    assembler.close()
+
+    assert first.state.shape == (12,)
+    assert first.joints_per_robot == [6, 6]
+    assert first.images["main"].shape == (240, 320, 3)
+    assert np.all(first.images["main"] == 1)
+    assert first.images["batched"].shape == (1, 224, 224, 3)
+    # Missing cameras are sent all black
+    assert np.all(first.images["missing"] == 0)
+    # Buffers are reused every other observation
+    assert second.images["main"] is not first.images["main"]
+    assert third.images["main"] is first.images["main"]
@@ -0,0 +1,56 @@
+"""
+Tests for the fixed-rate scheduler of the recording loop.
+
+```
+uv run pytest tests/phosphobot/test_scheduler.py
+```
+"""
+
+import asyncio
+import time
+
+from phosphobot.scheduler import FixedRateScheduler, TimingMetrics
+
+
+def test_scheduler_skips_missed_ticks():
+    async def run() -> list:
+        scheduler = FixedRateScheduler(freq=50)
+        scheduler.start()
+        ticks = [await scheduler.wait_next_tick()]
+        # Overrun by a bit more than 2 periods
+        time.sleep(0.05)
+        ticks.append(await scheduler.wait_next_tick())
+        ticks.append(await scheduler.wait_next_tick())
+        return ticks
+
+    ticks = asyncio.run(run())
+
+    # The overrun skips at least the tick whose deadline passed during the sleep
+    assert ticks[1].missed >= 1
+    assert ticks[1].index == 1 + ticks[1].missed
+    assert ticks[2].index == ticks[1].index + 1
+    # Deadlines are absolute: no drift after the overrun
+    assert abs(ticks[2].deadline - ticks[0].deadline - ticks[2].index / 50) < 1e-9
+
+
+def test_timing_metrics_summary():
+    async def run() -> TimingMetrics:
+        scheduler = FixedRateScheduler(freq=100)
+        metrics = TimingMetrics(freq=100, overrun_policy="duplicate")
+        for _ in range(5):
+            tick = await scheduler.wait_next_tick()
+            metrics.add_tick(
+                tick,
+                capture_latency=0.002,
+                robot_read_latency=0.001,
+                tick_duration=0.003,
+            )
+        return metrics
+
+    summary = asyncio.run(run()).summary()
+
+    assert summary.ticks == 5
+    assert summary.dropped_ticks == 0
+    assert summary.capture_latency_ms.p50 == 2.0
+    assert summary.effective_freq is not None
+    assert abs(summary.effective_freq - 100) < 1e-6
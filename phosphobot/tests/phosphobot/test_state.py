@@ -0,0 +1,135 @@
+"""
+Tests for the robot state broadcaster.
+
+```
+uv run pytest tests/phosphobot/test_state.py
+```
+"""
+
+import time
+from typing import Any
+
+import numpy as np
+
+from phosphobot.configs import config
+from phosphobot.hardware import BaseManipulator, KochHardware, SO100Hardware, get_sim
+from phosphobot.hardware.state import RobotStateBroadcaster
+from phosphobot.robot import RobotConnectionManager
+from phosphobot.types import SimulationMode
+
+
+class FakeRobot:
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.joints_reads = 0
+        self.telemetry_reads = 0
+
+    def read_joints_position(self, **kwargs: Any) -> np.ndarray:
+        self.joints_reads += 1
+        return np.full(6, float(self.joints_reads))
+
+    def current_torque(self) -> np.ndarray:
+        self.telemetry_reads += 1
+        return np.zeros(6)
+
+    def current_voltage(self) -> np.ndarray:
+        return np.full(6, 12.0)
+
+    def current_temperature(self) -> None:
+        return None
+
+
+def test_broadcaster_samples_at_rate():
+    robot = FakeRobot()
+    broadcaster = RobotStateBroadcaster(
+        robot=robot,  # type: ignore
+        freq=100,
+        telemetry_freq=10,
+        history_size=8,
+    )
+    # A consumer of the joints and of the telemetry
+    broadcaster.latest_telemetry()
+    broadcaster.start()
+    time.sleep(0.3)
+    broadcaster.stop()
+
+    assert not broadcaster.is_running
+    # ~30 samples: leave room for slow machines
+    assert 10 <= robot.joints_reads <= 31
+    assert 1 <= robot.telemetry_reads <= 4
+
+    # The ring buffer keeps the latest samples, oldest first
+    history = broadcaster.history()
+    assert len(history) == 8
+    timestamps = [state.timestamp for state in history]
+    assert timestamps == sorted(timestamps)
+    assert history[-1].joints_position[0] == robot.joints_reads
+
+    telemetry = broadcaster.latest_telemetry()
+    assert telemetry is not None and telemetry.has_telemetry
+    assert telemetry.voltage is not None and telemetry.voltage[0] == 12.0
+
+
+def test_broadcaster_staleness_bound():
+    robot = FakeRobot()
+    broadcaster = RobotStateBroadcaster(robot=robot, freq=100)  # type: ignore
+
+    assert broadcaster.latest() is None
+    state = broadcaster.sample()
+    assert broadcaster.latest(max_staleness=1.0) is state
+    time.sleep(0.02)
+    assert broadcaster.latest(max_staleness=0.01) is None
+    # Without telemetry_freq, the telemetry is never sampled
+    assert broadcaster.latest_telemetry() is None
+
+
+def test_broadcaster_pauses_without_consumers():
+    robot = FakeRobot()
+    broadcaster = RobotStateBroadcaster(
+        robot=robot,  # type: ignore
+        freq=100,
+        telemetry_freq=10,
+        idle_timeout=0.1,
+    )
+    broadcaster.start()
+    time.sleep(0.2)
+    # Nobody asked for a sample: the bus is left alone
+    assert robot.joints_reads == 0
+
+    # A consumer of the joints wakes it up, without reading the telemetry
+    broadcaster.latest()
+    time.sleep(0.05)
+    assert robot.joints_reads > 0
+    assert robot.telemetry_reads == 0
+
+    # It pauses again once the consumer is gone
+    time.sleep(0.2)
+    joints_reads = robot.joints_reads
+    time.sleep(0.1)
+    assert robot.joints_reads == joints_reads
+    assert broadcaster.is_running
+
+    broadcaster.stop()
+    assert not broadcaster.is_running
+
+
+def test_broadcaster_only_started_for_thread_safe_buses(monkeypatch):
+    config.SIM_MODE = SimulationMode.headless
+    get_sim()
+    started = []
+    monkeypatch.setattr(
+        BaseManipulator,
+        "start_state_broadcaster",
+        lambda self, **kwargs: started.append(self.name),
+    )
+    manager = RobotConnectionManager()
+    # The Dynamixel bus of the Koch arm is not serialized
+    robots = [SO100Hardware(), KochHardware()]
+    for robot in robots:
+        robot.is_connected = True
+        manager._start_state_broadcaster(robot)
+    assert started == [SO100Hardware.name]
+    # Don't disconnect the robots when they are collected: they have no bus
+    for robot in robots:
+        robot.is_connected = False
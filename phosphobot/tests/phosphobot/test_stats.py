@@ -0,0 +1,71 @@
+"""
+Tests for the dataset statistics.
+
+```
+uv run pytest tests/phosphobot/test_stats.py
+```
+"""
+
+import numpy as np
+import pandas as pd
+
+from phosphobot.models.dataset_stats import compute_parquet_moments, merge_moments
+from phosphobot.models.lerobot_dataset import Stats
+
+
+def test_image_stats_from_histogram():
+    rng = np.random.default_rng(0)
+    images = [rng.integers(10, 200, (48, 64, 3), dtype=np.uint8) for _ in range(4)]
+
+    stats = Stats()
+    for image in images:
+        stats.update_image(image)
+    stats.compute_from_rolling_images()
+
+    pixels = np.stack(images).reshape(-1, 3) / 255.0
+    assert stats.count == pixels.shape[0]
+    assert stats.mean is not None and stats.mean.shape == (3, 1, 1)
+    assert np.allclose(stats.mean.reshape(3), pixels.mean(axis=0))
+    assert stats.std is not None
+    assert np.allclose(stats.std.reshape(3), pixels.std(axis=0))
+    assert stats.min is not None and stats.max is not None
+    assert np.allclose(stats.min.reshape(3), pixels.min(axis=0))
+    assert np.allclose(stats.max.reshape(3), pixels.max(axis=0))
+
+
+def test_parquet_moments_are_merged_per_column(tmp_path):
+    rng = np.random.default_rng(0)
+    episodes = [
+        pd.DataFrame(
+            {
+                "observation.state": list(rng.normal(size=(nb_steps, 6))),
+                "timestamp": np.arange(nb_steps) / 30,
+                "index": np.arange(nb_steps),
+            }
+        )
+        for nb_steps in [5, 8]
+    ]
+    # A step without values is ignored
+    episodes[1].at[3, "observation.state"] = np.full(6, np.nan)
+    for i, episode in enumerate(episodes):
+        episode.to_parquet(tmp_path / f"episode_{i:06d}.parquet")
+
+    moments = merge_moments(
+        [
+            compute_parquet_moments(str(tmp_path / f"episode_{i:06d}.parquet"))
+            for i in range(2)
+        ]
+    )
+
+    states = np.vstack(
+        [np.vstack(episode["observation.state"]) for episode in episodes]
+    )
+    states = states[~np.isnan(states).all(axis=1)]
+    assert moments["observation.state"].count == 12
+    assert np.allclose(moments["observation.state"].mean, states.mean(axis=0))
+    assert np.allclose(moments["observation.state"].std, states.std(axis=0))
+    assert np.allclose(moments["observation.state"].min, states.min(axis=0))
+    assert np.allclose(moments["observation.state"].max, states.max(axis=0))
+    assert moments["index"].count == 13
+    assert moments["index"].max.tolist() == [7]
+    assert moments["timestamp"].sum.shape == (1,)
@@ -0,0 +1,141 @@
+"""
+Tests for the latest-wins command slots of the teleoperation.
+
+```
+uv run pytest tests/phosphobot/test_teleoperation.py
+```
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from phosphobot.models import AppControlData
+from phosphobot.teleoperation import TeleopManager
+
+
+class SlowTeleopManager(TeleopManager):
+    """Record the commands run instead of moving robots. Each move blocks 20 ms."""
+
+    def __init__(self) -> None:
+        super().__init__(rcm=None)  # type: ignore
+        self.processed: List[AppControlData] = []
+
+    async def process_control_data(self, control_data: AppControlData) -> bool:
+        self.processed.append(control_data)
+        time.sleep(0.02)
+        return True
+
+
+def control_data(x: float, source: str = "right") -> AppControlData:
+    return AppControlData(
+        x=x,
+        y=0,
+        z=0,
+        rx=0,
+        ry=0,
+        rz=0,
+        open=1,
+        source=source,  # type: ignore
+    )
+
+
+def test_latest_command_wins():
+    async def run() -> SlowTeleopManager:
+        manager = SlowTeleopManager()
+        manager.submit_control_data(control_data(0))
+        # Let the actuator start running the first command
+        await asyncio.sleep(0)
+        for x in range(1, 10):
+            manager.submit_control_data(control_data(x))
+        manager.submit_control_data(control_data(100, source="left"))
+        await asyncio.sleep(0.1)
+        manager.stop_actuators()
+        return manager
+
+    manager = asyncio.run(run())
+
+    # The commands submitted while the first one ran are replaced by the last one
+    right = [data.x for data in manager.processed if data.source == "right"]
+    left = [data.x for data in manager.processed if data.source == "left"]
+    assert right == [0, 9]
+    assert left == [100]
+    assert manager.coalesced_counter == 8
+
+    # The counters are reported every second, then reset
+    manager.last_report = datetime.now() - timedelta(seconds=2)
+    updates = asyncio.run(manager.send_status_updates())
+    assert updates[-1].nb_actions_coalesced == 8
+    assert manager.coalesced_counter == 0
+
+
+class MovedRobot:
+    """A robot moved by something else than the teleoperation."""
+
+    def __init__(self) -> None:
+        self.stopped = asyncio.Event()
+
+    @property
+    def is_moving(self) -> bool:
+        return not self.stopped.is_set()
+
+    async def wait_until_stopped(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.stopped.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+def test_newest_command_runs_after_the_robot_stops():
+    async def run() -> SlowTeleopManager:
+        manager = SlowTeleopManager()
+        robot = MovedRobot()
+
+        async def get_robots(control_data: AppControlData) -> list:
+            return [robot]
+
+        manager._get_robots = get_robots  # type: ignore
+        for x in range(3):
+            manager.submit_control_data(control_data(x))
+            await asyncio.sleep(0.01)
+        # Nothing runs while the robot is moving
+        assert manager.processed == []
+
+        robot.stopped.set()
+        await asyncio.sleep(0.05)
+        manager.stop_actuators()
+        return manager
+
+    manager = asyncio.run(run())
+
+    # The commands received during the move are not dropped: the newest one is run
+    assert [data.x for data in manager.processed] == [2]
+    assert manager.coalesced_counter == 2
+    assert manager.dropped_counter == 0
+
+
+def test_stop_actuators_of_one_session():
+    async def run() -> SlowTeleopManager:
+        manager = SlowTeleopManager()
+        manager.submit_control_data(control_data(0), session="websocket")
+        manager.submit_control_data(control_data(1), session="udp")
+        await asyncio.sleep(0.05)
+        udp_task = manager._slots[("udp", "right")].task
+        assert udp_task is not None
+
+        # The WebSocket disconnects while the UDP session keeps sending commands
+        manager.stop_actuators("websocket")
+        await asyncio.sleep(0)
+        assert not udp_task.done()
+        assert list(manager._slots) == [("udp", "right")]
+        manager.submit_control_data(control_data(2), session="udp")
+        assert manager._slots[("udp", "right")].task is udp_task
+        await asyncio.sleep(0.05)
+        manager.stop_actuators()
+        return manager
+
+    manager = asyncio.run(run())
+
+    assert sorted(data.x for data in manager.processed) == [0, 1, 2]
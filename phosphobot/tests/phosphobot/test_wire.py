@@ -0,0 +1,83 @@
+"""
+Tests for the wire formats of the inference clients and servers.
+
+```
+uv run pytest tests/phosphobot/test_wire.py
+```
+"""
+
+import numpy as np
+
+from phosphobot.am.wire import (
+    decode_actions,
+    decode_multipart,
+    decode_observation,
+    encode_actions,
+    encode_multipart,
+    encode_observation,
+    negotiate_wire_format,
+)
+
+
+def test_observation_round_trip():
+    inputs = {
+        "observation.state": np.arange(6, dtype=np.float32),
+        "observation.images.0": np.random.randint(0, 255, (24, 32, 3), dtype=np.uint8),
+        "detect_instruction": "red ball",
+    }
+    for wire_format in ["msgpack", "json_numpy"]:
+        body, content_type = encode_observation(inputs, wire_format)  # type: ignore
+        decoded = decode_observation(body, content_type)
+
+        assert decoded["detect_instruction"] == "red ball"
+        for key in ["observation.state", "observation.images.0"]:
+            assert decoded[key].dtype == inputs[key].dtype
+            assert np.array_equal(decoded[key], inputs[key])
+
+    msgpack_body, _ = encode_observation(inputs, "msgpack")
+    json_body, _ = encode_observation(inputs, "json_numpy")
+    assert len(msgpack_body) < len(json_body)
+
+
+def test_observation_jpeg():
+    frame = np.full((24, 32, 3), 128, dtype=np.uint8)
+    body, content_type = encode_observation(
+        {"observation.images.0": frame}, "msgpack", jpeg_quality=90
+    )
+    decoded = decode_observation(body, content_type)["observation.images.0"]
+
+    assert decoded.shape == frame.shape
+    assert np.abs(decoded.astype(int) - frame).max() <= 2
+
+
+def test_actions_round_trip():
+    actions = np.random.rand(10, 1, 6)
+    for wire_format in ["msgpack", "json_numpy"]:
+        body, content_type = encode_actions(actions, wire_format)  # type: ignore
+        assert np.array_equal(decode_actions(body, content_type), actions)
+
+
+def test_negotiate_wire_format():
+    assert negotiate_wire_format(["json_numpy", "msgpack"]) == "msgpack"
+    assert negotiate_wire_format(["json_numpy"]) == "json_numpy"
+    assert negotiate_wire_format(None) == "json_numpy"
+
+
+def test_multipart_round_trip():
+    frame = np.random.randint(0, 255, (24, 32, 3), dtype=np.uint8)
+    inputs = {
+        "video.main": frame,
+        "state.arm": np.arange(6, dtype=np.float32)[::2],
+        "gripper": np.float32(0.5),
+        "annotation.human.action.task_description": "pick up the cube",
+    }
+    frames = encode_multipart(inputs)
+
+    # One frame per array after the header, the contiguous arrays are not copied
+    assert len(frames) == 3
+    assert np.shares_memory(frames[1], frame)
+    decoded = decode_multipart(frames)
+    np.testing.assert_array_equal(decoded["video.main"], frame)
+    np.testing.assert_array_equal(decoded["state.arm"], [0, 2, 4])
+    assert decoded["gripper"] == np.float32(0.5)
+    assert decoded["annotation.human.action.task_description"] == "pick up the cube"
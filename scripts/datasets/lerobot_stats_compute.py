@@ -1,391 +1,340 @@
+import argparse
+import hashlib
 import json
 import os
-from copy import deepcopy
-from math import ceil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import einops
+import av
+import cv2
 import numpy as np
-import pandas as pd
-import torch
-import torchvision
+import pyarrow as pa
+import pyarrow.parquet as pq
 import tqdm
 from loguru import logger
-from torch.utils.data import Dataset
-import argparse
 
+# Bump when the content of the cache changes
+CACHE_VERSION = 1
 
-class ParquetEpisodesDataset(Dataset):
-    """Custom Dataset for loading parquet files from a directory."""
 
-    def __init__(self, dataset_dir: str):
-        """
-        dataset dir is the path to the folder containing data, videos, meta subfolder
-        """
-        self.dataset_dir = Path(dataset_dir)
-        self.data_dir = self.dataset_dir / "data"
-        self.videos_dir = self.dataset_dir / "videos"
+class EpisodeFiles:
+    """The parquet and the videos of an episode."""
 
-        if not self.data_dir.exists():
-            raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
-        if not self.videos_dir.exists():
-            raise FileNotFoundError(f"Videos directory not found: {self.videos_dir}")
+    def __init__(self, episode_idx: int, parquet_path: Path, video_paths: dict):
+        self.episode_idx = episode_idx
+        self.parquet_path = parquet_path
+        # Camera key (name of the videos subfolder) -> path of the video
+        self.video_paths: dict[str, Path] = video_paths
 
-        self.file_paths = sorted(self.data_dir.rglob("*.parquet"))
-        self.video_paths = sorted(self.videos_dir.rglob("*.mp4"))
+    def files_identity(self) -> dict[str, list[int]]:
+        """Size and modification time of the files, to know if the cached stats are valid."""
+        identity = {}
+        for path in [self.parquet_path, *self.video_paths.values()]:
+            stat = os.stat(path)
+            identity[str(path)] = [stat.st_size, stat.st_mtime_ns]
+        return identity
 
-        self.parquet_cache: dict[str, pd.DataFrame] = {}
 
-        if not self.file_paths:
-            raise ValueError(f"No parquet files found in {dataset_dir}")
+def find_episodes(dataset_dir: str) -> list[EpisodeFiles]:
+    """
+    dataset dir is the path to the folder containing data, videos, meta subfolder
+    """
+    dataset_path = Path(dataset_dir)
+    data_dir = dataset_path / "data"
+    videos_dir = dataset_path / "videos"
 
-        if not self.video_paths:
-            raise ValueError(f"No video files found in {dataset_dir}")
+    if not data_dir.exists():
+        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+    if not videos_dir.exists():
+        raise FileNotFoundError(f"Videos directory not found: {videos_dir}")
 
-        if len(self.video_paths) % len(self.file_paths) != 0:
-            raise ValueError(
-                f"Number of parquet files ({len(self.file_paths)}) does not match "
-                f"number of video files ({len(self.video_paths)})"
-            )
+    file_paths = sorted(data_dir.rglob("*.parquet"))
+    video_paths = sorted(videos_dir.rglob("*.mp4"))
 
-        # Reindex the data to have a global index over all the steps of all the episodes
-        self.episode_nb_steps = []
-        # Map global idx -> (file_idx, row_idx)
-        self.index_mapping: dict[int, dict] = {}
-        # Store the number of steps in each episode
-        self.steps_per_episode: dict[int, int] = {}
-        global_idx = 0
-        for file_path in self.file_paths:
-            # The filepath is expected to be in the format "chunk-000/episode_000000.parquet"
-            episode_idx = int(file_path.stem.split("_")[-1])
-            df = self.read_parquet(str(file_path))
-            nb_steps = len(df)
-            self.episode_nb_steps.append(nb_steps)
-
-            # Needed for episodes.jsonl
-            self.steps_per_episode[episode_idx] = nb_steps
-
-            # Find all the related video files and store them in the index_mapping
-            related_video_files = [
-                video_path
-                for video_path in self.video_paths
-                if f"episode_{episode_idx:06d}" in video_path.name
-            ]
-            # TODO: Use REGEX to split the path instead of chunk-000
-            related_video_files_dict = {
-                video_path.parent.name: video_path for video_path in related_video_files
-            }
-
-            for i in range(nb_steps):
-                self.index_mapping[i + global_idx] = {
-                    "file_path": file_path,
-                    "episode_idx": episode_idx,
-                    "row_idx": i,
-                    "videos_paths": related_video_files_dict,
-                }
-            global_idx += nb_steps
+    if not file_paths:
+        raise ValueError(f"No parquet files found in {dataset_dir}")
 
-        self.total_length = sum(self.episode_nb_steps)
+    if not video_paths:
+        raise ValueError(f"No video files found in {dataset_dir}")
 
-        # video keys are the unique names of the folders in the videos directory
-        videos_folders = self.videos_dir / "chunk-000"
-        if not videos_folders.exists():
-            raise FileNotFoundError(
-                f"Videos folders not found: {videos_folders}. "
-                "Please check the videos directory structure."
-            )
-        self.video_keys = os.listdir(videos_folders)
-
-    def __len__(self):
-        return self.total_length
-
-    def read_parquet(self, file_path: str):
-        # Cache the parquet files to avoid reading them multiple times
-        if file_path not in self.parquet_cache:
-            self.parquet_cache[file_path] = pd.read_parquet(file_path)
-        return self.parquet_cache[file_path]
-
-    def __getitem__(self, idx: int):
-        if idx >= self.total_length:
-            raise IndexError("Index out of bounds")
-
-        file_path: str = self.index_mapping[idx]["file_path"]
-        row_idx: int = self.index_mapping[idx]["row_idx"]
-
-        # Read the specific row
-        df = self.read_parquet(file_path)
-        row_data = df.iloc[row_idx]
-
-        # Get the related video files
-        videos_paths = self.index_mapping[idx]["videos_paths"]
-        video_key_to_path = {}
-        for key, video_path in videos_paths.items():
-            # Load the video and store it in the row_data
-            video_key_to_path[key] = decode_video_frames_torchvision(
-                video_path, timestamp=[row_data["timestamp"]]
-            ).squeeze(0)
-
-        # Convert each column to a Tensor
-        # If it's a list/np.ndarray, turn it into a float32 tensor of that shape
-        # If it's a scalar, make it a 0D or 1D float32 tensor.
-        sample = {}
-        for col_name, value in row_data.items():
-            if isinstance(value, (list, np.ndarray)):
-                sample[col_name] = torch.tensor(value, dtype=torch.float32)
-            elif isinstance(value, torch.Tensor):
-                sample[col_name] = value
-            elif isinstance(value, str):
-                # Convert the string to a list of float using eval
-                sample[col_name] = torch.tensor([float(x) for x in eval(value)])
-            else:
-                sample[col_name] = torch.tensor([value], dtype=torch.float32)
-
-        for key in video_key_to_path.keys():
-            sample[key] = video_key_to_path[key]
-
-        return sample
-
-    def write_episodes(self, output_dir: str):
-        # We want to write the episodes format
-        # {"episode_index": 0, "length": 57}
-        # {"episode_index": 1, "length": 88}
-        # ...
-
-        # For now, we resolve ot a temporary fix: use the first task from the meta/tasks.json file
-        # But we would like to be able to handle multiple tasks
-        # See the training/phospho_lerobot/scripts/multidataset.py save_episodes_jsonl() method
-        task = None
-        with open(os.path.join(self.dataset_dir, "meta", "tasks.jsonl"), "r") as file:
-            for line in file:
-                if line.strip():  # Skip empty lines
-                    row = json.loads(line)
-                    task = row["task"]
-        if task is None:
-            raise ValueError("No task found in the meta/tasks.json file")
-
-        for episode_idx, nb_steps in self.steps_per_episode.items():
-            episode = {
-                "episode_index": episode_idx,
-                "tasks": task,
-                "length": nb_steps,
-            }
-            with open(output_dir, "a") as f:
-                f.write(json.dumps(episode) + "\n")
+    if len(video_paths) % len(file_paths) != 0:
+        raise ValueError(
+            f"Number of parquet files ({len(file_paths)}) does not match "
+            f"number of video files ({len(video_paths)})"
+        )
 
+    # The videos are in "chunk-000/<camera key>/episode_000000.mp4"
+    videos_by_episode: dict[str, dict[str, Path]] = {}
+    for video_path in video_paths:
+        videos_by_episode.setdefault(video_path.stem, {})[video_path.parent.name] = (
+            video_path
+        )
 
-def get_stats_einops_patterns(
-    dataset: ParquetEpisodesDataset,
-    dataloader: torch.utils.data.DataLoader,
-):
-    """These einops patterns will be used to aggregate batches and compute statistics.
+    # The filepath is expected to be in the format "chunk-000/episode_000000.parquet"
+    return [
+        EpisodeFiles(
+            episode_idx=int(file_path.stem.split("_")[-1]),
+            parquet_path=file_path,
+            video_paths=videos_by_episode.get(file_path.stem, {}),
+        )
+        for file_path in file_paths
+    ]
 
-    dataset_path is the path to the folder containing data, videos, meta subfolder
 
-    Note: We assume images are in channel-first format.
+def column_values(column: pa.ChunkedArray) -> np.ndarray | None:
     """
+    The values of a numeric column as a contiguous 2D array of shape (rows, dimension).
+    Returns None for the other columns.
+    """
+    array = column.combine_chunks()
+    if pa.types.is_list(array.type) or pa.types.is_fixed_size_list(array.type):
+        value_type = array.type.value_type
+        if not (pa.types.is_integer(value_type) or pa.types.is_floating(value_type)):
+            return None
+        if len(array) == 0:
+            return None
+        values = array.flatten().to_numpy(zero_copy_only=False)
+        if values.size % len(array) != 0:
+            return None
+        return values.reshape(len(array), -1)
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+        return array.to_numpy(zero_copy_only=False).reshape(-1, 1)
+    return None
+
+
+def moments_from_values(values: np.ndarray) -> dict:
+    float_values = values.astype(np.float64)
+    return {
+        "count": len(values),
+        "sum": float_values.sum(axis=0),
+        "square_sum": np.square(float_values).sum(axis=0),
+        "min": float_values.min(axis=0),
+        "max": float_values.max(axis=0),
+    }
+
+
+def parquet_moments(parquet_path: Path) -> dict[str, dict]:
+    """Count, sum, square sum, min and max of each numeric column of a parquet."""
+    table = pq.read_table(parquet_path)
+    moments = {}
+    for column_name in table.column_names:
+        values = column_values(table.column(column_name))
+        if values is not None and len(values) > 0:
+            moments[column_name] = moments_from_values(values)
+    return moments
+
+
+def video_moments(video_path: Path, frame_stride: int, scale: float) -> dict:
+    """
+    Count, sum, square sum, min and max of the RGB channels of a video, normalized to [0, 1].
 
-    # Grab one batch to inspect
-    batch = next(iter(dataloader))
-    # batch is now a dictionary like:
-    # {
-    #   'action': tensor(...),
-    #   'observation.state': tensor(...),
-    #   'timestamp': tensor(...),
-    #    ...
-    # }
-
-    stats_patterns = {}
-
-    # Load metadata
-    features_dict = batch.keys()
-
-    logger.info(f"Featured dict: {features_dict}")
-    logger.info(f"Dataset video keys: {dataset.video_keys}")
-    for key in features_dict:
-        # Check if the batch actually has this key
-        if key not in batch:
-            logger.warning(f"Key '{key}' not found in batch. Skipping.")
-            continue
-
-        data = batch[key]
-        logger.info(f"Processing key '{key}' with shape {data.shape}")
-
-        # Sanity check that we don't have float64
-        if data.dtype == torch.float64:
-            raise TypeError(f"{key} has dtype float64, which is not expected.")
-
-        # TODO: Implement proper images handling
-        # If it's a camera key, do image checks
-        if key in dataset.video_keys:
-            # We expect a 4D tensor of shape [B, C, H, W]
-            if data.ndim != 4:
-                raise ValueError(
-                    f"Camera data '{key}' is expected to have 4 dimensions, "
-                    f"but got shape: {tuple(data.shape)}"
-                )
-
-            b, c, h, w = data.shape
-            # Check channel-first assumption (C < H and C < W for typical image shapes)
-            if not (c < h and c < w):
-                raise ValueError(
-                    f"Expect channel-first images for '{key}', but got shape {data.shape}"
-                )
-
-            # Check dtype and range
-            if data.dtype != torch.float32:
-                raise TypeError(
-                    f"Camera data '{key}' must be float32, got {data.dtype}"
-                )
-            if data.max() > 1.0:
-                raise ValueError(
-                    f"Camera data '{key}' has values above 1.0 (max={data.max():.4f})"
+    They are computed from the histogram of the values of the frames, which is much
+    cheaper than converting the frames to float. Only one frame every frame_stride
+    is counted, downscaled by scale, and the histogram is weighted to represent all the
+    pixels of the video. Downscaling averages neighboring pixels, so it lowers the std.
+    """
+    histogram = np.zeros((3, 256), dtype=np.int64)
+    nb_pixels = 0
+    nb_sampled_pixels = 0
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        # Decode on several threads
+        stream.thread_type = "AUTO"
+        for frame_index, frame in enumerate(container.decode(stream)):
+            nb_pixels += frame.width * frame.height
+            if frame_index % frame_stride != 0:
+                continue
+            if scale != 1.0:
+                image = frame.to_ndarray(
+                    format="rgb24",
+                    width=max(1, round(frame.width * scale)),
+                    height=max(1, round(frame.height * scale)),
                 )
-            if data.min() < 0.0:
-                raise ValueError(
-                    f"Camera data '{key}' has values below 0.0 (min={data.min():.4f})"
+            else:
+                image = frame.to_ndarray(format="rgb24")
+            for channel in range(3):
+                histogram[channel] += (
+                    cv2.calcHist([image], [channel], None, [256], [0, 256])
+                    .reshape(256)
+                    .astype(np.int64)
                 )
+            nb_sampled_pixels += image.shape[0] * image.shape[1]
+
+    weighted_histogram = histogram.astype(np.float64)
+    if nb_sampled_pixels > 0:
+        weighted_histogram *= nb_pixels / nb_sampled_pixels
+
+    values = np.arange(256, dtype=np.float64) / 255.0
+    non_empty_bins = histogram > 0
+    return {
+        "count": nb_pixels,
+        "sum": weighted_histogram @ values,
+        "square_sum": weighted_histogram @ values**2,
+        "min": values[np.argmax(non_empty_bins, axis=1)],
+        "max": values[255 - np.argmax(non_empty_bins[:, ::-1], axis=1)],
+    }
+
+
+def episode_moments(episode: EpisodeFiles, frame_stride: int, scale: float) -> dict:
+    """Moments of the features of an episode. Runs in a worker process."""
+    moments = parquet_moments(episode.parquet_path)
+    for camera_key, video_path in episode.video_paths.items():
+        moments[camera_key] = video_moments(video_path, frame_stride, scale)
+    return moments
+
+
+def merge_moments(moments: dict, other: dict) -> dict:
+    return {
+        "count": moments["count"] + other["count"],
+        "sum": moments["sum"] + other["sum"],
+        "square_sum": moments["square_sum"] + other["square_sum"],
+        "min": np.minimum(moments["min"], other["min"]),
+        "max": np.maximum(moments["max"], other["max"]),
+    }
+
+
+def default_cache_path(dataset_path: str) -> Path:
+    dataset_hash = hashlib.sha1(os.path.abspath(dataset_path).encode()).hexdigest()
+    return (
+        Path.home() / ".cache" / "lerobot_stats_compute" / f"{dataset_hash[:16]}.json"
+    )
 
-            # Set einops pattern for images
-            stats_patterns[key] = "b c h w -> c 1 1"
 
-        # stats_patterns["observation.images"] = "b c h w -> c 1 1"
+def load_cache(cache_path: Path, settings: dict) -> dict:
+    """The cached moments of each episode, if computed with the same settings."""
+    if not cache_path.exists():
+        return {}
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except json.JSONDecodeError:
+        logger.warning(f"Ignoring invalid cache {cache_path}")
+        return {}
+    if cache.get("version") != CACHE_VERSION or cache.get("settings") != settings:
+        return {}
+    return {
+        parquet_path: {
+            "files": entry["files"],
+            "moments": {
+                key: {
+                    name: value if name == "count" else np.array(value)
+                    for name, value in feature_moments.items()
+                }
+                for key, feature_moments in entry["moments"].items()
+            },
+        }
+        for parquet_path, entry in cache["episodes"].items()
+    }
+
+
+def save_cache(cache_path: Path, settings: dict, episodes: dict) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache = {
+        "version": CACHE_VERSION,
+        "settings": settings,
+        "episodes": {
+            parquet_path: {
+                "files": entry["files"],
+                "moments": tensor_to_list(entry["moments"]),
+            }
+            for parquet_path, entry in episodes.items()
+        },
+    }
+    # Write to a temporary file first, so that an interrupted run keeps the old cache
+    temporary_path = cache_path.with_suffix(".tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(temporary_path, cache_path)
+
+
+def compute_stats(
+    dataset_path,
+    num_workers=None,
+    frame_stride=1,
+    scale=1.0,
+    cache_path: Path | None = None,
+):
+    """
+    Compute mean/std and min/max statistics of all data keys in a LeRobotDataset.
 
-        # Non-camera data. Decide pattern based on dimensionality
-        elif data.ndim == 2:
-            # e.g. shape [batch_size, some_dim]
-            stats_patterns[key] = "b c -> c"
-        elif data.ndim == 1:
-            # e.g. shape [batch_size]
-            stats_patterns[key] = "b -> 1"
+    The moments of each episode are computed in a process pool and merged. With a
+    cache_path, the episodes whose files did not change since the last run are not read.
+    frame_stride and scale make the image stats approximate but faster.
+    """
+    episodes = find_episodes(dataset_path)
+    settings = {"frame_stride": frame_stride, "scale": scale}
+    cache = load_cache(cache_path, settings) if cache_path is not None else {}
+
+    moments_by_episode: dict[str, dict] = {}
+    to_compute = []
+    for episode in episodes:
+        files = episode.files_identity()
+        cached = cache.get(str(episode.parquet_path))
+        if cached is not None and cached["files"] == files:
+            moments_by_episode[str(episode.parquet_path)] = cached
         else:
-            logger.error(f"Unexpected shape for '{key}': {data.shape}")
-            raise ValueError(f"{key} has an unexpected shape {data.shape}")
-
-    return stats_patterns
-
-
-def compute_stats(dataset_path, batch_size=128, num_workers=2, max_num_samples=None):
-    """Compute mean/std and min/max statistics of all data keys in a LeRobotDataset."""
-    dataset = ParquetEpisodesDataset(dataset_path)
-
-    if max_num_samples is None:
-        max_num_samples = len(dataset)
-
-    # for more info on why we need to set the same number of workers, see `load_from_videos`
-    dataset = ParquetEpisodesDataset(dataset_path)
-
-    # Example DataLoader that returns dictionaries of tensors
-    generator = torch.Generator()
-    generator.manual_seed(1337)
-    dataloader = torch.utils.data.DataLoader(
-        dataset,
-        num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
+            to_compute.append((episode, files))
+    logger.info(
+        f"Computing the stats of {len(to_compute)} episodes, {len(moments_by_episode)} cached"
     )
-    stats_patterns = get_stats_einops_patterns(dataset, dataloader)
-
-    # mean and std will be computed incrementally while max and min will track the running value.
-    mean, std, max, min = {}, {}, {}, {}
-    for key in stats_patterns:
-        mean[key] = torch.tensor(0.0).float()
-        std[key] = torch.tensor(0.0).float()
-        max[key] = torch.tensor(-float("inf")).float()
-        min[key] = torch.tensor(float("inf")).float()
-
-    # Note: Due to be refactored soon. The point of storing `first_batch` is to make sure we don't get
-    # surprises when rerunning the sampler.
-    first_batch = None
-    running_item_count = 0  # for online mean computation
-
-    logger.info("Starting to create seeded dataloader")
-
-    for i, batch in tqdm.tqdm(
-        enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
-        desc="Compute mean, min, max",
-    ):
-        this_batch_size = len(batch["index"])
-        running_item_count += this_batch_size
-        if first_batch is None:
-            first_batch = deepcopy(batch)
-        for key, pattern in stats_patterns.items():
-            batch[key] = batch[key].float()
-            # Numerically stable update step for mean computation.
-            batch_mean = einops.reduce(batch[key], pattern, "mean")
-            # Hint: to update the mean we need x̄ₙ = (Nₙ₋₁x̄ₙ₋₁ + Bₙxₙ) / Nₙ, where the subscript represents
-            # the update step, N is the running item count, B is this batch size, x̄ is the running mean,
-            # and x is the current batch mean. Some rearrangement is then required to avoid risking
-            # numerical overflow. Another hint: Nₙ₋₁ = Nₙ - Bₙ. Rearrangement yields
-            # x̄ₙ = x̄ₙ₋₁ + Bₙ * (xₙ - x̄ₙ₋₁) / Nₙ
-            mean[key] = (
-                mean[key]
-                + this_batch_size * (batch_mean - mean[key]) / running_item_count
-            )
-            max[key] = torch.maximum(
-                max[key], einops.reduce(batch[key], pattern, "max")
-            )
-            min[key] = torch.minimum(
-                min[key], einops.reduce(batch[key], pattern, "min")
-            )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
-            break
+    if to_compute:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(episode_moments, episode, frame_stride, scale): (
+                    episode,
+                    files,
+                )
+                for episode, files in to_compute
+            }
+            for future in tqdm.tqdm(
+                as_completed(futures), total=len(futures), desc="Compute stats"
+            ):
+                episode, files = futures[future]
+                moments_by_episode[str(episode.parquet_path)] = {
+                    "files": files,
+                    "moments": future.result(),
+                }
 
-    dataloader = torch.utils.data.DataLoader(
-        dataset,
-        num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
-    )
-    first_batch_ = None
-    running_item_count = 0  # for online std computation
-    for i, batch in tqdm.tqdm(
-        enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
-        desc="Compute std",
-    ):
-        this_batch_size = len(batch["index"])
-        running_item_count += this_batch_size
-        # Sanity check to make sure the batches are still in the same order as before.
-        if first_batch_ is None:
-            first_batch_ = deepcopy(batch)
-            for key in stats_patterns:
-                assert torch.equal(first_batch_[key], first_batch[key])
-        for key, pattern in stats_patterns.items():
-            batch[key] = batch[key].float()
-            # Numerically stable update step for mean computation (where the mean is over squared
-            # residuals).See notes in the mean computation loop above.
-            batch_std = einops.reduce((batch[key] - mean[key]) ** 2, pattern, "mean")
-            std[key] = (
-                std[key] + this_batch_size * (batch_std - std[key]) / running_item_count
+    if cache_path is not None:
+        save_cache(cache_path, settings, moments_by_episode)
+
+    # Merge the moments of the episodes, in the order of the episodes
+    merged: dict[str, dict] = {}
+    for episode in episodes:
+        for key, moments in moments_by_episode[str(episode.parquet_path)][
+            "moments"
+        ].items():
+            merged[key] = (
+                merge_moments(merged[key], moments) if key in merged else moments
             )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
-            break
-
-    for key in stats_patterns:
-        std[key] = torch.sqrt(std[key])
-
+    video_keys = {key for episode in episodes for key in episode.video_paths}
     stats = {}
-    for key in stats_patterns:
+    for key, moments in merged.items():
+        mean = moments["sum"] / moments["count"]
+        variance = moments["square_sum"] / moments["count"] - mean**2
         stats[key] = {
-            "mean": mean[key],
-            "std": std[key],
-            "max": max[key],
-            "min": min[key],
+            "mean": mean,
+            # Rounding errors can make the variance slightly negative
+            "std": np.sqrt(np.maximum(variance, 0)),
+            "max": moments["max"],
+            "min": moments["min"],
         }
+        if key in video_keys:
+            # Images stats have the shape (c, 1, 1)
+            stats[key] = {
+                name: value.reshape(-1, 1, 1) for name, value in stats[key].items()
+            }
     return stats
 
 
 def tensor_to_list(obj):
     """
-    Convert all  torch.Tensor from an object
+    Convert all np.ndarray from an object
     (dict, list to list.
     """
-    if isinstance(obj, torch.Tensor):
+    if isinstance(obj, np.ndarray):
         return obj.tolist()
     elif isinstance(obj, dict):
         return {k: tensor_to_list(v) for k, v in obj.items()}
@@ -395,103 +344,34 @@ def tensor_to_list(obj):
         return obj
 
 
-def decode_video_frames_torchvision(
-    video_path: Path | str,
-    timestamp: list[float],
-    tolerance_s: float = 1,
-    backend: str = "pyav",
-    log_loaded_timestamps: bool = False,
-) -> torch.Tensor:
-    """Loads frames associated to the requested timestamps of a video
-
-    The backend can be either "pyav" (default) or "video_reader".
-    "video_reader" requires installing torchvision from source, see:
-    https://github.com/pytorch/vision/blob/main/torchvision/csrc/io/decoder/gpu/README.rst
-    (note that you need to compile against ffmpeg<4.3)
-
-    While both use cpu, "video_reader" is supposedly faster than "pyav" but requires additional setup.
-    For more info on video decoding, see `benchmark/video/README.md`
-
-    See torchvision doc for more info on these two backends:
-    https://pytorch.org/vision/0.18/index.html?highlight=backend#torchvision.set_video_backend
-
-    Note: Video benefits from inter-frame compression. Instead of storing every frame individually,
-    the encoder stores a reference frame (or a key frame) and subsequent frames as differences relative to
-    that key frame. As a consequence, to access a requested frame, we need to load the preceding key frame,
-    and all subsequent frames until reaching the requested frame. The number of key frames in a video
-    can be adjusted during encoding to take into account decoding time and video size in bytes.
-    """
-    video_path = str(video_path)
-
-    # set backend
-    keyframes_only = False
-    torchvision.set_video_backend(backend)
-    if backend == "pyav":
-        keyframes_only = True  # pyav doesnt support accuracte seek
-
-    # set a video stream reader
-    # TODO(rcadene): also load audio stream at the same time
-    reader = torchvision.io.VideoReader(video_path, "video")
-
-    # set the first and last requested timestamps
-    # Note: previous timestamps are usually loaded, since we need to access the previous key frame
-    first_ts = timestamp[0]
-    last_ts = timestamp[-1]
-
-    # access closest key frame of the first requested frame
-    # Note: closest key frame timestamp is usally smaller than `first_ts` (e.g. key frame can be the first frame of the video)
-    # for details on what `seek` is doing see: https://pyav.basswood-io.com/docs/stable/api/container.html?highlight=inputcontainer#av.container.InputContainer.seek
-    reader.seek(first_ts, keyframes_only=keyframes_only)
-
-    # load all frames until last requested frame
-    loaded_frames = []
-    loaded_ts = []
-    for frame in reader:
-        current_ts = frame["pts"]
-        if log_loaded_timestamps:
-            logger.info(f"frame loaded at timestamp={current_ts:.4f}")
-        loaded_frames.append(frame["data"])
-        loaded_ts.append(current_ts)
-        if current_ts >= last_ts:
-            break
-
-    if backend == "pyav":
-        reader.container.close()
-
-    reader = None
-
-    query_ts = torch.tensor(timestamp, dtype=torch.float64)
-    loaded_ts = torch.tensor(loaded_ts, dtype=torch.float64)  # type: ignore
-
-    # compute distances between each query timestamp and timestamps of all loaded frames
-    dist = torch.cdist(query_ts[:, None], loaded_ts[:, None], p=1)  # type: ignore
-    min_, argmin_ = dist.min(1)
-
-    is_within_tol = min_ < tolerance_s
-    if not is_within_tol.all():
-        logger.warning(
-            f"One or several query timestamps unexpectedly violate the tolerance ({min_[~is_within_tol]} > {tolerance_s=})."
-            " It means that the closest frame that can be loaded from the video is too far away in time."
-            " This might be due to synchronization issues with timestamps during data collection."
-            " To be safe, we advise to ignore this item during training."
-            f"\nqueried timestamps: {query_ts}"
-            f"\nloaded timestamps: {loaded_ts}"
-            f"\nvideo: {video_path}"
-            f"\nbackend: {backend}"
-        )
-
-    # get closest frames to the query timestamps
-    closest_frames = torch.stack([loaded_frames[idx] for idx in argmin_])
-    closest_ts = loaded_ts[argmin_]
-
-    if log_loaded_timestamps:
-        logger.info(f"{closest_ts=}")
-
-    # convert to the pytorch format which is float32 in [0,1] range (and channel first)
-    closest_frames = closest_frames.type(torch.float32) / 255
-
-    assert len(timestamp) == len(closest_frames)
-    return closest_frames
+def write_episodes(
+    dataset_dir: str, steps_per_episode: dict[int, int], output_dir: str
+) -> None:
+    # We want to write the episodes format
+    # {"episode_index": 0, "length": 57}
+    # {"episode_index": 1, "length": 88}
+    # ...
+
+    # For now, we resolve ot a temporary fix: use the first task from the meta/tasks.json file
+    # But we would like to be able to handle multiple tasks
+    # See the training/phospho_lerobot/scripts/multidataset.py save_episodes_jsonl() method
+    task = None
+    with open(os.path.join(dataset_dir, "meta", "tasks.jsonl"), "r") as file:
+        for line in file:
+            if line.strip():  # Skip empty lines
+                row = json.loads(line)
+                task = row["task"]
+    if task is None:
+        raise ValueError("No task found in the meta/tasks.json file")
+
+    for episode_idx, nb_steps in steps_per_episode.items():
+        episode = {
+            "episode_index": episode_idx,
+            "tasks": task,
+            "length": nb_steps,
+        }
+        with open(output_dir, "a") as f:
+            f.write(json.dumps(episode) + "\n")
 
 
 if __name__ == "__main__":
@@ -502,11 +382,42 @@ if __name__ == "__main__":
         required=True,
         help="Path to the dataset directory containing data, videos, and meta subfolders.",
     )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=None,
+        help="Number of processes computing the stats of the episodes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--frame-stride",
+        type=int,
+        default=1,
+        help="Only use one frame every frame-stride for the image stats. Approximate, but faster.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Downscale the frames by this factor for the image stats. Approximate, but faster.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute the stats of all the episodes, and don't cache them.",
+    )
     args = parser.parse_args()
 
     DATASET_PATH = args.dataset_path
 
-    stats = tensor_to_list(compute_stats(DATASET_PATH))
+    stats = tensor_to_list(
+        compute_stats(
+            DATASET_PATH,
+            num_workers=args.num_workers,
+            frame_stride=args.frame_stride,
+            scale=args.scale,
+            cache_path=None if args.no_cache else default_cache_path(DATASET_PATH),
+        )
+    )
 
     META_PATH = os.path.join(DATASET_PATH, "meta")
 
@@ -518,12 +429,17 @@ if __name__ == "__main__":
     logger.success(f"Stats computed and saved to {STATS_FILE}")
 
     # Edit the info.json file
-    dataset = ParquetEpisodesDataset(DATASET_PATH)
+    episodes = find_episodes(DATASET_PATH)
+    # The number of rows is in the metadata of the parquets
+    steps_per_episode = {
+        episode.episode_idx: pq.ParquetFile(episode.parquet_path).metadata.num_rows
+        for episode in episodes
+    }
 
     # Find the data that has changed
-    total_episodes = len(dataset.parquet_cache)
-    total_frames = dataset.total_length
-    total_videos = len(dataset.video_paths)
+    total_episodes = len(episodes)
+    total_frames = sum(steps_per_episode.values())
+    total_videos = sum(len(episode.video_paths) for episode in episodes)
     splits = {"train": f"0:{total_episodes}"}
 
     INFO_FILE = os.path.join(META_PATH, "info.json")
@@ -544,7 +460,7 @@ if __name__ == "__main__":
     # delete the episodes file if it exists
     if os.path.exists(EPISODES_FILE):
         os.remove(EPISODES_FILE)
-    dataset.write_episodes(EPISODES_FILE)
+    write_episodes(DATASET_PATH, steps_per_episode, EPISODES_FILE)
 
     logger.success(f"Episodes written to {EPISODES_FILE}")
     logger.success("Stats computation complete")
@@ -22,6 +22,9 @@ class Config:
     hf_model_id: str | None = None
     """the Hugging Face id of the model (if None, will load the model from the output directory)"""
 
+    allow_pickle: bool = False
+    """accept pickled requests from legacy clients (unsafe: they can run arbitrary code on the server)"""
+
 
 def main(config: Config):
     if config.hf_model_id is not None:
@@ -65,7 +68,9 @@ def main(config: Config):
     )
 
     # Start the server
-    server = RobotInferenceServer(model=policy, port=args.port)
+    server = RobotInferenceServer(
+        model=policy, port=args.port, allow_pickle=config.allow_pickle
+    )
 
     logger.info(
         f"Server starting on port {args.port}... (make sure the port is open and not already in use)"